@@ -3,7 +3,7 @@ from os.path import dirname
 
 from irene.brain.brain_plugin import BrainPlugin
 from irene.compatibility.compatibility_plugin import OriginalCompatibilityPlugin
-from irene.plugin_loader.core_plugins import ConfigPlugin, PluginDiscoveryPlugin
+from irene.plugin_loader.core_plugins import ConfigPlugin, PluginDiscoveryPlugin, ExecutorsPlugin
 from irene.plugin_loader.core_plugins.logging import LoggingPlugin
 from irene.plugin_loader.file_patterns import register_variable, substitute_pattern
 from irene.plugin_loader.launcher import launch_application
@@ -17,6 +17,7 @@ launch_application(
         ConfigPlugin(template_paths=('{irene_path}/config_templates',)),
         PluginDiscoveryPlugin(),
         LoggingPlugin(),
+        ExecutorsPlugin(),
         BrainPlugin(),
         OriginalCompatibilityPlugin(),
     ],
@@ -3,7 +3,10 @@
 """
 
 from abc import ABCMeta, abstractmethod, ABC
-from typing import Optional, Union, Callable, Generator, TypeVar, Any, Type, Collection, Tuple, ContextManager, Protocol
+from concurrent.futures import Future
+from functools import partial
+from typing import Optional, Union, Callable, Generator, TypeVar, Any, Type, Collection, Tuple, ContextManager, Protocol, \
+    Hashable, Sequence
 
 from irene.utils.metadata import Metadata, MetadataMapping, MetaMatcher
 
@@ -20,6 +23,7 @@ __all__ = [
     'OutputChannelPool',
     'OutputChannel',
     'OutputChannelNotFoundError',
+    'LOCAL_AUDIO_DEVICE',
     'TextOutputChannel',
     'AudioOutputChannel',
     'InboundMessage',
@@ -29,12 +33,30 @@ __all__ = [
 from irene.utils.predicate import Predicate
 
 
+LOCAL_AUDIO_DEVICE: Hashable = 'local-audio'
+"""
+Устройство вывода (см. ``OutputChannel.output_device``), соответствующее динамикам компьютера, на котором запущен
+ассистент.
+"""
+
+
 class OutputChannel(Metadata, metaclass=ABCMeta):
     """
     Канал, по которому ассистент может направлять ответные сообщения в том или ином виде.
     """
     __slots__ = ()
 
+    @property
+    def output_device(self) -> Hashable:
+        """
+        Устройство (динамики, соединение с клиентом, чат), на которое выполняется вывод через этот канал.
+
+        Вывод в каналы с одним и тем же устройством выполняется по очереди, в порядке вызова (см.
+        ``VAApi.dispatch_output``), так что, например, речь и звуковой сигнал не воспроизводятся одновременно.
+        По-умолчанию каждый канал считается отдельным устройством.
+        """
+        return self
+
 
 TChan = TypeVar('TChan', bound=OutputChannel)
 
@@ -113,6 +135,31 @@ class InboundMessage(Metadata, metaclass=ABCMeta):
             текст сообщения в каноническом формате
         """
 
+    def get_words(self) -> Tuple[str, ...]:
+        """
+        Возвращает слова текста сообщения.
+
+        Реализации могут хранить уже разбитый на слова текст, чтобы не разбивать его заново при каждом обращении.
+
+        Returns:
+            слова текста сообщения в каноническом формате
+        """
+        return tuple(self.get_text().split())
+
+    def get_hypotheses(self) -> Sequence[Tuple[str, float]]:
+        """
+        Возвращает варианты текста сообщения.
+
+        Для распознанной речи распознаватель может предложить несколько вариантов (гипотез) текста, отличающихся
+        вероятностью. Обработчик может выбрать из них тот, который лучше подходит к известным ему командам.
+
+        Returns:
+            непустая последовательность пар из текста в каноническом формате и уверенности в нём (от 0 до 1),
+            упорядоченная по убыванию уверенности.
+            Текст первого варианта совпадает с результатом ``get_text()``.
+        """
+        return ((self.get_text(), 1.0),)
+
     @abstractmethod
     def get_related_outputs(self) -> OutputChannelPool:
         """
@@ -143,6 +190,10 @@ class InboundMessage(Metadata, metaclass=ABCMeta):
 
         - ``"is_direct"`` - ``True`` если точно известно, что сообщение адресовано напрямую ассистенту
         - ``"language"`` - код языка сообщения
+        - ``"session"`` - ключ сеанса диалога (например, идентификатор чата), в котором получено сообщение.
+          Сообщения из разных сеансов обрабатываются независимо, каждый сеанс имеет собственный текущий контекст
+          диалога.
+          Если ключа нет, то используется сеанс, переданный в ``Brain.send_messages``
         """
         return super().meta
 
@@ -182,6 +233,8 @@ class Brain(VAApiBase, metaclass=ABCMeta):
     def send_messages(
             self,
             outputs: OutputChannelPool,
+            *,
+            session: Optional[Hashable] = None,
     ) -> ContextManager[Callable[[InboundMessage], None]]:
         """
         Позволяет отправлять сообщения голосовому ассистенту.
@@ -196,10 +249,25 @@ class Brain(VAApiBase, metaclass=ABCMeta):
         Args:
             outputs:
                 пул каналов вывода
+            session:
+                ключ сеанса диалога для сообщений, в метаданных которых нет ключа сеанса (см. ``InboundMessage.meta``).
+                ``None`` соответствует глобальному сеансу, в котором также выполняются активные взаимодействия
         Returns:
             менеджер контекста, предоставляющий функцию отправки сообщения
         """
 
+    def close_session(self, session: Hashable):
+        """
+        Сообщает о завершении сеанса диалога, например, при закрытии соединения с клиентом.
+
+        Состояние диалога в сеансе удаляется, не дожидаясь истечения времени бездействия.
+        Реализация по-умолчанию ничего не делает.
+
+        Args:
+            session:
+                ключ сеанса, ранее переданный в ``send_messages``
+        """
+
 
 class VAApi(VAApiBase, ABC):
     """
@@ -217,11 +285,32 @@ class VAApi(VAApiBase, ABC):
             пул всех доступных каналов вывода
         """
 
-    def say(self, text: str, **kwargs):
+    def dispatch_output(self, channel: 'OutputChannel', send: Callable[[], Any]) -> 'Future[Any]':
+        """
+        Выполняет вывод в канал.
+
+        Используется методами ``say``, ``play_audio`` и т.д. после выбора канала.
+        Реализация по-умолчанию выполняет вывод синхронно, реализация, используемая Мозгом - ставит вывод в очередь
+        устройства вывода (см. ``OutputChannel.output_device``) и сразу возвращает управление.
+        Вывод на одно и то же устройство в любом случае выполняется в порядке вызова.
+
+        Args:
+            channel:
+                канал вывода
+            send:
+                функция, выполняющая вывод в канал
+        Returns:
+            ``Future``, завершающийся по окончании вывода
+        """
+        future: Future = Future()
+        future.set_result(send())
+        return future
+
+    def say(self, text: str, **kwargs) -> 'Future[Any]':
         """
         Воспроизводит переданную фразу через основной канал вывода.
 
-        Блокирует выполнение до завершения воспроизведения.
+        Может не дожидаться завершения воспроизведения (см. ``dispatch_output``).
 
         Может быть вызван только из обработчиков контекста (``VAContext.handle_*``) и во взаимодействиях
         (``VAActiveInteraction.act``).
@@ -230,19 +319,21 @@ class VAApi(VAApiBase, ABC):
         Args:
             text: текст фразы
             **kwargs: дополнительные опции
+        Returns:
+            ``Future``, завершающийся по окончании воспроизведения
         """
         ch: TextOutputChannel
 
         # Type check doesn't work properly, https://github.com/python/mypy/issues/5374 may be related
         ch, *_ch = self.get_outputs().get_channels(TextOutputChannel)  # type: ignore
 
-        ch.send(text, **kwargs)
+        return self.dispatch_output(ch, partial(ch.send, text, **kwargs))
 
-    def play_audio(self, file_path: str, **kwargs):
+    def play_audio(self, file_path: str, **kwargs) -> 'Future[Any]':
         """
         Воспроизводит аудио-файл.
 
-        Блокирует выполнение до завершения воспроизведения.
+        Может не дожидаться завершения воспроизведения (см. ``dispatch_output``).
 
         Может быть вызван только из обработчиков контекста (VAContext.handle_*) и во взаимодействиях
         (VAActiveInteraction.act).
@@ -251,13 +342,15 @@ class VAApi(VAApiBase, ABC):
         Args:
             file_path: путь к файлу
             **kwargs: дополнительные опции
+        Returns:
+            ``Future``, завершающийся по окончании воспроизведения
         """
         ch: AudioOutputChannel
 
         # Type check doesn't work properly, https://github.com/python/mypy/issues/5374 may be related
         ch, *_ch = self.get_outputs().get_channels(AudioOutputChannel)  # type: ignore
 
-        ch.send_file(file_path, **kwargs)
+        return self.dispatch_output(ch, partial(ch.send_file, file_path, **kwargs))
 
 
 class VAApiExt(VAApi, ABC):
@@ -328,15 +421,19 @@ class VAApiExt(VAApi, ABC):
 
         return self.get_outputs().get_channels(typ, predicate)
 
-    def say(self, text: str, **kwargs):
+    def say(self, text: str, **kwargs) -> 'Future[Any]':
         """
         Отправляет текстовое сообщение.
 
+        Может не дожидаться окончания отправки (см. ``dispatch_output``).
+
         Args:
             text:
                 текст сообщения
             **kwargs:
                 дополнительные опции
+        Returns:
+            ``Future``, завершающийся по окончании отправки
 
         Raises:
             OutputChannelNotFoundError - если не найден канал вывода, поддерживающий текстовые сообщения (вероятность
@@ -349,9 +446,9 @@ class VAApiExt(VAApi, ABC):
             TextOutputChannel  # type: ignore
         )
 
-        ch.send(text, **kwargs)
+        return self.dispatch_output(ch, partial(ch.send, text, **kwargs))
 
-    def say_speech(self, text: str, **kwargs):
+    def say_speech(self, text: str, **kwargs) -> 'Future[Any]':
         """
         Аналогично ``say(...)`` выводит заданный текст, но выбирает только каналы, преобразующие текст в речь.
 
@@ -360,6 +457,8 @@ class VAApiExt(VAApi, ABC):
                 текст сообщения
             **kwargs:
                 дополнительные опции
+        Returns:
+            ``Future``, завершающийся по окончании воспроизведения
 
         Raises:
             OutputChannelNotFoundError - если не найден подходящий канал вывода
@@ -373,17 +472,21 @@ class VAApiExt(VAApi, ABC):
             MetaMatcher({'is_speech': True})
         )
 
-        ch.send(text, **kwargs)
+        return self.dispatch_output(ch, partial(ch.send, text, **kwargs))
 
-    def play_audio(self, file_path: str, **kwargs):
+    def play_audio(self, file_path: str, **kwargs) -> 'Future[Any]':
         """
         Воспроизводит аудио-файл.
 
+        Может не дожидаться окончания воспроизведения (см. ``dispatch_output``).
+
         Args:
             file_path:
                 путь к файлу
             **kwargs:
                 дополнительные опции
+        Returns:
+            ``Future``, завершающийся по окончании воспроизведения
 
         Raises:
             OutputChannelNotFoundError - если не найден канал вывода, поддерживающий воспроизведение аудио-файлов
@@ -395,7 +498,7 @@ class VAApiExt(VAApi, ABC):
             AudioOutputChannel  # type: ignore
         )
 
-        ch.send_file(file_path, **kwargs)
+        return self.dispatch_output(ch, partial(ch.send_file, file_path, **kwargs))
 
 
 class TextOutputChannel(ABC, OutputChannel):
@@ -457,6 +560,9 @@ class AudioOutputChannel(ABC, OutputChannel):
             **kwargs:
                 дополнительные опции, набор зависит от конкретной реализации класса.
                 Реализации должны игнорировать неизвестные им опции.
+
+                Опция ``audio_data`` содержит содержимое файла, если оно уже загружено в память - реализации, которые
+                отправляют файл клиенту, могут использовать её, чтобы не читать файл повторно.
         """
 
 
@@ -1,23 +1,28 @@
+from concurrent.futures import Future, Executor
 from contextlib import contextmanager
-from typing import Optional, TypedDict
+from functools import partial
+from typing import Optional, TypedDict, Hashable, Callable, Any
 
 from irene.brain.abc import VAContext, OutputChannelPool, VAApi, VAActiveInteractionSource, InboundMessage, Brain, \
-    VAContextConstructor
+    VAContextConstructor, OutputChannel
 from irene.brain.active_interaction import construct_active_interaction
-from irene.brain.context_manager import VAContextManager, TimeoutTicker
+from irene.brain.context_manager import VAContextManager, VASessionPool, DeadlineScheduler
+from irene.brain.output_dispatcher import OutputDispatcher
 from irene.brain.output_pool import CompositeOutputPool, EMPTY_OUTPUT_POOL
 
 
 class _VAApiProvider:
-    __slots__ = ('_outputs', '_context_manager', '_construct_context')
+    __slots__ = ('_outputs', '_dispatcher', '_context_manager', '_construct_context')
 
     def __init__(
             self,
             *,
             outputs: OutputChannelPool,
+            dispatcher: OutputDispatcher,
             context_constructor: VAContextConstructor,
     ):
         self._outputs = outputs
+        self._dispatcher = dispatcher
         self._context_manager: Optional[VAContextManager] = None
         self._construct_context = context_constructor
 
@@ -36,43 +41,49 @@ class _VAApiProvider:
         """
         Возвращает готовый к использованию экземпляр ``VAApi``.
         """
-        provider = self
-
-        class VAApiImpl(VAApi):
-            # Экземпляр создаётся таким образом - с передачей зависимостей через замыкание и запретом на добавление
-            # новых полей чтобы не давать плагинам доступа к тому, к чему доступа у них быть не должно, в т.ч. не давать
-            # создавать новые поля т.к. в некоторых случаях это может не работать. Это сделано для предотвращения
-            # возможных проблем с совместимостью в будущем.
-            __slots__ = ()
-
-            def get_outputs(self) -> OutputChannelPool:
-                return provider._outputs
-
-            def submit_active_interaction(
-                    self,
-                    interaction: VAActiveInteractionSource,
-                    *,
-                    related_message: Optional[InboundMessage] = None,
-            ):
-                if provider._context_manager is None:
-                    raise RuntimeError(
-                        'submit_active_interaction вызван до инициализации ссылки на VAContextManager')
-
-                ai = construct_active_interaction(
-                    interaction,
-                    related_message=related_message,
-                    construct_context=provider._construct_context,
-                )
-                provider._context_manager.process_active_interaction(ai)
-
-        return VAApiImpl()
+        return _VAApiImpl(self)
+
+
+class _VAApiImpl(VAApi):
+    # Зависимости хранятся в единственном поле, а добавление новых полей запрещено чтобы не давать плагинам создавать
+    # новые поля т.к. в некоторых случаях это может не работать. Это сделано для предотвращения возможных проблем с
+    # совместимостью в будущем.
+    __slots__ = '_provider'
+
+    def __init__(self, provider: _VAApiProvider):
+        self._provider = provider
+
+    def get_outputs(self) -> OutputChannelPool:
+        return self._provider._outputs
+
+    def dispatch_output(self, channel: OutputChannel, send: Callable[[], Any]) -> 'Future[Any]':
+        return self._provider._dispatcher.submit(channel, send)
+
+    def submit_active_interaction(
+            self,
+            interaction: VAActiveInteractionSource,
+            *,
+            related_message: Optional[InboundMessage] = None,
+    ):
+        provider = self._provider
+
+        if provider._context_manager is None:
+            raise RuntimeError(
+                'submit_active_interaction вызван до инициализации ссылки на VAContextManager')
+
+        ai = construct_active_interaction(
+            interaction,
+            related_message=related_message,
+            construct_context=provider._construct_context,
+        )
+        provider._context_manager.process_active_interaction(ai)
 
 
 class BrainImpl(Brain):
     class Config(TypedDict):
         defaultTimeout: float
-        timeoutCheckInterval: float
         timeoutsDisabled: bool
+        sessionIdleTimeout: float
 
     def __init__(
             self,
@@ -81,27 +92,31 @@ class BrainImpl(Brain):
             config: Config,
             predefined_outputs: OutputChannelPool = EMPTY_OUTPUT_POOL,
             context_constructor: VAContextConstructor,
+            output_executor: Optional[Executor] = None,
+            deadline_executor: Optional[Executor] = None,
     ):
         self._config = config
         self._outputs = CompositeOutputPool((predefined_outputs,))
+        self._dispatcher = OutputDispatcher(output_executor)
         self._api_provider = _VAApiProvider(
-            outputs=self._outputs, context_constructor=context_constructor)
+            outputs=self._outputs, dispatcher=self._dispatcher, context_constructor=context_constructor)
         self._context_constructor = context_constructor
 
-        self._context_manager = VAContextManager(
+        self._scheduler: Optional[DeadlineScheduler] = None
+
+        if not config['timeoutsDisabled']:
+            self._scheduler = DeadlineScheduler(executor=deadline_executor)
+            self._scheduler.start()
+
+        self._sessions = VASessionPool(
             self._api_provider.get_api(),
             main_context,
             config['defaultTimeout'],
+            config['sessionIdleTimeout'],
+            scheduler=self._scheduler,
         )
 
-        self._api_provider.use_context_manager(self._context_manager)
-
-        self._ticker: Optional[TimeoutTicker] = None
-
-        if not config['timeoutsDisabled']:
-            self._ticker = TimeoutTicker(
-                self._context_manager, config['timeoutCheckInterval'])
-            self._ticker.start()
+        self._api_provider.use_context_manager(self._sessions.global_session)
 
     def submit_active_interaction(
             self,
@@ -113,22 +128,30 @@ class BrainImpl(Brain):
             related_message=related_message,
             construct_context=self._context_constructor,
         )
-        self._context_manager.process_active_interaction(ai)
+        self._sessions.process_active_interaction(ai)
 
-    def _process_message(self, message: InboundMessage):
-        self._context_manager.process_command(message)
+    def _process_message(self, message: InboundMessage, default_session: Optional[Hashable] = None):
+        self._sessions.process_command(message, message.meta.get('session', default_session))
 
     @contextmanager
-    def send_messages(self, outputs: OutputChannelPool):
+    def send_messages(self, outputs: OutputChannelPool, *, session: Optional[Hashable] = None):
         self._outputs.insert(0, outputs)
 
         try:
-            yield self._process_message
+            if session is None:
+                yield self._process_message
+            else:
+                yield partial(self._process_message, default_session=session)
         finally:
             self._outputs.remove(outputs)
 
+    def close_session(self, session: Hashable):
+        self._sessions.close_session(session)
+
     def kill(self):
-        if self._ticker:
-            self._ticker.terminate()
-            self._ticker.join()
-            self._ticker = None
+        if self._scheduler:
+            self._scheduler.terminate()
+            self._scheduler.join()
+            self._scheduler = None
+
+        self._dispatcher.shutdown()
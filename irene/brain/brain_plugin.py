@@ -3,12 +3,12 @@ from typing import Any, Optional, Callable, TypedDict, Literal, Union
 
 from irene import VAContext, VAApiExt, construct_context, VAContextSource
 from irene.brain.brain import BrainImpl
-from irene.brain.command_tree import VACommandTree
+from irene.brain.command_tree import VACommandTree, FuzzyMatchingOptions
 from irene.brain.contexts import CommandTreeContext, UNKNOWN_COMMAND_SPECIAL_KEY, AMBIGUOUS_COMMAND_SPECIAL_KEY, \
     TriggerPhraseContext, CommandErrorInterceptionContext
 from irene.plugin_loader.abc import PluginManager
+from irene.plugin_loader.executors import get_executor, EXECUTOR_OUTPUT, EXECUTOR_BRAIN
 from irene.plugin_loader.magic_plugin import MagicPlugin, step_name, operation, after, before
-from irene.plugin_loader.run_operation import call_all_as_wrappers
 
 
 class BrainPlugin(MagicPlugin):
@@ -17,17 +17,24 @@ class BrainPlugin(MagicPlugin):
 
     class _Config(TypedDict):
         triggerPhrases: list[str]
+        triggerPhrasesFuzzyMatching: bool
         unknownRootCommandReply: str
         ambiguousRootCommandReply: str
         rootCommandErrorReply: Union[str, list[str]]
         unknownCommandReply: str
         ambiguousCommandReply: str
         defaultTimeout: float
-        timeoutCheckInterval: float
         timeoutsDisabled: bool
+        sessionIdleTimeout: float
+        fuzzyMatchingEnabled: bool
+        fuzzyMatchPenalty: float
+        fuzzyMatchMaxDistance: int
+        fuzzyMatchMinWordLength: int
+        commandCacheSize: int
 
     config: _Config = {
         'triggerPhrases': ["ирина", "ирины", "ирину"],
+        'triggerPhrasesFuzzyMatching': False,
         'unknownRootCommandReply': "Извини, я не поняла",
         'ambiguousRootCommandReply': "Извини, я не совсем поняла",
         'rootCommandErrorReply': "Упс, что-то пошло не так.",
@@ -35,9 +42,37 @@ class BrainPlugin(MagicPlugin):
         'ambiguousCommandReply': "Не совсем поняла...",
         'defaultTimeout': 10.0,
         'timeoutsDisabled': False,
-        'timeoutCheckInterval': 1.0,
+        'sessionIdleTimeout': 600.0,
+        'fuzzyMatchingEnabled': False,
+        'fuzzyMatchPenalty': 0.5,
+        'fuzzyMatchMaxDistance': 1,
+        'fuzzyMatchMinWordLength': 4,
+        'commandCacheSize': 256,
     }
 
+    config_comment = """
+    Настройки мозга.
+
+    - `triggerPhrases`              - фразы (имена ассистента), после которых следуют команды.
+    - `triggerPhrasesFuzzyMatching` - включает распознавание фраз с ошибками распознавания речи (с параметрами
+                                      `fuzzyMatchMaxDistance` и `fuzzyMatchMinWordLength`).
+
+    - `sessionIdleTimeout`          - время (в секундах) бездействия, после которого удаляется состояние диалога в
+                                      отдельном сеансе (соединении веб-клиента, чате в телеграме).
+
+    Параметры нечёткого распознавания слов команд:
+    - `fuzzyMatchingEnabled`        - включает распознавание слов команд с опечатками и ошибками распознавания речи
+                                      (например, "тайгер" вместо "таймер"). По-умолчанию выключено, т.к. может
+                                      приводить к срабатыванию команд на похожие, но не совпадающие фразы.
+    - `fuzzyMatchPenalty`           - штраф за каждую правку слова. Пропуск лишнего слова стоит 1, команды с
+                                      суммарным штрафом больше 2 не распознаются.
+    - `fuzzyMatchMaxDistance`       - максимальное количество правок (вставок, удалений, замен букв) в одном слове.
+    - `fuzzyMatchMinWordLength`     - минимальная длина слова, для которого выполняется нечёткое сопоставление.
+
+    - `commandCacheSize`            - количество последних запросов, для которых запоминаются найденные корневые
+                                      команды.
+    """
+
     _ErrorPhraseKeys = Literal['unknownRootCommandReply', 'ambiguousRootCommandReply']
 
     def __init__(self) -> None:
@@ -45,12 +80,23 @@ class BrainPlugin(MagicPlugin):
 
         self._brain: Optional[BrainImpl] = None
 
+    def _fuzzy_matching_options(self, enabled: bool) -> Optional[FuzzyMatchingOptions]:
+        if not enabled:
+            return None
+
+        return FuzzyMatchingOptions(
+            penalty=self.config['fuzzyMatchPenalty'],
+            max_distance=self.config['fuzzyMatchMaxDistance'],
+            min_word_length=self.config['fuzzyMatchMinWordLength'],
+        )
+
     def _construct_context(self, pm: PluginManager, src: VAContextSource, **kwargs):
         if 'construct_nested' not in kwargs:
             kwargs['construct_nested'] = partial(self._construct_context, pm)
 
-        context = call_all_as_wrappers(
-            pm.get_operation_sequence('construct_context'),
+        kwargs.setdefault('fuzzy_matching', self._fuzzy_matching_options(self.config['fuzzyMatchingEnabled']))
+
+        context = pm.get_wrapper_chain('construct_context')(
             src,
             pm,
             **kwargs
@@ -119,8 +165,7 @@ class BrainPlugin(MagicPlugin):
         """
         Создаёт основной экземпляр Мозга.
         """
-        root_ctx: VAContext = call_all_as_wrappers(
-            pm.get_operation_sequence('create_root_context'),
+        root_ctx: VAContext = pm.get_wrapper_chain('create_root_context')(
             construct_context(partial(self._say_configured, 'unknownRootCommandReply')),
             pm
         )
@@ -128,6 +173,8 @@ class BrainPlugin(MagicPlugin):
             main_context=root_ctx,
             config=self.config,
             context_constructor=partial(self._construct_context, pm),
+            output_executor=get_executor(EXECUTOR_OUTPUT),
+            deadline_executor=get_executor(EXECUTOR_BRAIN),
         )
 
     @step_name('kill_brain')
@@ -148,6 +195,22 @@ class BrainPlugin(MagicPlugin):
         """
         return nxt(prev or self._brain, *args, **kwargs)
 
+    def get_prewarm_phrases(self, nxt, prev: list[str], *args, **kwargs):
+        """
+        Добавляет настроенные ответы мозга к фразам, которые синтезируются заранее.
+        """
+        error_replies = self.config['rootCommandErrorReply']
+
+        prev.extend((
+            self.config['unknownRootCommandReply'],
+            self.config['ambiguousRootCommandReply'],
+            self.config['unknownCommandReply'],
+            self.config['ambiguousCommandReply'],
+            *([error_replies] if isinstance(error_replies, str) else error_replies),
+        ))
+
+        return nxt(prev, *args, **kwargs)
+
     def _say_configured(self, key: _ErrorPhraseKeys, va: VAApiExt, _: str):
         va.say(self.config[key])
 
@@ -165,7 +228,10 @@ class BrainPlugin(MagicPlugin):
 
         Нераспознанные команды будут передаваться контексту, полученному с предыдущего шага.
         """
-        tree: VACommandTree[VAContext] = VACommandTree()
+        tree: VACommandTree[VAContext] = VACommandTree(
+            self._fuzzy_matching_options(self.config['fuzzyMatchingEnabled']),
+            cache_size=self.config['commandCacheSize'],
+        )
 
         unknown_command_context = prev
         ambiguous_command_context = partial(
@@ -228,11 +294,14 @@ class BrainPlugin(MagicPlugin):
         сообщении для обработки сообщения.
         """
 
+        fuzzy_matching = self._fuzzy_matching_options(self.config['triggerPhrasesFuzzyMatching'])
+
         return nxt(
             TriggerPhraseContext(
                 [phrase.split(' ')
                  for phrase in self.config['triggerPhrases']],
                 prev,
+                fuzzy_matching,
             ),
             *args, **kwargs
         )
@@ -1,7 +1,14 @@
-from typing import Collection, Generator, Optional, Generic, TypeVar, Union, Callable, Tuple, Any
+import sys
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Collection, Generator, Optional, Generic, TypeVar, Union, Callable, Tuple, Any, Sequence, \
+    Mapping, NamedTuple
+
+from irene.utils.edit_distance import FuzzyWordIndex, edit_distance
 
 __all__ = [
     'VACommandTree',
+    'FuzzyMatchingOptions',
     'ConflictingCommandsException',
     'NoCommandMatchesException',
     'AmbiguousCommandException',
@@ -16,6 +23,45 @@ TSrcDict = dict[str, Union[Any, TSrc]]
 
 TConstructor = Callable[[TSrc], T]
 
+# Совпадения, веса которых отличаются меньше чем на эту величину, считаются равноценными
+_WEIGHT_CLOSENESS = 0.1
+
+# Допустимое количество пропущенных слов запроса
+_DEFAULT_TOLERANCE = 2
+
+# Количество запросов, результаты поиска по которым запоминаются деревом по-умолчанию
+_DEFAULT_CACHE_SIZE = 256
+
+# Прибавка к весу совпадения за уверенность 1.0 в варианте текста запроса.
+# Уверенный вариант, требующий пропуска слова, проигрывает менее уверенному варианту, совпадающему с командой полностью
+_DEFAULT_CONFIDENCE_WEIGHT = 1.0
+
+
+class FuzzyMatchingOptions(NamedTuple):
+    """
+    Параметры нечёткого сопоставления слов запроса со словами команд.
+
+    Нечёткое совпадение слова с опечаткой или ошибкой распознавания речи (например, "тайгер" вместо "таймер") уменьшает
+    вес совпадения команды на ``penalty`` за каждую правку, так что точное совпадение всегда предпочтительнее
+    нечёткого, а нечёткое совпадение предпочтительнее пропуска слова.
+    """
+
+    penalty: float = 0.5
+    """
+    Уменьшение веса совпадения за каждую правку слова
+    """
+
+    max_distance: int = 1
+    """
+    Максимальное расстояние Левенштейна между словом запроса и словом команды
+    """
+
+    min_word_length: int = 4
+    """
+    Минимальная длина слова запроса, для которого выполняется нечёткий поиск.
+    Короткие слова слишком легко превращаются одно в другое.
+    """
+
 
 class _CommandMatch(Generic[T]):
     __slots__ = ('ctx', 'text', 'weight')
@@ -29,7 +75,7 @@ class _CommandMatch(Generic[T]):
         return f'{self.ctx}({self.text}) * {self.weight}'
 
     def weight_is_close_to(self, other: '_CommandMatch'):
-        return abs(self.weight - other.weight) < 0.1
+        return abs(self.weight - other.weight) < _WEIGHT_CLOSENESS
 
 
 class ConflictingCommandsException(Exception, Generic[T]):
@@ -46,12 +92,59 @@ class ConflictingCommandsException(Exception, Generic[T]):
 
 
 class _CommandTreeNode(Generic[T]):
-    def __init__(self) -> None:
-        self._children: dict[str, _CommandTreeNode] = {}
-        self._ctx: Optional[T] = None
+    """
+    Узел дерева команд.
+
+    Узлы не изменяются после создания.
+    Добавление команд создаёт новые узлы на пути от корня до изменённых узлов, а неизменённые поддеревья используются
+    повторно.
+    Благодаря этому одно поддерево может быть доступно по нескольким путям (например, по всем вариантам ключа
+    ``"выключи|отключи"``) и "дерево" на самом деле является минимизированным ациклическим автоматом (DAWG) с общими
+    суффиксами.
+    """
+
+    __slots__ = ('_children', '_ctx', '_fuzzy_index')
 
-    def _get_matches(self, words: Collection[str], tolerance: float, ignore_self=False) \
-            -> Generator[_CommandMatch, None, None]:
+    def __init__(self, children: Mapping[str, '_CommandTreeNode[T]'], ctx: Optional[T]) -> None:
+        self._children = children
+        self._ctx = ctx
+        self._fuzzy_index: Optional[FuzzyWordIndex] = None
+
+    def is_empty(self) -> bool:
+        return self._ctx is None and len(self._children) == 0
+
+    def find_similar_children(self, word: str, max_distance: int) -> list[Tuple['_CommandTreeNode[T]', int]]:
+        """
+        Находит дочерние узлы, слова переходов в которые похожи на заданное слово, но не совпадают с ним.
+
+        Индекс слов переходов строится при первом поиске, так что время поиска почти не зависит от количества дочерних
+        узлов.
+        Т.к. узлы не изменяются после создания, индекс не требует обновления.
+
+        Args:
+            word:
+                слово запроса
+            max_distance:
+                максимальное расстояние Левенштейна между словом запроса и словом перехода
+        Returns:
+            список пар из дочернего узла и расстояния между словами
+        """
+        if (index := self._fuzzy_index) is None or index.max_distance < max_distance:
+            index = self._fuzzy_index = FuzzyWordIndex(self._children.keys(), max_distance)
+
+        return [
+            (self._children[child_word], distance)
+            for child_word, distance in index.find(word, max_distance)
+            if distance > 0
+        ]
+
+    def _get_matches(
+            self,
+            words: Collection[str],
+            tolerance: float,
+            fuzzy: Optional[FuzzyMatchingOptions],
+            ignore_self=False,
+    ) -> Generator[_CommandMatch, None, None]:
         if tolerance < 0:
             return
 
@@ -66,43 +159,266 @@ class _CommandTreeNode(Generic[T]):
         word, *rest = words
 
         if word in self._children:
-            yield from self._children[word]._get_matches(rest, tolerance)
+            yield from self._children[word]._get_matches(rest, tolerance, fuzzy)
 
-        # TODO: Добавить нечёткий поиск по частичному совпадению word в self._children
+        if fuzzy is not None and len(word) >= fuzzy.min_word_length:
+            for child_word, child in self._children.items():
+                distance = edit_distance(word, child_word, fuzzy.max_distance)
 
-        yield from self._get_matches(rest, tolerance - 1.0, ignore_self=True)
+                if 0 < distance <= fuzzy.max_distance:
+                    yield from child._get_matches(rest, tolerance - fuzzy.penalty * distance, fuzzy)
 
-    def get_matches(self, words: Collection[str]) -> Generator[_CommandMatch, None, None]:
-        return self._get_matches(words, 2)
+        yield from self._get_matches(rest, tolerance - 1.0, fuzzy, ignore_self=True)
 
-    def _add_node_deep(self, first_step=None, *path: Collection[str]) -> '_CommandTreeNode':
-        if first_step is None:
-            return self
+    def get_matches(
+            self,
+            words: Collection[str],
+            fuzzy: Optional[FuzzyMatchingOptions] = None,
+    ) -> Generator[_CommandMatch, None, None]:
+        """
+        Перебирает все совпадения запроса с командами поддерева.
 
-        if first_step not in self._children:
-            self._children[first_step] = _CommandTreeNode()
+        Эталонная реализация поиска, перебирающая все варианты пропуска слов.
+        Для поиска команд используется ``_find_best_matches``, эта реализация остаётся для тестов и сравнения
+        производительности.
+        """
+        return self._get_matches(words, _DEFAULT_TOLERANCE, fuzzy)
 
-        return self._children[first_step]._add_node_deep(*path)
 
-    def _set_ctx(self, ctx: T):
-        if self._ctx is not None:
-            raise ConflictingCommandsException([self._ctx, ctx])
+_NO_CHILDREN: Mapping[str, _CommandTreeNode] = MappingProxyType({})
 
-        self._ctx = ctx
+_EMPTY_NODE: _CommandTreeNode = _CommandTreeNode(_NO_CHILDREN, None)
 
-    def add_dict(self, d: TSrcDict, ctx_constructor: TConstructor):
-        for k, v in d.items():
-            for k_variant in k.split('|'):
-                n = self._add_node_deep(*k_variant.split(' '))
 
+class _DawgBuilder(Generic[T]):
+    """
+    Создаёт узлы дерева команд в процессе добавления команд.
+
+    Одинаковые узлы (с одинаковыми командами и одинаковыми переходами в одинаковые дочерние узлы), созданные одним
+    экземпляром, заменяются одним и тем же узлом.
+    """
+
+    __slots__ = ('_construct', '_registry')
+
+    def __init__(self, ctx_constructor: TConstructor):
+        self._construct = ctx_constructor
+        self._registry: dict[Tuple[Optional[int], frozenset[Tuple[str, _CommandTreeNode[T]]]], _CommandTreeNode[T]] = {}
+
+    def _make_node(self, children: dict[str, _CommandTreeNode[T]], ctx: Optional[T]) -> _CommandTreeNode[T]:
+        if ctx is None and len(children) == 0:
+            return _EMPTY_NODE
+
+        # Узлы сравниваются по идентичности, команды - по идентификатору объекта т.к. могут не поддерживать
+        # хеширование.
+        # Реестр хранит ссылки на узлы, а узлы - на команды, так что идентификаторы остаются уникальными пока существует
+        # реестр.
+        key = (None if ctx is None else id(ctx), frozenset(children.items()))
+
+        if (node := self._registry.get(key)) is None:
+            node = self._registry[key] = _CommandTreeNode(children or _NO_CHILDREN, ctx)
+
+        return node
+
+    def merge(self, a: _CommandTreeNode[T], b: _CommandTreeNode[T]) -> _CommandTreeNode[T]:
+        """
+        Объединяет команды двух поддеревьев.
+
+        Raises:
+            ConflictingCommandsException - если одна и та же команда есть в обоих поддеревьях
+        """
+        if a.is_empty():
+            return b
+
+        if b.is_empty():
+            return a
+
+        if a._ctx is not None and b._ctx is not None:
+            raise ConflictingCommandsException([a._ctx, b._ctx])
+
+        children = dict(a._children)
+
+        for word, child in b._children.items():
+            if (existing := children.get(word)) is not None:
                 try:
-                    if isinstance(v, dict):
-                        n.add_dict(v, ctx_constructor)
-                    else:
-                        n._set_ctx(ctx_constructor(v))
+                    children[word] = self.merge(existing, child)
                 except ConflictingCommandsException as e:
-                    e.prepend_word(k_variant)
+                    e.prepend_word(word)
                     raise
+            else:
+                children[word] = child
+
+        return self._make_node(children, a._ctx if a._ctx is not None else b._ctx)
+
+    def build(self, d: TSrcDict) -> _CommandTreeNode[T]:
+        """
+        Создаёт поддерево из словаря с командами.
+
+        Поддерево для значения, соответствующего ключу с несколькими вариантами (``"a|b"``), создаётся (и объект
+        команды конструируется) один раз и используется всеми вариантами.
+        """
+        entries: list[Tuple[Sequence[str], _CommandTreeNode[T]]] = []
+
+        for k, v in d.items():
+            variants = k.split('|')
+
+            try:
+                if isinstance(v, dict):
+                    value_node = self.build(v)
+                else:
+                    value_node = self._make_node({}, self._construct(v))
+            except ConflictingCommandsException as e:
+                e.prepend_word(variants[0])
+                raise
+
+            if not value_node.is_empty():
+                entries.extend((variant.split(' '), value_node) for variant in variants)
+
+        return self._build_paths(entries, 0)
+
+    def _build_paths(self, entries: list[Tuple[Sequence[str], _CommandTreeNode[T]]], depth: int) -> _CommandTreeNode[T]:
+        """
+        Создаёт поддерево, содержащее заданные поддеревья по заданным путям.
+
+        Args:
+            entries:
+                пары из пути (последовательности слов) и поддерева, которое должно быть доступно по этому пути
+            depth:
+                количество первых слов путей, уже пройденных от корня создаваемого поддерева
+        """
+        if len(entries) == 1:
+            # Единственный путь - просто строим цепочку узлов
+            words, node = entries[0]
+
+            for word in reversed(words[depth:]):
+                node = self._make_node({sys.intern(word): node}, None)
+
+            return node
+
+        terminal: _CommandTreeNode[T] = _EMPTY_NODE
+        groups: dict[str, list[Tuple[Sequence[str], _CommandTreeNode[T]]]] = {}
+
+        for words, tail in entries:
+            if len(words) == depth:
+                terminal = self.merge(terminal, tail)
+            else:
+                groups.setdefault(words[depth], []).append((words, tail))
+
+        children: dict[str, _CommandTreeNode[T]] = {}
+
+        for word, group in groups.items():
+            try:
+                children[sys.intern(word)] = self._build_paths(group, depth + 1)
+            except ConflictingCommandsException as e:
+                e.prepend_word(word)
+                raise
+
+        return self.merge(terminal, self._make_node(children, None))
+
+
+# Состояние поиска: (узел, оставшийся допуск, узел достигнут текущим словом а не пропуском слова)
+_MatchState = Tuple[_CommandTreeNode, float, bool]
+
+
+def _find_best_matches(
+        root: _CommandTreeNode[T],
+        words: Sequence[str],
+        tolerance: float = _DEFAULT_TOLERANCE,
+        fuzzy: Optional[FuzzyMatchingOptions] = None,
+        weight_bound: float = float('-inf'),
+) -> list[_CommandMatch[T]]:
+    """
+    Находит лучшие совпадения запроса с командами.
+
+    Поиск выполняется динамическим программированием за один проход по словам запроса: состояния, в которые можно
+    попасть разными способами, объединяются.
+    Результаты совпадают с результатами перебора в ``_CommandTreeNode.get_matches`` с точностью до порядка
+    совпадений, но время поиска ограничено ``O(len(words) * states)``, где ``states`` - количество узлов дерева,
+    достижимых запросом.
+
+    Args:
+        root:
+            корень дерева команд
+        words:
+            слова запроса
+        tolerance:
+            допустимое количество пропущенных слов
+        fuzzy:
+            параметры нечёткого сопоставления слов или ``None`` если нечёткое сопоставление не используется
+        weight_bound:
+            вес уже известного совпадения (например, найденного для другого варианта запроса).
+            Совпадения, вес которых заметно ниже, не ищутся.
+    Returns:
+        список совпадений, вес которых близок к весу лучшего совпадения (см. ``_CommandMatch.weight_is_close_to``) или
+        к ``weight_bound`` если он больше, упорядоченный по убыванию веса.
+        Совпадения, найденные несколькими разными способами, повторяются в списке соответствующее количество раз.
+    """
+    words_count = len(words)
+
+    # Слова короче этой длины сопоставляются только точно
+    fuzzy_min_length = float('inf') if fuzzy is None else fuzzy.min_word_length
+    fuzzy_penalty = 0.0 if fuzzy is None else fuzzy.penalty
+    fuzzy_max_distance = 0 if fuzzy is None else fuzzy.max_distance
+
+    # Найденные совпадения в виде (команда, номер первого слова остатка запроса, вес, количество способов)
+    found: list[Tuple[T, int, float, int]] = []
+    best_weight = weight_bound
+
+    # Каждое состояние хранится вместе с количеством способов его достижения
+    states: dict[_MatchState, int] = {(root, tolerance, True): 1}
+    position = 0
+
+    while states:
+        remaining = words_count - position
+        word = words[position] if remaining > 0 else None
+        fuzzy_word = word is not None and len(word) >= fuzzy_min_length
+        next_states: dict[_MatchState, int] = {}
+
+        for (node, tol, arrived), count in states.items():
+            if arrived and (ctx := node._ctx) is not None:
+                weight = tol - remaining
+
+                if weight > best_weight - _WEIGHT_CLOSENESS:
+                    found.append((ctx, position, weight, count))
+
+                    if weight > best_weight:
+                        best_weight = weight
+
+            # Вес совпадения не может превышать допуск состояния, из которого оно получено, так что состояния с
+            # допуском заметно ниже веса лучшего найденного совпадения отбрасываются
+            if word is None or tol <= best_weight - _WEIGHT_CLOSENESS:
+                continue
+
+            if (child := node._children.get(word)) is not None:
+                key = (child, tol, True)
+                next_states[key] = next_states.get(key, 0) + count
+
+            if fuzzy_word and tol - fuzzy_penalty > best_weight - _WEIGHT_CLOSENESS:
+                for child, distance in node.find_similar_children(word, fuzzy_max_distance):
+                    child_tol = tol - fuzzy_penalty * distance
+
+                    if child_tol >= 0 and child_tol > best_weight - _WEIGHT_CLOSENESS:
+                        key = (child, child_tol, True)
+                        next_states[key] = next_states.get(key, 0) + count
+
+            if tol >= 1.0 and tol - 1.0 > best_weight - _WEIGHT_CLOSENESS:
+                key = (node, tol - 1.0, False)
+                next_states[key] = next_states.get(key, 0) + count
+
+        if word is None:
+            break
+
+        position += 1
+        states = next_states
+
+    result = [
+        _CommandMatch(ctx, ' '.join(words[position:]), weight)
+        for ctx, position, weight, count in found
+        if abs(weight - best_weight) < _WEIGHT_CLOSENESS
+        for _ in range(count)
+    ]
+    result.sort(key=lambda match: match.weight, reverse=True)
+
+    return result
 
 
 class NoCommandMatchesException(Exception):
@@ -128,10 +444,24 @@ class VACommandTree(Generic[T]):
     поиска подходящих объектов по заданному тексту.
     """
 
-    __slots__ = '_root'
+    __slots__ = ('_root', '_fuzzy_matching', '_resolve')
 
-    def __init__(self):
-        self._root = _CommandTreeNode()
+    def __init__(
+            self,
+            fuzzy_matching: Optional[FuzzyMatchingOptions] = None,
+            cache_size: int = _DEFAULT_CACHE_SIZE,
+    ):
+        """
+        Args:
+            fuzzy_matching:
+                параметры нечёткого сопоставления слов запроса со словами команд или ``None`` если слова должны
+                совпадать точно
+            cache_size:
+                количество последних запросов, результаты поиска по которым запоминаются
+        """
+        self._root: _CommandTreeNode[T] = _EMPTY_NODE
+        self._fuzzy_matching = fuzzy_matching
+        self._resolve = lru_cache(maxsize=cache_size)(self._resolve_uncached)
 
     def add_commands(self, commands: TSrcDict, context_constructor: TConstructor):
         """
@@ -159,6 +489,8 @@ class VACommandTree(Generic[T]):
         >>>     }
         >>> }, lambda it: it)
 
+        для всех вариантов ключа используется один и тот же объект, созданный функцией ``context_constructor``.
+
         Args:
             commands:
                 команды в виде вложенных словарей
@@ -169,12 +501,19 @@ class VACommandTree(Generic[T]):
             ConflictingCommandsException - если одна из добавляемых команд совпадает с другой добавляемой или ранее
                                            добавленой командой
         """
-        self._root.add_dict(commands, context_constructor)
+        builder: _DawgBuilder[T] = _DawgBuilder(context_constructor)
+
+        # Корень заменяется только после успешного добавления всех команд, так что при ошибке дерево остаётся
+        # неизменным, а параллельно выполняющийся поиск видит либо старое, либо новое состояние дерева
+        self._root = builder.merge(self._root, builder.build(commands))
+        self._resolve.cache_clear()
 
     def get_command(self, text: str) -> Tuple[T, str]:
         """
         Осуществляет поиск наиболее подходящей команды к запросу.
 
+        Результаты поиска (в т.ч. неудачного) для последних запросов запоминаются до следующего изменения дерева.
+
         Args:
             text:
                 текст запроса
@@ -184,22 +523,95 @@ class VACommandTree(Generic[T]):
             NoCommandMatchesException - если подходящих команд нет
             AmbiguousCommandException - если есть несколько подходящих команд, но выбрать одну однозначно не получается
         """
-        words = text.split(' ')
-        matching = list(sorted(
-            self._root.get_matches(words),
-            key=lambda match: match.weight,
-            reverse=True,
-        ))
+        ctx, rest, ambiguous = self._resolve(self._root, text)
 
-        if len(matching) == 0:
+        if ambiguous is not None:
+            raise AmbiguousCommandException(text, ambiguous)
+
+        if ctx is None:
             raise NoCommandMatchesException(text)
 
+        return ctx, rest
+
+    def get_command_for_hypotheses(
+            self,
+            hypotheses: Sequence[Tuple[str, float]],
+            confidence_weight: float = _DEFAULT_CONFIDENCE_WEIGHT,
+    ) -> Tuple[T, str]:
+        """
+        Осуществляет поиск команды, наиболее подходящей к одному из вариантов запроса.
+
+        Оценка совпадения складывается из веса совпадения с командой и уверенности в варианте запроса, умноженной на
+        ``confidence_weight``.
+        Варианты перебираются в порядке убывания уверенности, а поиск по каждому следующему варианту отбрасывает
+        совпадения, которые заведомо хуже уже найденных.
+        Совпадение нескольких вариантов с одной и той же командой неоднозначностью не считается.
+
+        Args:
+            hypotheses:
+                пары из текста варианта запроса и уверенности в нём (см. ``InboundMessage.get_hypotheses``)
+            confidence_weight:
+                вес уверенности в варианте запроса
+        Returns:
+            кортеж из найденной команды и остатка выбранного варианта запроса
+        Raises:
+            NoCommandMatchesException - если подходящих команд нет ни для одного варианта
+            AmbiguousCommandException - если выбрать одну команду однозначно не получается
+        """
+        root = self._root
+        best_score = float('-inf')
+
+        # Совпадения в виде (оценка, номер варианта, совпадение)
+        candidates: list[Tuple[float, int, _CommandMatch[T]]] = []
+
+        for index, (text, confidence) in enumerate(hypotheses):
+            bonus = confidence_weight * confidence
+
+            for match in _find_best_matches(root, text.split(' '), fuzzy=self._fuzzy_matching,
+                                            weight_bound=best_score - bonus):
+                score = match.weight + bonus
+                candidates.append((score, index, match))
+
+                if score > best_score:
+                    best_score = score
+
+        close = [it for it in candidates if abs(it[0] - best_score) < _WEIGHT_CLOSENESS]
+
+        if len(close) == 0:
+            raise NoCommandMatchesException(hypotheses[0][0] if hypotheses else '')
+
+        _, best_index, best_match = max(close, key=lambda it: (it[0], -it[1]))
+
+        if any(
+                (index == best_index and match is not best_match) or match.ctx is not best_match.ctx
+                for _, index, match in close
+        ):
+            raise AmbiguousCommandException(hypotheses[best_index][0], [match for _, _, match in close])
+
+        return best_match.ctx, best_match.text
+
+    def _resolve_uncached(self, root: _CommandTreeNode[T], text: str) \
+            -> Tuple[Optional[T], str, Optional[Tuple[_CommandMatch[T], ...]]]:
+        # Корень передаётся явно и является частью ключа кеша, так что результат поиска, выполнявшегося параллельно с
+        # добавлением команд, не попадёт в кеш для нового состояния дерева
+        matching = _find_best_matches(root, text.split(' '), fuzzy=self._fuzzy_matching)
+
+        if len(matching) == 0:
+            return None, text, None
+
         best_match = matching[0]
 
         if len(matching) >= 2 and best_match.weight_is_close_to(matching[1]):
-            raise AmbiguousCommandException(
-                text,
-                list(filter(best_match.weight_is_close_to, matching))
-            )
+            return None, text, tuple(filter(best_match.weight_is_close_to, matching))
 
-        return best_match.ctx, best_match.text
+        return best_match.ctx, best_match.text, None
+
+    def cache_info(self):
+        """
+        Возвращает статистику использования кеша результатов поиска.
+
+        Returns:
+            именованный кортеж с количеством попаданий (``hits``) и промахов (``misses``) кеша, максимальным
+            (``maxsize``) и текущим (``currsize``) количеством запомненных запросов
+        """
+        return self._resolve.cache_info()
@@ -1,12 +1,20 @@
+import heapq
 import logging
-from threading import Thread, Lock, Event
-from typing import Optional
+import time
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from functools import partial
+from itertools import count
+from threading import Thread, Lock, Event, Condition
+from typing import Optional, Hashable, Callable, Union, Iterator, Any
 
 from irene.brain.abc import VAApi, VAContext, VAActiveInteraction, InboundMessage
 from irene.brain.contexts import InterruptContext
 
 _DEFAULT_TIMEOUT = 10.0
 _DEFAULT_TICK_INTERVAL = 1.0
+_DEFAULT_SESSION_IDLE_TIMEOUT = 600.0
+_MIN_EVICTION_INTERVAL = 0.1
 
 
 class VAContextManager:
@@ -18,21 +26,52 @@ class VAContextManager:
     времени ожидания).
     """
 
-    def __init__(self, va: VAApi, default_context: VAContext, default_timeout: float = _DEFAULT_TIMEOUT):
+    def __init__(
+            self,
+            va: VAApi,
+            default_context: VAContext,
+            default_timeout: float = _DEFAULT_TIMEOUT,
+            scheduler: Optional['DeadlineScheduler'] = None,
+    ):
         """
         Args:
             va: экземпляр API голосового ассистента
             default_context: контекст диалога по-умолчанию
             default_timeout: время ожидания следующей команды по-умолчанию. Может быть изменено для отдельного
                 контекста (см. метод VAContext.get_timeout) или через поле VAContextManager.default_timeout
+            scheduler: планировщик, оповещающий менеджер об истечении времени ожидания.
+                Если не передан, то для отсчёта времени ожидания должен периодически вызываться метод tick_timeout.
         """
         self._va = va
         self._default_context = default_context
         self._current_context = default_context
         self.default_timeout = default_timeout
         self._timeout = _DEFAULT_TIMEOUT
+        self._scheduler = scheduler
+        self._deadline_generation = 0
+        self._missed_deadline: Optional[int] = None
+        self._closed = False
         self._lck = Lock()
 
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        self._lck.acquire()
+
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self):
+        self._lck.release()
+
+        # Истечение времени ожидания наступило, пока менеджер был занят (см. handle_deadline)
+        if (generation := self._missed_deadline) is not None:
+            self._missed_deadline = None
+
+            if generation == self._deadline_generation and (scheduler := self._scheduler) is not None:
+                scheduler.schedule(scheduler.now(), self, generation)
+
     def _set_ctx(self, ctx: Optional[VAContext]):
         if ctx is None:
             ctx = self._default_context
@@ -47,7 +86,7 @@ class VAContextManager:
         Args:
             message: сообщение от пользователя
         """
-        with self._lck:
+        with self._locked():
             self._set_ctx(
                 self._current_context.handle_command(self._va, message))
 
@@ -58,7 +97,7 @@ class VAContextManager:
         Args:
             interaction:
         """
-        with self._lck:
+        with self._locked():
             interrupted: Optional[VAContext] = self._current_context.handle_interrupt(
                 self._va)
 
@@ -79,14 +118,69 @@ class VAContextManager:
                         self._set_ctx(InterruptContext(
                             interrupted, interrupting))
 
+    def is_in_default_context(self) -> bool:
+        """
+        Проверяет, находится ли диалог в контексте по-умолчанию, т.е. не ожидает продолжения начатого ранее диалога.
+        """
+        return self._current_context is self._default_context
+
     def _start_timeout(self):
         self._timeout = self._current_context.get_timeout(self.default_timeout)
 
+        if (scheduler := self._scheduler) is not None:
+            # Ранее запланированное истечение времени ожидания становится неактуальным.
+            # В контексте по-умолчанию диалог ничего не ожидает, так что время ожидания не отсчитывается.
+            self._deadline_generation += 1
+
+            if self._current_context is not self._default_context and not self._closed:
+                scheduler.schedule(scheduler.now() + self._timeout, self, self._deadline_generation)
+
+    def close(self):
+        """
+        Отменяет запланированное истечение времени ожидания и запрещает планировать новые.
+
+        Вызывается при удалении сеанса, чтобы время ожидания не истекало в уже не существующем сеансе.
+        """
+        self._closed = True
+        self._deadline_generation += 1
+
+    def handle_deadline(self, generation: int):
+        """
+        Обрабатывает истечение времени ожидания, запланированное через ``DeadlineScheduler``.
+
+        Не ждёт завершения обработки команды в этом сеансе: если менеджер занят, то истечение времени ожидания
+        планируется повторно сразу после того, как менеджер освободится (если оно к тому времени не станет
+        неактуальным).
+
+        Args:
+            generation: номер, переданный планировщику вместе со временем истечения ожидания.
+                Если с тех пор контекст сменился, то истечение времени ожидания игнорируется.
+        """
+        if generation != self._deadline_generation:
+            return
+
+        # Отмечается до попытки захватить блокировку, чтобы поток, освобождающий её, не пропустил отметку
+        self._missed_deadline = generation
+
+        if not self._lck.acquire(blocking=False):
+            return
+
+        try:
+            self._missed_deadline = None
+
+            if generation != self._deadline_generation:
+                return
+
+            self._set_ctx(self._current_context.handle_timeout(self._va))
+        finally:
+            self._release()
+
     def tick_timeout(self, delta: float = 1.0):
         """
         Обрабатывает истечение времени ожидания следующей команды.
 
-        Этот метод должен периодически (раз в delta секунд) вызываться.
+        Этот метод должен периодически (раз в delta секунд) вызываться если менеджер создан без планировщика
+        (``DeadlineScheduler``).
         Для этого можно использовать TimeoutTicker.
 
         Когда команда выполняется, этот метод будет блокировать поток до завершения выполнения команды.
@@ -103,20 +197,335 @@ class VAContextManager:
                 self._start_timeout()
 
 
+class DeadlineScheduler(Thread):
+    """
+    Оповещает менеджеры контекста (VAContextManager) об истечении времени ожидания команд.
+
+    Хранит моменты истечения времени ожидания всех менеджеров в двоичной куче и спит до ближайшего из них, так что
+    время ожидания отсчитывается без погрешности, а при отсутствии ожидающих диалогов поток не просыпается вовсе.
+    Менеджер заново планирует истечение времени ожидания при каждой смене контекста, устаревшие записи отбрасываются
+    менеджером при обработке.
+
+    Сам поток планировщика только извлекает наступившие записи из кучи и передаёт их на выполнение в ``executor``,
+    так что долгая обработка истечения времени ожидания в одном сеансе не задерживает остальные сеансы.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic, executor: Optional[Executor] = None):
+        """
+        Args:
+            clock: функция, возвращающая текущее время в секундах
+            executor: исполнитель, в котором обрабатываются наступившие события.
+                Если не передан, то события обрабатываются прямо в потоке планировщика.
+        """
+        super().__init__(daemon=True)
+        self._clock = clock
+        self._executor = executor
+        self._heap: list[tuple[float, int, Callable[[], Any]]] = []
+        self._sequence = count()
+        self._cond = Condition()
+        self._terminated = False
+
+    def now(self) -> float:
+        """
+        Возвращает текущее время по часам планировщика.
+        """
+        return self._clock()
+
+    def pending_count(self) -> int:
+        """
+        Возвращает количество запланированных (в т.ч. устаревших) оповещений.
+        """
+        with self._cond:
+            return len(self._heap)
+
+    def schedule(self, deadline: float, manager: VAContextManager, generation: int):
+        """
+        Планирует вызов ``manager.handle_deadline(generation)`` в заданный момент времени.
+
+        Args:
+            deadline: момент времени по часам планировщика (см. ``now``)
+            manager: менеджер контекста
+            generation: значение, передаваемое менеджеру
+        """
+        self.call_at(deadline, partial(manager.handle_deadline, generation))
+
+    def call_at(self, deadline: float, callback: Callable[[], Any]):
+        """
+        Планирует вызов функции в заданный момент времени.
+
+        Args:
+            deadline: момент времени по часам планировщика (см. ``now``)
+            callback: вызываемая функция
+        """
+        with self._cond:
+            entry = (deadline, next(self._sequence), callback)
+            heapq.heappush(self._heap, entry)
+
+            if self._heap[0] is entry:
+                self._cond.notify()
+
+    def terminate(self):
+        """
+        Оповещает поток о необходимости завершить работу.
+        """
+        with self._cond:
+            self._terminated = True
+            self._cond.notify()
+
+    def _wait_next(self) -> Optional[tuple[float, int, Callable[[], Any]]]:
+        with self._cond:
+            while not self._terminated:
+                if not self._heap:
+                    self._cond.wait()
+                    continue
+
+                delay = self._heap[0][0] - self._clock()
+
+                if delay <= 0:
+                    return heapq.heappop(self._heap)
+
+                self._cond.wait(delay)
+
+            return None
+
+    @staticmethod
+    def _run_callback(callback: Callable[[], Any]):
+        # noinspection PyBroadException
+        try:
+            callback()
+        except Exception:
+            logging.exception(
+                "Ошибка при обработке истечения времени ожидания команды")
+
+    def run(self):
+        while (entry := self._wait_next()) is not None:
+            _, _, callback = entry
+
+            if self._executor is None:
+                self._run_callback(callback)
+                continue
+
+            # noinspection PyBroadException
+            try:
+                self._executor.submit(self._run_callback, callback)
+            except Exception:
+                logging.exception(
+                    "Не удалось передать на выполнение обработку истечения времени ожидания команды")
+
+        logging.debug("Поток отсчёта времени ожидания остановлен")
+
+
+class _Session:
+    __slots__ = ('manager', 'users', 'last_used')
+
+    def __init__(self, manager: VAContextManager, now: float):
+        self.manager = manager
+        self.users = 0
+        self.last_used = now
+
+
+class VASessionPool:
+    """
+    Набор менеджеров контекста, по одному для каждого сеанса диалога.
+
+    Сеансы (соединения веб-клиентов, чаты в телеграме и т.д.) различаются по ключу сеанса.
+    Каждый сеанс имеет собственный текущий контекст, время ожидания и блокировку, так что команды из разных сеансов
+    обрабатываются параллельно и не влияют на состояние диалога друг друга.
+
+    Глобальный сеанс (с ключом ``None``) существует всегда и используется для сообщений без ключа сеанса и для активных
+    взаимодействий.
+    Остальные сеансы создаются при получении первого сообщения и удаляются явно (см. ``close_session``) или после
+    ``idle_timeout`` секунд бездействия, даже если диалог в сеансе не вернулся в контекст по-умолчанию.
+    """
+
+    def __init__(
+            self,
+            va: VAApi,
+            default_context: VAContext,
+            default_timeout: float = _DEFAULT_TIMEOUT,
+            idle_timeout: float = _DEFAULT_SESSION_IDLE_TIMEOUT,
+            clock: Callable[[], float] = time.monotonic,
+            scheduler: Optional[DeadlineScheduler] = None,
+    ):
+        """
+        Args:
+            va: экземпляр API голосового ассистента
+            default_context: контекст диалога по-умолчанию, общий для всех сеансов
+            default_timeout: время ожидания следующей команды по-умолчанию
+            idle_timeout: время бездействия в секундах, после которого сеанс удаляется
+            clock: функция, возвращающая текущее время в секундах
+            scheduler: планировщик истечения времени ожидания, используемый менеджерами контекста всех сеансов.
+                Через него же удаляются неактивные сеансы, пока они есть.
+                Если не передан, то должен периодически вызываться метод tick_timeout.
+        """
+        self._va = va
+        self._default_context = default_context
+        self._default_timeout = default_timeout
+        self._idle_timeout = idle_timeout
+        self._clock = clock
+        self._scheduler = scheduler
+        self._global = VAContextManager(va, default_context, default_timeout, scheduler)
+        self._sessions: dict[Hashable, _Session] = {}
+        self._eviction_scheduled = False
+        self._lck = Lock()
+
+    def _schedule_eviction(self, now: float):
+        """
+        Планирует удаление неактивных сеансов на момент, когда истечёт время бездействия самого давно не
+        использовавшегося сеанса.
+
+        Вызывается с захваченной блокировкой.
+        Время последнего использования сеансов только растёт, так что уже запланированное удаление никогда не бывает
+        позже необходимого и повторно не планируется.
+        """
+        if (scheduler := self._scheduler) is None or self._eviction_scheduled:
+            return
+
+        idle_since = [session.last_used for session in self._sessions.values() if session.users == 0]
+
+        if not idle_since:
+            # Сеансов нет, или все они заняты - удаление будет запланировано после обработки команды
+            return
+
+        delay = max(min(idle_since) + self._idle_timeout - now, _MIN_EVICTION_INTERVAL)
+        scheduler.call_at(scheduler.now() + delay, self._handle_eviction_deadline)
+        self._eviction_scheduled = True
+
+    def _handle_eviction_deadline(self):
+        with self._lck:
+            self._eviction_scheduled = False
+            now = self._clock()
+            self._evict_idle(now)
+            self._schedule_eviction(now)
+
+    @property
+    def global_session(self) -> VAContextManager:
+        """
+        Менеджер контекста глобального сеанса.
+        """
+        return self._global
+
+    def session_count(self) -> int:
+        """
+        Возвращает количество существующих сеансов, не считая глобального.
+        """
+        return len(self._sessions)
+
+    @contextmanager
+    def _use_session(self, key: Hashable) -> Iterator[VAContextManager]:
+        with self._lck:
+            now = self._clock()
+
+            if (session := self._sessions.get(key)) is None:
+                self._evict_idle(now)
+                session = self._sessions[key] = _Session(
+                    VAContextManager(self._va, self._default_context, self._default_timeout, self._scheduler),
+                    now,
+                )
+
+            session.users += 1
+
+        try:
+            yield session.manager
+        finally:
+            with self._lck:
+                session.users -= 1
+                session.last_used = self._clock()
+                self._schedule_eviction(session.last_used)
+
+    def _evict_idle(self, now: float):
+        idle = [
+            key
+            for key, session in self._sessions.items()
+            if session.users == 0
+            and now - session.last_used >= self._idle_timeout
+        ]
+
+        for key in idle:
+            self._sessions.pop(key).manager.close()
+
+    def close_session(self, session: Hashable):
+        """
+        Удаляет сеанс, например, при закрытии соединения, с которым он связан.
+
+        Если в сеансе выполняется команда, то она будет завершена, но время ожидания следующей команды уже не будет
+        отсчитываться.
+        Если после этого придёт сообщение с тем же ключом, то будет создан новый сеанс.
+
+        Args:
+            session: ключ сеанса. Глобальный сеанс (``None``) удалить нельзя
+        """
+        if session is None:
+            return
+
+        with self._lck:
+            removed = self._sessions.pop(session, None)
+
+        if removed is not None:
+            removed.manager.close()
+
+    def process_command(self, message: InboundMessage, session: Optional[Hashable] = None):
+        """
+        Обрабатывает переданную текстовую команду в заданном сеансе.
+
+        Args:
+            message: сообщение от пользователя
+            session: ключ сеанса или ``None`` для глобального сеанса
+        """
+        if session is None:
+            self._global.process_command(message)
+            return
+
+        with self._use_session(session) as manager:
+            manager.process_command(message)
+
+    def process_active_interaction(self, interaction: VAActiveInteraction):
+        """
+        Выполняет активное взаимодействие в глобальном сеансе.
+
+        Args:
+            interaction:
+        """
+        self._global.process_active_interaction(interaction)
+
+    def tick_timeout(self, delta: float = 1.0):
+        """
+        Обрабатывает истечение времени ожидания во всех сеансах и удаляет неактивные сеансы.
+
+        Сеансы, в которых в данный момент обрабатывается команда, пропускаются - после обработки команды время ожидания
+        отсчитывается заново.
+
+        Args:
+            delta: прошедшее время в секундах
+        """
+        self._global.tick_timeout(delta)
+
+        with self._lck:
+            sessions = [session.manager for session in self._sessions.values() if session.users == 0]
+
+        for manager in sessions:
+            manager.tick_timeout(delta)
+
+        with self._lck:
+            self._evict_idle(self._clock())
+
+
 class TimeoutTicker(Thread):
     """
     Оповещает менеджер контекста (VAContextManager) течении времени.
 
+    Используется для менеджеров контекста, созданных без ``DeadlineScheduler``.
+
     Из-за особенностей работы менеджера контекста, возможна погрешность примерно в (-interval,0) во времени ожидания
     команд.
     Для уменьшения погрешности (если, вдруг, это критично) можно уменьшить interval, однако не слишком сильно, чтобы не
     повредить производительности.
     """
 
-    def __init__(self, cm: VAContextManager, interval: float = _DEFAULT_TICK_INTERVAL):
+    def __init__(self, cm: Union[VAContextManager, VASessionPool], interval: float = _DEFAULT_TICK_INTERVAL):
         """
         Args:
-            cm: экземпляр VAContextManager
+            cm: экземпляр VAContextManager или VASessionPool
             interval: интервал оповещения
         """
         super().__init__(daemon=True)
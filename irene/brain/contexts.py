@@ -1,13 +1,19 @@
 import random
+from concurrent.futures import Future
 from functools import partial
 from inspect import isgenerator, isclass
+from types import MappingProxyType
 from logging import getLogger
-from typing import Optional, Callable, Any, TypeVar, Collection, SupportsFloat
+from typing import Optional, Callable, Any, TypeVar, Collection, SupportsFloat, Sequence
 
 from irene.brain.abc import VAContext, VAApi, VAContextSource, VAContextGenerator, VAApiExt, OutputChannelPool, \
-    InboundMessage, VAContextConstructor
-from irene.brain.command_tree import VACommandTree, NoCommandMatchesException, AmbiguousCommandException
+    InboundMessage, VAContextConstructor, OutputChannel
+from irene.brain.command_tree import VACommandTree, NoCommandMatchesException, AmbiguousCommandException, \
+    FuzzyMatchingOptions
 from irene.brain.inbound_messages import PartialTextMessage
+from irene.utils.aho_corasick import AhoCorasickAutomaton
+from irene.utils.edit_distance import FuzzyWordIndex
+from irene.utils.metadata import MetadataMapping
 
 T = TypeVar('T')
 
@@ -20,13 +26,14 @@ class ApiExtProvider:
     """
 
     __slots__ = ('_next_context', '_next_context_timeout',
-                 '_msg', '_construct_ctx')
+                 '_msg', '_construct_ctx', '_api')
 
     def __init__(self, context_constructor: VAContextConstructor):
         self._next_context: Optional[VAContext] = None
         self._next_context_timeout: Optional[float] = None
         self._msg: Optional[InboundMessage] = None
         self._construct_ctx = context_constructor
+        self._api: Optional[_ApiExtImpl] = None
 
     def get_next_context(self, default: Optional[VAContext]) -> Optional[VAContext]:
         """
@@ -96,37 +103,49 @@ class ApiExtProvider:
     def using_va(self, va: VAApi) -> VAApiExt:
         """
         Возвращает экземпляр расширенного API для данного экземпляра базового API.
+
+        Экземпляр переиспользуется пока передаётся тот же экземпляр базового API.
         """
-        provider = self
+        if (api := self._api) is None or api._va is not va:
+            api = self._api = _ApiExtImpl(self, va)
+
+        return api
+
 
-        class _ApiExtImpl(VAApiExt):
-            __slots__ = ()
+class _ApiExtImpl(VAApiExt):
+    __slots__ = ('_provider', '_va')
 
-            def get_message(self) -> InboundMessage:
-                msg = provider._msg
+    def __init__(self, provider: ApiExtProvider, va: VAApi):
+        self._provider = provider
+        self._va = va
 
-                if msg is None:
-                    raise RuntimeError(
-                        'get_message вызван не из обработчика команды либо API инициализирован некорректно'
-                    )
+    def get_message(self) -> InboundMessage:
+        msg = self._provider._msg
+
+        if msg is None:
+            raise RuntimeError(
+                'get_message вызван не из обработчика команды либо API инициализирован некорректно'
+            )
 
-                return msg
+        return msg
 
-            def context_set(self, ctx: VAContextSource, timeout: Optional[float] = None):
-                provider._next_context = provider._construct_ctx(
-                    ctx, ext_api_provider=provider)
-                provider._next_context_timeout = timeout
+    def context_set(self, ctx: VAContextSource, timeout: Optional[float] = None):
+        provider = self._provider
+        provider._next_context = provider._construct_ctx(
+            ctx, ext_api_provider=provider)
+        provider._next_context_timeout = timeout
 
-            def submit_active_interaction(self, *args, **kwargs):
-                if 'related_message' not in kwargs and provider._msg is not None:
-                    kwargs['related_message'] = provider._msg
+    def submit_active_interaction(self, *args, **kwargs):
+        if 'related_message' not in kwargs and self._provider._msg is not None:
+            kwargs['related_message'] = self._provider._msg
 
-                return va.submit_active_interaction(*args, **kwargs)
+        return self._va.submit_active_interaction(*args, **kwargs)
 
-            def get_outputs(self) -> OutputChannelPool:
-                return va.get_outputs()
+    def get_outputs(self) -> OutputChannelPool:
+        return self._va.get_outputs()
 
-        return _ApiExtImpl()
+    def dispatch_output(self, channel: OutputChannel, send: Callable[[], Any]) -> 'Future[Any]':
+        return self._va.dispatch_output(channel, send)
 
 
 def _function_to_str(fn: Callable):
@@ -135,11 +154,51 @@ def _function_to_str(fn: Callable):
     return f'{mod}.{name}'
 
 
+class _ApiExtProviderPool:
+    """
+    Набор свободных экземпляров ``ApiExtProvider`` для контекстов-функций, которым провайдер не был передан явно.
+
+    Провайдер переиспользуется между сообщениями, но не между одновременно обрабатываемыми сообщениями: на время вызова
+    функции он изымается из набора. Провайдер, переданный генератору или новому контексту (через ``context_set``),
+    в набор не возвращается, т.к. остаётся связан с продолжением диалога.
+    """
+    __slots__ = ('_free', '_construct_ctx')
+
+    def __init__(self, context_constructor: VAContextConstructor):
+        self._free: list[ApiExtProvider] = []
+        self._construct_ctx = context_constructor
+
+    def call(self, va: VAApi, message: InboundMessage, fn: Callable[..., Any], *args: Any) -> Optional[VAContext]:
+        """
+        Вызывает функцию со свободным (или новым) провайдером и возвращает контекст для продолжения диалога.
+
+        Args:
+            va:
+            message: обрабатываемое сообщение
+            fn: функция, принимающая расширенный API, текст сообщения и дополнительные аргументы
+            *args: дополнительные аргументы функции
+        """
+        try:
+            ext = self._free.pop()
+        except IndexError:
+            ext = ApiExtProvider(self._construct_ctx)
+
+        ext.set_inbound_message(message)
+        returned = fn(ext.using_va(va), message.get_text(), *args)
+        handed_off = isgenerator(returned) or ext._next_context is not None
+
+        try:
+            return ext.get_next_context_from_returned_value(returned, va)
+        finally:
+            if not handed_off:
+                self._free.append(ext)
+
+
 class FunctionContext(VAContext):
     """
     Контекст, однократно вызывающий заданную функцию при получении команды.
     """
-    __slots__ = ('_fn', '_ext', '_construct_ctx')
+    __slots__ = ('_fn', '_ext', '_ext_pool')
 
     def __init__(
             self,
@@ -150,10 +209,12 @@ class FunctionContext(VAContext):
     ):
         self._fn = fn
         self._ext = ext_api_provider
-        self._construct_ctx: VAContextConstructor = context_constructor
+        self._ext_pool = _ApiExtProviderPool(context_constructor)
 
     def handle_command(self, va: VAApi, message: InboundMessage) -> Optional[VAContext]:
-        ext = self._ext or ApiExtProvider(self._construct_ctx)
+        if (ext := self._ext) is None:
+            return self._ext_pool.call(va, message, self._fn)
+
         ext.set_inbound_message(message)
 
         return ext.get_next_context_from_returned_value(self._fn(ext.using_va(va), message.get_text()), va)
@@ -167,7 +228,7 @@ class FunctionContextWithArgs(VAContext):
     Контекст, однократно вызывающий заданную функцию при получении команды и передающий
     этой функции дополнительный аргумент.
     """
-    __slots__ = ('_fn', '_arg', '_ext', '_construct_ctx')
+    __slots__ = ('_fn', '_arg', '_ext', '_ext_pool')
 
     def __init__(
             self,
@@ -180,10 +241,11 @@ class FunctionContextWithArgs(VAContext):
         self._fn = fn
         self._arg = arg
         self._ext = ext_api_provider
-        self._construct_ctx: VAContextConstructor = context_constructor
+        self._ext_pool = _ApiExtProviderPool(context_constructor)
 
     def handle_command(self, va: VAApi, message: InboundMessage) -> Optional[VAContext]:
-        ext = self._ext or ApiExtProvider(self._construct_ctx)
+        if (ext := self._ext) is None:
+            return self._ext_pool.call(va, message, self._fn, self._arg)
 
         ext.set_inbound_message(message)
 
@@ -328,7 +390,12 @@ class CommandTreeContext(VAContext):
     def handle_command(self, va: VAApi, message: InboundMessage) -> Optional[VAContext]:
         try:
             ctx: VAContext
-            ctx, rest_text = self._tree.get_command(message.get_text())
+            hypotheses = message.get_hypotheses()
+
+            if len(hypotheses) > 1:
+                ctx, rest_text = self._tree.get_command_for_hypotheses(hypotheses)
+            else:
+                ctx, rest_text = self._tree.get_command(message.get_text())
         except NoCommandMatchesException as e:
             self.logger.info(str(e))
 
@@ -338,46 +405,128 @@ class CommandTreeContext(VAContext):
 
             return self._handle_error(va, message, self._ambiguous_command_context)
 
-        return ctx.handle_command(va, PartialTextMessage(message, rest_text))
+        return ctx.handle_command(va, PartialTextMessage(message, rest_text, canonical=True))
 
 
 class TriggerPhraseContext(VAContext):
     """
     Контекст, ожидающий появления во входящем потоке ключевой фразы (имени ассистента) и передающий управление
     следующему контексту при его обнаружении.
+
+    Если для сообщения есть несколько вариантов распознанного текста, то ключевая фраза ищется только в достаточно
+    вероятных вариантах (см. ``MIN_TRIGGER_CONFIDENCE_RATIO``), чтобы маловероятные варианты, случайно содержащие
+    имя ассистента, не активировали его.
     """
-    __slots__ = ('_phrases', '_next_context')
+    __slots__ = ('_automaton', '_next_context', '_fuzzy', '_vocabulary')
 
-    def __init__(self, phrases: Collection[Collection[str]], next_context: VAContext):
+    MIN_TRIGGER_CONFIDENCE_RATIO = 0.5
+    """
+    Минимальное отношение уверенности варианта текста к уверенности наиболее вероятного варианта, при котором ключевая
+    фраза в этом варианте активирует ассистента
+    """
+
+    def __init__(
+            self,
+            phrases: Collection[Collection[str]],
+            next_context: VAContext,
+            fuzzy_matching: Optional[FuzzyMatchingOptions] = None,
+    ):
         """
         Args:
             phrases: набор ключевых фраз. Каждая фраза представлена как коллекция слов.
             next_context: контекст, которому нужно передать управление в случае обнаружения ключевой фразы.
                 Остаток фразы будет передан в метод handle_command этого контекста.
+            fuzzy_matching: параметры нечёткого сопоставления слов сообщения со словами ключевых фраз или ``None`` если
+                слова должны совпадать точно
         """
-        self._phrases = phrases
+        self._automaton = AhoCorasickAutomaton((tuple(phrase), None) for phrase in phrases)
         self._next_context = next_context
+        self._fuzzy = fuzzy_matching
+        self._vocabulary: Optional[FuzzyWordIndex] = None
+
+        if fuzzy_matching is not None:
+            self._vocabulary = FuzzyWordIndex(
+                {word for phrase in phrases for word in phrase},
+                fuzzy_matching.max_distance,
+            )
+
+    def _correct_words(self, words: tuple[str, ...]) -> tuple[str, ...]:
+        """
+        Заменяет слова, похожие на слова ключевых фраз, на эти слова.
+        """
+        vocabulary, fuzzy = self._vocabulary, self._fuzzy
+
+        if vocabulary is None or fuzzy is None:
+            return words
+
+        corrected = list(words)
+
+        for i, word in enumerate(words):
+            if len(word) < fuzzy.min_word_length:
+                continue
+
+            similar = vocabulary.find(word)
+
+            if similar and all(distance > 0 for _, distance in similar):
+                corrected[i] = min(similar, key=lambda it: (it[1], it[0]))[0]
+
+        return tuple(corrected)
 
     def handle_command(self, va: VAApi, message: InboundMessage) -> Optional[VAContext]:
         if message.meta.get('is_direct', False):
             return self._next_context.handle_command(va, message)
 
-        words = message.get_text().split(' ')
+        if len(hypotheses := message.get_hypotheses()) > 1:
+            return self._handle_hypotheses(va, message, hypotheses)
+
+        words = message.get_words()
+
+        if (end := self._find_phrase_end(words)) is None:
+            return None
+
+        return self._next_context.handle_command(
+            va,
+            PartialTextMessage(message, words[end:], _DIRECT_MESSAGE_META)
+        )
+
+    def _find_phrase_end(self, words: tuple[str, ...]) -> Optional[int]:
+        if (found := self._automaton.find_earliest(self._correct_words(words))) is None:
+            return None
+
+        return found[1]
+
+    def _handle_hypotheses(
+            self,
+            va: VAApi,
+            message: InboundMessage,
+            hypotheses: Sequence[tuple[str, float]],
+    ) -> Optional[VAContext]:
+        # Дальше передаются остатки только тех вариантов текста, в которых есть ключевая фраза
+        rests: list[tuple[str, float]] = []
+        min_confidence = hypotheses[0][1] * self.MIN_TRIGGER_CONFIDENCE_RATIO
+        triggered = False
+
+        for text, confidence in hypotheses:
+            words = tuple(text.split())
+
+            if (end := self._find_phrase_end(words)) is not None:
+                rests.append((' '.join(words[end:]), confidence))
+                triggered = triggered or confidence >= min_confidence
 
-        while len(words) > 0:
-            for phrase in self._phrases:
-                if words[:len(phrase)] == phrase:
-                    rest_text = ' '.join(words[len(phrase):])
+        if not triggered:
+            return None
 
-                    return self._next_context.handle_command(
-                        va,
-                        PartialTextMessage(message, rest_text, {
-                            'is_direct': True})
-                    )
+        return self._next_context.handle_command(
+            va,
+            PartialTextMessage(
+                message, rests[0][0], _DIRECT_MESSAGE_META,
+                canonical=True,
+                hypotheses=rests if len(rests) > 1 else None,
+            )
+        )
 
-            words = words[1:]
 
-        return None
+_DIRECT_MESSAGE_META: MetadataMapping = MappingProxyType({'is_direct': True})
 
 
 class InterruptContext(VAContext):
@@ -497,6 +646,7 @@ def construct_context(
         *,
         ext_api_provider: Optional[ApiExtProvider] = None,
         construct_nested: Optional[VAContextConstructor] = None,
+        fuzzy_matching: Optional[FuzzyMatchingOptions] = None,
         **_kwargs,
 ) -> VAContext:
     """
@@ -531,6 +681,8 @@ def construct_context(
             Функция, которая будет использоваться для создания дополнительных контекстов - контекстов команд в случае
             получения словаря, контекстов, порождаемых создаваемым контекстом.
             Если аргумент не передан, то будет использоваться сама функция ``construct_context``.
+        fuzzy_matching:
+            параметры нечёткого сопоставления слов для деревьев команд, создаваемых из словарей
 
     Returns:
         готовый контекст
@@ -540,7 +692,7 @@ def construct_context(
     """
     if construct_nested is None:
         construct_nested = partial(
-            construct_context, ext_api_provider=ext_api_provider)
+            construct_context, ext_api_provider=ext_api_provider, fuzzy_matching=fuzzy_matching)
 
     if isinstance(src, VAContext):
         return src
@@ -557,7 +709,7 @@ def construct_context(
         ambiguous_command_context, = src.pop(
             AMBIGUOUS_COMMAND_SPECIAL_KEY, None),
 
-        tree = VACommandTree[VAContext]()
+        tree = VACommandTree[VAContext](fuzzy_matching)
         tree.add_commands(src, construct_nested)
         uc_constructed, ac_constructed = None, None
 
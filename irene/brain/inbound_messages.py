@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, Union, Iterable, Sequence
 
 from irene.brain.abc import InboundMessage, OutputChannelPool
 from irene.brain.canonical_text import convert_to_canonical
@@ -9,7 +9,7 @@ class PlainTextMessage(InboundMessage):
     """
     Простое текстовое сообщение, не подвергнутое никаким преобразованиям.
     """
-    __slots__ = ('_canonical', '_txt', '_out', '_meta')
+    __slots__ = ('_canonical', '_words', '_txt', '_out', '_meta')
 
     def __init__(
             self,
@@ -18,6 +18,7 @@ class PlainTextMessage(InboundMessage):
             meta: Optional[MetadataMapping] = None,
     ):
         self._canonical = convert_to_canonical(text)
+        self._words: Optional[tuple[str, ...]] = None
         self._txt = text
         self._out = outputs
         self._meta = meta if meta is not None else {}
@@ -25,6 +26,12 @@ class PlainTextMessage(InboundMessage):
     def get_text(self) -> str:
         return self._canonical
 
+    def get_words(self) -> tuple[str, ...]:
+        if (words := self._words) is None:
+            words = self._words = tuple(self._canonical.split())
+
+        return words
+
     def get_original_text(self) -> str:
         return self._txt
 
@@ -36,27 +43,111 @@ class PlainTextMessage(InboundMessage):
         return self._meta
 
 
+class SpeechHypothesesMessage(PlainTextMessage):
+    """
+    Распознанная речь, представленная несколькими вариантами (гипотезами) текста.
+
+    Текстом сообщения считается наиболее вероятный вариант, остальные доступны через ``get_hypotheses()``.
+    """
+    __slots__ = ('_hypotheses',)
+
+    def __init__(
+            self,
+            hypotheses: Iterable[tuple[str, float]],
+            outputs: OutputChannelPool,
+            meta: Optional[MetadataMapping] = None,
+    ):
+        """
+        Args:
+            hypotheses:
+                пары из текста и уверенности в нём (от 0 до 1) в произвольном порядке
+            outputs:
+                пул каналов вывода
+            meta:
+                метаданные сообщения
+        Raises:
+            ValueError - если не передано ни одного варианта
+        """
+        ranked = sorted(hypotheses, key=lambda it: it[1], reverse=True)
+
+        if len(ranked) == 0:
+            raise ValueError("Не передано ни одного варианта текста")
+
+        super().__init__(ranked[0][0], outputs, meta)
+
+        self._hypotheses = (
+            (self._canonical, ranked[0][1]),
+            *((convert_to_canonical(text), confidence) for text, confidence in ranked[1:]),
+        )
+
+    def get_hypotheses(self) -> Sequence[tuple[str, float]]:
+        return self._hypotheses
+
+
 class PartialTextMessage(InboundMessage):
     """
     Остаток сообщения, часть которого уже была использована для выбора обработчика.
     """
 
-    __slots__ = ('_original', '_text', '_meta')
+    __slots__ = ('_original', '_parent', '_text', '_words', '_meta', '_meta_overrides', '_hypotheses')
 
     def __init__(
             self,
             original: InboundMessage,
-            text_slice: str,
-            meta_overrides: Optional[MetadataMapping] = None
+            text_slice: Union[str, tuple[str, ...]],
+            meta_overrides: Optional[MetadataMapping] = None,
+            *,
+            canonical: bool = False,
+            hypotheses: Optional[Sequence[tuple[str, float]]] = None,
     ):
+        """
+        Args:
+            original:
+                исходное сообщение
+            text_slice:
+                остаток текста сообщения - строка или кортеж слов в каноническом формате
+            meta_overrides:
+                метаданные, заменяющие метаданные исходного сообщения
+            canonical:
+                ``True`` если переданная строка уже имеет канонический формат и её не нужно преобразовывать
+            hypotheses:
+                остатки вариантов текста исходного сообщения (см. ``InboundMessage.get_hypotheses``).
+                Первый вариант должен совпадать с остатком текста.
+                Если не переданы, то у сообщения единственный вариант текста
+        """
         self._original = original.get_original()
-        self._text = convert_to_canonical(text_slice)
-        self._meta = original.meta if meta_overrides is None else {
-            **original.meta, **meta_overrides}
+        self._parent = original
+        self._words: Optional[tuple[str, ...]] = None
+        self._text = ''
+
+        if isinstance(text_slice, tuple):
+            self._words = text_slice
+        else:
+            self._text = text_slice if canonical else convert_to_canonical(text_slice)
+
+        # Метаданные объединяются при первом обращении т.к. обработчики большинства сообщений к ним не обращаются
+        self._meta: Optional[MetadataMapping] = None
+        self._meta_overrides = meta_overrides
+        self._hypotheses = hypotheses
 
     def get_text(self) -> str:
+        if self._words is not None and not self._text:
+            self._text = ' '.join(self._words)
+
         return self._text
 
+    def get_words(self) -> tuple[str, ...]:
+        if (words := self._words) is None:
+            words = self._words = tuple(self._text.split())
+
+        return words
+
+    def get_hypotheses(self) -> Sequence[tuple[str, float]]:
+        if (hypotheses := self._hypotheses) is None:
+            hypotheses = self._hypotheses = ((self.get_text(), 1.0),)
+
+        return hypotheses
+
     def get_related_outputs(self) -> OutputChannelPool:
         return self._original.get_related_outputs()
 
@@ -65,4 +156,16 @@ class PartialTextMessage(InboundMessage):
 
     @property
     def meta(self) -> MetadataMapping:
-        return self._meta
+        if (meta := self._meta) is None:
+            meta = self._parent.meta
+            overrides = self._meta_overrides
+
+            if overrides is not None and any(meta.get(k, _MISSING) != v for k, v in overrides.items()):
+                meta = {**meta, **overrides}
+
+            self._meta = meta
+
+        return meta
+
+
+_MISSING = object()
@@ -0,0 +1,94 @@
+import logging
+from collections import deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Optional, Hashable
+
+from irene.brain.abc import OutputChannel
+
+__all__ = ['OutputDispatcher']
+
+_Task = tuple[Future, Callable[[], Any]]
+
+
+class OutputDispatcher:
+    """
+    Выполняет вывод в каналы вывода в фоновых потоках.
+
+    Вывод на каждое устройство (см. ``OutputChannel.output_device``) выполняется в порядке отправки, по одному сообщению
+    за раз, даже если он выполняется через разные каналы (например, речь и звуковой сигнал на одни и те же динамики).
+    Вывод на разные устройства выполняется параллельно.
+    Это позволяет обработчикам команд не ждать окончания воспроизведения ответа, удерживая блокировку менеджера
+    контекста.
+    """
+
+    __slots__ = ('_executor', '_own_executor', '_queues', '_lck', '_logger')
+
+    def __init__(self, executor: Optional[Executor] = None):
+        """
+        Args:
+            executor:
+                исполнитель, в потоках которого выполняется вывод.
+                Если не передан, то создаётся собственный пул потоков.
+        """
+        self._own_executor = executor is None
+        self._executor = executor or ThreadPoolExecutor(thread_name_prefix='output')
+
+        # Очереди по устройствам вывода. Очереди существуют только пока в них есть невыполненные задачи
+        self._queues: dict[Hashable, deque[_Task]] = {}
+        self._lck = Lock()
+        self._logger = logging.getLogger('output-dispatcher')
+
+    def submit(self, channel: OutputChannel, send: Callable[[], Any]) -> 'Future[Any]':
+        """
+        Ставит вывод в очередь устройства, на которое выводит канал.
+
+        Args:
+            channel:
+                канал вывода
+            send:
+                функция, выполняющая вывод в канал
+        Returns:
+            ``Future``, завершающийся по окончании вывода
+        """
+        future: Future = Future()
+        key = channel.output_device
+
+        with self._lck:
+            queue = self._queues.get(key)
+            start = queue is None
+
+            if queue is None:
+                queue = self._queues[key] = deque()
+
+            queue.append((future, send))
+
+        if start:
+            self._executor.submit(self._drain, key, queue)
+
+        return future
+
+    def _drain(self, key: Hashable, queue: deque[_Task]):
+        while True:
+            with self._lck:
+                if not queue:
+                    del self._queues[key]
+                    return
+
+                future, send = queue.popleft()
+
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(send())
+            except BaseException as e:
+                self._logger.exception("Ошибка при выводе в канал")
+                future.set_exception(e)
+
+    def shutdown(self):
+        """
+        Завершает работу собственного пула потоков, дождавшись выполнения поставленных в очередь задач.
+        """
+        if self._own_executor:
+            self._executor.shutdown(wait=True)
@@ -5,6 +5,8 @@ from unittest.mock import Mock
 from irene import VAApi, VAContext
 from irene.brain.abc import InboundMessage
 from irene.brain.contexts import construct_context, CommandTreeContext
+from irene.brain.inbound_messages import SpeechHypothesesMessage
+from irene.brain.output_pool import EMPTY_OUTPUT_POOL
 from irene.test_utuls import VAContextMock
 from irene.test_utuls.stub_text_message import tm
 
@@ -108,6 +110,23 @@ class CommandTreeContextTest(unittest.TestCase):
             self.c2
         )
 
+    def test_hypotheses(self):
+        self.c1.cmd_contexts["пожалуйста"] = self.c2
+        ctx = construct_context({
+            "поставь таймер": self.c1,
+        })
+
+        self.assertIs(
+            ctx.handle_command(
+                self.va,
+                SpeechHypothesesMessage(
+                    [("поставь тайгер пожалуйста", 0.7), ("поставь таймер пожалуйста", 0.3)],
+                    EMPTY_OUTPUT_POOL
+                )
+            ),
+            self.c2
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,9 +1,11 @@
+import threading
 import time
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock, call, patch
 
 from irene.brain.abc import VAApi
-from irene.brain.context_manager import VAContextManager, TimeoutTicker
+from irene.brain.context_manager import VAContextManager, TimeoutTicker, VASessionPool, DeadlineScheduler
 from irene.test_utuls import VAContextMock
 from irene.test_utuls.stub_text_message import tm
 
@@ -62,6 +64,202 @@ class ContextManagerTest(unittest.TestCase):
             self.va, "пока")
 
 
+class DeadlineSchedulerTest(unittest.TestCase):
+    def setUp(self):
+        self.hi_to_ctx = VAContextMock()
+
+        self.hi_ctx = VAContextMock()
+        self.hi_ctx.timeout = 0.1
+        self.hi_ctx.timeout_context = self.hi_to_ctx
+        self.hi_ctx.cmd_contexts["ещё"] = self.hi_ctx
+
+        self.default_ctx = VAContextMock()
+        self.default_ctx.cmd_contexts["привет"] = self.hi_ctx
+
+        self.va = Mock(spec=VAApi)
+        self.scheduler = DeadlineScheduler()
+        self.scheduler.start()
+        self.mgr = VAContextManager(self.va, self.default_ctx, scheduler=self.scheduler)
+
+    def tearDown(self):
+        self.scheduler.terminate()
+
+        # Зависнет если остановка потока не сработает
+        self.scheduler.join()
+
+    def test_timeout(self):
+        self.mgr.process_command(tm("привет"))
+
+        time.sleep(0.05)
+        self.hi_ctx.handle_timeout.assert_not_called()
+
+        time.sleep(0.15)
+        self.hi_ctx.handle_timeout.assert_called_once_with(self.va)
+
+        self.mgr.process_command(tm("пока"))
+        self.hi_to_ctx.handle_command_text.assert_called_once_with(self.va, "пока")
+
+    def test_context_change_rearms_timeout(self):
+        self.mgr.process_command(tm("привет"))
+        time.sleep(0.07)
+        self.mgr.process_command(tm("ещё"))
+        time.sleep(0.07)
+
+        self.hi_ctx.handle_timeout.assert_not_called()
+
+        time.sleep(0.1)
+        self.hi_ctx.handle_timeout.assert_called_once_with(self.va)
+
+    def test_no_deadlines_in_default_context(self):
+        self.mgr.process_command(tm("пока"))
+
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_many_sessions(self):
+        self.hi_ctx.timeout_context = None
+        pool = VASessionPool(self.va, self.default_ctx, scheduler=self.scheduler)
+
+        for i in range(100):
+            pool.process_command(tm("привет"), i)
+
+        time.sleep(0.3)
+
+        self.assertEqual(self.hi_ctx.handle_timeout.call_count, 100)
+        # Остаётся только удаление неактивных сеансов
+        self.assertEqual(self.scheduler.pending_count(), 1)
+
+    def test_no_deadlines_without_sessions(self):
+        pool = VASessionPool(self.va, self.default_ctx, scheduler=self.scheduler)
+        pool.process_command(tm("пока"))
+
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+    def test_busy_session_deadline_retried(self):
+        self.mgr.process_command(tm("привет"))
+
+        with self.mgr._locked():
+            time.sleep(0.2)
+            self.hi_ctx.handle_timeout.assert_not_called()
+            # Пока менеджер занят, истечение времени ожидания не перепланируется
+            self.assertEqual(self.scheduler.pending_count(), 0)
+
+        time.sleep(0.05)
+        self.hi_ctx.handle_timeout.assert_called_once_with(self.va)
+
+    def test_slow_timeout_does_not_delay_other_sessions(self):
+        executor = ThreadPoolExecutor(2)
+        self.addCleanup(executor.shutdown)
+        scheduler = DeadlineScheduler(executor=executor)
+        scheduler.start()
+        self.addCleanup(scheduler.join)
+        self.addCleanup(scheduler.terminate)
+
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow_timeout(_va):
+            release.wait(1)
+
+        slow_ctx = VAContextMock()
+        slow_ctx.timeout = 0.05
+        slow_ctx.handle_timeout.side_effect = slow_timeout
+        self.default_ctx.cmd_contexts["медленно"] = slow_ctx
+
+        pool = VASessionPool(self.va, self.default_ctx, scheduler=scheduler)
+        pool.process_command(tm("медленно"), 'slow')
+        pool.process_command(tm("привет"), 'fast')
+
+        time.sleep(0.25)
+
+        slow_ctx.handle_timeout.assert_called_once_with(self.va)
+        self.hi_ctx.handle_timeout.assert_called_once_with(self.va)
+
+    def test_closed_session_does_not_time_out(self):
+        pool = VASessionPool(self.va, self.default_ctx, scheduler=self.scheduler)
+        pool.process_command(tm("привет"), 'chat1')
+
+        pool.close_session('chat1')
+        time.sleep(0.2)
+
+        self.hi_ctx.handle_timeout.assert_not_called()
+
+    def test_idle_sessions_evicted(self):
+        pool = VASessionPool(self.va, self.default_ctx, idle_timeout=0.1, scheduler=self.scheduler)
+        pool.process_command(tm("пока"), 'chat1')
+        self.assertEqual(pool.session_count(), 1)
+
+        time.sleep(0.3)
+
+        self.assertEqual(pool.session_count(), 0)
+        self.assertEqual(self.scheduler.pending_count(), 0)
+
+
+class SessionPoolTest(unittest.TestCase):
+    def setUp(self):
+        self.hi_to_ctx = VAContextMock()
+
+        self.hi_ctx = VAContextMock()
+        self.hi_ctx.timeout = 1.0
+        self.hi_ctx.timeout_context = self.hi_to_ctx
+
+        self.default_ctx = VAContextMock()
+        self.default_ctx.cmd_contexts["привет"] = self.hi_ctx
+
+        self.va = Mock(spec=VAApi)
+        self.now = 0.0
+        self.pool = VASessionPool(self.va, self.default_ctx, idle_timeout=60.0, clock=lambda: self.now)
+
+    def test_sessions_are_independent(self):
+        self.pool.process_command(tm("привет"), 'chat1')
+        self.pool.process_command(tm("пока"), 'chat2')
+
+        self.hi_ctx.handle_command_text.assert_not_called()
+        self.default_ctx.handle_command_text.assert_called_with(self.va, "пока")
+
+        self.pool.process_command(tm("пока"), 'chat1')
+
+        self.hi_ctx.handle_command_text.assert_called_once_with(self.va, "пока")
+
+    def test_global_session(self):
+        self.pool.process_command(tm("привет"))
+
+        self.assertFalse(self.pool.global_session.is_in_default_context())
+        self.assertEqual(self.pool.session_count(), 0)
+
+    def test_timeouts_per_session(self):
+        self.pool.process_command(tm("привет"), 'chat1')
+
+        self.pool.tick_timeout(1.001)
+
+        self.hi_ctx.handle_timeout.assert_called_once_with(self.va)
+
+    def test_idle_sessions_evicted(self):
+        self.pool.process_command(tm("пока"), 'chat1')
+        self.pool.process_command(tm("привет"), 'chat2')
+        self.assertEqual(self.pool.session_count(), 2)
+
+        self.now = 30.0
+        self.pool.tick_timeout(0.0)
+        self.assertEqual(self.pool.session_count(), 2)
+
+        self.now = 61.0
+        self.pool.tick_timeout(0.0)
+
+        # Сеанс, ожидающий продолжения диалога, тоже удаляется
+        self.assertEqual(self.pool.session_count(), 0)
+        self.hi_ctx.handle_timeout.assert_not_called()
+
+    def test_close_session(self):
+        self.pool.process_command(tm("привет"), 'chat1')
+
+        self.pool.close_session('chat1')
+        self.pool.close_session('chat2')
+        self.assertEqual(self.pool.session_count(), 0)
+
+        self.pool.process_command(tm("пока"), 'chat1')
+        self.hi_ctx.handle_command_text.assert_not_called()
+
+
 class TimeoutTickerTest(unittest.TestCase):
     def setUp(self) -> None:
         self.cm = Mock(spec=VAContextManager)
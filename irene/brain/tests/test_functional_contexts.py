@@ -1,7 +1,11 @@
 import unittest
+from unittest.mock import Mock
 
 from irene import VAApiExt, ContextTimeoutException
-from irene.brain.contexts import construct_context
+from irene.brain.abc import VAApi
+from irene.brain.contexts import construct_context, ApiExtProvider
+from irene.brain.inbound_messages import PlainTextMessage
+from irene.brain.output_pool import EMPTY_OUTPUT_POOL
 from irene.test_utuls import DialogTestCase
 
 
@@ -114,6 +118,50 @@ class FunctionalContextsTest(DialogTestCase):
         """)
 
 
+class ApiExtProviderTest(unittest.TestCase):
+    def test_api_reused(self):
+        provider = ApiExtProvider(construct_context)
+        va, other_va = Mock(spec=VAApi), Mock(spec=VAApi)
+
+        self.assertIs(provider.using_va(va), provider.using_va(va))
+        self.assertIsNot(provider.using_va(other_va), provider.using_va(va))
+
+        provider.using_va(va).get_outputs()
+        va.get_outputs.assert_called_once()
+
+    def test_function_context_reuses_provider(self):
+        apis = []
+
+        def fn(api: VAApiExt, _text: str):
+            apis.append(api)
+            api.get_message()
+
+        ctx = construct_context(fn)
+        va = Mock(spec=VAApi)
+
+        for text in ("раз", "два"):
+            ctx.handle_command(va, PlainTextMessage(text, EMPTY_OUTPUT_POOL))
+
+        self.assertIs(apis[0], apis[1])
+        self.assertEqual(apis[1].get_message().get_text(), "два")
+
+    def test_provider_not_reused_while_dialog_continues(self):
+        apis = []
+
+        def fn(api: VAApiExt, _text: str):
+            apis.append(api)
+            yield
+
+        ctx = construct_context(fn)
+        va = Mock(spec=VAApi)
+
+        for text in ("раз", "два"):
+            ctx.handle_command(va, PlainTextMessage(text, EMPTY_OUTPUT_POOL))
+
+        self.assertIsNot(apis[0], apis[1])
+        self.assertEqual(apis[0].get_message().get_text(), "раз")
+
+
 class GeneratorContextTest(DialogTestCase):
     @staticmethod
     def _timer_gen(_va: VAApiExt, text: str):
@@ -1,6 +1,6 @@
 import unittest
 
-from irene.brain.inbound_messages import PlainTextMessage, PartialTextMessage
+from irene.brain.inbound_messages import PlainTextMessage, PartialTextMessage, SpeechHypothesesMessage
 from irene.brain.output_pool import OutputPoolImpl
 
 
@@ -45,6 +45,57 @@ class InboundMessagesTest(unittest.TestCase):
             om
         )
 
+    def test_words(self):
+        om = PlainTextMessage("Привет, Ирина!", self.pool)
+
+        self.assertEqual(om.get_words(), ("привет", "ирина"))
+        self.assertEqual(PlainTextMessage("", self.pool).get_words(), ())
+
+    def test_partial_message_from_words(self):
+        om = PlainTextMessage("Ирина, который час?", self.pool)
+        msg = PartialTextMessage(om, om.get_words()[1:])
+
+        self.assertEqual(msg.get_text(), "который час")
+        self.assertEqual(msg.get_words(), ("который", "час"))
+        self.assertEqual(PartialTextMessage(om, ()).get_text(), "")
+
+    def test_partial_message_meta(self):
+        om = PlainTextMessage("Ирина, который час?", self.pool, {'language': 'ru'})
+
+        self.assertIs(PartialTextMessage(om, "который час").meta, om.meta)
+        self.assertEqual(
+            PartialTextMessage(om, "который час", {'is_direct': True}).meta,
+            {'language': 'ru', 'is_direct': True}
+        )
+
+        direct = PartialTextMessage(om, "который час", {'is_direct': True})
+        self.assertIs(PartialTextMessage(direct, "час", {'is_direct': True}).meta, direct.meta)
+
+    def test_hypotheses(self):
+        msg = SpeechHypothesesMessage([("Включи свет", 0.25), ("Выключи свет!", 0.75)], self.pool)
+
+        self.assertEqual(msg.get_text(), "выключи свет")
+        self.assertEqual(msg.get_original_text(), "Выключи свет!")
+        self.assertEqual(msg.get_hypotheses(), (("выключи свет", 0.75), ("включи свет", 0.25)))
+
+        with self.assertRaises(ValueError):
+            SpeechHypothesesMessage([], self.pool)
+
+    def test_partial_message_hypotheses(self):
+        msg = PlainTextMessage("ирина включи свет", self.pool)
+
+        self.assertEqual(msg.get_hypotheses(), (("ирина включи свет", 1.0),))
+        self.assertEqual(
+            PartialTextMessage(msg, ("включи", "свет")).get_hypotheses(),
+            (("включи свет", 1.0),)
+        )
+
+        hypotheses = [("включи свет", 0.6), ("выключи свет", 0.4)]
+        self.assertIs(
+            PartialTextMessage(msg, "включи свет", canonical=True, hypotheses=hypotheses).get_hypotheses(),
+            hypotheses
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
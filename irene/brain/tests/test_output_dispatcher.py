@@ -0,0 +1,147 @@
+import time
+import unittest
+from concurrent.futures import Future
+from threading import Event
+from typing import Any, Callable, Hashable
+from unittest.mock import patch
+
+from irene.brain.abc import OutputChannel, TextOutputChannel, AudioOutputChannel, VAApi, OutputChannelPool
+from irene.brain.output_dispatcher import OutputDispatcher
+from irene.brain.output_pool import OutputPoolImpl
+
+
+class _Channel(OutputChannel):
+    pass
+
+
+class _Speaker:
+    """
+    Динамик, записывающий воспроизводимые звуки и проверяющий, что они не воспроизводятся одновременно.
+    """
+
+    def __init__(self):
+        self.played: list[str] = []
+        self.overlapped = False
+        self._playing = False
+
+    def play(self, sound: str, duration: float):
+        if self._playing:
+            self.overlapped = True
+
+        self._playing = True
+        time.sleep(duration)
+        self.played.append(sound)
+        self._playing = False
+
+
+class _SpeakerTextChannel(TextOutputChannel):
+    def __init__(self, speaker: _Speaker):
+        self._speaker = speaker
+
+    def send(self, text: str, **kwargs):
+        self._speaker.play(text, 0.1)
+
+    @property
+    def output_device(self) -> Hashable:
+        return self._speaker
+
+
+class _SpeakerAudioChannel(AudioOutputChannel):
+    def __init__(self, speaker: _Speaker):
+        self._speaker = speaker
+
+    def send_file(self, file_path: str, **kwargs):
+        self._speaker.play(file_path, 0.01)
+
+    @property
+    def output_device(self) -> Hashable:
+        return self._speaker
+
+
+class _DispatchingApi(VAApi):
+    def __init__(self, outputs: OutputChannelPool, dispatcher: OutputDispatcher):
+        self._outputs = outputs
+        self._dispatcher = dispatcher
+
+    def get_outputs(self) -> OutputChannelPool:
+        return self._outputs
+
+    def dispatch_output(self, channel: OutputChannel, send: Callable[[], Any]) -> 'Future[Any]':
+        return self._dispatcher.submit(channel, send)
+
+    def submit_active_interaction(self, interaction, *, related_message=None):
+        pass
+
+
+class OutputDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.dispatcher = OutputDispatcher()
+
+    def tearDown(self):
+        self.dispatcher.shutdown()
+
+    def test_channel_order(self):
+        ch = _Channel()
+        sent: list[int] = []
+        release = Event()
+
+        def send(i: int):
+            release.wait()
+            sent.append(i)
+            return i
+
+        futures = [self.dispatcher.submit(ch, lambda i=i: send(i)) for i in range(10)]
+
+        # Вывод не блокирует отправляющий поток
+        self.assertFalse(futures[-1].done())
+
+        release.set()
+
+        self.assertEqual([f.result(1) for f in futures], list(range(10)))
+        self.assertEqual(sent, list(range(10)))
+
+    def test_channels_are_independent(self):
+        blocked, free = _Channel(), _Channel()
+        release = Event()
+
+        blocked_future = self.dispatcher.submit(blocked, release.wait)
+        free_future = self.dispatcher.submit(free, lambda: 'done')
+
+        self.assertEqual(free_future.result(1), 'done')
+        self.assertFalse(blocked_future.done())
+
+        release.set()
+        self.assertTrue(blocked_future.result(1))
+
+    def test_say_and_play_audio_on_one_device(self):
+        speaker = _Speaker()
+        va = _DispatchingApi(
+            OutputPoolImpl([_SpeakerTextChannel(speaker), _SpeakerAudioChannel(speaker)]),
+            self.dispatcher,
+        )
+
+        va.say('раз')
+        va.play_audio('сигнал.wav')
+        va.say('два').result(1)
+
+        self.assertEqual(speaker.played, ['раз', 'сигнал.wav', 'два'])
+        self.assertFalse(speaker.overlapped)
+
+    @patch('logging.Logger.exception')
+    def test_error(self, _):
+        ch = _Channel()
+
+        def fail():
+            raise ValueError('test!')
+
+        failed = self.dispatcher.submit(ch, fail)
+        following = self.dispatcher.submit(ch, lambda: 42)
+
+        with self.assertRaises(ValueError):
+            failed.result(1)
+
+        self.assertEqual(following.result(1), 42)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
+import random
 import unittest
 
 from irene.brain.command_tree import VACommandTree, ConflictingCommandsException, AmbiguousCommandException, \
-    NoCommandMatchesException
+    NoCommandMatchesException, FuzzyMatchingOptions, _find_best_matches
 
 
 def _constructor(src: str) -> str:
@@ -100,6 +101,275 @@ class VACommandTreeTest(unittest.TestCase):
         self.assert_result("выключи свет", 'light_off')
         self.assert_result("выключи звук", 'mute')
 
+    def test_conflicting_rules_leave_tree_unchanged(self):
+        with self.assertRaises(ConflictingCommandsException):
+            self.tree.add_commands(
+                {
+                    "выключи": {
+                        "свет": 'light_off',
+                        "звук": 'mute_dup',
+                    }
+                },
+                _constructor
+            )
+
+        with self.assertRaises(NoCommandMatchesException):
+            self.tree.get_command("выключи свет")
+
+        self.assert_result("выключи звук", 'mute')
+
+    def test_variants_share_subtree(self):
+        constructed = []
+
+        def constructor(src: str) -> str:
+            constructed.append(src)
+            return _constructor(src)
+
+        self.tree.add_commands(
+            {
+                "убавь|понизь": {
+                    "громкость|звук": 'volume_down',
+                }
+            },
+            constructor
+        )
+
+        self.assertEqual(constructed, ['volume_down'])
+        self.assertIs(
+            self.tree._root._children["убавь"],
+            self.tree._root._children["понизь"],
+        )
+        self.assert_result("понизь звук", 'volume_down')
+        self.assert_result("убавь громкость", 'volume_down')
+
+    def test_skipped_words(self):
+        self.assert_result("пожалуйста выключи звук", 'mute')
+        self.assert_result("выключи пожалуйста звук", 'mute')
+
+    def test_same_command_matched_in_different_ways(self):
+        self.tree.add_commands({"выключи свет": 'light_off'}, _constructor)
+
+        with self.assertRaises(AmbiguousCommandException):
+            self.tree.get_command("выключи выключи свет")
+
+
+class CommandCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tree: VACommandTree[str] = VACommandTree(cache_size=2)
+        self.tree.add_commands({"который час": 'time', "включи": {"свет|звук": 'on'}}, _constructor)
+
+    def test_repeated_query_hits_cache(self):
+        self.assertEqual(self.tree.get_command("который час"), ('cmd_time', ''))
+        self.assertEqual(self.tree.get_command("который час"), ('cmd_time', ''))
+
+        info = self.tree.cache_info()
+        self.assertEqual((info.hits, info.misses), (1, 1))
+
+    def test_errors_are_cached(self):
+        for _ in range(2):
+            with self.assertRaises(NoCommandMatchesException):
+                self.tree.get_command("привет")
+
+            with self.assertRaises(AmbiguousCommandException):
+                self.tree.get_command("включи свет звук")
+
+        info = self.tree.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 2))
+
+    def test_cache_is_bounded(self):
+        for text in ("который час", "включи свет", "включи звук", "который час"):
+            self.tree.get_command(text)
+
+        info = self.tree.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (0, 4, 2))
+
+    def test_add_commands_invalidates_cache(self):
+        with self.assertRaises(NoCommandMatchesException):
+            self.tree.get_command("привет")
+
+        self.tree.add_commands({"привет": 'hi'}, _constructor)
+
+        self.assertEqual(self.tree.get_command("привет"), ('cmd_hi', ''))
+
+
+class FuzzyMatchingTest(unittest.TestCase):
+    def setUp(self):
+        self.tree: VACommandTree[str] = VACommandTree(FuzzyMatchingOptions())
+        self.tree.add_commands(
+            {
+                "поставь таймер": 'timer',
+                "поставь": {
+                    "будильник": 'alarm',
+                },
+                "включи свет": 'light_on',
+                "выключи свет": 'light_off',
+            },
+            _constructor
+        )
+
+    def test_exact_match(self):
+        self.assertEqual(self.tree.get_command("поставь таймер"), ('cmd_timer', ''))
+
+    def test_misspelled_word(self):
+        self.assertEqual(self.tree.get_command("поставь тайгер на минуту"), ('cmd_timer', 'на минуту'))
+        self.assertEqual(self.tree.get_command("поставь будильнек"), ('cmd_alarm', ''))
+
+    def test_exact_match_preferred(self):
+        self.tree.add_commands({"поставь тайгер": 'tiger'}, _constructor)
+
+        self.assertEqual(self.tree.get_command("поставь тайгер"), ('cmd_tiger', ''))
+        self.assertEqual(self.tree.get_command("поставь таймер"), ('cmd_timer', ''))
+
+    def test_similar_commands_are_ambiguous(self):
+        with self.assertRaises(AmbiguousCommandException):
+            self.tree.get_command("вылючи свет")
+
+    def test_too_many_edits(self):
+        with self.assertRaises(NoCommandMatchesException):
+            self.tree.get_command("поставь тигр")
+
+    def test_short_words_match_exactly(self):
+        self.tree.add_commands({"да": 'yes'}, _constructor)
+
+        with self.assertRaises(NoCommandMatchesException):
+            self.tree.get_command("до")
+
+    def test_disabled_by_default(self):
+        tree: VACommandTree[str] = VACommandTree()
+        tree.add_commands({"поставь таймер": 'timer'}, _constructor)
+
+        with self.assertRaises(NoCommandMatchesException):
+            tree.get_command("поставь тайгер")
+
+
+class HypothesesTest(unittest.TestCase):
+    def setUp(self):
+        self.tree: VACommandTree[str] = VACommandTree()
+        self.tree.add_commands(
+            {
+                "поставь таймер": 'timer',
+                "включи свет": 'light_on',
+                "выключи свет": 'light_off',
+            },
+            _constructor
+        )
+
+    def test_best_hypothesis(self):
+        self.assertEqual(
+            self.tree.get_command_for_hypotheses([("поставь таймер", 0.7), ("поставь тайгер", 0.3)]),
+            ('cmd_timer', '')
+        )
+
+    def test_less_confident_hypothesis_matches(self):
+        self.assertEqual(
+            self.tree.get_command_for_hypotheses([("поставь тайгер", 0.7), ("поставь таймер", 0.3)]),
+            ('cmd_timer', '')
+        )
+
+    def test_exact_match_beats_confidence(self):
+        self.assertEqual(
+            self.tree.get_command_for_hypotheses([("поставь пожалуйста таймер", 0.6), ("поставь таймер", 0.4)]),
+            ('cmd_timer', '')
+        )
+
+    def test_confidence_breaks_ties(self):
+        self.assertEqual(
+            self.tree.get_command_for_hypotheses([("включи свет", 0.8), ("выключи свет", 0.2)]),
+            ('cmd_light_on', '')
+        )
+
+    def test_close_hypotheses_are_ambiguous(self):
+        with self.assertRaises(AmbiguousCommandException):
+            self.tree.get_command_for_hypotheses([("включи свет", 0.52), ("выключи свет", 0.48)])
+
+    def test_agreeing_hypotheses_are_not_ambiguous(self):
+        self.assertEqual(
+            self.tree.get_command_for_hypotheses([("включи свет", 0.5), ("включи свет", 0.5)]),
+            ('cmd_light_on', '')
+        )
+
+    def test_no_hypothesis_matches(self):
+        with self.assertRaises(NoCommandMatchesException):
+            self.tree.get_command_for_hypotheses([("привет", 0.6), ("пока", 0.4)])
+
+    def test_single_hypothesis_same_as_get_command(self):
+        for text in ("поставь таймер", "включи свет пожалуйста", "ну поставь таймер"):
+            self.assertEqual(
+                self.tree.get_command_for_hypotheses([(text, 1.0)]),
+                self.tree.get_command(text)
+            )
+
+
+_WORDS = ('а', 'б', 'в', 'г', 'д')
+
+
+def _random_commands(rnd: random.Random, depth: int = 0) -> dict:
+    commands: dict = {}
+
+    for _ in range(rnd.randint(1, 3)):
+        key = '|'.join(
+            ' '.join(rnd.choices(_WORDS, k=rnd.randint(1, 2)))
+            for _ in range(rnd.randint(1, 2))
+        )
+
+        if depth < 2 and rnd.random() < 0.5:
+            commands[key] = _random_commands(rnd, depth + 1)
+        else:
+            commands[key] = len(commands)
+
+    return commands
+
+
+class CompiledMatcherTest(unittest.TestCase):
+    def _random_tree(self, rnd: random.Random) -> VACommandTree:
+        tree: VACommandTree[str] = VACommandTree()
+        counter = iter(range(1000))
+
+        for _ in range(rnd.randint(1, 4)):
+            try:
+                tree.add_commands(_random_commands(rnd), lambda _: f'cmd_{next(counter)}')
+            except ConflictingCommandsException:
+                pass
+
+        return tree
+
+    def test_matches_reference_implementation(self):
+        self._test_matches_reference_implementation(None)
+
+    def test_fuzzy_matches_reference_implementation(self):
+        # Все однобуквенные слова отличаются друг от друга на одну правку
+        self._test_matches_reference_implementation(FuzzyMatchingOptions(min_word_length=1))
+
+    def _test_matches_reference_implementation(self, fuzzy):
+        rnd = random.Random(42)
+
+        for _ in range(200):
+            tree = self._random_tree(rnd)
+
+            for _ in range(10):
+                words = rnd.choices(_WORDS, k=rnd.randint(0, 7))
+
+                reference = list(tree._root.get_matches(words, fuzzy))
+                best_weight = max((m.weight for m in reference), default=None)
+
+                self.assertEqual(
+                    sorted(
+                        (m.ctx, m.text, m.weight)
+                        for m in reference if abs(m.weight - best_weight) < 0.1
+                    ),
+                    sorted((m.ctx, m.text, m.weight) for m in _find_best_matches(tree._root, words, fuzzy=fuzzy)),
+                    f'Результаты различаются для запроса "{" ".join(words)}"'
+                )
+
+    def test_long_query(self):
+        tree: VACommandTree[str] = VACommandTree()
+        tree.add_commands({"выключи звук": 'mute'}, _constructor)
+
+        self.assertEqual(
+            tree.get_command("выключи звук " + ' '.join(['немедленно'] * 200)),
+            ('cmd_mute', ' '.join(['немедленно'] * 200))
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
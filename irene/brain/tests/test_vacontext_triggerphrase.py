@@ -2,7 +2,10 @@ import unittest
 from unittest.mock import Mock
 
 from irene.brain.abc import VAApi
+from irene.brain.command_tree import FuzzyMatchingOptions
 from irene.brain.contexts import TriggerPhraseContext
+from irene.brain.inbound_messages import SpeechHypothesesMessage
+from irene.brain.output_pool import EMPTY_OUTPUT_POOL
 from irene.test_utuls import VAContextMock
 from irene.test_utuls.stub_text_message import tm
 
@@ -80,6 +83,66 @@ class TriggerPhraseContextTest(unittest.TestCase):
             self.ctx1
         )
 
+    def test_earliest_phrase(self):
+        c = TriggerPhraseContext(
+            [["ирина"], ["окей", "ирина"]], self.next_ctx)
+        c.handle_command(self.va, tm("окей ирина привет ирина пока"))
+        self.next_ctx.handle_command_text.assert_called_once_with(self.va, "привет ирина пока")
+
+    def test_fuzzy_phrase(self):
+        c = TriggerPhraseContext(
+            [["ирина"], ["ирины"]], self.next_ctx, FuzzyMatchingOptions())
+        self.assertIs(
+            c.handle_command(self.va, tm("арина привет")),
+            self.ctx1
+        )
+        self.assertIs(
+            c.handle_command(self.va, tm("ира привет")),
+            None
+        )
+
+    def test_no_fuzzy_phrase_by_default(self):
+        c = TriggerPhraseContext([["ирина"]], self.next_ctx)
+        self.assertIs(
+            c.handle_command(self.va, tm("арина привет")),
+            None
+        )
+
+    def test_hypotheses(self):
+        c = TriggerPhraseContext([["ирина"]], self.next_ctx)
+        c.handle_command(
+            self.va,
+            SpeechHypothesesMessage(
+                [("арина привет", 0.5), ("ирина пока", 0.3), ("привет ирина", 0.2)],
+                EMPTY_OUTPUT_POOL
+            )
+        )
+
+        message = self.next_ctx.handle_command.call_args[0][1]
+        self.assertEqual(message.get_text(), "пока")
+        self.assertEqual(message.get_hypotheses(), [("пока", 0.3), ("", 0.2)])
+        self.assertTrue(message.meta['is_direct'])
+
+    def test_phrase_in_unlikely_hypothesis(self):
+        c = TriggerPhraseContext([["ирина"]], self.next_ctx)
+        self.assertIsNone(
+            c.handle_command(
+                self.va,
+                SpeechHypothesesMessage([("арина привет", 1.0), ("ирина привет", 0.01)], EMPTY_OUTPUT_POOL)
+            )
+        )
+        self.next_ctx.handle_command.assert_not_called()
+
+    def test_hypotheses_without_phrase(self):
+        c = TriggerPhraseContext([["ирина"]], self.next_ctx)
+        self.assertIsNone(
+            c.handle_command(
+                self.va,
+                SpeechHypothesesMessage([("арина привет", 0.5), ("ира пока", 0.5)], EMPTY_OUTPUT_POOL)
+            )
+        )
+        self.next_ctx.handle_command.assert_not_called()
+
 
 if __name__ == '__main__':
     unittest.main()
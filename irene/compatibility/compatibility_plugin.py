@@ -3,11 +3,11 @@ import sys
 from functools import wraps
 from logging import getLogger
 from types import ModuleType
-from typing import Any, Callable, Type, Optional
+from typing import Any, Callable, Type, Optional, Hashable
 
 import irene.compatibility.vacore as vacore_module
 from irene import VAContextSource, VAApiExt
-from irene.brain.abc import AudioOutputChannel
+from irene.brain.abc import AudioOutputChannel, LOCAL_AUDIO_DEVICE
 from irene.compatibility.vacore import VACore
 from irene.face.abc import FileWritingTTS, ImmediatePlaybackTTS, MuteGroup
 from irene.face.mute_group import NULL_MUTE_GROUP
@@ -37,6 +37,10 @@ def _make_playwav_channel_type(vacore, init, play) -> _WavPlayerConstructor:
             with self._mg.muted():
                 play(vacore, file_path)
 
+        @property
+        def output_device(self) -> Hashable:
+            return LOCAL_AUDIO_DEVICE
+
     return _LocalPlaywavChannel
 
 
@@ -45,10 +45,11 @@ class VACore:
         raise _UnsupportedConfigAccessError()
 
     def say(self, text: str):
-        self._assert_va_ready().say(text)
+        # Плагины старого формата рассчитывают на то, что вывод завершён к моменту возврата из метода
+        self._assert_va_ready().say(text).result()
 
     def say2(self, text: str):
-        self._assert_va_ready().say_speech(text)
+        self._assert_va_ready().say_speech(text).result()
 
     def context_set(self, ctx, timeout=None):
         self._assert_va_ready().context_set(ctx, timeout)
@@ -63,7 +64,7 @@ class VACore:
             if isfile(p):
                 wavfile = p
 
-        self._assert_va_ready().play_audio(wavfile)
+        self._assert_va_ready().play_audio(wavfile).result()
 
     mpcHcPath: str
     mpcIsUse: bool
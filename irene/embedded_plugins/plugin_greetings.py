@@ -17,6 +17,11 @@ def _greet(va: VAApiExt, _):
     va.say(choice(config['phrases']))
 
 
+def get_prewarm_phrases(nxt, prev: list[str], *args, **kwargs):
+    prev.extend(config['phrases'])
+    return nxt(prev, *args, **kwargs)
+
+
 define_commands = {
     "привет|доброе утро": _greet
 }
@@ -6,6 +6,7 @@ from typing import TypedDict, Optional
 import irene.utils.num_to_text_ru as num_to_text
 from irene import VAApiExt
 from irene.brain.abc import OutputChannelNotFoundError
+from irene.plugin_loader.executors import get_executor, EXECUTOR_BRAIN
 from irene.plugin_loader.file_patterns import pick_random_file
 from irene.plugin_loader.magic_plugin import MagicPlugin
 
@@ -14,6 +15,30 @@ female_units_min = ((u'минута', u'минуты', u'минут'), 'f')
 female_units_sec2 = ((u'секунду', u'секунды', u'секунд'), 'f')
 female_units_sec = ((u'секунда', u'секунды', u'секунд'), 'f')
 
+_PREWARM_MINUTES = (1, 2, 3, 5, 10, 15, 20, 30)
+"""
+Длительности (в минутах) таймеров, ответы для которых синтезируются заранее
+"""
+
+_DEFAULT_TIMER_TEXT = "пять минут"
+
+_UNKNOWN_TIME_REPLY = "Что после таймер?"
+
+
+def _minutes_text(minutes: int) -> str:
+    if minutes == 1:
+        return num_to_text.num2text(1, female_units_min)
+
+    return num_to_text.num2text(minutes, female_units_min) + " "
+
+
+def _timer_set_reply(text: str) -> str:
+    return f"поставила таймер на {text}"
+
+
+def _timer_done_reply(text: str) -> str:
+    return f"{text} прошло"
+
 
 class TimerPlugin(MagicPlugin):
     name = 'plugin_timer'
@@ -45,6 +70,20 @@ class TimerPlugin(MagicPlugin):
     async def init(self, *_args, **_kwargs):
         self._loop = asyncio.get_running_loop()
 
+    def _beep_reply(self) -> str:
+        return " ".join(("БИП",) * self.config['wavRepeatTimes'])
+
+    def get_prewarm_phrases(self, nxt, prev: list[str], *args, **kwargs):
+        """
+        Добавляет ответы для таймеров частых длительностей к фразам, которые синтезируются заранее.
+        """
+        prev.extend((_UNKNOWN_TIME_REPLY, self._beep_reply()))
+
+        for text in (_DEFAULT_TIMER_TEXT, *map(_minutes_text, _PREWARM_MINUTES)):
+            prev.extend((_timer_set_reply(text), _timer_done_reply(text)))
+
+        return nxt(prev, *args, **kwargs)
+
     def define_commands(self, *_args, **_kwargs):
         return {
             "поставь таймер|поставь тайгер|таймер|тайгер": self._set_timer
@@ -54,18 +93,19 @@ class TimerPlugin(MagicPlugin):
         def done_interaction(va: VAApiExt):
             try:
                 for i in range(self.config['wavRepeatTimes']):
-                    va.play_audio(pick_random_file(self.config['wavPath']))
+                    # Пауза между повторами отсчитывается от окончания воспроизведения
+                    va.play_audio(pick_random_file(self.config['wavPath'])).result()
                     sleep(0.2)
             except OutputChannelNotFoundError:
-                va.say(" ".join(("БИП",) * self.config['wavRepeatTimes']))
+                va.say(self._beep_reply())
 
-            va.say(f"{text} прошло")
+            va.say(_timer_done_reply(text))
 
         async def timer_task():
             await asyncio.sleep(time)
             try:
                 await self._loop.run_in_executor(
-                    None,
+                    get_executor(EXECUTOR_BRAIN),
                     va.submit_active_interaction,
                     done_interaction
                 )
@@ -82,12 +122,12 @@ class TimerPlugin(MagicPlugin):
             timer_task(),
         )
 
-        va.say(f"поставила таймер на {text}")
+        va.say(_timer_set_reply(text))
 
     def _set_timer(self, va: VAApiExt, phrase: str):
         if phrase == "":
             # таймер по умолчанию - на 5 минут
-            self._set_timer_real(va, 5 * 60, "пять минут")
+            self._set_timer_real(va, 5 * 60, _DEFAULT_TIMER_TEXT)
             return
 
         phrase += " "
@@ -114,7 +154,7 @@ class TimerPlugin(MagicPlugin):
 
         # ставим минуты?
         for i in range(100, 1, -1):
-            txt = num_to_text.num2text(i, female_units_min) + " "
+            txt = _minutes_text(i)
             if phrase.startswith(txt):
                 self._set_timer_real(va, i * 60, txt)
                 return
@@ -132,7 +172,7 @@ class TimerPlugin(MagicPlugin):
         # без указания единиц измерения - ставим минуты
         for i in range(100, 1,
                        -1):  # обратный вариант - иначе "двадцать" находится быстрее чем "двадцать пять", а это неверно
-            txt = num_to_text.num2text(i, female_units_min) + " "
+            txt = _minutes_text(i)
             txt2 = num_to_text.num2text(i) + " "
             if phrase.startswith(txt2):
                 self._set_timer_real(va, i * 60, txt)
@@ -145,10 +185,9 @@ class TimerPlugin(MagicPlugin):
 
         # спецкейс под одну минуту
         if phrase.startswith("один ") or phrase.startswith("одна ") or phrase.startswith("одну "):
-            txt = num_to_text.num2text(1, female_units_min)
-            self._set_timer_real(va, 1 * 60, txt)
+            self._set_timer_real(va, 1 * 60, _minutes_text(1))
             return
 
         # непонятно, но сохраняем контекст и переспрашиваем время
-        va.say("Что после таймер?")
+        va.say(_UNKNOWN_TIME_REPLY)
         va.context_set(self._set_timer)
@@ -3,7 +3,26 @@
 
 Кеш реализован в виде папки с файлами, где имя файла является хешем от типа TTS, его настроек и озвученной фразы.
 
-Плагин так же осуществляет периодическую очистку папки кеша. В зависимости от настроек, файлы могут удаляться если:
+Сведения о файлах кеша (размеры и время последнего использования) хранятся в индексе (база данных SQLite), так что
+поиск файла в кеше и очистка кеша не требуют просмотра содержимого папки.
+Папка кеша просматривается целиком только если индекс отсутствует или повреждён.
+
+Содержимое часто используемых файлов (например, ответов на неизвестные команды, приветствий) дополнительно хранится в
+оперативной памяти.
+Каналы вывода, отправляющие файлы клиентам (веб-интерфейс, Telegram), получают его без повторного чтения файла.
+
+После запуска и после изменения голосовых профилей плагин заранее синтезирует известные фразы (ответы мозга, приветствия
+и т.д.) для всех голосовых профилей, так что первые ответы не ждут синтеза речи.
+Синтез выполняется в фоне, по одной фразе, и приостанавливается пока синтезируются ответы на запросы пользователя.
+Плагины могут добавлять свои фразы в операции ``get_prewarm_phrases``:
+
+```python
+def get_prewarm_phrases(nxt, prev: list[str], *args, **kwargs):
+    prev.append("Таймер сработал")
+    return nxt(prev, *args, **kwargs)
+```
+
+Плагин так же осуществляет очистку папки кеша. В зависимости от настроек, файлы могут удаляться если:
 - они не использовались дольше заданного времени
 - кеш занимает больше места, чем разрешено
 - файлов накопилось больше заданного количества
@@ -11,38 +30,59 @@
 
 import asyncio
 import os
-from datetime import datetime
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
 from hashlib import sha256
 from logging import getLogger
 from pathlib import Path
-from shutil import copy
-from typing import TypedDict, Optional, Any
+from shutil import copy, rmtree
+from threading import Lock, Event
+from typing import TypedDict, Optional, Any, Iterable, Callable
+from weakref import WeakSet
 
 from irene.face.abc import FileWritingTTS, TTSResultFile
 from irene.face.tts_helpers import PersistentTTSResultFile, create_disposable_tts_result_file
+from irene.plugin_loader.abc import PluginManager
+from irene.plugin_loader.executors import run_in_executor, configure_executor, get_executor, EXECUTOR_IO, \
+    EXECUTOR_TTS
 from irene.plugin_loader.file_patterns import first_substitution
+from irene.plugin_loader.run_operation import call_all_as_wrappers
+from irene.utils.audio_converter import AudioConverter
+from irene.utils.bytes_cache import BytesLRUCache
 from irene.utils.metadata import MetadataMapping
 
 name = 'tts_cache'
-version = '0.2.0'
+version = '0.5.0'
 
 _logger = getLogger(name)
 
 
 class _Config(TypedDict):
     cache_path: str
+    index_path: str
     max_files: Optional[int]
     max_size: Optional[float]
     max_age: Optional[float]
     cleanup_interval: float
+    memory_cache_size: Optional[float]
+    memory_cache_max_file_size: Optional[float]
+    prewarm: bool
+    prewarm_pause: float
 
 
 config: _Config = {
     'cache_path': '{irene_home}/cache/tts',
+    'index_path': '{irene_home}/cache/tts_index.sqlite3',
     'max_files': -1,
     'max_size': -1,
     'max_age': -1,
     'cleanup_interval': 1.0,
+    'memory_cache_size': 16,
+    'memory_cache_max_file_size': 1,
+    'prewarm': True,
+    'prewarm_pause': 1.0,
 }
 
 config_comment = """
@@ -50,13 +90,55 @@ config_comment = """
 
 Доступные параметры:
 - `cache_path`        - путь к папке, где хранятся файлы кеша
+- `index_path`        - путь к файлу индекса кеша
 - `max_files`         - максимальное количество хранимых файлов кеша.
                         0, `null` или значение меньше 0 означают, что количество файлов не ограничено.
 - `max_size`          - максимальный суммарный размер (в мибибайтах), всех файлов кеша.
                         0, `null` или значение меньше 0 означают, что размер файлов не ограничен.
 - `max_age`           - максимальное время хранения (в сутках с последнего использования) файлов в кеше.
                         0, `null` или значение меньше 0 означают, что файлы кеша могут храниться сколь угодно долго.
-- `cleanup_interval`  - интервал (в часах) с которым происходит очистка кеша.
+- `cleanup_interval`  - интервал (в часах) с которым происходит удаление файлов, не использовавшихся дольше
+                        `max_age`.
+                        Ограничения количества и размера файлов применяются сразу при добавлении файлов в кеш.
+- `memory_cache_size` - максимальный суммарный размер (в мибибайтах) файлов, содержимое которых хранится в оперативной
+                        памяти.
+                        0, `null` или значение меньше 0 отключают хранение файлов в памяти.
+                        Изменения применяются после перезапуска.
+- `memory_cache_max_file_size`
+                      - максимальный размер (в мибибайтах) файла, содержимое которого может храниться в памяти.
+- `prewarm`           - включает заблаговременный синтез известных фраз для всех голосовых профилей.
+- `prewarm_pause`     - пауза (в секундах) между синтезом фраз при заблаговременном синтезе.
+"""
+
+
+_INDEX_FORMAT_VERSION = 1
+
+_INDEX_FLUSH_INTERVAL = 60
+"""
+Интервал (в секундах), с которым время использования файлов кеша записывается в индекс на диске
+"""
+
+_PREWARM_EXECUTOR = 'tts_prewarm'
+"""
+Пул потоков для заблаговременного синтеза фраз
+"""
+
+_PREWARM_PRIORITY = 10
+"""
+Значение nice для потока заблаговременного синтеза
+"""
+
+_PREWARM_DIR = '.prewarm'
+"""
+Папка (внутри папки кеша), в которой создаются файлы при заблаговременном синтезе
+"""
+
+_CONVERTED_FORMATS = ('ogg', 'mp3', 'wav', 'opus', 'flac')
+"""
+Форматы, в которые могут быть преобразованы файлы кеша (см. ``AudioConverter.get_converted_file_path``).
+
+Преобразованные файлы создаются без ведома кеша, поэтому при удалении файла из кеша удаляются и все его возможные
+преобразованные варианты.
 """
 
 
@@ -71,127 +153,547 @@ def _ensure_cache_dir() -> Path:
     return cache_dir_path
 
 
-def _find_existing_file(base_name: str) -> Path:
+def _get_key(file_name: str) -> str:
     """
-    Ищет файл с заданным базовым именем в кеше.
+    Возвращает ключ (базовое имя) файла кеша - имя без расширения и суффиксов преобразованных вариантов.
+    """
+    return file_name.split('.', 1)[0]
 
-    Args:
-        base_name:
-    Returns:
-        путь к найденному файлу
-    Raises:
-        FileNotFoundError - если подходящего файла не найдено
+
+def _limit(value: Optional[float]) -> Optional[float]:
+    return value if value is not None and value > 0 else None
+
+
+class _KeyEntry:
+    """
+    Сведения о файлах кеша с общим ключом - оригинальном файле, созданном TTS, и его вариантах, преобразованных в другие
+    форматы.
     """
-    # В кеше может лежать несколько версий файла - оригинальный файл, созданный TTS и его варианты, преобразованные в
-    # другие форматы AudioConverter'ом.
-    matching = list(_ensure_cache_dir().glob(f'{base_name}.*'))
 
-    if len(matching) == 0:
-        raise FileNotFoundError()
+    __slots__ = ('files', 'last_access')
 
-    time = datetime.now().timestamp()
+    def __init__(self, last_access: float):
+        self.files: dict[str, int] = {}
+        """Размеры файлов по их именам"""
 
-    for file_path in matching:
-        # Нельзя использовать file_path.touch() так как он создаст файл если он был только что удалён потоком очистки
-        os.utime(file_path, (time, time))
+        self.last_access = last_access
 
-    # Имена преобразованных файлов будут длиннее, чем у оригинала. Поэтому, возвращаем к файлу с самым коротким именем.
-    return min(matching, key=lambda it: len(it.name))
 
+class _CacheIndex:
+    """
+    Индекс файлов кеша.
 
-def _cache_file_sort(path: Path) -> Any:
+    Хранит в памяти сведения о файлах кеша, упорядоченные по времени последнего использования, и их копию в базе данных
+    SQLite.
+    Добавление и удаление файлов сразу записывается в базу данных, так что после аварийного завершения индекс
+    по-прежнему соответствует содержимому папки кеша.
+    Только время последнего использования файлов записывается периодически (см. ``flush``).
     """
-    Возвращает ключ сортировки, используемый при очистке кеша.
 
-    Файлы сортируются от новых к старым (по mtime), среди файлов с одинаковым mtime первыми идут файлы с более коротким
-    именем. Таким образом, оригинальный файл будет ближе к началу списка (и удалится с меньшей вероятностью), чем
-    варианты, преобразованные в другие форматы - AudioConverter гарантирует, что mtime новых преобразованных файлов
-    совпадает с mtime оригинала.
+    __slots__ = ('_cache_dir', '_db_path', '_db', '_db_outdated', '_entries', '_files_count', '_total_size',
+                 '_accessed', '_lck')
+
+    def __init__(self, cache_dir: Path, db_path: Path):
+        self._cache_dir = cache_dir
+        self._db_path = db_path
+        self._db: Optional[sqlite3.Connection] = None
+
+        # Не удалось записать изменения в базу данных, при следующем вызове flush она будет перезаписана целиком
+        self._db_outdated = False
+
+        # От давно использовавшихся к недавно использованным
+        self._entries: OrderedDict[str, _KeyEntry] = OrderedDict()
+        self._files_count = 0
+        self._total_size = 0
+
+        # Ключи, время использования которых ещё не записано в базу данных
+        self._accessed: set[str] = set()
+        self._lck = Lock()
+
+        if not self._load():
+            self._rebuild()
+
+    def _get_db(self) -> sqlite3.Connection:
+        if (db := self._db) is not None:
+            return db
+
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self._db_path, check_same_thread=False)
+
+        try:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS files ('
+                'name TEXT PRIMARY KEY, key TEXT NOT NULL, size INTEGER NOT NULL, last_access REAL NOT NULL)'
+            )
+            db.execute('CREATE INDEX IF NOT EXISTS files_key ON files (key)')
+            db.execute('CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)')
+        except sqlite3.Error:
+            db.close()
+            raise
+
+        self._db = db
+        return db
+
+    def _close_db(self):
+        if (db := self._db) is not None:
+            self._db = None
+            db.close()
+
+    def _write(self, write: Callable[[sqlite3.Connection], Any]) -> bool:
+        """
+        Выполняет изменение базы данных в отдельной транзакции.
+
+        Вызывается с захваченной блокировкой.
+        Если изменение не удалось, то база данных будет перезаписана целиком при следующем вызове ``flush``.
+        """
+        try:
+            db = self._get_db()
+
+            with db:
+                write(db)
+        except sqlite3.Error:
+            _logger.warning("Не удалось сохранить индекс кеша %s", self._db_path, exc_info=True)
+            self._close_db()
+            self._db_outdated = True
+            return False
+
+        return True
+
+    def _load(self) -> bool:
+        if not self._db_path.is_file():
+            return False
+
+        try:
+            db = self._get_db()
+            meta = dict(db.execute('SELECT name, value FROM meta'))
+
+            if meta.get('version') != str(_INDEX_FORMAT_VERSION) or meta.get('cache_dir') != str(self._cache_dir):
+                _logger.info("Индекс кеша %s устарел, индекс будет построен заново", self._db_path)
+                return False
+
+            for file_name, key, size, last_access in db.execute(
+                    'SELECT name, key, size, last_access FROM files ORDER BY last_access'
+            ):
+                self._add_file(key, file_name, size, last_access)
+        except sqlite3.Error:
+            _logger.warning("Не удалось прочитать индекс кеша %s, индекс будет построен заново", self._db_path,
+                            exc_info=True)
+            self._close_db()
+            self._entries.clear()
+            self._files_count, self._total_size = 0, 0
+            return False
+
+        return True
+
+    def _rows(self, keys: Iterable[str]) -> list[tuple[str, str, int, float]]:
+        return [
+            (file_name, key, size, entry.last_access)
+            for key in keys
+            if (entry := self._entries.get(key)) is not None
+            for file_name, size in entry.files.items()
+        ]
+
+    def _write_all(self, db: sqlite3.Connection):
+        db.execute('DELETE FROM files')
+        db.executemany('INSERT INTO files (name, key, size, last_access) VALUES (?, ?, ?, ?)',
+                       self._rows(self._entries.keys()))
+        db.executemany(
+            'INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)',
+            (('version', str(_INDEX_FORMAT_VERSION)), ('cache_dir', str(self._cache_dir))),
+        )
+
+    def _rebuild(self):
+        _logger.info("Строю индекс кеша %s", self._cache_dir)
+
+        self._entries.clear()
+        self._files_count, self._total_size = 0, 0
+
+        files = []
+
+        with os.scandir(self._cache_dir) as it:
+            for dir_entry in it:
+                if dir_entry.is_file():
+                    stat = dir_entry.stat()
+                    files.append((stat.st_mtime, dir_entry.name, stat.st_size))
+
+        # Раньше время последнего использования файлов сохранялось как время изменения
+        for mtime, file_name, size in sorted(files):
+            self._add_file(_get_key(file_name), file_name, size, mtime)
+
+        # Файлы и сведения о версии индекса записываются одной транзакцией, так что прерванное построение индекса
+        # будет повторено при следующем запуске
+        if not self._write(self._write_all):
+            # Файл индекса мог быть повреждён, он всё равно будет создан заново
+            self._db_path.unlink(missing_ok=True)
+            self._db_outdated = not self._write(self._write_all)
+
+    def _add_file(self, key: str, file_name: str, size: int, last_access: float):
+        if (entry := self._entries.get(key)) is None:
+            entry = self._entries[key] = _KeyEntry(last_access)
+        else:
+            entry.last_access = max(entry.last_access, last_access)
+            self._entries.move_to_end(key)
+
+        if (previous_size := entry.files.get(file_name)) is not None:
+            self._total_size -= previous_size
+        else:
+            self._files_count += 1
+
+        entry.files[file_name] = size
+        self._total_size += size
+
+    def _remove_key(self, key: str) -> list[Path]:
+        entry = self._entries.pop(key)
+        self._files_count -= len(entry.files)
+        self._total_size -= sum(entry.files.values())
+        self._accessed.discard(key)
+
+        return [self._cache_dir.joinpath(file_name) for file_name in entry.files]
+
+    def _delete_rows(self, keys: list[str]):
+        if keys:
+            self._write(lambda db: db.executemany('DELETE FROM files WHERE key = ?', ((key,) for key in keys)))
+
+    def contains(self, key: str) -> bool:
+        """
+        Проверяет, есть ли в индексе файл с заданным ключом, не отмечая его как использованный.
+        """
+        with self._lck:
+            return key in self._entries
+
+    def find(self, key: str, *, check_exists: bool = True) -> Optional[Path]:
+        """
+        Ищет файл с заданным ключом и отмечает его как использованный.
+
+        Args:
+            key:
+                ключ файла
+            check_exists:
+                проверять ли, что файл всё ещё существует.
+                Если ``False``, то поиск не обращается к файловой системе.
+        Returns:
+            путь к оригинальному файлу или ``None`` если файла нет в кеше
+        """
+        with self._lck:
+            if (entry := self._entries.get(key)) is None:
+                return None
+
+            # Имена преобразованных файлов длиннее, чем у оригинала
+            path = self._cache_dir.joinpath(min(entry.files, key=len))
+
+            if check_exists and not path.is_file():
+                # Файл удалён не через индекс
+                self._remove_key(key)
+                self._delete_rows([key])
+                return None
+
+            entry.last_access = time.time()
+            self._entries.move_to_end(key)
+            self._accessed.add(key)
+
+            return path
+
+    def add(self, path: Path, *, max_files: Optional[float], max_size: Optional[float]):
+        """
+        Добавляет файл в индекс и удаляет давно не использовавшиеся файлы, если кеш превысил ограничения.
+
+        Args:
+            path:
+                путь к файлу в папке кеша
+            max_files:
+                максимальное количество файлов или ``None``
+            max_size:
+                максимальный суммарный размер файлов в байтах или ``None``
+        """
+        key = _get_key(path.name)
+
+        with self._lck:
+            self._add_file(key, path.name, path.stat().st_size, time.time())
+            self._write(lambda db: db.executemany(
+                'INSERT OR REPLACE INTO files (name, key, size, last_access) VALUES (?, ?, ?, ?)',
+                self._rows((key,)),
+            ))
+
+            evicted: list[str] = []
+            stale: list[Path] = []
+
+            while len(self._entries) > 1 and (
+                    (max_files is not None and self._files_count > max_files) or
+                    (max_size is not None and self._total_size > max_size)
+            ):
+                evicted.append(evicted_key := next(iter(self._entries)))
+                stale.extend(self._remove_key(evicted_key))
+
+            self._delete_rows(evicted)
+
+        _delete_files(stale)
+
+    def remove_older_than(self, timestamp: float):
+        """
+        Удаляет файлы, не использовавшиеся с заданного момента времени.
+        """
+        evicted: list[str] = []
+        stale: list[Path] = []
+
+        with self._lck:
+            while self._entries:
+                key, entry = next(iter(self._entries.items()))
+
+                if entry.last_access >= timestamp:
+                    break
+
+                evicted.append(key)
+                stale.extend(self._remove_key(key))
+
+            self._delete_rows(evicted)
+
+        if stale:
+            _logger.info("Удаляю %d давно не использовавшихся файл(ов) кеша", len(stale))
+
+        _delete_files(stale)
+
+    def get_stats(self) -> tuple[int, int]:
+        """
+        Returns:
+            количество файлов и их суммарный размер в байтах
+        """
+        return self._files_count, self._total_size
+
+    def flush(self):
+        """
+        Записывает в базу данных время последнего использования файлов.
+        """
+        with self._lck:
+            if self._db_outdated:
+                self._db_outdated = False
+                self._accessed.clear()
+                self._write(self._write_all)
+                return
+
+            if not self._accessed:
+                return
+
+            accessed, self._accessed = self._accessed, set()
+            rows = [
+                (entry.last_access, key)
+                for key in accessed
+                if (entry := self._entries.get(key)) is not None
+            ]
+
+            if not self._write(lambda db: db.executemany('UPDATE files SET last_access = ? WHERE key = ?', rows)):
+                self._accessed.update(accessed)
+
+    def close(self):
+        """
+        Записывает несохранённые изменения и закрывает базу данных.
+        """
+        self.flush()
+
+        with self._lck:
+            self._close_db()
+
+
+def _delete_files(paths: Iterable[Path]):
+    for path in paths:
+        _logger.debug("Удаляю файл %s", str(path))
+
+        if (hot_tier := _hot_tier) is not None:
+            hot_tier.discard(_get_key(path.name))
+
+        path.unlink(missing_ok=True)
+
+        for fmt in _CONVERTED_FORMATS:
+            Path(AudioConverter.get_converted_file_path(str(path), fmt)).unlink(missing_ok=True)
+
+
+_index: Optional[_CacheIndex] = None
+_index_lck = Lock()
+
+_hot_tier: Optional[BytesLRUCache] = None
+"""
+Содержимое часто используемых файлов кеша по их ключам
+"""
+
+
+def _get_index() -> _CacheIndex:
+    global _index
+
+    if (index := _index) is not None:
+        return index
+
+    with _index_lck:
+        if _index is None:
+            _index = _CacheIndex(_ensure_cache_dir(), Path(first_substitution(config['index_path'])).absolute())
+
+        return _index
+
+
+def _get_hot_tier() -> Optional[BytesLRUCache]:
+    global _hot_tier
+
+    if (hot_tier := _hot_tier) is not None:
+        return hot_tier
+
+    if (max_size := _limit(config['memory_cache_size'])) is None:
+        return None
+
+    with _index_lck:
+        if _hot_tier is None:
+            max_file_size = _limit(config['memory_cache_max_file_size'])
+            _hot_tier = BytesLRUCache(
+                int(max_size * 1024 * 1024),
+                int(max_file_size * 1024 * 1024) if max_file_size is not None else None,
+            )
+
+        return _hot_tier
+
+
+def _load_to_hot_tier(key: str, path: Path) -> Optional[bytes]:
     """
-    return -path.stat().st_mtime, len(path.name)
+    Загружает содержимое файла в память, если его размер это позволяет.
+
+    Returns:
+        содержимое файла или ``None`` если файл не может храниться в памяти
+    """
+    if (hot_tier := _get_hot_tier()) is None or not hot_tier.accepts(path.stat().st_size):
+        return None
+
+    data = path.read_bytes()
+    hot_tier.put(key, data)
+
+    return data
 
 
 def _do_cleanup() -> None:
-    _logger.info("Ищу файлы кеша, которые пора удалить")
+    index = _get_index()
 
-    cache_files: list[Path] = list(_ensure_cache_dir().iterdir())
-    cache_files.sort(key=_cache_file_sort)
-    n_files_to_delete = 0
+    if (age_limit := _limit(config['max_age'])) is not None:
+        index.remove_older_than(time.time() - age_limit * 60 * 60 * 24)
 
-    if (files_limit := (config['max_files'] or 0)) > 0:
-        if len(cache_files) > files_limit:
-            n_files_to_delete = max(n_files_to_delete, len(cache_files) - files_limit)
+    index.flush()
 
-            _logger.debug(
-                "В кеше %d файлов, %d из них будут удалены, чтобы оставить не более %d файлов",
-                len(cache_files), n_files_to_delete, files_limit,
-            )
 
-    if (size_limit := (config['max_size'] or 0)) > 0:
-        size_accumulator = 0.0  # MiB
+class _Flight:
+    """
+    Синтез файла, ожидаемый одним или несколькими потоками.
+    """
 
-        for i, file in enumerate(cache_files):
-            size_accumulator += file.stat().st_size / 1024 / 1024  # Bytes -> MiBytes
+    __slots__ = ('done', 'result', 'error', 'background', 'superseded')
 
-            if size_accumulator > size_limit:
-                n_files_to_delete = max(n_files_to_delete, len(cache_files) - i)
+    def __init__(self, background: bool = False):
+        self.done = Event()
+        self.result: Optional[Path] = None
+        self.error: Optional[BaseException] = None
 
-                _logger.debug(
-                    "%d из %d самых новых файлов занимают %f Мибибайт, один из них и ещё %d файл(ов) будут удалены",
-                    i + 1, len(cache_files), size_accumulator, len(cache_files) - (i + 1),
-                )
+        self.background = background
+        """Заблаговременный синтез, результата которого никто не ждёт"""
 
-                break
+        self.superseded = False
+        """Файл синтезируется заново по запросу пользователя, результат заблаговременного синтеза не нужен"""
 
-    if (age_limit := (config['max_age'] or 0)) > 0:
-        max_mtime = datetime.now().timestamp() - age_limit * 60 * 60 * 24
 
-        for i, file in enumerate(cache_files):
-            if file.stat().st_mtime < max_mtime:
-                n_files_to_delete = max(n_files_to_delete, len(cache_files) - i)
+_flights: dict[str, _Flight] = {}
+_flights_lck = Lock()
 
-                _logger.debug(
-                    "Все файлы кеша начиная с %dго из %d старше %f часов и будут удалены",
-                    i + 1, len(cache_files), age_limit,
-                )
 
-    if n_files_to_delete == 0:
-        _logger.debug("Нет файлов, требующих удаления")
-        return
+def _single_flight(key: str, fn: Callable[[], Path]) -> Path:
+    """
+    Вызывает функцию, создающую файл с заданным ключом, если она ещё не выполняется в другом потоке.
+    Иначе - дожидается результата вызова в другом потоке.
 
-    _logger.info("Собираюсь удалить %d файл(ов) кеша", n_files_to_delete)
+    Это позволяет не синтезировать одну и ту же фразу одновременно в нескольких потоках (например, когда уведомление
+    озвучивается для нескольких клиентов сразу) и не перезаписывать файл, который в это время читают другие потоки.
 
-    if n_files_to_delete == len(cache_files):
-        _logger.warning(
-            "Собираюсь удалить все файлы кеша (%d). Возможно, стратегия очистки кеша настроена не верно.",
-            n_files_to_delete,
-        )
+    Заблаговременный синтез (см. ``_background_flight``) выполняется с низким приоритетом, поэтому его результата
+    запрос не дожидается, а синтезирует файл сам.
 
-    for file in cache_files[-n_files_to_delete:]:
-        _logger.debug("Удаляю файл %s", str(file))
+    Raises:
+        исключение, выброшенное функцией
+    """
+    with _flights_lck:
+        if (flight := _flights.get(key)) is None or flight.background:
+            if flight is not None:
+                flight.superseded = True
+
+            leader = True
+            flight = _flights[key] = _Flight()
+        else:
+            leader = False
+
+    if not leader:
+        flight.done.wait()
 
-        file.unlink(missing_ok=True)
+        if flight.error is not None:
+            raise flight.error
 
-    _logger.debug("Удаление файлов закончено")
+        assert flight.result is not None
+        return flight.result
 
+    try:
+        flight.result = fn()
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lck:
+            del _flights[key]
 
-def _respond_with_cached_file(file_path: Path, file_base_path: Optional[str]) -> TTSResultFile:
+        flight.done.set()
+
+    return flight.result
+
+
+def _background_flight(key: str, synthesize: Callable[[], Path], publish: Callable[[Path], Any]):
+    """
+    Заблаговременно создаёт файл с заданным ключом, если он не создаётся в другом потоке.
+
+    Файл создаётся отдельно от кеша (функцией ``synthesize``) и переносится в кеш (функцией ``publish``) только если за
+    это время его не начали синтезировать по запросу пользователя (см. ``_single_flight``).
+    """
+    with _flights_lck:
+        if key in _flights:
+            return
+
+        flight = _flights[key] = _Flight(background=True)
+
+    try:
+        path = synthesize()
+
+        with _flights_lck:
+            if not flight.superseded:
+                publish(path)
+                return
+
+        path.unlink(missing_ok=True)
+    finally:
+        with _flights_lck:
+            if _flights.get(key) is flight:
+                del _flights[key]
+
+
+def _respond_with_cached_file(file_path: Path, file_base_path: Optional[str], data: Optional[bytes]) -> TTSResultFile:
     """
     Создаёт объект TTSResultFile для файла, хранящегося в кеше.
 
     Args:
         file_path: путь к файлу в кеше
         file_base_path: базовый путь файла, запрошенный клиентом
+        data: содержимое файла, если оно хранится в памяти
     """
     if file_base_path is not None:
         # Если клиент требует файл, лежащий в определённом месте, то копируем файл из кеша туда и возвращаем
         # DisposableTTSResultFile, чтобы клиент удалил его после использования.
         result_file = create_disposable_tts_result_file(file_base_path)
-        copy(file_path, result_file.get_full_path())
+
+        if data is not None:
+            Path(result_file.get_full_path()).write_bytes(data)
+        else:
+            copy(file_path, result_file.get_full_path())
+
         return result_file
 
     # Если клиенту не важно, где лежит файл - то возвращаем PersistentTTSResultFile, напрямую указывающий на файл в кеше
-    return PersistentTTSResultFile(str(file_path))
+    return PersistentTTSResultFile(str(file_path), data)
 
 
 class _CachingFileTTS(FileWritingTTS):
@@ -205,24 +707,97 @@ class _CachingFileTTS(FileWritingTTS):
 
         return args_hash.hexdigest()
 
+    def _synthesize(self, cached_file_base_name: str, text: str, **kwargs) -> Path:
+        def synthesize() -> Path:
+            # Файл мог быть создан другим потоком после того, как этот поток не нашёл его в кеше
+            if (cached_file_path := _get_index().find(cached_file_base_name)) is not None:
+                return cached_file_path
+
+            return self._synthesize_new(cached_file_base_name, text, **kwargs)
+
+        return _single_flight(cached_file_base_name, synthesize)
+
+    def _synthesize_new(self, cached_file_base_name: str, text: str, **kwargs) -> Path:
+        cached_file_path = Path(
+            self._wrapped.say_to_file(
+                text,
+                file_base_path=str(_ensure_cache_dir().joinpath(cached_file_base_name)),
+                **kwargs
+            ).get_full_path()
+        )
+
+        self._add_to_index(cached_file_path)
+
+        return cached_file_path
+
+    @staticmethod
+    def _add_to_index(cached_file_path: Path):
+        max_size = _limit(config['max_size'])
+        _get_index().add(
+            cached_file_path,
+            max_files=_limit(config['max_files']),
+            max_size=max_size * 1024 * 1024 if max_size is not None else None,
+        )
+
+    def is_cached(self, text: str) -> bool:
+        """
+        Проверяет, есть ли в кеше результат синтеза заданной фразы.
+        """
+        return _get_index().contains(self._get_cache_file_base_name(text))
+
+    def prewarm(self, text: str):
+        """
+        Синтезирует фразу и сохраняет результат в кеше, если его там ещё нет.
+
+        Результат не загружается в память, чтобы не вытеснять из неё действительно часто используемые файлы.
+        Если ту же фразу в это время запросит пользователь, то она будет синтезирована для него заново, не дожидаясь
+        заблаговременного синтеза.
+        """
+        cached_file_base_name = self._get_cache_file_base_name(text)
+
+        def synthesize() -> Path:
+            prewarm_dir = _ensure_cache_dir().joinpath(_PREWARM_DIR)
+            prewarm_dir.mkdir(exist_ok=True)
+
+            return Path(self._wrapped.say_to_file(
+                text,
+                file_base_path=str(prewarm_dir.joinpath(cached_file_base_name)),
+            ).get_full_path())
+
+        def publish(path: Path):
+            if _get_index().contains(cached_file_base_name):
+                path.unlink(missing_ok=True)
+                return
+
+            cached_file_path = _ensure_cache_dir().joinpath(path.name)
+            path.replace(cached_file_path)
+            self._add_to_index(cached_file_path)
+
+        if not _get_index().contains(cached_file_base_name):
+            _background_flight(cached_file_base_name, synthesize, publish)
+
     def say_to_file(self, text: str, file_base_path: Optional[str] = None, **kwargs) -> TTSResultFile:
         if kwargs.get('no_cache', False):
             return self._wrapped.say_to_file(text, file_base_path, **kwargs)
 
         cached_file_base_name = self._get_cache_file_base_name(text)
+        index = _get_index()
 
-        try:
-            cached_file_path = _find_existing_file(cached_file_base_name)
-        except FileNotFoundError:
-            cached_file_path = Path(
-                self._wrapped.say_to_file(
-                    text,
-                    file_base_path=str(_ensure_cache_dir().joinpath(cached_file_base_name)),
-                    **kwargs
-                ).get_full_path()
-            )
+        if (hot_tier := _get_hot_tier()) is not None and (data := hot_tier.get(cached_file_base_name)) is not None:
+            # Файлы удаляются из памяти вместе с удалением из индекса, так что обращаться к файловой системе не нужно
+            if (cached_file_path := index.find(cached_file_base_name, check_exists=False)) is not None:
+                return _respond_with_cached_file(cached_file_path, file_base_path, data)
 
-        return _respond_with_cached_file(cached_file_path, file_base_path)
+            hot_tier.discard(cached_file_base_name)
+
+        if (cached_file_path := index.find(cached_file_base_name)) is None:
+            cached_file_path = self._synthesize(cached_file_base_name, text, **kwargs)
+
+        return _respond_with_cached_file(
+            cached_file_path,
+            file_base_path,
+            _load_to_hot_tier(cached_file_base_name, cached_file_path),
+        )
 
     @property
     def meta(self) -> MetadataMapping:
@@ -235,6 +810,14 @@ class _CachingFileTTS(FileWritingTTS):
         return self._wrapped.get_settings_hash()
 
 
+_caching_ttss: 'WeakSet[_CachingFileTTS]' = WeakSet()
+"""
+Все существующие кеширующие TTS.
+
+TTS, заменённые после изменения настроек голосовых профилей, удаляются из множества автоматически.
+"""
+
+
 def create_file_tts(nxt, prev: Optional[FileWritingTTS], config: dict[str, Any], *args, **kwargs):
     if (tts := nxt(prev, config, *args, **kwargs)) is None:
         return None
@@ -242,21 +825,160 @@ def create_file_tts(nxt, prev: Optional[FileWritingTTS], config: dict[str, Any],
     if config.get('no_cache', False):
         return tts
 
-    return _CachingFileTTS(tts)
+    caching_tts = _CachingFileTTS(tts)
+    _caching_ttss.add(caching_tts)
+
+    return caching_tts
+
+
+def _collect_prewarm_phrases(pm: PluginManager) -> list[str]:
+    phrases: list[str] = call_all_as_wrappers(pm.get_operation_sequence('get_prewarm_phrases'), [], pm)
+
+    return list(dict.fromkeys(phrase for phrase in phrases if phrase.strip()))
+
+
+def _create_profile_ttss(pm: PluginManager):
+    """
+    Создаёт TTS всех включённых голосовых профилей, в т.ч. тех, которые ещё не использовались каналами вывода.
+    """
+    try:
+        call_all_as_wrappers(pm.get_operation_sequence('get_file_writing_tts_engines'), [], pm)
+    except Exception:
+        _logger.exception("Не удалось создать TTS голосовых профилей для заблаговременного синтеза")
+
+
+def _prewarm_phrase(tts: _CachingFileTTS, text: str):
+    try:
+        # В Linux приоритет задаётся отдельно для каждого потока
+        thread_id = threading.get_native_id()
+
+        if os.getpriority(os.PRIO_PROCESS, thread_id) < _PREWARM_PRIORITY:
+            os.setpriority(os.PRIO_PROCESS, thread_id, _PREWARM_PRIORITY)
+    except (AttributeError, OSError):
+        pass
+
+    tts.prewarm(text)
+
+
+async def _prewarm(phrases: list[str], ttss: list[_CachingFileTTS]):
+    live_executor = get_executor(EXECUTOR_TTS)
+    synthesized = 0
+
+    for tts in ttss:
+        for phrase in phrases:
+            if tts.is_cached(phrase):
+                continue
+
+            # Синтез ответов на запросы пользователя важнее
+            while (stats := live_executor.get_stats()).active or stats.queued:
+                await asyncio.sleep(config['prewarm_pause'])
+
+            try:
+                await run_in_executor(_PREWARM_EXECUTOR, _prewarm_phrase, tts, phrase)
+            except Exception:
+                _logger.exception("Ошибка при заблаговременном синтезе фразы \"%s\" (%s)", phrase, tts.get_name())
+
+            synthesized += 1
+            await asyncio.sleep(config['prewarm_pause'])
+
+    if synthesized:
+        _logger.info("Заблаговременно синтезировано фраз: %d", synthesized)
+
+
+async def _run_prewarm(pm: PluginManager):
+    profiles_created = False
+    prewarmed: Optional[tuple] = None
+
+    while True:
+        if config['prewarm']:
+            if not profiles_created:
+                await run_in_executor(EXECUTOR_IO, _create_profile_ttss, pm)
+                profiles_created = True
+
+            phrases = _collect_prewarm_phrases(pm)
+            ttss = list(_caching_ttss)
+            signature = (tuple(phrases), frozenset((tts.get_name(), tts.get_settings_hash()) for tts in ttss))
+
+            if signature != prewarmed:
+                await _prewarm(phrases, ttss)
+                prewarmed = signature
+
+        await asyncio.sleep(_INDEX_FLUSH_INTERVAL)
 
 
 def init(*_args, **_kwargs):
+    configure_executor(_PREWARM_EXECUTOR, 1)
+    # Файлы, заблаговременный синтез которых был прерван
+    rmtree(_ensure_cache_dir().joinpath(_PREWARM_DIR), ignore_errors=True)
     _do_cleanup()
 
 
-async def run(*_args, **_kwargs):
+def _log_stats():
+    files, size = _get_index().get_stats()
+    _logger.info("В кеше %d файл(ов), %.1f Мибибайт", files, size / 1024 / 1024)
+
+    if (hot_tier := _hot_tier) is not None:
+        stats = hot_tier.get_stats()
+        _logger.info(
+            "В памяти %d файл(ов), %.1f из %.1f Мибибайт, доля попаданий %.0f%%",
+            stats.entries, stats.size / 1024 / 1024, stats.max_size / 1024 / 1024, stats.hit_rate * 100,
+        )
+
+
+async def run(pm: PluginManager, *_args, **_kwargs):
+    next_cleanup = time.monotonic() + config['cleanup_interval'] * 60 * 60
+    prewarm_task = asyncio.create_task(_run_prewarm(pm))
+
     try:
         while True:
-            await asyncio.sleep(config['cleanup_interval'] * 60 * 60)
+            await asyncio.sleep(_INDEX_FLUSH_INTERVAL)
 
             try:
-                await asyncio.get_running_loop().run_in_executor(None, _do_cleanup)
+                if time.monotonic() >= next_cleanup:
+                    next_cleanup = time.monotonic() + config['cleanup_interval'] * 60 * 60
+                    await run_in_executor(EXECUTOR_IO, _do_cleanup)
+                    _log_stats()
+                else:
+                    await run_in_executor(EXECUTOR_IO, _get_index().flush)
             except Exception:
                 _logger.exception("Ошибка в процессе очистки кеша")
     finally:
+        prewarm_task.cancel()
         _logger.info("Задача очистки кеша завершена.")
+
+
+def terminate(*_args, **_kwargs):
+    if (index := _index) is not None:
+        index.close()
+
+
+def register_fastapi_endpoints(router, *_args, **_kwargs) -> None:
+    from fastapi import APIRouter
+    from pydantic import BaseModel, Field
+
+    r: APIRouter = router
+
+    class MemoryCacheStatsModel(BaseModel):
+        entries: int = Field(title="Количество файлов в памяти")
+        size: int = Field(title="Суммарный размер файлов в памяти, в байтах")
+        max_size: int = Field(title="Максимальный суммарный размер файлов в памяти, в байтах")
+        hits: int = Field(title="Количество запросов, обслуженных из памяти")
+        misses: int = Field(title="Количество запросов, для которых файла не было в памяти")
+        evictions: int = Field(title="Количество файлов, вытесненных из памяти")
+        hit_rate: float = Field(title="Доля запросов, обслуженных из памяти")
+
+    class CacheStatsModel(BaseModel):
+        files: int = Field(title="Количество файлов в кеше")
+        size: int = Field(title="Суммарный размер файлов в кеше, в байтах")
+        memory: Optional[MemoryCacheStatsModel] = Field(title="Статистика хранения файлов в памяти")
+
+    @r.get('/stats', response_model=CacheStatsModel, name="Статистика кеша TTS")
+    def get_stats() -> CacheStatsModel:
+        files, size = _get_index().get_stats()
+        memory = None
+
+        if (hot_tier := _hot_tier) is not None:
+            stats = hot_tier.get_stats()
+            memory = MemoryCacheStatsModel(**stats._asdict(), hit_rate=stats.hit_rate)
+
+        return CacheStatsModel(files=files, size=size, memory=memory)
@@ -15,7 +15,7 @@ import torch
 import irene.utils.all_num_to_text as all_num_to_text
 from irene.face.abc import FileWritingTTS, TTSResultFile
 from irene.face.tts_helpers import create_disposable_tts_result_file
-from irene.plugin_loader.file_patterns import first_substitution, match_files
+from irene.plugin_loader.file_patterns import first_substitution, match_files, invalidate_matches
 from irene.plugin_loader.utils.snapshot_hash import snapshot_hash
 from irene.utils.metadata import MetadataMapping
 
@@ -70,6 +70,7 @@ def _get_model_files(url: str) -> Iterable[str]:
     os.makedirs(dirname(target_path), exist_ok=True)
 
     torch.hub.download_url_to_file(url, target_path)
+    invalidate_matches(target_path)
 
     _logger.info(f"Файл модели скачан в '{target_path}'.")
 
@@ -11,7 +11,7 @@ from irene.utils.metadata import Metadata, MetaMatcher, MetadataMapping
 from irene.utils.predicate import Predicate
 
 name = 'voice_profiles'
-version = '0.1.0'
+version = '0.2.0'
 
 _logger = getLogger(name)
 
@@ -23,6 +23,10 @@ config_comment = """
 - `"voiceProfiles"`       - список голосовых профилей (см. далее)
 - `"defaultLocalPlayer"`  - метод воспроизведения голоса, используемый по-умолчанию для воспроизведения речи на
                             локальном устройстве.
+- `"streamingPlayback"`   - если `true`, то при воспроизведении речи на локальном устройстве длинный текст
+                            синтезируется по предложениям, и воспроизведение начинается сразу после синтеза первого
+                            предложения.
+                            Используется только для TTS-движков, которые пишут результат в файл.
 
 Голосовым профилем называется набор настроек для TTS-движка, который затем может использоваться для озвучения речи.
 Список голосовых профилей представляет собой объект, ключом в котором служит уникальное имя профиля, а значением - набор
@@ -120,6 +124,7 @@ config: dict[str, Any] = {
     "defaultLocalPlayer": {
         "type": "sounddevice"
     },
+    "streamingPlayback": True,
     "voiceProfiles": {
         "silero_v3_ru_f": {
             "enabled": True,
@@ -305,8 +310,7 @@ class _VoiceProfile(Metadata):
     def _create_file_writing_tts(self) -> FileWritingTTS:
         assert self._pm is not None
 
-        tts: Optional[FileWritingTTS] = call_all_as_wrappers(
-            self._pm.get_operation_sequence('create_file_tts'),
+        tts: Optional[FileWritingTTS] = self._pm.get_wrapper_chain('create_file_tts')(
             None,
             self._settings.get('tts_settings', {}),
             self._pm,
@@ -348,7 +352,7 @@ class _VoiceProfile(Metadata):
                 raise _TTSCreationFailure(
                     f"Не удалось создать канал вывода звука для профиля {self._id}")
 
-            tts = FilePlaybackTTS(file_tts, filtered_players[0])
+            tts = FilePlaybackTTS(file_tts, filtered_players[0], streaming=config.get('streamingPlayback', False))
 
         return tts
 
@@ -17,7 +17,7 @@ from typing import Optional, Callable, Any, TypedDict
 from urllib.parse import urlparse
 from urllib.request import urlretrieve
 
-from irene.plugin_loader.file_patterns import pick_random_file, first_substitution
+from irene.plugin_loader.file_patterns import pick_random_file, first_substitution, invalidate_matches
 
 name = 'vosk_model_loader'
 version = '1.0.0'
@@ -55,6 +55,7 @@ def _download_model() -> str:
     os.makedirs(dirname(target_path), exist_ok=True)
 
     urlretrieve(raw_url, target_path)
+    invalidate_matches(target_path)
 
     _logger.info(f"Файл модели загружен в {target_path}")
 
@@ -0,0 +1,388 @@
+import asyncio
+import os
+import threading
+import time
+import unittest
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import TemporaryDirectory
+from typing import Optional
+from unittest.mock import patch, Mock
+
+from irene.brain.abc import AudioOutputChannel
+from irene.brain.brain_plugin import BrainPlugin
+from irene.embedded_plugins import plugin_tts_cache, plugin_greetings
+from irene.face.abc import FileWritingTTS, TTSResultFile
+from irene.face.tts_helpers import PersistentTTSResultFile, FilePlaybackTTS
+from irene.plugin_loader.executors import MonitoredThreadPoolExecutor, set_executor, shutdown_executors, EXECUTOR_TTS
+from irene.plugin_loader.magic_plugin import MagicModulePlugin
+from irene.plugin_loader.plugin_manager import PluginManagerImpl
+from irene.utils.metadata import MetadataMapping
+
+
+class _FileTTSStub(FileWritingTTS):
+    def __init__(self):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+        self.error: Optional[Exception] = None
+
+    def say_to_file(self, text: str, file_base_path: Optional[str] = None, **kwargs) -> TTSResultFile:
+        self.calls += 1
+        self.started.set()
+        self.release.wait()
+
+        if self.error is not None:
+            raise self.error
+
+        path = f'{file_base_path}.wav'
+        Path(path).write_text(text)
+        return PersistentTTSResultFile(path)
+
+    def get_name(self) -> str:
+        return 'stub'
+
+    def get_settings_hash(self) -> str:
+        return 'settings'
+
+    @property
+    def meta(self) -> MetadataMapping:
+        return {}
+
+
+class TTSCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.cache_dir = Path(self._tmp.name, 'tts')
+        self.index_path = Path(self._tmp.name, 'index.sqlite3')
+
+        config_patch = patch.dict(plugin_tts_cache.config, {
+            'cache_path': str(self.cache_dir),
+            'index_path': str(self.index_path),
+            'max_files': -1,
+            'max_size': -1,
+            'max_age': -1,
+            'memory_cache_size': -1,
+            'prewarm_pause': 0.01,
+        })
+        config_patch.start()
+        self.addCleanup(config_patch.stop)
+        self._reset_index()
+        self.addCleanup(self._reset_index)
+
+        self.wrapped = _FileTTSStub()
+        self.tts = plugin_tts_cache.create_file_tts(lambda *_args, **_kwargs: self.wrapped, None, {})
+
+    @staticmethod
+    def _reset_index():
+        if (index := plugin_tts_cache._index) is not None:
+            index.close()
+
+        plugin_tts_cache._index = None
+        plugin_tts_cache._hot_tier = None
+
+    def _restart(self):
+        plugin_tts_cache.terminate()
+        self._reset_index()
+
+    def _crash(self):
+        # Индекс не сохраняется перед завершением, записанные в базу данных изменения остаются
+        self.addCleanup(plugin_tts_cache._get_index().close)
+        plugin_tts_cache._index = None
+        plugin_tts_cache._hot_tier = None
+
+    def _say(self, text: str) -> Path:
+        return Path(self.tts.say_to_file(text).get_full_path())
+
+    def test_cached_file_reused(self):
+        path = self._say('привет')
+
+        self.assertEqual(self._say('привет'), path)
+        self.assertEqual(self.wrapped.calls, 1)
+        self.assertEqual(plugin_tts_cache._get_index().get_stats(), (1, len('привет'.encode('utf-8'))))
+
+    def test_index_persisted(self):
+        path = self._say('привет')
+        self._restart()
+
+        with patch.object(plugin_tts_cache._CacheIndex, '_rebuild') as rebuild:
+            self.assertEqual(self._say('привет'), path)
+
+        rebuild.assert_not_called()
+        self.assertEqual(self.wrapped.calls, 1)
+
+    def test_index_survives_unclean_shutdown(self):
+        plugin_tts_cache.config['max_files'] = 2
+
+        first = self._say('раз')
+        self._say('два')
+        self._crash()
+
+        with patch.object(plugin_tts_cache._CacheIndex, '_rebuild') as rebuild:
+            self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 2)
+            self._say('три')
+
+        rebuild.assert_not_called()
+        self.assertFalse(first.exists())
+        self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 2)
+
+    def test_rebuilt_index_survives_unclean_shutdown(self):
+        self._say('раз')
+        self._say('два')
+        self._restart()
+        self.index_path.unlink()
+
+        plugin_tts_cache._get_index()
+        self._crash()
+
+        with patch.object(plugin_tts_cache._CacheIndex, '_rebuild') as rebuild:
+            self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 2)
+
+        rebuild.assert_not_called()
+
+    def test_rebuild_on_corrupted_index(self):
+        path = self._say('привет')
+        self._restart()
+        self.index_path.write_bytes(b'not a database')
+
+        self.assertEqual(self._say('привет'), path)
+        self.assertEqual(self.wrapped.calls, 1)
+
+        self._crash()
+
+        with patch.object(plugin_tts_cache._CacheIndex, '_rebuild') as rebuild:
+            self.assertEqual(self._say('привет'), path)
+
+        rebuild.assert_not_called()
+
+    def test_rebuild_on_missing_index(self):
+        path = self._say('привет')
+        self._restart()
+        self.index_path.unlink()
+
+        self.assertEqual(self._say('привет'), path)
+        self.assertEqual(self.wrapped.calls, 1)
+
+    def test_file_deleted_externally(self):
+        self._say('привет').unlink()
+
+        self._say('привет')
+        self.assertEqual(self.wrapped.calls, 2)
+
+    def test_max_files(self):
+        plugin_tts_cache.config['max_files'] = 2
+
+        first = self._say('раз')
+        second = self._say('два')
+        self._say('раз')
+        self._say('три')
+
+        self.assertTrue(first.is_file())
+        self.assertFalse(second.exists())
+        self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 2)
+
+    def test_converted_files_removed(self):
+        plugin_tts_cache.config['max_files'] = 1
+
+        first = self._say('раз')
+        converted = Path(f'{first}.converted.ogg')
+        converted.write_bytes(b'ogg')
+        self._say('два')
+
+        self.assertFalse(first.exists())
+        self.assertFalse(converted.exists())
+
+    def test_max_age(self):
+        plugin_tts_cache.config['max_age'] = 1
+
+        old = self._say('раз')
+        unused = self._say('два')
+
+        with patch.object(plugin_tts_cache.time, 'time', return_value=time.time() + 60 * 60 * 24 * 2):
+            self._say('раз')
+            new = self._say('три')
+            plugin_tts_cache._do_cleanup()
+
+        self.assertTrue(old.is_file())
+        self.assertTrue(new.is_file())
+        self.assertFalse(unused.exists())
+
+    def test_rebuild_uses_modification_time(self):
+        old = self._say('раз')
+        self._say('два')
+        self._restart()
+        self.index_path.unlink()
+        os.utime(old, (0, 0))
+        plugin_tts_cache.config['max_age'] = 1
+
+        plugin_tts_cache.init()
+
+        self.assertFalse(old.exists())
+        self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 1)
+
+    def test_memory_cache(self):
+        plugin_tts_cache.config['memory_cache_size'] = 1
+
+        path = self._say('привет')
+
+        with patch.object(Path, 'is_file') as is_file, patch.object(Path, 'stat') as stat:
+            result = self.tts.say_to_file('привет')
+
+        is_file.assert_not_called()
+        stat.assert_not_called()
+        self.assertEqual(result.get_full_path(), str(path))
+        self.assertEqual(result.get_data(), 'привет'.encode('utf-8'))
+        self.assertEqual(self.wrapped.calls, 1)
+        self.assertEqual(plugin_tts_cache._hot_tier.get_stats().hits, 1)
+
+    def test_memory_cache_file_size_limit(self):
+        plugin_tts_cache.config['memory_cache_size'] = 1
+        plugin_tts_cache.config['memory_cache_max_file_size'] = 1 / 1024 / 1024
+
+        self._say('привет')
+
+        self.assertIsNone(self.tts.say_to_file('привет').get_data())
+        self.assertEqual(plugin_tts_cache._hot_tier.get_stats().entries, 0)
+
+    def test_evicted_files_removed_from_memory(self):
+        plugin_tts_cache.config['memory_cache_size'] = 1
+        plugin_tts_cache.config['max_files'] = 1
+
+        self._say('раз')
+        self._say('два')
+
+        self.assertEqual(plugin_tts_cache._hot_tier.get_stats().entries, 1)
+        self._say('раз')
+        self.assertEqual(self.wrapped.calls, 3)
+
+    def test_playback_passes_data_to_output(self):
+        plugin_tts_cache.config['memory_cache_size'] = 1
+        output = Mock(AudioOutputChannel)
+        playback = FilePlaybackTTS(self.tts, output)
+
+        playback.say('привет')
+        playback.say('привет')
+
+        path = str(self._say('привет'))
+        output.send_file.assert_called_with(path, alt_text='привет', audio_data='привет'.encode('utf-8'))
+
+    def test_prewarm(self):
+        plugin_tts_cache.config['memory_cache_size'] = 1
+
+        asyncio.run(plugin_tts_cache._prewarm(['раз', 'два'], [self.tts]))
+
+        self.assertEqual(self.wrapped.calls, 2)
+        self.assertTrue(self.tts.is_cached('раз'))
+        self.assertEqual(plugin_tts_cache._get_hot_tier().get_stats().entries, 0)
+
+        asyncio.run(plugin_tts_cache._prewarm(['раз', 'два'], [self.tts]))
+        self._say('два')
+
+        self.assertEqual(self.wrapped.calls, 2)
+
+    def test_prewarm_waits_for_live_requests(self):
+        self.addCleanup(shutdown_executors)
+        live_executor = MonitoredThreadPoolExecutor(EXECUTOR_TTS, 1)
+        set_executor(live_executor)
+        release = threading.Event()
+        live_executor.submit(release.wait)
+
+        async def scenario():
+            task = asyncio.create_task(plugin_tts_cache._prewarm(['раз'], [self.tts]))
+            await asyncio.sleep(0.1)
+            self.assertEqual(self.wrapped.calls, 0)
+
+            release.set()
+            await task
+
+        asyncio.run(scenario())
+
+        self.assertEqual(self.wrapped.calls, 1)
+
+    def test_live_request_does_not_wait_for_prewarm(self):
+        prewarm_started = threading.Event()
+        prewarm_release = threading.Event()
+        self.addCleanup(prewarm_release.set)
+        say_to_file = self.wrapped.say_to_file
+
+        def slow_prewarm(text: str, file_base_path: Optional[str] = None, **kwargs):
+            if plugin_tts_cache._PREWARM_DIR in Path(str(file_base_path)).parts:
+                prewarm_started.set()
+                prewarm_release.wait(1)
+
+            return say_to_file(text, file_base_path, **kwargs)
+
+        with patch.object(self.wrapped, 'say_to_file', slow_prewarm), ThreadPoolExecutor(1) as executor:
+            prewarm = executor.submit(self.tts.prewarm, 'привет')
+            self.assertTrue(prewarm_started.wait(1))
+
+            path = self._say('привет')
+            self.assertFalse(prewarm.done())
+
+            prewarm_release.set()
+            prewarm.result()
+
+        self.assertEqual(self.wrapped.calls, 2)
+        self.assertEqual(path.read_text(), 'привет')
+        self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 1)
+        self.assertEqual(list(self.cache_dir.joinpath(plugin_tts_cache._PREWARM_DIR).iterdir()), [])
+        self.assertEqual(plugin_tts_cache._flights, {})
+
+    def test_collect_prewarm_phrases(self):
+        brain = BrainPlugin()
+        brain.config = {**BrainPlugin.config, 'rootCommandErrorReply': ["Упс", "Не поняла..."]}
+        pm = PluginManagerImpl([brain, MagicModulePlugin(plugin_greetings)])
+
+        phrases = plugin_tts_cache._collect_prewarm_phrases(pm)
+
+        self.assertIn("Извини, я не поняла", phrases)
+        self.assertIn("Упс", phrases)
+        self.assertIn("И тебе привет!", phrases)
+        self.assertEqual(phrases.count("Не поняла..."), 1)
+
+    def test_streaming_playback_caches_chunks(self):
+        output = Mock(AudioOutputChannel)
+        playback = FilePlaybackTTS(self.tts, output, streaming=True)
+
+        playback.say('Раз. Два.')
+        playback.say('Два. Три.')
+
+        self.assertEqual(self.wrapped.calls, 3)
+        self.assertEqual(plugin_tts_cache._get_index().get_stats()[0], 3)
+
+    def _say_concurrently(self, text: str, n: int) -> list:
+        self.wrapped.release.clear()
+
+        with ThreadPoolExecutor(n) as executor:
+            futures = [executor.submit(self.tts.say_to_file, text) for _ in range(n)]
+            self.wrapped.started.wait(1)
+            # Даём остальным потокам дойти до ожидания результата
+            time.sleep(0.1)
+            self.wrapped.release.set()
+
+            return [future.exception() or future.result().get_full_path() for future in futures]
+
+    def test_concurrent_requests_synthesized_once(self):
+        results = self._say_concurrently('привет', 8)
+
+        self.assertEqual(self.wrapped.calls, 1)
+        self.assertEqual(set(results), {str(self._say('привет'))})
+        self.assertEqual(plugin_tts_cache._flights, {})
+
+    def test_concurrent_requests_share_error(self):
+        self.wrapped.error = RuntimeError('сбой')
+
+        results = self._say_concurrently('привет', 4)
+
+        self.assertEqual(self.wrapped.calls, 1)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+
+        self.wrapped.error = None
+        self._say('привет')
+        self.assertEqual(self.wrapped.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
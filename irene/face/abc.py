@@ -4,6 +4,7 @@
 
 from abc import ABC, abstractmethod
 
+from irene.brain.abc import LOCAL_AUDIO_DEVICE
 from irene.utils.metadata import Metadata
 
 __all__ = [
@@ -18,7 +19,7 @@ __all__ = [
 
 from contextlib import contextmanager
 
-from typing import Optional, Callable, ContextManager, Iterable
+from typing import Optional, Callable, ContextManager, Iterable, Union, Sequence, Hashable
 
 
 class TTS(Metadata, ABC):
@@ -48,6 +49,15 @@ class ImmediatePlaybackTTS(TTS):
     TTS, который может воспроизводить синтезированную речь самостоятельно.
     """
 
+    @property
+    def output_device(self) -> Hashable:
+        """
+        Устройство, на котором воспроизводится речь (см. ``OutputChannel.output_device``).
+
+        По-умолчанию - динамики компьютера, на котором запущен ассистент.
+        """
+        return LOCAL_AUDIO_DEVICE
+
     @abstractmethod
     def say(self, text: str, **kwargs):
         """
@@ -75,6 +85,16 @@ class TTSResultFile(ABC):
         Возвращает полный абсолютный путь к файлу.
         """
 
+    def get_data(self) -> Optional[bytes]:
+        """
+        Возвращает содержимое файла, если оно доступно без обращения к файловой системе (например, хранится в кеше в
+        оперативной памяти).
+
+        Returns:
+            содержимое файла или ``None`` если его нужно прочитать из файла
+        """
+        return None
+
     @abstractmethod
     def release(self):
         """
@@ -122,10 +142,13 @@ class LocalInput(ABC):
     """
 
     @abstractmethod
-    def run(self) -> ContextManager[tuple[Iterable[str], Callable[[], None]]]:
+    def run(self) -> ContextManager[tuple[Iterable[Union[str, Sequence[tuple[str, float]]]], Callable[[], None]]]:
         """
         Запускает ввод текста и предоставляет итератор, по введённым командам.
 
+        Команда представлена либо строкой, либо, для распознанной речи, непустой последовательностью вариантов текста с
+        уверенностью в каждом из них (см. ``InboundMessage.get_hypotheses``).
+
         >>> li: LocalInput = ...
         >>> with li.run() as (lines, stop):
         >>>     # stop() можно вызвать из другого потока чтобы прервать цикл ввода
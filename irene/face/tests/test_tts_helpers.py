@@ -0,0 +1,145 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from unittest.mock import Mock
+
+from irene.brain.abc import AudioOutputChannel
+from irene.face.abc import FileWritingTTS, TTSResultFile
+from irene.face.tts_helpers import split_text_for_streaming, FilePlaybackTTS
+from irene.utils.metadata import MetadataMapping
+
+
+class SplitTextForStreamingTest(unittest.TestCase):
+    def test_single_sentence(self):
+        self.assertEqual(split_text_for_streaming("Привет, мир!"), ["Привет, мир!"])
+
+    def test_sentences(self):
+        self.assertEqual(
+            split_text_for_streaming("  Первое предложение. Второе?  Третье!\nЧетвёртое… Пятое  "),
+            ["Первое предложение.", "Второе?", "Третье!", "Четвёртое…", "Пятое"],
+        )
+
+    def test_numbers_not_split(self):
+        self.assertEqual(split_text_for_streaming("Температура 3.5 градуса."), ["Температура 3.5 градуса."])
+
+    def test_long_sentence_split_into_clauses(self):
+        self.assertEqual(
+            split_text_for_streaming("раз два, три четыре; пять шесть, семь", max_length=20),
+            ["раз два, три четыре;", "пять шесть, семь"],
+        )
+
+    def test_long_clause_kept(self):
+        self.assertEqual(
+            split_text_for_streaming("оченьдлинноеслово, ещё", max_length=5),
+            ["оченьдлинноеслово,", "ещё"],
+        )
+
+    def test_empty(self):
+        self.assertEqual(split_text_for_streaming("  "), [])
+
+
+class _ResultFileStub(TTSResultFile):
+    def __init__(self, text: str, released: list[str]):
+        self.text = text
+        self._released = released
+
+    def get_full_path(self) -> str:
+        return f'/stub/{self.text}.wav'
+
+    def release(self):
+        self._released.append(self.text)
+
+
+class _FileTTSStub(FileWritingTTS):
+    def __init__(self):
+        self.texts: list[str] = []
+        self.released: list[str] = []
+        self.gates: dict[str, threading.Event] = {}
+        self.timed_out: list[str] = []
+        self.fail_on: Optional[str] = None
+        self.threads: set[str] = set()
+
+    def say_to_file(self, text: str, file_base_path: Optional[str] = None, **kwargs) -> TTSResultFile:
+        self.threads.add(threading.current_thread().name)
+
+        if (gate := self.gates.get(text)) is not None and not gate.wait(1):
+            self.timed_out.append(text)
+
+        if text == self.fail_on:
+            raise RuntimeError(text)
+
+        self.texts.append(text)
+        return _ResultFileStub(text, self.released)
+
+    def get_name(self) -> str:
+        return 'stub'
+
+    @property
+    def meta(self) -> MetadataMapping:
+        return {}
+
+
+class FilePlaybackTTSTest(unittest.TestCase):
+    def setUp(self):
+        self.tts = _FileTTSStub()
+        self.output = Mock(AudioOutputChannel)
+
+    def _played(self) -> list[str]:
+        return [call.kwargs['alt_text'] for call in self.output.send_file.call_args_list]
+
+    def test_whole_text_without_streaming(self):
+        FilePlaybackTTS(self.tts, self.output).say("Раз. Два.")
+
+        self.assertEqual(self.tts.texts, ["Раз. Два."])
+        self.assertEqual(self._played(), ["Раз. Два."])
+
+    def test_synthesis_in_executor(self):
+        executor = ThreadPoolExecutor(1, thread_name_prefix='synthesis')
+        self.addCleanup(executor.shutdown)
+        playback_threads: set[str] = set()
+        self.output.send_file.side_effect = lambda *_args, **_kwargs: playback_threads.add(
+            threading.current_thread().name)
+
+        FilePlaybackTTS(self.tts, self.output, synthesis_executor=executor).say("Раз. Два.")
+        FilePlaybackTTS(self.tts, self.output, streaming=True, synthesis_executor=executor).say("Раз. Два.")
+
+        self.assertEqual(self.tts.threads, {'synthesis_0'})
+        self.assertEqual(playback_threads, {threading.current_thread().name})
+
+    def test_streaming(self):
+        FilePlaybackTTS(self.tts, self.output, streaming=True).say("Раз. Два. Три.")
+
+        self.assertEqual(self.tts.texts, ["Раз.", "Два.", "Три."])
+        self.assertEqual(self._played(), ["Раз.", "Два.", "Три."])
+        self.assertEqual(self.tts.released, ["Раз.", "Два.", "Три."])
+
+    def test_playback_starts_before_synthesis_ends(self):
+        last_gate = self.tts.gates["Три."] = threading.Event()
+        self.output.send_file.side_effect = lambda *_args, **_kwargs: last_gate.set()
+
+        FilePlaybackTTS(self.tts, self.output, streaming=True).say("Раз. Два. Три.")
+
+        self.assertEqual(self.tts.timed_out, [])
+        self.assertEqual(self._played(), ["Раз.", "Два.", "Три."])
+
+    def test_synthesis_error(self):
+        self.tts.fail_on = "Два."
+
+        with self.assertRaises(RuntimeError):
+            FilePlaybackTTS(self.tts, self.output, streaming=True).say("Раз. Два. Три.")
+
+        self.assertEqual(self._played(), ["Раз."])
+        self.assertEqual(self.tts.released, ["Раз."])
+
+    def test_playback_error_releases_files(self):
+        self.output.send_file.side_effect = RuntimeError()
+
+        with self.assertRaises(RuntimeError):
+            FilePlaybackTTS(self.tts, self.output, streaming=True).say("Раз. Два. Три. Четыре.")
+
+        self.assertEqual(sorted(self.tts.released), sorted(self.tts.texts))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,12 +1,17 @@
 import os
+import re
 import uuid
 from os.path import join
+from concurrent.futures import Executor
+from queue import Queue
 from tempfile import gettempdir
-from typing import Optional, Callable, Any
+from threading import Thread, Event
+from typing import Optional, Callable, Any, Union, Hashable
 
 from irene.brain.abc import AudioOutputChannel, TextOutputChannel
 from irene.face.abc import ImmediatePlaybackTTS, FileWritingTTS, TTSResultFile, MuteGroup
 from irene.face.mute_group import NULL_MUTE_GROUP
+from irene.plugin_loader.executors import get_executor, EXECUTOR_TTS
 from irene.utils.metadata import MetadataMapping
 
 
@@ -33,12 +38,16 @@ class PersistentTTSResultFile(TTSResultFile):
     Например, может представлять собой хранимый в кеше файл с заранее сгенерированной часто используемой фразой.
     """
 
-    def __init__(self, full_path: str):
+    def __init__(self, full_path: str, data: Optional[bytes] = None):
         self._full_path = full_path
+        self._data = data
 
     def get_full_path(self) -> str:
         return self._full_path
 
+    def get_data(self) -> Optional[bytes]:
+        return self._data
+
     def release(self):
         pass
 
@@ -120,23 +129,106 @@ def immediate_playback_tts_from_callbacks(
     return _ImmediatePlaybackTTSImpl
 
 
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?…])\s+')
+_CLAUSE_END_RE = re.compile(r'(?<=[,;:—])\s+')
+
+STREAMING_CHUNK_MAX_LENGTH = 200
+"""
+Максимальная длина фрагмента текста, синтезируемого отдельно при потоковом воспроизведении
+"""
+
+
+def split_text_for_streaming(text: str, max_length: int = STREAMING_CHUNK_MAX_LENGTH) -> list[str]:
+    """
+    Разбивает текст на фрагменты, которые можно синтезировать и воспроизводить по отдельности.
+
+    Текст разбивается на предложения, а предложения длиннее ``max_length`` - на части по знакам препинания между
+    частями предложения.
+    Части предложения объединяются, пока их общая длина не превышает ``max_length``.
+
+    Args:
+        text:
+            текст
+        max_length:
+            максимальная длина фрагмента.
+            Фрагмент может оказаться длиннее, если в нём нет подходящих знаков препинания.
+    Returns:
+        непустые фрагменты текста
+    """
+    chunks: list[str] = []
+
+    for sentence in _SENTENCE_END_RE.split(text.strip()):
+        if len(sentence) <= max_length:
+            chunks.append(sentence)
+            continue
+
+        current = ''
+
+        for clause in _CLAUSE_END_RE.split(sentence):
+            if current and len(current) + 1 + len(clause) > max_length:
+                chunks.append(current)
+                current = clause
+            else:
+                current = f'{current} {clause}' if current else clause
+
+        chunks.append(current)
+
+    return [chunk for chunk in chunks if chunk]
+
+
 class FilePlaybackTTS(ImmediatePlaybackTTS):
     """
     Адаптер, превращающий ``FileWritingTTS`` (TTS-движок, пишущий результат в файл) в ``ImmediatePlaybackTTS`` (TTS
     движок, воспроизводящий речь немедленно) за счёт использования аудио-выхода (``AudioOutputChannel``).
+
+    Синтез выполняется в пуле потоков синтеза речи (``EXECUTOR_TTS``), а воспроизведение - в вызывающем потоке, так что
+    воспроизведение не занимает потоки, выполняющие синтез.
+    Поэтому ``say`` не следует вызывать из потоков этого пула.
+
+    В потоковом режиме текст, состоящий из нескольких предложений, разбивается на фрагменты (см.
+    ``split_text_for_streaming``).
+    Фрагменты синтезируются по очереди в отдельном потоке и воспроизводятся по мере готовности, так что воспроизведение
+    начинается сразу после синтеза первого фрагмента.
     """
 
-    __slots__ = ('_tts', '_ao', '_tmp')
+    __slots__ = ('_tts', '_ao', '_tmp', '_streaming', '_executor')
+
+    _STREAMING_QUEUE_SIZE = 2
+    """Количество фрагментов, которые могут быть синтезированы заранее, до начала их воспроизведения"""
 
     def __init__(
             self,
             file_writing: FileWritingTTS,
             playback_channel: AudioOutputChannel,
             temp_file_path: Optional[str] = None,
+            streaming: bool = False,
+            synthesis_executor: Optional[Executor] = None,
     ):
+        """
+        Args:
+            file_writing:
+                TTS-движок
+            playback_channel:
+                канал воспроизведения
+            temp_file_path:
+                базовый путь к файлам, в которые записывается результат синтеза
+            streaming:
+                включает потоковый режим.
+                Не следует включать для каналов, где каждый файл отправляется отдельным сообщением (например, Telegram).
+            synthesis_executor:
+                исполнитель, в котором выполняется синтез.
+                Если не передан, то используется пул потоков синтеза речи (``EXECUTOR_TTS``).
+        """
         self._tts = file_writing
         self._ao = playback_channel
         self._tmp = temp_file_path
+        self._streaming = streaming
+        self._executor = synthesis_executor
+
+    def _say_to_file(self, text: str, file_base_path: Optional[str], **kwargs) -> TTSResultFile:
+        executor = self._executor or get_executor(EXECUTOR_TTS)
+
+        return executor.submit(self._tts.say_to_file, text, file_base_path, **kwargs).result()
 
     def get_name(self) -> str:
         return self._tts.get_name()
@@ -144,10 +236,63 @@ class FilePlaybackTTS(ImmediatePlaybackTTS):
     def get_settings_hash(self) -> str:
         return self._tts.get_settings_hash()
 
-    def say(self, text: str, **kwargs):
-        with self._tts.say_to_file(text, self._tmp, **kwargs) as f:
+    def _play(self, f: TTSResultFile, text: str):
+        if (data := f.get_data()) is not None:
+            # Каналы, поддерживающие эту опцию, отправят данные без чтения файла
+            self._ao.send_file(f.get_full_path(), alt_text=text, audio_data=data)
+        else:
             self._ao.send_file(f.get_full_path(), alt_text=text)
 
+    def say(self, text: str, **kwargs):
+        if self._streaming and len(chunks := split_text_for_streaming(text)) > 1:
+            self._say_streaming(chunks, **kwargs)
+            return
+
+        with self._say_to_file(text, self._tmp, **kwargs) as f:
+            self._play(f, text)
+
+    def _say_streaming(self, chunks: list[str], **kwargs):
+        results: Queue[Optional[tuple[str, Union[TTSResultFile, Exception]]]] = Queue(self._STREAMING_QUEUE_SIZE)
+        stopped = Event()
+
+        def produce():
+            try:
+                for i, chunk in enumerate(chunks):
+                    if stopped.is_set():
+                        return
+
+                    file_base_path = None if self._tmp is None else f'{self._tmp}_{i}'
+                    results.put((chunk, self._say_to_file(chunk, file_base_path, **kwargs)))
+            except Exception as e:
+                results.put(('', e))
+            finally:
+                results.put(None)
+
+        Thread(target=produce, name='tts-streaming', daemon=True).start()
+
+        try:
+            while (item := results.get()) is not None:
+                chunk, result = item
+
+                if isinstance(result, Exception):
+                    raise result
+
+                with result as f:
+                    self._play(f, chunk)
+        except BaseException:
+            # Останавливаем синтез и освобождаем уже синтезированные файлы
+            stopped.set()
+
+            while (item := results.get()) is not None:
+                if isinstance(item[1], TTSResultFile):
+                    item[1].release()
+
+            raise
+
+    @property
+    def output_device(self) -> Hashable:
+        return self._ao.output_device
+
     @property
     def meta(self) -> MetadataMapping:
         return {**self._tts.meta, **self._ao.meta}
@@ -167,6 +312,10 @@ class ImmediatePlaybackTTSOutput(TextOutputChannel):
         with self._mg.muted():
             self._tts.say(text, **kwargs)
 
+    @property
+    def output_device(self) -> Hashable:
+        return self._tts.output_device
+
     @property
     def meta(self) -> MetadataMapping:
         return {**self._tts.meta, 'is_speech': True}
@@ -13,7 +13,7 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Iterable, Collection, Any, NamedTuple, Union
+from typing import Iterable, Collection, Any, NamedTuple, Union, Callable, Optional
 
 
 class OperationStep(NamedTuple):
@@ -57,6 +57,18 @@ class Plugin(ABC):
             набор шагов, предоставляемый плагином
         """
 
+    def get_declared_operations(self) -> Optional[Collection[str]]:
+        """
+        Возвращает имена всех операций, для которых плагин предоставляет шаги.
+
+        Используется для сохранения сведений о плагине в индексе плагинов.
+
+        Returns:
+            имена операций или ``None`` если набор операций плагина заранее неизвестен (например, может меняться со
+            временем)
+        """
+        return None
+
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
         cls.name = cls.__dict__.get('name', cls.__name__)
@@ -100,3 +112,33 @@ class PluginManager(ABC):
         Raises:
             DependencyCycleException - если у шагов операции присутствуют циклические зависимости
         """
+
+    def get_wrapper_chain(self, op_name: str) -> Callable[..., Any]:
+        """
+        Возвращает функцию, выполняющую шаги операции как обёртки (см. ``call_all_as_wrappers``).
+
+        >>> pm: PluginManager = ...
+        >>> result = pm.get_wrapper_chain('create_something')(initial, *args, **kwargs)
+
+        Args:
+            op_name:
+                имя операции
+
+        Returns:
+            функция, принимающая начальное значение и дополнительные аргументы и возвращающая результат работы операции
+
+        Raises:
+            DependencyCycleException - если у шагов операции присутствуют циклические зависимости
+        """
+        from irene.plugin_loader.run_operation import compile_wrappers
+
+        return compile_wrappers(self.get_operation_sequence(op_name))
+
+    def invalidate_operation_cache(self):
+        """
+        Сообщает менеджеру плагинов, что набор шагов операций изменился (например, были загружены новые плагины).
+
+        Менеджер может запоминать упорядоченные последовательности шагов операций.
+        Плагины, изменяющие набор шагов, возвращаемых их методом ``get_operation_steps``, должны вызывать этот метод
+        после изменения.
+        """
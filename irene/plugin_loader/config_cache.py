@@ -0,0 +1,148 @@
+"""
+Кеш разобранных файлов конфигурации, сохраняемый на диске между запусками приложения.
+
+Разбор YAML - заметная часть времени запуска при большом количестве плагинов.
+Кеш хранит результаты разбора в формате ``marshal`` вместе с временем изменения и размером файлов, так что при повторных
+запусках неизменившиеся файлы загружаются без разбора.
+Сами файлы конфигурации остаются основным источником данных - кеш никогда не используется для их записи.
+"""
+
+import marshal
+import os
+from logging import getLogger
+from pathlib import Path
+from typing import Optional, Any, Callable, NamedTuple
+
+__all__ = ['ParsedConfigCache']
+
+_CACHE_FORMAT_VERSION = 1
+
+_logger = getLogger('config_cache')
+
+
+class _CacheEntry(NamedTuple):
+    mtime: int
+    size: int
+
+    data: bytes
+    """
+    Результат разбора файла, сериализованный с помощью ``marshal``.
+
+    Хранится в сериализованном виде, чтобы изменения загруженной конфигурации не попадали в кеш.
+    """
+
+
+class ParsedConfigCache:
+    """
+    Кеш разобранных файлов конфигурации.
+
+    Изменения записываются на диск методом ``save``.
+    Записи о файлах, к которым не было обращений с момента загрузки кеша, при сохранении удаляются.
+    """
+
+    __slots__ = ('_path', '_entries', '_used_entries', '_modified')
+
+    def __init__(self, path: Optional[str]):
+        """
+        Args:
+            path:
+                путь к файлу кеша или ``None`` если кеш не должен сохраняться на диске
+        """
+        self._path = path
+        self._entries: dict[str, _CacheEntry] = {}
+        self._used_entries: dict[str, _CacheEntry] = {}
+        self._modified = False
+
+        if path is not None:
+            self._load(path)
+
+    def _load(self, path: str):
+        try:
+            with open(path, 'rb') as f:
+                data = marshal.load(f)
+
+            if data.get('version') != _CACHE_FORMAT_VERSION:
+                _logger.info("Формат кеша конфигурации в %s устарел, кеш будет построен заново", path)
+                self._modified = True
+                return
+
+            self._entries = {
+                file_path: _CacheEntry(mtime, size, entry_data)
+                for file_path, (mtime, size, entry_data) in data['files'].items()
+            }
+        except FileNotFoundError:
+            self._modified = True
+        except Exception:
+            _logger.warning("Не удалось прочитать кеш конфигурации из %s, кеш будет построен заново", path,
+                            exc_info=True)
+            self._entries = {}
+            self._modified = True
+
+    def read(self, file_path: Path, parse: Callable[[], Any]) -> Any:
+        """
+        Возвращает содержимое файла конфигурации из кеша или, если файл изменился или отсутствует в кеше, результат
+        разбора файла.
+
+        Может вызываться одновременно из нескольких потоков.
+
+        Args:
+            file_path:
+                путь к файлу конфигурации
+            parse:
+                функция, читающая и разбирающая файл
+        Returns:
+            результат разбора файла
+        """
+        key = str(file_path)
+        stat = os.stat(key)
+
+        if (entry := self._entries.get(key)) is not None and (entry.mtime, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            self._used_entries[key] = entry
+            return marshal.loads(entry.data)
+
+        result = parse()
+
+        try:
+            entry = _CacheEntry(stat.st_mtime_ns, stat.st_size, marshal.dumps(result))
+        except ValueError:
+            # Файл содержит значения, не поддерживаемые marshal (например, даты), он будет разбираться при каждом запуске
+            _logger.debug("Результат разбора %s не может быть сохранён в кеше", key, exc_info=True)
+            return result
+
+        self._entries[key] = self._used_entries[key] = entry
+        self._modified = True
+
+        return result
+
+    def save(self):
+        """
+        Записывает кеш на диск, если его содержимое изменилось.
+        """
+        if self._path is None:
+            return
+
+        if not self._modified and self._used_entries.keys() == self._entries.keys():
+            return
+
+        data = dict(
+            version=_CACHE_FORMAT_VERSION,
+            files={
+                path: (entry.mtime, entry.size, entry.data)
+                for path, entry in self._used_entries.items()
+            },
+        )
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            tmp_path = f'{self._path}.tmp'
+
+            with open(tmp_path, 'wb') as f:
+                marshal.dump(data, f)
+
+            os.replace(tmp_path, self._path)
+        except OSError:
+            _logger.warning("Не удалось сохранить кеш конфигурации в %s", self._path, exc_info=True)
+            return
+
+        self._entries = dict(self._used_entries)
+        self._modified = False
@@ -1,2 +1,3 @@
 from irene.plugin_loader.core_plugins.config import ConfigPlugin
+from irene.plugin_loader.core_plugins.executors import ExecutorsPlugin
 from irene.plugin_loader.core_plugins.plugin_discovery import PluginDiscoveryPlugin
@@ -1,18 +1,24 @@
 import asyncio
 import json
 from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, Future
 from logging import getLogger
 from os import listdir
 from os.path import isdir, isfile, join, basename
 from pathlib import Path
 from shutil import copyfile
 from textwrap import dedent
+from functools import partial
 from threading import Event
-from typing import Any, Iterable, Optional, Collection
+from typing import Any, Iterable, Optional, Collection, Callable
 
 import yaml  # type: ignore
 
+from irene.plugin_loader.config_cache import ParsedConfigCache
+from irene.plugin_loader.executors import run_in_executor, EXECUTOR_IO
 from irene.plugin_loader.file_patterns import match_files, first_substitution, substitute_pattern
+from irene.plugin_loader.utils.file_watcher import create_file_watcher, InotifyWatcher
+from irene.plugin_loader.utils.observable import ObservableDict, ObservableList
 from irene.plugin_loader.utils.snapshot_hash import snapshot_hash
 
 try:
@@ -22,14 +28,28 @@ except ImportError:
 
 from irene.plugin_loader.magic_plugin import MagicPlugin, step_name
 from irene.plugin_loader.abc import PluginManager, OperationStep, Plugin
+from irene.plugin_loader.startup_profiler import profile_span
+
+yaml.add_representer(ObservableDict, yaml.representer.SafeRepresenter.represent_dict, Dumper=Dumper)
+yaml.add_representer(ObservableList, yaml.representer.SafeRepresenter.represent_list, Dumper=Dumper)
 
 _CONFIG_EXTENSIONS = ('.yaml', '.yml', '.json')
 
 _TEMPLATE_DESCRIPTION_FILE = 'README.txt'
 
+_WATCH_DEBOUNCE_SECONDS = 0.05
+"""
+Задержка перед обработкой изменений, позволяющая обработать несколько изменений, сделанных подряд, за один раз
+"""
+
 _logger = getLogger('config')
 
 
+def _read_config_file(file_path: Path, encoding: str) -> Any:
+    with file_path.open('r', encoding=encoding) as f:
+        return yaml.load(f, Loader)
+
+
 class ConfigurationScope:
     """
     Объект, управляющий состоянием конфигурации отдельного плагина.
@@ -41,14 +61,73 @@ class ConfigurationScope:
             initial_value: dict[str, Any],
             plugin: Plugin,
             comment: str,
+            reader: Callable[[Path, str], Any] = _read_config_file,
+            on_modified: Callable[[], None] = lambda: None,
     ):
+        """
+        Args:
+            main_file_path:
+                путь к основному файлу конфигурации
+            initial_value:
+                значение конфигурации по-умолчанию, изменяемое при загрузке файлов
+            plugin:
+                плагин, которому принадлежит конфигурация
+            comment:
+                комментарий, записываемый в начало основного файла конфигурации
+            reader:
+                функция, читающая содержимое файла конфигурации по пути и кодировке
+            on_modified:
+                функция, вызываемая при изменении конфигурации в памяти, если изменения отслеживаются (см.
+                ``track_changes``)
+        """
         self._main_file_path = main_file_path
+        self._reader = reader
+        self._on_modified = on_modified
         self._value = initial_value
         self._plugin = plugin
         self._comment = comment
         self._stored_hash: Optional[int] = None
         self._stored_mtime: Optional[float] = None
         self._notified_hash: Optional[int] = None
+        self._tracked = False
+        self._modified_since_store = True
+        self._modified_since_notify = True
+
+    @property
+    def main_file_path(self) -> Path:
+        return self._main_file_path
+
+    def track_changes(self) -> bool:
+        """
+        Заменяет значение конфигурации наблюдаемой копией (см. ``ObservableDict``) и передаёт её плагину, что позволяет
+        узнавать об изменениях конфигурации без вычисления хешей.
+
+        Это возможно, только если плагин хранит конфигурацию в аттрибуте ``config``.
+        Конфигурации остальных плагинов сравниваются по хешам, как и раньше.
+
+        Returns:
+            ``True`` если изменения конфигурации отслеживаются
+        """
+        if self._tracked:
+            return True
+
+        if getattr(self._plugin, 'config', None) is not self._value:
+            return False
+
+        value = ObservableDict(self._value, self._mark_modified)
+        setattr(self._plugin, 'config', value)
+        self._value = value
+        self._tracked = True
+
+        return True
+
+    def is_tracked(self) -> bool:
+        return self._tracked
+
+    def _mark_modified(self):
+        self._modified_since_store = True
+        self._modified_since_notify = True
+        self._on_modified()
 
     def calc_current_hash(self) -> int:
         return snapshot_hash(self._value, hash)
@@ -63,14 +142,20 @@ class ConfigurationScope:
         """
         Сообщает плагину если конфигурация была изменена.
         """
-        if self._notified_hash == self.calc_current_hash():
+        if self._tracked:
+            if not self._modified_since_notify:
+                return
+        elif self._notified_hash == self.calc_current_hash():
             return
 
         for step in self._plugin.get_operation_steps('receive_config'):
             step.step(self._value)
 
-        # Плагин может изменить конфигурацию в операции receive_config, пересчитываем хеш заново и запоминаем
-        self._notified_hash = self.calc_current_hash()
+        # Плагин может изменить конфигурацию в операции receive_config, такие изменения не считаются новыми
+        if self._tracked:
+            self._modified_since_notify = False
+        else:
+            self._notified_hash = self.calc_current_hash()
 
     def was_modified_in_memory(self) -> bool:
         """
@@ -79,6 +164,9 @@ class ConfigurationScope:
 
         Если конфигурация ранее не была прочитана из основного файла конфигурации, то возвращается True.
         """
+        if self._tracked:
+            return self._modified_since_store
+
         return self._stored_hash != self.calc_current_hash()
 
     def exists_on_disk(self):
@@ -115,8 +203,7 @@ class ConfigurationScope:
             Словарь со значениями, прочитанными из файла.
         """
         try:
-            with file_path.open('r', encoding=encoding) as f:
-                data = yaml.load(f, Loader)
+            data = self._reader(file_path, encoding)
         except Exception as e:
             _logger.exception(
                 f"Ошибка при чтении файла конфигурации {file_path}", exc_info=e)
@@ -138,11 +225,17 @@ class ConfigurationScope:
         if self._main_file_path.exists():
             loaded_data = self.load_file(self._main_file_path, encoding)
 
-            self._stored_hash = snapshot_hash(loaded_data, hash)
             self._stored_mtime = self._main_file_path.stat().st_mtime
+
+            if self._tracked:
+                # Файл может содержать не все значения конфигурации, тогда его нужно перезаписать
+                self._modified_since_store = loaded_data != self._value
+            else:
+                self._stored_hash = snapshot_hash(loaded_data, hash)
         else:
             self._stored_hash = None
             self._stored_mtime = None
+            self._modified_since_store = True
 
     def store_main_file(self, encoding: str, yaml_options: dict[str, Any]):
         """
@@ -157,12 +250,15 @@ class ConfigurationScope:
                 yaml.dump(self._value, f, Dumper, **yaml_options)
 
         self._stored_mtime = self._main_file_path.stat().st_mtime
-        self._stored_hash = self.calc_current_hash()
+        self._modified_since_store = False
+
+        if not self._tracked:
+            self._stored_hash = self.calc_current_hash()
 
 
 class ConfigPlugin(MagicPlugin):
     name = 'config'
-    version = '1.1.0'
+    version = '1.2.0'
 
     config: dict[str, Any] = {
         'yamlDumpOptions': {
@@ -176,6 +272,9 @@ class ConfigPlugin(MagicPlugin):
         'watchFileChanges': True,
         'watchMemoryChanges': True,
         'watchIntervalSeconds': 30,
+        'useInotify': True,
+        'prefetchThreads': 0,
+        'parsedCachePath': '{irene_home}/cache/config_cache.marshal',
     }
     config_comment = u"""
     Настройки загрузки, сохранения и обновления конфигурации.
@@ -192,11 +291,26 @@ class ConfigPlugin(MagicPlugin):
     - `watchMemoryChanges` - если True, то загрузчик конфигурации будет отслеживать изменения конфигурации, хранящейся в
       памяти и записывать её актуальное состояние в файл.
     - `watchIntervalSeconds` - интервал времени в секундах, через который загрузчик конфигурации проверяет наличие
-      изменений файлов конфигурации (`watchFileChanges`) и хранимой в памяти конфигурации (`watchMemoryChanges`).
-
-    Если установлены одновременно флаги `watchFileChanges` и `watchMemoryChanges`, то при одновременном (в течение
-    одного интервала `watchIntervalSeconds`) изменении конфигурации и в памяти и в файле на диске приоритет имеют
-    изменения внесённые в памяти и, соответственно, файл конфигурации будет перезаписан.
+      изменений файлов конфигурации (`watchFileChanges`) и хранимой в памяти конфигурации (`watchMemoryChanges`), если
+      об изменениях невозможно узнать сразу.
+      Изменения конфигурации плагинов, хранящих её в аттрибуте `config`, обнаруживаются сразу же.
+      Изменения файлов обнаруживаются сразу же, если доступен inotify (см. `useInotify`).
+    - `useInotify` - если True, то для отслеживания изменений файлов конфигурации используется inotify (только в
+      Linux).
+      Если inotify недоступен, то файлы проверяются раз в `watchIntervalSeconds` секунд.
+
+    Если установлены одновременно флаги `watchFileChanges` и `watchMemoryChanges`, то при одновременном изменении
+    конфигурации и в памяти и в файле на диске приоритет имеют изменения внесённые в памяти и, соответственно, файл
+    конфигурации будет перезаписан.
+
+    - `prefetchThreads` - количество потоков, в которых при запуске заранее читаются и разбираются все файлы
+      конфигурации из папки конфигурации и папок конфигурации по-умолчанию.
+      Ускоряет запуск при медленном хранилище (например, SD-карте).
+      Если 0, то файлы читаются последовательно, по мере загрузки плагинов.
+    - `parsedCachePath` - путь к файлу кеша разобранных файлов конфигурации.
+      Неизменившиеся файлы загружаются при запуске из кеша, без разбора YAML.
+      Кеш не используется для чтения файла конфигурации самого загрузчика конфигурации.
+      Если null, то кеш не используется.
     """
 
     def __init__(self, *, template_paths: Collection[str] = ()):
@@ -210,6 +324,11 @@ class ConfigPlugin(MagicPlugin):
         self._watch_started = False
         self._watch_termination_request = Event()
         self._watch_terminated = Event()
+        self._prefetched: dict[Path, Future[tuple[int, int, Any]]] = {}
+        self._parsed_cache: Optional[ParsedConfigCache] = None
+        self._modified_scopes: set[str] = set()
+        self._watch_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._watch_wakeup: Optional[asyncio.Event] = None
 
     def setup_cli_arguments(self, ap: ArgumentParser, *_args, **_kwargs):
         if len(self._template_paths) > 0:
@@ -346,6 +465,69 @@ class ConfigPlugin(MagicPlugin):
     def _get_file_encoding(self) -> str:
         return self.config.get('fileEncoding', 'utf-8')
 
+    def _parse_file(self, file_path: Path, encoding: str) -> Any:
+        if (cache := self._parsed_cache) is None:
+            return _read_config_file(file_path, encoding)
+
+        return cache.read(file_path, lambda: _read_config_file(file_path, encoding))
+
+    def _prefetch_file(self, file_path: Path, encoding: str) -> tuple[int, int, Any]:
+        stat = file_path.stat()
+
+        with profile_span(str(file_path), 'config_prefetch'):
+            return stat.st_mtime_ns, stat.st_size, self._parse_file(file_path, encoding)
+
+    def _open_parsed_cache(self):
+        if (path := self.config['parsedCachePath']) is not None:
+            self._parsed_cache = ParsedConfigCache(first_substitution(path))
+
+    def _save_parsed_cache(self):
+        """
+        Сохраняет кеш разобранных файлов, прочитанных при запуске.
+
+        Файлы, изменившиеся после запуска, читаются без использования кеша.
+        """
+        if (cache := self._parsed_cache) is not None:
+            self._parsed_cache = None
+            cache.save()
+
+    def _start_prefetch(self):
+        """
+        Начинает параллельное чтение всех файлов конфигурации, если оно включено.
+        """
+        if (threads := self.config['prefetchThreads']) <= 0:
+            return
+
+        executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='config-prefetch')
+        encoding = self._get_file_encoding()
+
+        for dir_path in (*self._defaults_dirs, self._config_dir):
+            if not dir_path.is_dir():
+                continue
+
+            for file_path in dir_path.iterdir():
+                if file_path.suffix in _CONFIG_EXTENSIONS and file_path.stem not in self._scopes \
+                        and file_path not in self._prefetched:
+                    self._prefetched[file_path] = executor.submit(self._prefetch_file, file_path, encoding)
+
+        # Потоки завершатся после выполнения поставленных задач
+        executor.shutdown(wait=False)
+
+    def _read_file(self, file_path: Path, encoding: str) -> Any:
+        if (future := self._prefetched.pop(file_path, None)) is not None:
+            try:
+                mtime, size, data = future.result()
+            except Exception:
+                # Файл будет прочитан заново, а ошибка - выведена в лог при повторном чтении
+                pass
+            else:
+                stat = file_path.stat()
+
+                if (stat.st_mtime_ns, stat.st_size) == (mtime, size):
+                    return data
+
+        return self._parse_file(file_path, encoding)
+
     def _init_config_scope(self, config_step: OperationStep):
         if isinstance(config_step.step, dict):
             config_value = config_step.step
@@ -369,16 +551,21 @@ class ConfigPlugin(MagicPlugin):
             config_value,
             config_step.plugin,
             comment,
+            self._read_file,
+            partial(self._on_scope_modified, config_step.plugin.name),
         )
+        scope.track_changes()
 
-        for defaults_path in self._get_default_config_files(config_step.plugin.name):
-            if defaults_path.exists():
-                scope.load_file(defaults_path, self._get_file_encoding())
+        with profile_span(config_step.plugin.name, 'config'):
+            for defaults_path in self._get_default_config_files(config_step.plugin.name):
+                if defaults_path.exists():
+                    scope.load_file(defaults_path, self._get_file_encoding())
 
-        if scope.exists_on_disk():
-            scope.load_main_file(self._get_file_encoding())
+            if scope.exists_on_disk():
+                scope.load_main_file(self._get_file_encoding())
 
-        scope.notify_plugin()
+        with profile_span(config_step.plugin.name, 'receive_config'):
+            scope.notify_plugin()
 
         if scope.was_modified_in_memory():
             scope.store_main_file(
@@ -419,22 +606,58 @@ class ConfigPlugin(MagicPlugin):
 
     @step_name('config')
     def bootstrap(self, pm: PluginManager, *_args, **_kwargs):
-        for step in pm.get_operation_sequence('config'):
-            self._init_config_scope(step)
+        steps = list(pm.get_operation_sequence('config'))
+
+        # Собственная конфигурация загружается первой, т.к. от неё зависит, нужно ли читать остальные файлы заранее
+        for step in steps:
+            if step.plugin is self:
+                self._init_config_scope(step)
+
+        self._open_parsed_cache()
+        self._start_prefetch()
+
+        for step in steps:
+            if step.plugin is not self:
+                self._init_config_scope(step)
 
     def plugin_discovered(self, _pm: PluginManager, plugin: Plugin, *_args, **_kwargs):
         for step in plugin.get_operation_steps('config'):
             self._init_config_scope(step)
 
-    def _scan_changes(self, watch_file_changes: bool, watch_memory_changes: bool):
-        for scope_name, scope in self._scopes.items():
-            if watch_memory_changes and scope.was_modified_in_memory():
+    def _on_scope_modified(self, scope_name: str):
+        # Может вызываться из любого потока
+        self._modified_scopes.add(scope_name)
+
+        if (loop := self._watch_loop) is not None and (wakeup := self._watch_wakeup) is not None:
+            try:
+                loop.call_soon_threadsafe(wakeup.set)
+            except RuntimeError:
+                # Цикл событий уже завершён
+                pass
+
+    def _scan_changes(self, file_scopes: Iterable[str], memory_scopes: Iterable[str]):
+        """
+        Проверяет изменения заданных конфигураций.
+
+        Args:
+            file_scopes:
+                имена конфигураций, файлы которых могли измениться
+            memory_scopes:
+                имена конфигураций, которые могли измениться в памяти
+        """
+        memory_scopes = set(memory_scopes)
+
+        for scope_name in sorted({*file_scopes, *memory_scopes}):
+            if (scope := self._scopes.get(scope_name)) is None:
+                continue
+
+            if scope_name in memory_scopes and scope.was_modified_in_memory():
                 _logger.info("Конфигурация для %s была изменена, перезаписываю файл", scope_name)
                 try:
                     scope.store_main_file(self._get_file_encoding(), self.config['yamlDumpOptions'])
                 except Exception:
                     _logger.exception("Ошибка при сохранении конфигурации для %s", scope_name)
-            elif watch_file_changes and scope.was_modified_on_disk():
+            elif scope_name in file_scopes and scope.was_modified_on_disk():
                 _logger.info("Файл конфигурации для %s был изменён, загружаю его", scope_name)
 
                 try:
@@ -447,25 +670,115 @@ class ConfigPlugin(MagicPlugin):
                 except Exception:
                     _logger.exception("Ошибка при обработке изменений в конфигурации %s", scope_name)
 
+    def _start_file_watcher(self, on_change: Callable[[Optional[set[str]]], None]) -> Optional[InotifyWatcher]:
+        if not self.config['useInotify']:
+            return None
+
+        if (watcher := create_file_watcher()) is None:
+            _logger.info("inotify недоступен, файлы конфигурации будут проверяться периодически")
+            return None
+
+        try:
+            self._ensure_config_dir()
+            watcher.add_directory(str(self._config_dir))
+            read_changes = watcher.read_changes
+            asyncio.get_running_loop().add_reader(watcher.fileno(), lambda: on_change(read_changes()))
+        except Exception:
+            _logger.exception("Не удалось начать отслеживание изменений в папке %s", self._config_dir)
+            watcher.close()
+            return None
+
+        return watcher
+
     async def run(self, *_args, **_kwargs):
+        # Файлы, прочитанные заранее, но не понадобившиеся при запуске
+        self._prefetched.clear()
+        self._save_parsed_cache()
+
         loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        changed_files: set[str] = set()
+        # Нужно ли проверить все файлы (при первой проверке, если inotify недоступен или потерял часть событий)
+        rescan_files = True
 
-        while True:
-            await asyncio.sleep(self.config['watchIntervalSeconds'])
+        def on_files_changed(paths: Optional[set[str]]):
+            nonlocal rescan_files
 
-            watch_file_changes, watch_memory_changes = \
-                self.config['watchFileChanges'], self.config['watchMemoryChanges']
+            if paths is None:
+                rescan_files = True
+            else:
+                changed_files.update(paths)
 
-            if (not watch_file_changes) and (not watch_memory_changes):
-                continue
+            wakeup.set()
 
-            await loop.run_in_executor(
-                None,
-                self._scan_changes,
-                watch_file_changes, watch_memory_changes
-            )
+        self._watch_loop, self._watch_wakeup = loop, wakeup
+        watcher = self._start_file_watcher(on_files_changed)
+
+        # Первая проверка выполняется сразу, чтобы учесть изменения, сделанные до запуска
+        wakeup.set()
+
+        try:
+            while True:
+                watch_file_changes, watch_memory_changes = \
+                    self.config['watchFileChanges'], self.config['watchMemoryChanges']
+
+                # Периодическая проверка нужна только для того, что нельзя отследить сразу
+                needs_polling = (watch_file_changes and watcher is None) or \
+                                (watch_memory_changes and not all(s.is_tracked() for s in self._scopes.values()))
+
+                try:
+                    await asyncio.wait_for(
+                        wakeup.wait(),
+                        self.config['watchIntervalSeconds'] if needs_polling else None,
+                    )
+                    # Даём закончить серию изменений, сделанных подряд
+                    await asyncio.sleep(_WATCH_DEBOUNCE_SECONDS)
+                except asyncio.TimeoutError:
+                    rescan_files = True
+
+                wakeup.clear()
+
+                file_scopes: set[str] = set()
+                memory_scopes: set[str] = set()
+
+                # Множество может пополняться из других потоков
+                while self._modified_scopes:
+                    memory_scopes.add(self._modified_scopes.pop())
+
+                if watch_file_changes:
+                    if rescan_files or watcher is None:
+                        file_scopes.update(self._scopes.keys())
+                    else:
+                        file_scopes.update(
+                            Path(p).stem for p in changed_files if Path(p).suffix in _CONFIG_EXTENSIONS
+                        )
+
+                rescan_files = False
+                changed_files.clear()
+
+                if watch_memory_changes:
+                    memory_scopes.update(name for name, scope in self._scopes.items() if not scope.is_tracked())
+                else:
+                    memory_scopes.clear()
+
+                if not file_scopes and not memory_scopes:
+                    continue
+
+                await run_in_executor(
+                    EXECUTOR_IO,
+                    self._scan_changes,
+                    file_scopes, memory_scopes
+                )
+        finally:
+            self._watch_loop, self._watch_wakeup = None, None
+
+            if watcher is not None:
+                loop.remove_reader(watcher.fileno())
+                watcher.close()
 
     def terminate(self, *_args, **_kwargs):
+        self._save_parsed_cache()
+
         if self.config['storeOnShutdown']:
             for scope_name in self._scopes.keys():
                 self._store_config(scope_name)
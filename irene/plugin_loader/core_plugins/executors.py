@@ -0,0 +1,108 @@
+import asyncio
+from logging import getLogger
+from typing import Any, Optional
+
+from irene.plugin_loader.executors import configure_executor, get_executors_stats, EXECUTOR_STT, EXECUTOR_TTS, \
+    EXECUTOR_OUTPUT, EXECUTOR_BRAIN, EXECUTOR_IO
+from irene.plugin_loader.magic_plugin import MagicPlugin, after
+
+_logger = getLogger('executors')
+
+
+class ExecutorsPlugin(MagicPlugin):
+    name = 'executors'
+    version = '1.0.0'
+
+    config: dict[str, Any] = {
+        'maxWorkers': {
+            EXECUTOR_STT: None,
+            EXECUTOR_TTS: None,
+            EXECUTOR_OUTPUT: None,
+            EXECUTOR_BRAIN: None,
+            EXECUTOR_IO: None,
+        },
+        'statsLogIntervalSeconds': 0,
+    }
+    config_comment = u"""
+    Настройки пулов потоков подсистем.
+
+    Блокирующие задачи разных подсистем выполняются в отдельных пулах потоков, чтобы медленные задачи одной подсистемы
+    не задерживали другие:
+
+    - `stt` - распознавание речи
+    - `tts` - синтез речи
+    - `output` - вывод ответов - воспроизведение речи и звуков, отправка сообщений
+    - `brain` - обработка входящих сообщений
+    - `io` - обработка сообщений клиентов и работа с файлами
+
+    Остальные задачи выполняются в пуле по-умолчанию, размер которого задаётся параметром командной строки
+    `--executor-max-workers`.
+
+    Доступны следующие параметры:
+
+    - `maxWorkers` - максимальное количество потоков в каждом пуле.
+      Если null, то используется количество по-умолчанию (количество процессоров + 4, но не более 32).
+      Изменения применяются после перезапуска.
+    - `statsLogIntervalSeconds` - интервал в секундах, через который статистика пулов (длина очереди, время ожидания в
+      очереди, загруженность) выводится в лог.
+      Если 0, то статистика не выводится в лог, но доступна через REST API (`GET /executors`).
+    """
+
+    def _configure(self):
+        for name, max_workers in self.config['maxWorkers'].items():
+            configure_executor(name, max_workers)
+
+    @after('config')
+    def bootstrap(self, *_args, **_kwargs):
+        self._configure()
+
+    def receive_config(self, *_args, **_kwargs):
+        self._configure()
+
+    async def run(self, *_args, **_kwargs):
+        while True:
+            interval: Optional[float] = self.config['statsLogIntervalSeconds']
+
+            if not interval:
+                # Интервал может быть изменён без перезапуска
+                await asyncio.sleep(60)
+                continue
+
+            await asyncio.sleep(interval)
+
+            for stats in get_executors_stats():
+                _logger.info(
+                    "Пул %s: потоков %d/%d, выполняется %d, в очереди %d, ожидание в очереди %.3f с (макс. %.3f с), "
+                    "загруженность %.0f%%",
+                    stats.name, stats.threads, stats.max_workers, stats.active, stats.queued,
+                    stats.wait_time_avg, stats.wait_time_max, stats.utilization * 100,
+                )
+
+    def register_fastapi_endpoints(self, router, *_args, **_kwargs) -> None:
+        from fastapi import APIRouter
+        from pydantic import BaseModel, Field
+
+        r: APIRouter = router
+
+        class ExecutorStatsModel(BaseModel):
+            name: str = Field(title="Имя пула потоков")
+            max_workers: int = Field(title="Максимальное количество потоков")
+            threads: int = Field(title="Количество созданных потоков")
+            active: int = Field(title="Количество выполняющихся задач")
+            queued: int = Field(title="Количество задач, ожидающих в очереди")
+            submitted: int = Field(title="Количество задач, поставленных в очередь")
+            completed: int = Field(title="Количество выполненных задач")
+            wait_time_avg: float = Field(title="Среднее время ожидания в очереди, в секундах")
+            wait_time_max: float = Field(title="Максимальное время ожидания в очереди, в секундах")
+            utilization: float = Field(title="Доля времени, в течение которого потоки пула были заняты")
+
+        @r.get(
+            '/executors',
+            response_model=list[ExecutorStatsModel],
+            name="Статистика пулов потоков",
+        )
+        def get_executors() -> list[ExecutorStatsModel]:
+            """
+            Возвращает статистику всех пулов потоков.
+            """
+            return [ExecutorStatsModel(**stats._asdict()) for stats in get_executors_stats()]
@@ -1,21 +1,28 @@
 import sys
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor, Future
+from contextlib import contextmanager
+from functools import partial
 from importlib.util import spec_from_file_location, module_from_spec
 from inspect import isclass
 from logging import getLogger
 from os.path import isfile, basename, splitext
 from types import ModuleType
-from typing import Optional, TypedDict, Iterable
+from typing import Optional, TypedDict, Iterable, Any, Collection, Iterator
 
 from irene.plugin_loader.abc import PluginManager, Plugin, OperationStep
-from irene.plugin_loader.errors import PluginExcludedException
-from irene.plugin_loader.file_patterns import match_files, substitute_patterns
+from irene.plugin_loader.errors import PluginExcludedException, PluginLoadingException
+from irene.plugin_loader.file_patterns import substitute_patterns, first_substitution
+from irene.plugin_loader.lazy_plugin import LazyModulePlugin
 from irene.plugin_loader.magic_plugin import MagicPlugin, after, step_name, operation, MagicModulePlugin
+from irene.plugin_loader.plugin_index import PluginIndex, PluginManifest
 from irene.plugin_loader.run_operation import call_until_first_result, call_all
+from irene.plugin_loader.startup_profiler import profile_span
 
 
 class PluginDiscoveryPlugin(MagicPlugin):
     name = 'discover_plugins'
-    version = '1.0.2'
+    version = '1.2.0'
 
     _logger = getLogger(name)
 
@@ -23,6 +30,9 @@ class PluginDiscoveryPlugin(MagicPlugin):
         pluginPaths: list[str]
         appendPythonPath: list[str]
         excludePlugins: list[str]
+        pluginIndexPath: Optional[str]
+        lazyPluginLoading: bool
+        importThreads: int
 
     config: _Config = {
         'pluginPaths': [
@@ -35,7 +45,10 @@ class PluginDiscoveryPlugin(MagicPlugin):
             "{irene_home}/plugins",
             "{irene_home}/deps",
         ],
-        "excludePlugins": []
+        "excludePlugins": [],
+        "pluginIndexPath": "{irene_home}/cache/plugin_index.json",
+        "lazyPluginLoading": False,
+        "importThreads": 0,
     }
 
     config_comment = """
@@ -47,6 +60,25 @@ class PluginDiscoveryPlugin(MagicPlugin):
                             Если зависимости плагинов ставятся в папку, не находящуюся в PYTHONPATH, то путь к этой
                             папке нужно указать здесь.
     - `excludePlugins`    - список плагинов, которые загружать не нужно. См. далее.
+    - `pluginIndexPath`   - путь к файлу индекса плагинов.
+                            В индексе запоминаются найденные файлы плагинов и сведения о плагинах, что позволяет не
+                            просматривать заново неизменившиеся папки при следующих запусках.
+                            Индекс можно перестроить, запустив приложение с параметром `--rebuild-plugin-index`.
+                            Если `null`, то индекс не сохраняется.
+    - `lazyPluginLoading` - откладывать импорт модулей плагинов, сведения о которых есть в индексе, до первого вызова
+                            их шагов.
+                            Уменьшает время запуска и потребление памяти, если часть найденных плагинов не используется
+                            (например, плагины локального ввода/вывода звука в Docker-контейнере без звуковых
+                            устройств).
+                            Описания настроек таких плагинов берутся из индекса и обновляются только при изменении
+                            файла плагина.
+    - `importThreads`     - количество потоков, в которых модули плагинов импортируются параллельно.
+                            Ускоряет запуск при медленном хранилище (например, SD-карте).
+                            Уведомления о найденных плагинах и их инициализация по-прежнему выполняются
+                            последовательно, в том же порядке, что и без параллельного импорта.
+                            Если параллельный импорт модуля завершился ошибкой, то модуль импортируется повторно
+                            обычным образом.
+                            Если 0, то модули импортируются последовательно.
     
     ## Отключение плагинов
 
@@ -65,10 +97,109 @@ class PluginDiscoveryPlugin(MagicPlugin):
         super().__init__()
         self._plugins: list[Plugin] = []
         self._excluded: set[str] = set()
+        self._rebuild_index = False
+        self._prefetched: dict[str, Future[Optional[ModuleType]]] = {}
 
     def receive_config(self, config, *_args, **_kwargs):
         self._excluded = set(config['excludePlugins'])
 
+    def setup_cli_arguments(self, ap: ArgumentParser, *_args, **_kwargs):
+        ap.add_argument(
+            '--rebuild-plugin-index',
+            action='store_true',
+            dest='rebuild_plugin_index',
+            help="Перестроить индекс плагинов, не используя сохранённые ранее результаты поиска плагинов",
+        )
+
+    def receive_cli_arguments(self, args: Any, *_args, **_kwargs):
+        self._rebuild_index = args.rebuild_plugin_index
+
+    def get_declared_operations(self) -> Optional[Collection[str]]:
+        # Набор шагов меняется по мере загрузки плагинов
+        return None
+
+    def _is_excluded(self, name: str, version: str) -> bool:
+        return name in self._excluded or f'{name}@{version}' in self._excluded
+
+    def _is_file_excluded(self, path: str) -> bool:
+        file_basename = basename(path)
+
+        return file_basename in self._excluded or splitext(file_basename)[0] in self._excluded
+
+    def _can_load_lazily(self, path: str, known: Optional[list[PluginManifest]]) -> bool:
+        return bool(known) and self.config['lazyPluginLoading'] and \
+            all(it.lazy_loadable for it in known or ()) and not self._is_file_excluded(path)
+
+    def _is_module_file(self, path: str) -> bool:
+        return path.endswith('.py') and isfile(path)
+
+    def _import_module(self, path: str) -> Optional[ModuleType]:
+        module_name = splitext(basename(path))[0]
+
+        spec = spec_from_file_location(
+            module_name,
+            path,
+        )
+
+        if spec is None or spec.loader is None:
+            self._logger.warning(
+                "Не удалось загрузить модуль плагина %s - не удалось создать спецификацию модуля",
+                path
+            )
+            return None
+
+        module = module_from_spec(spec)
+
+        with profile_span(module_name, 'import', path=path):
+            spec.loader.exec_module(module)
+
+        return module
+
+    @contextmanager
+    def _prefetch_modules(self, paths: Iterable[str]) -> Iterator[None]:
+        """
+        Начинает параллельный импорт модулей плагинов из заданных файлов, если он включён.
+
+        Импортированные модули используются шагом ``discover_python_module``.
+        """
+        if (threads := self.config['importThreads']) <= 0:
+            yield
+            return
+
+        with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='plugin-import') as executor:
+            for path in paths:
+                if self._is_module_file(path) and not self._is_file_excluded(path):
+                    self._prefetched[path] = executor.submit(self._import_module, path)
+
+            try:
+                yield
+            finally:
+                for future in self._prefetched.values():
+                    future.cancel()
+
+                self._prefetched.clear()
+
+    def _load_plugin(self, pm: PluginManager, path: str, name: str) -> Plugin:
+        plugins: Optional[Iterable[Plugin]] = call_until_first_result(
+            pm.get_operation_sequence('discover_plugins_at_path'), pm, path)
+
+        for plugin in plugins or ():
+            if plugin.name == name:
+                return plugin
+
+        raise PluginLoadingException(f"Плагин {name} не найден в файле {path}")
+
+    def _open_index(self) -> PluginIndex:
+        path: Optional[str] = None
+
+        if (path_template := self.config['pluginIndexPath']) is not None:
+            try:
+                path = first_substitution(path_template)
+            except ValueError:
+                self._logger.warning("Некорректный путь к индексу плагинов: %s", path_template, exc_info=True)
+
+        return PluginIndex(path, rebuild=self._rebuild_index)
+
     def get_operation_steps(self, op_name: str) -> Iterable[OperationStep]:
         for plugin in self._plugins:
             yield from plugin.get_operation_steps(op_name)
@@ -84,26 +215,67 @@ class PluginDiscoveryPlugin(MagicPlugin):
         plugin_discovered_op = list(
             pm.get_operation_sequence('plugin_discovered'))
 
-        for plugin_path in match_files(self.config['pluginPaths']):
-            try:
-                plugins: Optional[Iterable[Plugin]] = call_until_first_result(
-                    plugin_discover_op, pm, plugin_path)
-            except PluginExcludedException:
+        index = self._open_index()
+        pending: list[tuple[str, Optional[list[PluginManifest]]]] = []
+
+        for plugin_path in sorted(index.match_files(self.config['pluginPaths'])):
+            known: Optional[list[PluginManifest]] = index.get_plugins(plugin_path)
+
+            if known and all(self._is_excluded(it.name, it.version) for it in known):
+                # Все плагины из файла отключены - файл можно не импортировать
                 self._logger.info(
                     "Плагин из файла %s отключён",
                     plugin_path,
                 )
                 continue
 
-            if plugins is None:
-                self._logger.warning(
-                    "Не удалось загрузить плагин из %s",
-                    plugin_path
+            pending.append((plugin_path, known))
+
+        with self._prefetch_modules(path for path, known in pending if not self._can_load_lazily(path, known)):
+            self._discover_plugins(pm, index, pending, plugin_discover_op, plugin_discovered_op)
+
+        index.save()
+
+    def _discover_plugins(
+            self,
+            pm: PluginManager,
+            index: PluginIndex,
+            pending: list[tuple[str, Optional[list[PluginManifest]]]],
+            plugin_discover_op: list[OperationStep],
+            plugin_discovered_op: list[OperationStep],
+    ):
+        for plugin_path, known in pending:
+            plugins: Optional[Iterable[Plugin]]
+
+            if known and self._can_load_lazily(plugin_path, known):
+                self._logger.debug(
+                    "Импорт модуля плагина из файла %s отложен до первого обращения",
+                    plugin_path,
                 )
-                continue
+                plugins = [LazyModulePlugin(it, partial(self._load_plugin, pm, plugin_path, it.name)) for it in known]
+            else:
+                try:
+                    plugins = call_until_first_result(
+                        plugin_discover_op, pm, plugin_path)
+                except PluginExcludedException:
+                    self._logger.info(
+                        "Плагин из файла %s отключён",
+                        plugin_path,
+                    )
+                    continue
+
+                if plugins is None:
+                    self._logger.warning(
+                        "Не удалось загрузить плагин из %s",
+                        plugin_path
+                    )
+                    continue
+
+                plugins = list(plugins)
+                index.set_plugins(plugin_path, plugins)
 
             for plugin in plugins:
-                if plugin.name in self._excluded or str(plugin) in self._excluded:
+                if self._is_excluded(plugin.name, plugin.version):
                     continue
 
                 self._logger.debug(
@@ -112,41 +284,34 @@ class PluginDiscoveryPlugin(MagicPlugin):
                 )
 
                 self._plugins.append(plugin)
+                pm.invalidate_operation_cache()
                 call_all(plugin_discovered_op, pm, plugin)
 
     @step_name('discover_python_module')
     def discover_plugins_at_path(self, pm: PluginManager, path: str, *_args, **_kwargs):
-        if not isfile(path):
-            return
-
-        if not path.endswith('.py'):
+        if not self._is_module_file(path):
             return
 
-        file_basename = basename(path)
-
-        if file_basename in self._excluded:
+        if self._is_file_excluded(path):
             raise PluginExcludedException()
 
-        module_name = splitext(file_basename)[0]
+        module: Optional[ModuleType]
 
-        if module_name in self._excluded:
-            raise PluginExcludedException()
-
-        spec = spec_from_file_location(
-            module_name,
-            path,
-        )
+        if (future := self._prefetched.pop(path, None)) is not None:
+            try:
+                module = future.result()
+            except Exception:
+                self._logger.debug(
+                    "Ошибка при параллельном импорте модуля %s, импортирую его повторно",
+                    path, exc_info=True,
+                )
+                module = self._import_module(path)
+        else:
+            module = self._import_module(path)
 
-        if spec is None or spec.loader is None:
-            self._logger.warning(
-                "Не удалось загрузить модуль плагина %s - не удалось создать спецификацию модуля",
-                path
-            )
+        if module is None:
             return
 
-        module = module_from_spec(spec)
-        spec.loader.exec_module(module)
-
         return call_until_first_result(pm.get_operation_sequence('discover_plugins_in_module'), pm, module)
 
     @step_name('discover_explicit_plugins')
@@ -1,2 +1,9 @@
 class PluginExcludedException(Exception):
     pass
+
+
+class PluginLoadingException(Exception):
+    """
+    Исключение, сообщающее о том, что не удалось загрузить плагин, загрузка которого была отложена.
+    """
+    pass
@@ -0,0 +1,238 @@
+"""
+Именованные пулы потоков для отдельных подсистем приложения.
+
+Блокирующие задачи разных подсистем выполняются в разных пулах потоков, так что медленные задачи одной подсистемы
+(например, синтез речи) не задерживают задачи других (например, распознавание речи).
+Для каждого пула собирается статистика - длина очереди, время ожидания задач в очереди и загруженность потоков.
+
+Задачи, для которых пул не указан явно, выполняются в пуле по-умолчанию (``EXECUTOR_DEFAULT``), который
+устанавливается как executor по-умолчанию для event loop'а приложения.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, Future
+from logging import getLogger
+from threading import Lock
+from time import perf_counter
+from typing import Optional, Callable, Any, NamedTuple, TypeVar
+
+__all__ = [
+    'MonitoredThreadPoolExecutor',
+    'ExecutorStats',
+    'configure_executor',
+    'get_executor',
+    'set_executor',
+    'run_in_executor',
+    'get_executors_stats',
+    'shutdown_executors',
+    'EXECUTOR_DEFAULT',
+    'EXECUTOR_STT',
+    'EXECUTOR_TTS',
+    'EXECUTOR_OUTPUT',
+    'EXECUTOR_BRAIN',
+    'EXECUTOR_IO',
+]
+
+EXECUTOR_DEFAULT = 'default'
+"""Пул по-умолчанию"""
+
+EXECUTOR_STT = 'stt'
+"""Распознавание речи"""
+
+EXECUTOR_TTS = 'tts'
+"""Синтез речи"""
+
+EXECUTOR_OUTPUT = 'output'
+"""Вывод ответов - воспроизведение речи и звуков, отправка сообщений"""
+
+EXECUTOR_BRAIN = 'brain'
+"""Обработка входящих сообщений"""
+
+EXECUTOR_IO = 'io'
+"""Короткие операции ввода-вывода - обработка сообщений клиентов, работа с файлами"""
+
+_T = TypeVar('_T')
+
+_logger = getLogger('executors')
+
+
+class ExecutorStats(NamedTuple):
+    """
+    Статистика пула потоков.
+    """
+
+    name: str
+
+    max_workers: int
+    """Максимальное количество потоков"""
+
+    threads: int
+    """Количество созданных потоков"""
+
+    active: int
+    """Количество выполняющихся задач"""
+
+    queued: int
+    """Количество задач, ожидающих в очереди"""
+
+    submitted: int
+    """Количество задач, поставленных в очередь с момента создания пула"""
+
+    completed: int
+    """Количество выполненных задач"""
+
+    wait_time_avg: float
+    """Среднее время ожидания задачи в очереди, в секундах"""
+
+    wait_time_max: float
+    """Максимальное время ожидания задачи в очереди, в секундах"""
+
+    utilization: float
+    """Доля времени (от 0 до 1), в течение которого потоки пула были заняты с момента его создания"""
+
+
+class MonitoredThreadPoolExecutor(ThreadPoolExecutor):
+    """
+    Пул потоков, собирающий статистику выполнения задач.
+    """
+
+    def __init__(self, name: str, max_workers: Optional[int] = None):
+        super().__init__(max_workers=max_workers, thread_name_prefix=f'{name}-executor')
+        self.name = name
+        self._stats_lck = Lock()
+        self._created = perf_counter()
+        self._submitted = 0
+        self._started = 0
+        self._cancelled = 0
+        self._completed = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._busy_time = 0.0
+
+    def submit(self, fn, /, *args, **kwargs):
+        with self._stats_lck:
+            self._submitted += 1
+
+        future = super().submit(self._run_task, perf_counter(), fn, args, kwargs)
+        future.add_done_callback(self._on_task_done)
+
+        return future
+
+    def _on_task_done(self, future: Future):
+        if future.cancelled():
+            with self._stats_lck:
+                self._cancelled += 1
+
+    def _run_task(self, submitted: float, fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        started = perf_counter()
+        wait_time = started - submitted
+
+        with self._stats_lck:
+            self._started += 1
+            self._wait_time_total += wait_time
+            self._wait_time_max = max(self._wait_time_max, wait_time)
+
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            with self._stats_lck:
+                self._completed += 1
+                self._busy_time += perf_counter() - started
+
+    def get_stats(self) -> ExecutorStats:
+        now = perf_counter()
+
+        with self._stats_lck:
+            active = self._started - self._completed
+
+            return ExecutorStats(
+                name=self.name,
+                max_workers=self._max_workers,
+                threads=len(self._threads),
+                active=active,
+                queued=self._submitted - self._started - self._cancelled,
+                submitted=self._submitted,
+                completed=self._completed,
+                wait_time_avg=self._wait_time_total / self._started if self._started else 0.0,
+                wait_time_max=self._wait_time_max,
+                # Время ещё не завершённых задач не учитывается
+                utilization=min(1.0, self._busy_time / (self._max_workers * (now - self._created))),
+            )
+
+
+_executors: dict[str, MonitoredThreadPoolExecutor] = {}
+_max_workers: dict[str, Optional[int]] = {}
+_lck = Lock()
+
+
+def configure_executor(name: str, max_workers: Optional[int]):
+    """
+    Задаёт максимальное количество потоков пула.
+
+    Изменения применяются только к ещё не созданным пулам.
+
+    Args:
+        name:
+            имя пула
+        max_workers:
+            максимальное количество потоков или ``None`` для количества по-умолчанию (см. ``ThreadPoolExecutor``)
+    """
+    with _lck:
+        if _max_workers.get(name) == max_workers:
+            return
+
+        _max_workers[name] = max_workers
+
+        if name in _executors:
+            _logger.warning("Пул потоков %s уже создан, новый размер будет применён после перезапуска", name)
+
+
+def get_executor(name: str) -> MonitoredThreadPoolExecutor:
+    """
+    Возвращает пул потоков с заданным именем, создавая его при первом обращении.
+    """
+    if (executor := _executors.get(name)) is not None:
+        return executor
+
+    with _lck:
+        if (executor := _executors.get(name)) is None:
+            executor = _executors[name] = MonitoredThreadPoolExecutor(name, _max_workers.get(name))
+
+        return executor
+
+
+def set_executor(executor: MonitoredThreadPoolExecutor):
+    """
+    Регистрирует созданный заранее пул потоков под его именем, заменяя существующий пул.
+    """
+    with _lck:
+        _executors[executor.name] = executor
+
+
+def run_in_executor(name: str, fn: Callable[..., _T], *args) -> 'asyncio.Future[_T]':
+    """
+    Выполняет функцию в пуле потоков с заданным именем, аналогично ``loop.run_in_executor``.
+
+    Должна вызываться из потока event loop'а.
+    """
+    return asyncio.get_running_loop().run_in_executor(get_executor(name), fn, *args)
+
+
+def get_executors_stats() -> list[ExecutorStats]:
+    """
+    Возвращает статистику всех созданных пулов потоков.
+    """
+    return [executor.get_stats() for executor in sorted(_executors.values(), key=lambda it: it.name)]
+
+
+def shutdown_executors(*, wait: bool = True):
+    """
+    Завершает работу всех созданных пулов потоков, кроме пула по-умолчанию, работа которого завершается вместе с event
+    loop'ом.
+    """
+    with _lck:
+        executors = [executor for name, executor in _executors.items() if name != EXECUTOR_DEFAULT]
+        _executors.clear()
+
+    for executor in executors:
+        executor.shutdown(wait=wait)
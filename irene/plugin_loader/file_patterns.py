@@ -1,17 +1,41 @@
+import os
 import sys
-from glob import iglob
-from os.path import abspath
+import time
+from fnmatch import fnmatchcase
+from functools import lru_cache
+from glob import has_magic
+from itertools import product
+from os.path import abspath, join, isdir, dirname
 from pathlib import Path
 from random import choice
-from typing import Optional, Union, Iterable
+from string import Formatter
+from threading import Lock
+from typing import Optional, Union, Iterable, Mapping
 
 PathVariableValue = Union[str, Iterable[str]]
 
+DirectorySnapshot = dict[str, Optional[int]]
+"""
+Время изменения (``st_mtime_ns``) папок или ``None`` для несуществующих папок.
+"""
+
 _global_variables: dict[str, PathVariableValue] = dict(
     user_home=str(Path.home()),
     python_path=[str(it) for it in sys.path],
 )
 
+_MATCH_CACHE_MAX_SIZE = 1024
+
+_RACY_INTERVAL_NS = 2_000_000_000
+"""
+Папки, изменённые не раньше этого времени (в наносекундах) до поиска, могут измениться ещё раз без изменения времени
+изменения (на файловых системах с низкой точностью времени изменения), так что результаты поиска в таких папках не
+кешируются.
+"""
+
+_match_cache: dict[str, tuple[list[str], DirectorySnapshot]] = {}
+_match_cache_lck = Lock()
+
 
 def register_variable(name: str, value: PathVariableValue):
     """
@@ -41,6 +65,9 @@ def match_files(
     - ``{python_path}`` - путь к папке с пакетами python.
       Функция будет перебирать все папки, используемые интерпретатором.
 
+    Результаты поиска сохраняются и используются повторно, пока не изменится ни одна из просмотренных при поиске папок
+    (см. ``invalidate_matches``).
+
     Args:
         patterns:
             шаблоны для поиска файлов
@@ -59,12 +86,147 @@ def match_files(
 
     for pattern in patterns:
         for substituted in substitute_pattern(pattern, override_vars=override_vars):
-            for match in iglob(substituted, recursive=True):
-                matching.add(abspath(match))
+            matching.update(_glob_cached(abspath(substituted)))
 
     return matching
 
 
+def _glob_cached(pattern: str) -> list[str]:
+    if (cached := _match_cache.get(pattern)) is not None and is_snapshot_valid(cached[1]):
+        return cached[0]
+
+    started = time.time_ns()
+    files, snapshot = glob_with_snapshot(pattern)
+
+    with _match_cache_lck:
+        if all(mtime is None or mtime < started - _RACY_INTERVAL_NS for mtime in snapshot.values()):
+            if len(_match_cache) >= _MATCH_CACHE_MAX_SIZE:
+                # Удаляем самую старую запись, словарь сохраняет порядок добавления
+                del _match_cache[next(iter(_match_cache))]
+
+            _match_cache[pattern] = files, snapshot
+        else:
+            _match_cache.pop(pattern, None)
+
+    return files
+
+
+def invalidate_matches(path: Optional[str] = None):
+    """
+    Сбрасывает сохранённые результаты поиска файлов функциями ``match_files`` и ``pick_random_file``.
+
+    Результаты поиска проверяются по времени изменения папок, так что вызывать эту функцию нужно только после изменений,
+    которые могли не изменить время изменения папок (например, на файловых системах с низкой точностью времени
+    изменения) или когда изменения должны быть видны сразу же наверняка, например, после скачивания файла.
+
+    Args:
+        path:
+            путь к изменившемуся файлу или папке или ``None`` если нужно сбросить все результаты
+    """
+    with _match_cache_lck:
+        if path is None:
+            _match_cache.clear()
+            return
+
+        affected = {path := abspath(path)}
+
+        while (parent := dirname(path)) != path:
+            affected.add(path := parent)
+
+        for pattern, (_, snapshot) in list(_match_cache.items()):
+            if not affected.isdisjoint(snapshot.keys()):
+                del _match_cache[pattern]
+
+
+def glob_with_snapshot(pattern: str) -> tuple[list[str], DirectorySnapshot]:
+    """
+    Ищет файлы, соответствующие шаблону (без переменных), так же как ``glob`` и запоминает состояние всех папок,
+    содержимое которых повлияло на результат.
+
+    Добавление, удаление или переименование файла или папки изменяет время изменения содержащей его папки, так что пока
+    ``is_snapshot_valid`` возвращает ``True`` для запомненного состояния, повторный поиск вернёт тот же результат.
+
+    Args:
+        pattern:
+            шаблон пути
+    Returns:
+        кортеж из списка абсолютных путей найденных файлов и папок и состояния папок
+    """
+    snapshot: DirectorySnapshot = {}
+    parts = Path(abspath(pattern)).parts
+    # Как и glob, шаблон, оканчивающийся разделителем, соответствует только папкам
+    directories_only = pattern.endswith(os.sep) or (os.altsep is not None and pattern.endswith(os.altsep))
+    current = [parts[0]]
+
+    def list_dir(path: str) -> list[str]:
+        try:
+            snapshot[path] = os.stat(path).st_mtime_ns
+            return os.listdir(path)
+        except FileNotFoundError:
+            snapshot[path] = None
+        except NotADirectoryError:
+            # Файл не станет папкой без изменения содержащей его папки
+            pass
+
+        return []
+
+    def walk(path: str) -> Iterable[str]:
+        yield path
+
+        for name in list_dir(path):
+            if not name.startswith('.') and isdir(child := join(path, name)):
+                yield from walk(child)
+
+    for i, part in enumerate(parts[1:], 1):
+        last = i == len(parts) - 1
+
+        if part == '**':
+            current = [it for path in current for it in walk(path)]
+
+            if last and not directories_only:
+                current += [
+                    child
+                    for path in current
+                    for name in sorted(list_dir(path))
+                    if not name.startswith('.') and not isdir(child := join(path, name))
+                ]
+        elif has_magic(part):
+            current = [
+                join(path, name)
+                for path in current
+                for name in sorted(list_dir(path))
+                if fnmatchcase(name, part) and (part.startswith('.') or not name.startswith('.'))
+            ]
+        else:
+            current = [join(path, part) for path in current]
+
+            if last:
+                # Отсутствие файла с конкретным именем тоже зависит от содержимого папки
+                for path in current:
+                    list_dir(os.path.dirname(path))
+                current = [path for path in current if os.path.lexists(path)]
+
+    if directories_only:
+        current = [path for path in current if isdir(path)]
+
+    return current, snapshot
+
+
+def is_snapshot_valid(snapshot: Mapping[str, Optional[int]]) -> bool:
+    """
+    Проверяет, что состояние папок не изменилось с момента создания снимка функцией ``glob_with_snapshot``.
+    """
+    for path, mtime in snapshot.items():
+        try:
+            if os.stat(path).st_mtime_ns != mtime:
+                return False
+        except (FileNotFoundError, NotADirectoryError):
+            if mtime is not None:
+                return False
+
+    return True
+
+
 def pick_random_file(
         patterns: Iterable[str],
         *,
@@ -94,6 +256,27 @@ def pick_random_file(
     return choice(files)
 
 
+@lru_cache(maxsize=256)
+def _compile_pattern(pattern: str) -> Optional[tuple[tuple[str, Optional[str]], ...]]:
+    """
+    Разбирает шаблон на части - текст и имена подставляемых переменных.
+
+    Returns:
+        кортеж пар из текста и имени переменной, следующей за ним (или ``None``) или ``None`` если шаблон использует
+        возможности ``str.format``, кроме простой подстановки переменных
+    """
+    try:
+        parsed = tuple(Formatter().parse(pattern))
+    except ValueError:
+        return None
+
+    for _, field, spec, conversion in parsed:
+        if field is not None and (not field.isidentifier() or spec or conversion):
+            return None
+
+    return tuple((text, field) for text, field, _, _ in parsed)
+
+
 def substitute_pattern(
         pattern: str,
         *,
@@ -114,6 +297,36 @@ def substitute_pattern(
     Raises:
         ValueError если шаблон использует переменную, значение которой не определено
     """
+    if (compiled := _compile_pattern(pattern)) is None:
+        yield from _substitute_pattern_with_format(pattern, override_vars=override_vars)
+        return
+
+    all_vars: Mapping[str, PathVariableValue] = \
+        _global_variables if not override_vars else {**_global_variables, **override_vars}
+
+    fields = {field for _, field in compiled if field is not None}
+
+    for field in fields:
+        if field not in all_vars:
+            raise ValueError(f"Неизвестная переменная '{field}' в шаблоне пути файла '{pattern}'")
+
+    # Переменные с несколькими значениями перебираются в том же порядке, в котором перечислены переменные
+    varying = [k for k, v in all_vars.items() if k in fields and not isinstance(v, str)]
+
+    for values in product(*(all_vars[k] for k in varying)):
+        current = dict(zip(varying, values))
+
+        yield ''.join(
+            text if field is None else text + str(current[field] if field in current else all_vars[field])
+            for text, field in compiled
+        )
+
+
+def _substitute_pattern_with_format(
+        pattern: str,
+        *,
+        override_vars: Optional[dict[str, PathVariableValue]] = None,
+) -> Iterable[str]:
     all_vars: dict[str, PathVariableValue] = {
         **_global_variables, **(override_vars or {})}
 
@@ -129,7 +342,7 @@ def substitute_pattern(
 
         for value in v:
             all_vars[k] = value
-            yield from substitute_pattern(pattern, override_vars=all_vars)
+            yield from _substitute_pattern_with_format(pattern, override_vars=all_vars)
 
         return
 
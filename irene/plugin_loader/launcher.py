@@ -1,13 +1,17 @@
 import asyncio
 import signal
 from argparse import ArgumentParser
-from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
+from os import environ
 from typing import Collection, Optional, Awaitable
 
 from irene.plugin_loader.abc import Plugin
+from irene.plugin_loader.executors import MonitoredThreadPoolExecutor, set_executor, shutdown_executors, \
+    EXECUTOR_DEFAULT
 from irene.plugin_loader.plugin_manager import PluginManagerImpl
 from irene.plugin_loader.run_operation import call_all, call_all_parallel_async
+from irene.plugin_loader.startup_profiler import StartupProfiler, set_active_profiler, profile_span, \
+    PROFILE_STARTUP_ENV
 
 _logger = getLogger('launcher')
 
@@ -104,6 +108,25 @@ async def _run_with_interrupts(future: Awaitable):
         interrupt_task.cancel()
 
 
+def _start_profiling(pm: PluginManagerImpl) -> StartupProfiler:
+    profiler = StartupProfiler()
+    set_active_profiler(profiler)
+    pm.set_step_instrumentation(profiler.instrument)
+
+    return profiler
+
+
+def _finish_profiling(pm: PluginManagerImpl, profiler: StartupProfiler, path: str):
+    profiler.stop()
+    set_active_profiler(None)
+    pm.set_step_instrumentation(None)
+
+    try:
+        profiler.write(path)
+    except OSError:
+        _logger.exception("Не удалось сохранить профиль запуска в %s", path)
+
+
 def launch_application(
         core_plugins: Collection[Plugin],
         *,
@@ -121,6 +144,7 @@ def launch_application(
     pm = PluginManagerImpl(core_plugins)
 
     asyncio_debug, executor_max_workers = False, None
+    profile_path: Optional[str] = None
 
     def parse_args(strict: bool):
         ap = ArgumentParser(add_help=strict, prog=canonical_launch_command)
@@ -135,11 +159,22 @@ def launch_application(
             '--executor-max-workers', '-w',
             dest='executor_max_workers',
             metavar='<N>',
-            help="Максимальное кол-во потоков в рабочем пуле.",
+            help="Максимальное кол-во потоков в рабочем пуле по-умолчанию. "
+                 "Размеры пулов отдельных подсистем задаются в конфигурации (executors.maxWorkers).",
             default=None,
             required=False,
             type=int,
         )
+        ap.add_argument(
+            '--profile-startup',
+            dest='profile_startup',
+            metavar='<file>',
+            help="Сохранить профиль запуска приложения (время выполнения шагов операций и импорта плагинов) в заданный "
+                 "файл в формате Chrome Trace Event, и текстовую сводку - в файл с расширением .txt. "
+                 f"Путь к файлу можно так же задать переменной окружения {PROFILE_STARTUP_ENV}.",
+            default=environ.get(PROFILE_STARTUP_ENV) or None,
+            required=False,
+        )
 
         call_all(pm.get_operation_sequence('setup_cli_arguments'), ap)
 
@@ -150,30 +185,38 @@ def launch_application(
 
         call_all(pm.get_operation_sequence('receive_cli_arguments'), args)
 
-        nonlocal asyncio_debug, executor_max_workers
+        nonlocal asyncio_debug, executor_max_workers, profile_path
         asyncio_debug = args.asyncio_debug
         executor_max_workers = args.executor_max_workers
+        profile_path = args.profile_startup
 
     parse_args(False)
-    call_all(pm.get_operation_sequence('bootstrap'), pm)
+
+    profiler = _start_profiling(pm) if profile_path is not None else None
+
+    with profile_span('bootstrap', 'operation'):
+        call_all(pm.get_operation_sequence('bootstrap'), pm)
+
     parse_args(True)
 
     async def run_async_operations() -> None:
-        executor = ThreadPoolExecutor(
-            max_workers=executor_max_workers,
-        )
+        executor = MonitoredThreadPoolExecutor(EXECUTOR_DEFAULT, executor_max_workers)
+        set_executor(executor)
         asyncio.get_running_loop().set_default_executor(executor)
 
         run_tasks: Optional[Collection[asyncio.Task]] = None
 
         try:
-            init_tasks = await call_all_parallel_async(pm.get_operation_sequence('init'), pm)
-
             try:
-                await _run_with_interrupts(asyncio.gather(*init_tasks))
+                with profile_span('init', 'operation'):
+                    init_tasks = await call_all_parallel_async(pm.get_operation_sequence('init'), pm)
+                    await _run_with_interrupts(asyncio.gather(*init_tasks))
             except InterruptedError:
                 _logger.info("Получен сигнал прерывания в процессе инициализации.")
                 return
+            finally:
+                if profiler is not None and profile_path is not None:
+                    _finish_profiling(pm, profiler, profile_path)
 
             _logger.info("Инициализация завершена.")
 
@@ -209,4 +252,7 @@ def launch_application(
                 else:
                     _logger.debug("Все задачи выполнены, завершаюсь штатно.")
 
-    asyncio.run(run_async_operations(), debug=asyncio_debug)
+    try:
+        asyncio.run(run_async_operations(), debug=asyncio_debug)
+    finally:
+        shutdown_executors()
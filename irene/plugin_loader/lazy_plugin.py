@@ -0,0 +1,192 @@
+"""
+Отложенная загрузка модулей плагинов.
+
+Модуль плагина (``MagicModulePlugin``), сведения о котором есть в индексе плагинов, можно не импортировать при запуске
+приложения: сведения о шагах операций, конфигурация по-умолчанию и описание конфигурации берутся из индекса, а модуль
+импортируется только при первом вызове одного из шагов или обращении к другим аттрибутам плагина.
+Это позволяет не загружать тяжёлые зависимости (например, ``torch``) плагинов, операции которых не выполняются в данной
+конфигурации приложения.
+"""
+
+import copy
+from logging import getLogger
+from threading import Lock
+from typing import Callable, Optional, Iterable, Collection, Any
+
+from irene.plugin_loader.abc import Plugin, OperationStep
+from irene.plugin_loader.errors import PluginLoadingException
+from irene.plugin_loader.plugin_index import PluginManifest, StepManifest, STEP_COROUTINE, STEP_VALUE
+
+__all__ = ['LazyModulePlugin']
+
+_logger = getLogger('lazy_plugin')
+
+
+class LazyModulePlugin(Plugin):
+    """
+    Плагин, представляющий модуль плагина, который импортируется при первом обращении.
+
+    Шаги-функции заменяются функциями, загружающими плагин при первом вызове и вызывающими соответствующий шаг
+    загруженного плагина.
+    Запрос шагов операции, содержащей шаги, не являющиеся функциями, приводит к загрузке плагина.
+    Исключение - конфигурация плагина: если она сохранена в индексе, то плагин получает её копию, а после загрузки модуля
+    переменная ``config`` модуля заменяется этой копией, со всеми внесёнными в неё к тому времени изменениями.
+
+    Описание конфигурации (``config_comment``) берётся из индекса, так что если оно формируется динамически (например,
+    содержит список устройств), то оно соответствует моменту последнего изменения файла плагина.
+    """
+
+    __slots__ = ('name', 'version', '_manifest', '_loader', '_plugin', '_config', '_steps', '_lck')
+
+    def __init__(self, manifest: PluginManifest, loader: Callable[[], Plugin]):
+        """
+        Args:
+            manifest:
+                сведения о плагине из индекса плагинов
+            loader:
+                функция, загружающая плагин
+        Raises:
+            ValueError - если сведений о плагине недостаточно для его отложенной загрузки
+        """
+        if not manifest.lazy_loadable or manifest.operations is None:
+            raise ValueError(f"Плагин {manifest.name}@{manifest.version} не поддерживает отложенную загрузку")
+
+        self.name = manifest.name
+        self.version = manifest.version
+        self.__doc__ = manifest.doc
+        self._manifest = manifest
+        self._loader = loader
+        self._plugin: Optional[Plugin] = None
+        self._config = copy.deepcopy(manifest.config)
+        self._steps: dict[str, tuple[OperationStep, ...]] = {}
+        self._lck = Lock()
+
+    def is_loaded(self) -> bool:
+        """
+        Проверяет, был ли уже загружен плагин.
+        """
+        return self._plugin is not None
+
+    def load(self) -> Plugin:
+        """
+        Загружает плагин, если он ещё не загружен.
+
+        Returns:
+            загруженный плагин
+        Raises:
+            PluginLoadingException - если загрузить плагин не удалось
+        """
+        if (plugin := self._plugin) is not None:
+            return plugin
+
+        with self._lck:
+            if self._plugin is None:
+                _logger.debug("Загружаю плагин %s", self)
+
+                try:
+                    plugin = self._loader()
+                except PluginLoadingException:
+                    raise
+                except Exception as e:
+                    raise PluginLoadingException(f"Не удалось загрузить плагин {self}") from e
+
+                if self._config is not None:
+                    setattr(plugin, 'config', self._config)
+
+                self._plugin = plugin
+
+            return self._plugin
+
+    def get_declared_operations(self) -> Optional[Collection[str]]:
+        assert self._manifest.operations is not None
+        return self._manifest.operations.keys()
+
+    def get_operation_steps(self, op_name: str) -> Iterable[OperationStep]:
+        if (steps := self._steps.get(op_name)) is None:
+            steps = self._steps[op_name] = self._make_steps(op_name)
+
+        return steps
+
+    def _make_steps(self, op_name: str) -> tuple[OperationStep, ...]:
+        assert self._manifest.operations is not None
+        manifests = self._manifest.operations.get(op_name, ())
+
+        if op_name == 'config' and self._config is not None:
+            return tuple(
+                OperationStep(self._config, step.name, self, step.dependencies, step.reverse_dependencies)
+                for step in manifests
+            )
+
+        if self._plugin is not None or any(step.kind == STEP_VALUE for step in manifests):
+            return tuple(
+                OperationStep(step.step, step.name, self, step.dependencies, step.reverse_dependencies)
+                for step in self.load().get_operation_steps(op_name)
+            )
+
+        return tuple(
+            OperationStep(
+                self._make_lazy_step(op_name, step), step.name, self, step.dependencies, step.reverse_dependencies
+            )
+            for step in manifests
+        )
+
+    def _resolve_step(self, op_name: str, step_name: str) -> Any:
+        for step in self.load().get_operation_steps(op_name):
+            if step.name == step_name:
+                return step.step
+
+        raise PluginLoadingException(f"Загруженный плагин {self} не содержит шага {step_name} операции {op_name}")
+
+    def _make_lazy_step(self, op_name: str, step: StepManifest) -> Callable:
+        target: Optional[Callable] = None
+
+        def resolve() -> Callable:
+            nonlocal target
+
+            if target is None:
+                target = self._resolve_step(op_name, step.name)
+
+            return target
+
+        if step.kind == STEP_COROUTINE:
+            async def lazy_coroutine_step(*args, **kwargs):
+                return await resolve()(*args, **kwargs)
+
+            return lazy_coroutine_step
+
+        def lazy_step(*args, **kwargs):
+            return resolve()(*args, **kwargs)
+
+        return lazy_step
+
+    def __setattr__(self, key, value):
+        if key in LazyModulePlugin.__slots__ or key == '__doc__':
+            return super().__setattr__(key, value)
+
+        if key == 'config' and self._config is not None:
+            # Замена конфигурации (например, наблюдаемой копией) не должна приводить к загрузке модуля
+            with self._lck:
+                self._config = value
+                self._steps.pop('config', None)
+
+                if self._plugin is not None:
+                    setattr(self._plugin, 'config', value)
+
+            return
+
+        return setattr(self.load(), key, value)
+
+    def __getattr__(self, item):
+        if item.startswith('_'):
+            raise AttributeError(item)
+
+        if item == 'config' and self._config is not None:
+            return self._config
+
+        if item == 'config_comment':
+            if (comment := self._manifest.config_comment) is None:
+                raise AttributeError(item)
+
+            return comment
+
+        return getattr(self.load(), item)
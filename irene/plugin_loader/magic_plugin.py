@@ -1,7 +1,7 @@
 import re
 from abc import ABC
 from types import ModuleType
-from typing import Iterable, Collection, Callable, TypeVar
+from typing import Iterable, Collection, Callable, TypeVar, Optional
 
 from irene.plugin_loader.abc import Plugin, OperationStep
 
@@ -155,6 +155,9 @@ class MagicPlugin(Plugin, ABC):
     def get_operation_steps(self, op_name: str) -> Iterable[OperationStep]:
         return self.__steps.get(op_name, ())
 
+    def get_declared_operations(self) -> Optional[Collection[str]]:
+        return self.__steps.keys()
+
 
 class MagicModulePlugin(Plugin):
     __slots__ = ('name', 'version', '_module', '_steps', '__doc__')
@@ -169,6 +172,9 @@ class MagicModulePlugin(Plugin):
     def get_operation_steps(self, op_name: str) -> Iterable[OperationStep]:
         return self._steps.get(op_name, ())
 
+    def get_declared_operations(self) -> Optional[Collection[str]]:
+        return self._steps.keys()
+
     def __setattr__(self, key, value):
         if key in self.__slots__:
             return super().__setattr__(key, value)
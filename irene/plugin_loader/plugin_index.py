@@ -0,0 +1,323 @@
+"""
+Индекс плагинов, сохраняемый на диске между запусками приложения.
+
+Индекс хранит результаты поиска файлов плагинов по шаблонам путей вместе с состоянием папок, от которых эти результаты
+зависят, и сведения о плагинах, найденных в каждом файле.
+Это позволяет при повторных запусках не просматривать заново папки, которые не изменились (в т.ч. все папки из
+``sys.path`` для шаблонов, использующих ``{python_path}``), и узнавать имена, версии и операции плагинов без импорта
+их модулей.
+"""
+
+import json
+import os
+from asyncio import iscoroutinefunction
+from logging import getLogger
+from typing import Optional, Iterable, NamedTuple, Any
+
+from irene.plugin_loader.abc import Plugin, OperationStep
+from irene.plugin_loader.file_patterns import substitute_pattern, glob_with_snapshot, is_snapshot_valid, \
+    DirectorySnapshot
+from irene.plugin_loader.magic_plugin import MagicModulePlugin
+
+__all__ = ['PluginIndex', 'PluginManifest', 'StepManifest', 'STEP_FUNCTION', 'STEP_COROUTINE', 'STEP_VALUE']
+
+_INDEX_FORMAT_VERSION = 2
+
+STEP_FUNCTION = 'function'
+"""Шаг - функция (или другой вызываемый объект)"""
+
+STEP_COROUTINE = 'coroutine'
+"""Шаг - асинхронная функция"""
+
+STEP_VALUE = 'value'
+"""Шаг - значение, не являющееся функцией"""
+
+_logger = getLogger('plugin_index')
+
+
+class StepManifest(NamedTuple):
+    """
+    Сведения о шаге операции, не требующие наличия самого шага.
+    """
+
+    name: str
+    dependencies: tuple[str, ...] = ()
+    reverse_dependencies: tuple[str, ...] = ()
+
+    kind: str = STEP_VALUE
+    """
+    Вид шага - ``STEP_FUNCTION``, ``STEP_COROUTINE`` или ``STEP_VALUE``
+    """
+
+    @classmethod
+    def of(cls, step: OperationStep) -> 'StepManifest':
+        if iscoroutinefunction(step.step):
+            kind = STEP_COROUTINE
+        elif callable(step.step):
+            kind = STEP_FUNCTION
+        else:
+            kind = STEP_VALUE
+
+        return cls(step.name, tuple(step.dependencies), tuple(step.reverse_dependencies), kind)
+
+
+class PluginManifest(NamedTuple):
+    """
+    Сведения о плагине, сохраняемые в индексе.
+    """
+
+    name: str
+    version: str
+
+    operations: Optional[dict[str, tuple[StepManifest, ...]]]
+    """
+    Шаги плагина, сгруппированные по операциям, или ``None`` если набор операций плагина заранее неизвестен
+    """
+
+    lazy_loadable: bool = False
+    """
+    ``True`` если плагин является модулем (``MagicModulePlugin``), импорт которого можно отложить до первого обращения
+    к его шагам (см. ``LazyModulePlugin``)
+    """
+
+    config: Optional[dict[str, Any]] = None
+    """
+    Конфигурация плагина по-умолчанию, если её можно сохранить в индексе
+    """
+
+    config_comment: Optional[str] = None
+    doc: Optional[str] = None
+
+    @classmethod
+    def of(cls, plugin: Plugin) -> 'PluginManifest':
+        operations: Optional[dict[str, tuple[StepManifest, ...]]] = None
+
+        if (op_names := plugin.get_declared_operations()) is not None:
+            operations = {
+                op_name: tuple(StepManifest.of(step) for step in plugin.get_operation_steps(op_name))
+                for op_name in op_names
+            }
+
+        if not isinstance(plugin, MagicModulePlugin) or operations is None:
+            return cls(plugin.name, plugin.version, operations)
+
+        config_comment = getattr(plugin, 'config_comment', None)
+
+        return cls(
+            plugin.name,
+            plugin.version,
+            operations,
+            lazy_loadable=True,
+            config=_get_storable_config(plugin),
+            config_comment=config_comment if isinstance(config_comment, str) else None,
+            doc=plugin.__doc__,
+        )
+
+    def to_json(self) -> Any:
+        return dict(
+            name=self.name,
+            version=self.version,
+            operations=None if self.operations is None else {
+                op_name: [
+                    [step.name, list(step.dependencies), list(step.reverse_dependencies), step.kind]
+                    for step in steps
+                ]
+                for op_name, steps in self.operations.items()
+            },
+            lazy_loadable=self.lazy_loadable,
+            config=self.config,
+            config_comment=self.config_comment,
+            doc=self.doc,
+        )
+
+    @classmethod
+    def from_json(cls, data: Any) -> 'PluginManifest':
+        operations = data['operations']
+
+        return cls(
+            data['name'],
+            data['version'],
+            None if operations is None else {
+                op_name: tuple(
+                    StepManifest(name, tuple(deps), tuple(rdeps), kind) for name, deps, rdeps, kind in steps
+                )
+                for op_name, steps in operations.items()
+            },
+            lazy_loadable=data['lazy_loadable'],
+            config=data['config'],
+            config_comment=data['config_comment'],
+            doc=data['doc'],
+        )
+
+
+def _get_storable_config(plugin: Plugin) -> Optional[dict[str, Any]]:
+    """
+    Возвращает копию конфигурации плагина по-умолчанию, если она одна и не изменяется при сохранении в JSON.
+
+    Копия нужна т.к. сама конфигурация будет изменена после загрузки файлов конфигурации.
+    """
+    steps = list(plugin.get_operation_steps('config'))
+
+    if len(steps) != 1 or not isinstance(config := steps[0].step, dict):
+        return None
+
+    try:
+        stored = json.loads(json.dumps(config, ensure_ascii=False))
+    except (TypeError, ValueError):
+        return None
+
+    return stored if stored == config else None
+
+
+class _FileEntry(NamedTuple):
+    mtime: int
+    size: int
+    plugins: list[PluginManifest]
+
+
+class PluginIndex:
+    """
+    Индекс файлов плагинов.
+
+    Изменения, сделанные в процессе поиска плагинов, записываются на диск методом ``save``.
+    Записи о файлах и шаблонах, к которым не было обращений с момента загрузки индекса, при сохранении удаляются.
+    """
+
+    __slots__ = ('_path', '_globs', '_files', '_used_globs', '_used_files', '_modified')
+
+    def __init__(self, path: Optional[str], *, rebuild: bool = False):
+        """
+        Args:
+            path:
+                путь к файлу индекса или ``None`` если индекс не должен сохраняться на диске
+            rebuild:
+                ``True`` если ранее сохранённое содержимое индекса нужно игнорировать
+        """
+        self._path = path
+        self._globs: dict[str, tuple[list[str], DirectorySnapshot]] = {}
+        self._files: dict[str, _FileEntry] = {}
+        self._used_globs: dict[str, tuple[list[str], DirectorySnapshot]] = {}
+        self._used_files: dict[str, _FileEntry] = {}
+        self._modified = rebuild
+
+        if path is not None and not rebuild:
+            self._load(path)
+
+    def _load(self, path: str):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+
+            if data.get('version') != _INDEX_FORMAT_VERSION:
+                _logger.info("Формат индекса плагинов в %s устарел, индекс будет построен заново", path)
+                self._modified = True
+                return
+
+            self._globs = {
+                pattern: (files, snapshot)
+                for pattern, (files, snapshot) in data['globs'].items()
+            }
+            self._files = {
+                file_path: _FileEntry(mtime, size, [PluginManifest.from_json(it) for it in plugins])
+                for file_path, (mtime, size, plugins) in data['files'].items()
+            }
+        except FileNotFoundError:
+            self._modified = True
+        except Exception:
+            _logger.warning("Не удалось прочитать индекс плагинов из %s, индекс будет построен заново", path,
+                            exc_info=True)
+            self._globs, self._files = {}, {}
+            self._modified = True
+
+    def match_files(self, patterns: Iterable[str]) -> set[str]:
+        """
+        Ищет файлы, соответствующие шаблонам путей (с переменными, см. ``file_patterns.match_files``).
+
+        Для шаблонов, папки которых не изменились с прошлого поиска, используются сохранённые результаты.
+        """
+        matching: set[str] = set()
+
+        for pattern in patterns:
+            for substituted in substitute_pattern(pattern):
+                if (cached := self._globs.get(substituted)) is None or not is_snapshot_valid(cached[1]):
+                    cached = glob_with_snapshot(substituted)
+                    self._globs[substituted] = cached
+                    self._modified = True
+
+                self._used_globs[substituted] = cached
+                matching.update(cached[0])
+
+        return matching
+
+    def get_plugins(self, path: str) -> Optional[list[PluginManifest]]:
+        """
+        Возвращает сведения о плагинах из заданного файла, если файл не изменился с момента их сохранения.
+
+        Args:
+            path:
+                путь к файлу плагина
+        Returns:
+            список сведений о плагинах или ``None`` если сведений нет или они устарели
+        """
+        if (entry := self._files.get(path)) is None:
+            return None
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        if stat.st_mtime_ns != entry.mtime or stat.st_size != entry.size:
+            return None
+
+        self._used_files[path] = entry
+
+        return entry.plugins
+
+    def set_plugins(self, path: str, plugins: Iterable[Plugin]):
+        """
+        Сохраняет сведения о плагинах, найденных в заданном файле.
+        """
+        stat = os.stat(path)
+        entry = _FileEntry(stat.st_mtime_ns, stat.st_size, [PluginManifest.of(plugin) for plugin in plugins])
+
+        if self._files.get(path) != entry:
+            self._files[path] = entry
+            self._modified = True
+
+        self._used_files[path] = entry
+
+    def save(self):
+        """
+        Записывает индекс на диск, если его содержимое изменилось.
+        """
+        if self._path is None:
+            return
+
+        if not self._modified and self._used_globs.keys() == self._globs.keys() \
+                and self._used_files.keys() == self._files.keys():
+            return
+
+        data = dict(
+            version=_INDEX_FORMAT_VERSION,
+            globs=self._used_globs,
+            files={
+                path: [entry.mtime, entry.size, [plugin.to_json() for plugin in entry.plugins]]
+                for path, entry in self._used_files.items()
+            },
+        )
+
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            tmp_path = f'{self._path}.tmp'
+
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+
+            os.replace(tmp_path, self._path)
+        except OSError:
+            _logger.warning("Не удалось сохранить индекс плагинов в %s", self._path, exc_info=True)
+            return
+
+        self._globs, self._files = dict(self._used_globs), dict(self._used_files)
+        self._modified = False
@@ -1,18 +1,112 @@
 from graphlib import TopologicalSorter, CycleError
 from logging import getLogger
-from typing import Iterable, Collection
+from typing import Collection, NamedTuple, Callable, Any, Optional
 
 from irene.plugin_loader.abc import PluginManager, OperationStep, Plugin, DependencyCycleException
+from irene.plugin_loader.run_operation import compile_wrappers
+
+
+class OperationCacheInfo(NamedTuple):
+    """
+    Статистика использования кеша последовательностей шагов операций.
+    """
+
+    hits: int
+    """
+    Количество запросов, для которых последовательность шагов была взята из кеша
+    """
+
+    misses: int
+    """
+    Количество запросов, для которых последовательность шагов была построена заново
+    """
+
+    currsize: int
+    """
+    Количество операций, последовательности шагов которых хранятся в кеше
+    """
+
+    invalidations: int
+    """
+    Количество сбросов кеша
+    """
 
 
 class PluginManagerImpl(PluginManager):
-    __slots__ = ('_plugins', '_logger')
+    """
+    Менеджер плагинов, запоминающий упорядоченные последовательности шагов операций и созданные из них цепочки обёрток
+    до следующего вызова ``invalidate_operation_cache``.
+    """
+
+    __slots__ = ('_plugins', '_logger', '_plans', '_chains', '_hits', '_misses', '_invalidations', '_instrument')
 
     def __init__(self, plugins: Collection[Plugin], *, logger=getLogger('PluginManager')):
         self._plugins = plugins
         self._logger = logger
+        self._plans: dict[str, tuple[OperationStep, ...]] = {}
+        self._chains: dict[str, Callable[..., Any]] = {}
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+        self._instrument: Optional[Callable[[str, OperationStep], OperationStep]] = None
+
+    def get_operation_sequence(self, op_name: str) -> tuple[OperationStep, ...]:
+        if (plan := self._plans.get(op_name)) is not None:
+            self._hits += 1
+            return plan
+
+        self._misses += 1
+        plans = self._plans
+        plan = self._build_plan(op_name)
+
+        if (instrument := self._instrument) is not None:
+            plan = tuple(instrument(op_name, step) for step in plan)
+
+        # Если кеш был сброшен во время построения последовательности, то она могла устареть и не запоминается
+        if plans is self._plans:
+            plans[op_name] = plan
 
-    def get_operation_sequence(self, op_name: str) -> Iterable[OperationStep]:
+        return plan
+
+    def get_wrapper_chain(self, op_name: str) -> Callable[..., Any]:
+        if (chain := self._chains.get(op_name)) is not None:
+            return chain
+
+        chains = self._chains
+        chain = compile_wrappers(self.get_operation_sequence(op_name))
+
+        if chains is self._chains:
+            chains[op_name] = chain
+
+        return chain
+
+    def invalidate_operation_cache(self):
+        self._plans = {}
+        self._chains = {}
+        self._invalidations += 1
+
+    def set_step_instrumentation(self, instrument: Optional[Callable[[str, OperationStep], OperationStep]]):
+        """
+        Устанавливает функцию, которой будут обработаны все шаги возвращаемых последовательностей операций (например,
+        для замера времени выполнения шагов, см. ``StartupProfiler.instrument``).
+
+        Последовательности, полученные ранее, не изменяются.
+
+        Args:
+            instrument:
+                функция, принимающая имя операции и шаг и возвращающая шаг, который будет использован вместо него,
+                или ``None`` чтобы перестать обрабатывать шаги
+        """
+        self._instrument = instrument
+        self.invalidate_operation_cache()
+
+    def cache_info(self) -> OperationCacheInfo:
+        """
+        Возвращает статистику использования кеша последовательностей шагов операций.
+        """
+        return OperationCacheInfo(self._hits, self._misses, len(self._plans), self._invalidations)
+
+    def _build_plan(self, op_name: str) -> tuple[OperationStep, ...]:
         ts: TopologicalSorter[str] = TopologicalSorter()
         steps: dict[str, OperationStep] = {}
 
@@ -41,16 +135,15 @@ class PluginManagerImpl(PluginManager):
                 [steps.get(name, name) for name in e.args[1][1:]]
             )
 
-        # Генератор вынесен в отдельную функцию чтобы исключение DependencyCycleException выкидывалось непосредственно
-        # при вызове get_operation_sequence
-        def iterate():
-            while ts.is_active():
-                node_group = ts.get_ready()
+        plan: list[OperationStep] = []
+
+        while ts.is_active():
+            node_group = ts.get_ready()
 
-                for name in node_group:
-                    if name in steps:
-                        yield steps[name]
+            for name in node_group:
+                if name in steps:
+                    plan.append(steps[name])
 
-                ts.done(*node_group)
+            ts.done(*node_group)
 
-        return iterate()
+        return tuple(plan)
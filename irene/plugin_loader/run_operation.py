@@ -4,7 +4,7 @@
 
 import asyncio
 from functools import partial
-from typing import Any, Collection, Iterable
+from typing import Any, Callable, Collection, Iterable
 
 from irene.plugin_loader.abc import OperationStep
 
@@ -105,15 +105,35 @@ def call_all_as_wrappers(steps: Iterable[OperationStep], initial: Any, *args, **
         результат работы операции
     """
 
-    def _call_wrapper(s: Collection[OperationStep], prev, *a, **kw):
-        if len(s) == 0:
-            return prev
+    return compile_wrappers(steps)(initial, *args, **kwargs)
 
-        step, *rest = s
 
-        return step.step(partial(_call_wrapper, rest), prev, *a, **kw)
+def _return_prev(prev, *_args, **_kwargs):
+    return prev
 
-    return _call_wrapper(tuple(steps), initial, *args, **kwargs)
+
+def compile_wrappers(steps: Iterable[OperationStep]) -> Callable[..., Any]:
+    """
+    Создаёт функцию, выполняющую шаги так же, как ``call_all_as_wrappers``.
+
+    Функция первого шага заранее связывается с функцией, выполняющей последующие шаги, так что при вызове созданной
+    функции не создаются промежуточные объекты, а одну и ту же функцию можно вызывать многократно:
+
+    >>> chain = compile_wrappers(pm.get_operation_sequence('create_something'))
+    >>> something = chain(initial, *args, **kwargs)
+
+    Args:
+        steps:
+            шаги операции
+    Returns:
+        функция, принимающая начальное значение и дополнительные аргументы и возвращающая результат работы операции
+    """
+    chain: Callable[..., Any] = _return_prev
+
+    for step in reversed(tuple(steps)):
+        chain = partial(step.step, chain)
+
+    return chain
 
 
 async def call_all_parallel_async(steps: Iterable[OperationStep], *args, **kwargs) -> Collection[asyncio.Task]:
@@ -0,0 +1,308 @@
+"""
+Профилирование запуска приложения.
+
+Профилировщик замеряет реальное время и процессорное время каждого вызова шагов операций (см.
+``PluginManagerImpl.set_step_instrumentation``), а так же отдельных этапов запуска, отмеченных функцией ``profile_span``
+(например, импорта модулей плагинов), и сохраняет результаты в формате Chrome Trace Event (файл можно открыть в
+``chrome://tracing`` или https://ui.perfetto.dev) и в виде текстовой сводки, отсортированной по затраченному времени.
+"""
+
+import json
+import os
+import threading
+from asyncio import iscoroutinefunction
+from contextlib import contextmanager
+from functools import wraps
+from itertools import count
+from logging import getLogger
+from os.path import splitext
+from time import perf_counter, thread_time
+from typing import Optional, Any, Iterator, NamedTuple, Generator
+
+from irene.plugin_loader.abc import OperationStep
+
+__all__ = ['StartupProfiler', 'get_active_profiler', 'set_active_profiler', 'profile_span', 'PROFILE_STARTUP_ENV']
+
+PROFILE_STARTUP_ENV = 'IRENE_PROFILE_STARTUP'
+"""
+Переменная окружения, в которой можно указать путь к файлу профиля запуска вместо параметра ``--profile-startup``
+"""
+
+_logger = getLogger('startup_profiler')
+
+
+class _Record(NamedTuple):
+    name: str
+    category: str
+    start: float
+    wall: float
+    cpu: float
+    thread_id: int
+    is_async: bool
+    args: dict[str, Any]
+
+
+class StartupProfiler:
+    """
+    Собирает сведения о времени выполнения шагов операций и других этапов запуска.
+
+    Для шагов-функций процессорное время считается для потока, в котором выполнялся шаг, для асинхронных шагов -
+    суммируется время, потраченное в потоке event loop'а на выполнение самой корутины между её приостановками.
+    Время шагов, вызывающих другие шаги (например, шагов-обёрток), включает время вложенных вызовов.
+    """
+
+    __slots__ = ('_origin', '_records', '_lck', '_active')
+
+    def __init__(self):
+        self._origin = perf_counter()
+        self._records: list[_Record] = []
+        self._lck = threading.Lock()
+        self._active = True
+
+    def is_active(self) -> bool:
+        """
+        Проверяет, записывает ли профилировщик новые замеры.
+        """
+        return self._active
+
+    def stop(self):
+        """
+        Прекращает запись новых замеров.
+
+        Шаги, обёрнутые профилировщиком, продолжают работать, но их вызовы больше не замеряются.
+        """
+        self._active = False
+
+    def _record(self, name: str, category: str, start: float, wall: float, cpu: float, is_async: bool,
+                args: dict[str, Any]):
+        record = _Record(name, category, start - self._origin, wall, cpu, threading.get_ident(), is_async, args)
+
+        with self._lck:
+            self._records.append(record)
+
+    @contextmanager
+    def span(self, name: str, category: str, **args) -> Iterator[None]:
+        """
+        Замеряет время выполнения блока кода в текущем потоке.
+
+        Args:
+            name:
+                название этапа
+            category:
+                категория этапа, например, ``import``
+            **args:
+                дополнительные сведения, сохраняемые в профиле
+        """
+        if not self._active:
+            yield
+            return
+
+        start, start_cpu = perf_counter(), thread_time()
+
+        try:
+            yield
+        finally:
+            self._record(name, category, start, perf_counter() - start, thread_time() - start_cpu, False, args)
+
+    def instrument(self, op_name: str, step: OperationStep) -> OperationStep:
+        """
+        Оборачивает шаг операции функцией, замеряющей время его выполнения.
+
+        Шаги, не являющиеся функциями, возвращаются без изменений.
+
+        Args:
+            op_name:
+                имя операции
+            step:
+                шаг операции
+        Returns:
+            шаг с обёрнутой функцией
+        """
+        fn = step.step
+
+        if not callable(fn):
+            return step
+
+        name, args = step.name, {'operation': op_name, 'plugin': str(step.plugin)}
+
+        if iscoroutinefunction(fn):
+            @wraps(fn)
+            async def timed_coroutine_step(*a, **kw):
+                if not self._active:
+                    return await fn(*a, **kw)
+
+                start = perf_counter()
+                cpu = [0.0]
+
+                try:
+                    return await _TimedCoroutine(fn(*a, **kw), cpu)
+                finally:
+                    self._record(name, op_name, start, perf_counter() - start, cpu[0], True, args)
+
+            return step._replace(step=timed_coroutine_step)
+
+        @wraps(fn)
+        def timed_step(*a, **kw):
+            if not self._active:
+                return fn(*a, **kw)
+
+            start, start_cpu = perf_counter(), thread_time()
+
+            try:
+                return fn(*a, **kw)
+            finally:
+                self._record(name, op_name, start, perf_counter() - start, thread_time() - start_cpu, False, args)
+
+        return step._replace(step=timed_step)
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """
+        Возвращает собранные замеры в формате Chrome Trace Event.
+        """
+        pid = os.getpid()
+        events: list[dict[str, Any]] = []
+        async_ids = count(1)
+
+        with self._lck:
+            records = list(self._records)
+
+        thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+
+        for thread_id in {record.thread_id for record in records}:
+            events.append(dict(
+                name='thread_name', ph='M', pid=pid, tid=thread_id,
+                args=dict(name=thread_names.get(thread_id, str(thread_id))),
+            ))
+
+        for record in records:
+            common = dict(
+                name=record.name, cat=record.category, pid=pid, tid=record.thread_id,
+                args=dict(record.args, cpu_ms=round(record.cpu * 1e3, 3)),
+            )
+
+            if record.is_async:
+                # Асинхронные шаги выполняются в одном потоке одновременно и не вложены друг в друга, поэтому
+                # записываются как асинхронные события, а не как вложенные интервалы
+                async_id = next(async_ids)
+                events.append(dict(common, ph='b', id=async_id, ts=record.start * 1e6))
+                events.append(dict(common, ph='e', id=async_id, ts=(record.start + record.wall) * 1e6))
+            else:
+                events.append(dict(common, ph='X', ts=record.start * 1e6, dur=record.wall * 1e6))
+
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def format_summary(self) -> str:
+        """
+        Возвращает текстовую сводку по замерам, отсортированную по суммарному реальному времени.
+        """
+        totals: dict[tuple[str, str], list[float]] = {}
+
+        with self._lck:
+            records = list(self._records)
+
+        for record in records:
+            total = totals.setdefault((record.category, record.name), [0.0, 0.0, 0, 0.0])
+            total[0] += record.wall
+            total[1] += record.cpu
+            total[2] += 1
+            total[3] = max(total[3], record.wall)
+
+        lines = [
+            "Время запуска по шагам операций (время шагов включает время вложенных вызовов)",
+            "",
+            f"{'реальное, мс':>13} {'ЦП, мс':>10} {'вызовов':>8} {'макс., мс':>10}  категория / имя",
+        ]
+
+        for (category, name), (wall, cpu, calls, max_wall) in sorted(
+                totals.items(), key=lambda it: it[1][0], reverse=True
+        ):
+            lines.append(
+                f"{wall * 1e3:13.1f} {cpu * 1e3:10.1f} {calls:8d} {max_wall * 1e3:10.1f}  {category} / {name}"
+            )
+
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """
+        Сохраняет профиль в формате Chrome Trace Event в заданный файл и текстовую сводку в файл с тем же именем и
+        расширением ``.txt``.
+
+        Args:
+            path:
+                путь к файлу профиля
+        """
+        summary_path = f'{splitext(path)[0]}.txt'
+
+        if summary_path == path:
+            summary_path = f'{path}.txt'
+
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_chrome_trace(), f, ensure_ascii=False)
+
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(self.format_summary())
+
+        _logger.info("Профиль запуска сохранён в %s, сводка - в %s", path, summary_path)
+
+
+class _TimedCoroutine:
+    """
+    Awaitable, выполняющий корутину и суммирующий процессорное время, потраченное на каждый шаг её выполнения.
+    """
+
+    __slots__ = ('_coro', '_cpu')
+
+    def __init__(self, coro, cpu: list[float]):
+        self._coro = coro
+        self._cpu = cpu
+
+    def __await__(self) -> Generator[Any, Any, Any]:
+        coro, cpu = self._coro, self._cpu
+        value: Any = None
+        error: Optional[BaseException] = None
+
+        while True:
+            start = thread_time()
+
+            try:
+                yielded = coro.send(value) if error is None else coro.throw(error)
+            except StopIteration as e:
+                return e.value
+            finally:
+                cpu[0] += thread_time() - start
+
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:
+                value, error = None, e
+
+
+_active_profiler: Optional[StartupProfiler] = None
+
+
+def get_active_profiler() -> Optional[StartupProfiler]:
+    """
+    Возвращает профилировщик запуска, если профилирование включено.
+    """
+    return _active_profiler
+
+
+def set_active_profiler(profiler: Optional[StartupProfiler]):
+    """
+    Устанавливает текущий профилировщик запуска.
+    """
+    global _active_profiler
+    _active_profiler = profiler
+
+
+@contextmanager
+def profile_span(name: str, category: str, **args) -> Iterator[None]:
+    """
+    Замеряет время выполнения блока кода, если профилирование запуска включено (см. ``StartupProfiler.span``).
+    """
+    if (profiler := _active_profiler) is None:
+        yield
+        return
+
+    with profiler.span(name, category, **args):
+        yield
@@ -0,0 +1,69 @@
+import datetime
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml  # type: ignore
+
+from irene.plugin_loader.config_cache import ParsedConfigCache
+
+
+class ParsedConfigCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self._tmp.name, 'cache', 'config.marshal')
+        self.file_path = Path(self._tmp.name, 'plugin.yaml')
+        self.file_path.write_text('greeting: привет\nvolumes: [1, 2]\n', encoding='utf-8')
+        self.parsed = 0
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def parse(self):
+        self.parsed += 1
+        return yaml.safe_load(self.file_path.read_text(encoding='utf-8'))
+
+    def read(self):
+        cache = ParsedConfigCache(self.cache_path)
+        result = cache.read(self.file_path, self.parse)
+        cache.save()
+        return result
+
+    def test_unchanged_file_is_not_parsed(self):
+        self.assertEqual(self.read(), {'greeting': 'привет', 'volumes': [1, 2]})
+        self.assertEqual(self.read(), {'greeting': 'привет', 'volumes': [1, 2]})
+        self.assertEqual(self.parsed, 1)
+
+    def test_changed_file_is_parsed(self):
+        self.read()
+
+        self.file_path.write_text('greeting: здравствуйте\n', encoding='utf-8')
+
+        self.assertEqual(self.read(), {'greeting': 'здравствуйте'})
+        self.assertEqual(self.parsed, 2)
+
+    def test_cached_value_is_not_shared(self):
+        cache = ParsedConfigCache(self.cache_path)
+        cache.read(self.file_path, self.parse)['volumes'].append(3)
+
+        self.assertEqual(cache.read(self.file_path, self.parse)['volumes'], [1, 2])
+
+    def test_unsupported_values_are_not_cached(self):
+        self.file_path.write_text('date: 2022-01-01\n', encoding='utf-8')
+
+        self.assertEqual(self.read(), {'date': datetime.date(2022, 1, 1)})
+        self.assertEqual(self.read(), {'date': datetime.date(2022, 1, 1)})
+        self.assertEqual(self.parsed, 2)
+
+    def test_broken_cache_file(self):
+        os.makedirs(os.path.dirname(self.cache_path))
+        Path(self.cache_path).write_bytes(b'not a cache')
+
+        self.assertEqual(self.read()['greeting'], 'привет')
+        self.assertEqual(self.read()['greeting'], 'привет')
+        self.assertEqual(self.parsed, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,173 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from irene.plugin_loader.core_plugins import ConfigPlugin
+from irene.plugin_loader.core_plugins import config as config_module
+from irene.plugin_loader.magic_plugin import MagicPlugin
+from irene.plugin_loader.plugin_manager import PluginManagerImpl
+from irene.plugin_loader.utils.file_watcher import create_file_watcher
+from irene.plugin_loader.utils.observable import ObservableDict
+
+
+class _ConfiguredPlugin(MagicPlugin):
+    name = 'configured'
+    version = '0.0.1'
+
+    def __init__(self):
+        # Конфигурация изменяется при загрузке, поэтому у каждого экземпляра своя копия
+        self.config = {
+            'greeting': 'привет',
+            'volume': 50,
+        }
+        super().__init__()
+
+
+class _ConfigPlugin(ConfigPlugin):
+    name = 'config'
+
+    def __init__(self):
+        self.config = {**ConfigPlugin.config, 'parsedCachePath': None}
+        super().__init__()
+
+
+class ConfigPrefetchTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config_dir = Path(self._tmp.name, 'config')
+        self.defaults_dir = Path(self._tmp.name, 'defaults')
+        self.config_dir.mkdir()
+        self.defaults_dir.mkdir()
+
+        (self.defaults_dir / 'configured.yaml').write_text('volume: 70\n', encoding='utf-8')
+        (self.config_dir / 'configured.yaml').write_text('greeting: здравствуйте\n', encoding='utf-8')
+        (self.config_dir / 'config.yaml').write_text('prefetchThreads: 2\n', encoding='utf-8')
+
+        self.config_plugin = _ConfigPlugin()
+        self.config_plugin._config_dir = self.config_dir
+        self.config_plugin._defaults_dirs = [self.defaults_dir]
+        self.plugin = _ConfiguredPlugin()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_prefetched_files_are_applied(self):
+        self.config_plugin.bootstrap(PluginManagerImpl([self.config_plugin, self.plugin]))
+
+        self.assertEqual(self.config_plugin.config['prefetchThreads'], 2)
+        self.assertEqual(self.plugin.config, {'greeting': 'здравствуйте', 'volume': 70})
+        self.assertEqual(self.config_plugin._prefetched, {})
+
+    def test_changed_file_is_read_again(self):
+        self.config_plugin.config['prefetchThreads'] = 2
+        self.config_plugin._start_prefetch()
+
+        path = self.config_dir / 'configured.yaml'
+        self.config_plugin._prefetched[path].result()
+
+        path.write_text('greeting: добрый день\n', encoding='utf-8')
+        future_time = time.time() + 10
+        os.utime(path, (future_time, future_time))
+
+        self.assertEqual(self.config_plugin._read_file(path, 'utf-8'), {'greeting': 'добрый день'})
+
+    def test_parsed_files_are_cached(self):
+        cache_path = str(Path(self._tmp.name, 'cache', 'config.marshal'))
+
+        # При первом запуске неполный файл конфигурации перезаписывается, так что из кеша он читается только в третий раз
+        for _ in range(3):
+            config_plugin, plugin = _ConfigPlugin(), _ConfiguredPlugin()
+            config_plugin.config['parsedCachePath'] = cache_path
+            config_plugin._config_dir = self.config_dir
+            config_plugin._defaults_dirs = [self.defaults_dir]
+
+            with mock.patch.object(config_module, '_read_config_file', wraps=config_module._read_config_file) as read:
+                config_plugin.bootstrap(PluginManagerImpl([config_plugin, plugin]))
+                config_plugin.terminate()
+
+            self.assertEqual(plugin.config, {'greeting': 'здравствуйте', 'volume': 70})
+
+        # Повторно читается только собственный файл конфигурации загрузчика
+        self.assertEqual([c.args[0].name for c in read.call_args_list], ['config.yaml'])
+
+
+class ConfigWatchTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.config_dir = Path(self._tmp.name)
+        self.config_path = self.config_dir / 'configured.yaml'
+
+        self.config_plugin = _ConfigPlugin()
+        self.config_plugin._config_dir = self.config_dir
+        self.plugin = _ConfiguredPlugin()
+        self.config_plugin.bootstrap(PluginManagerImpl([self.config_plugin, self.plugin]))
+        self.scope = self.config_plugin._scopes['configured']
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_changes_are_tracked(self):
+        self.assertIsInstance(self.plugin.config, ObservableDict)
+        self.assertTrue(self.scope.is_tracked())
+        self.assertFalse(self.scope.was_modified_in_memory())
+
+        self.plugin.config['volume'] = 10
+
+        self.assertTrue(self.scope.was_modified_in_memory())
+        self.assertIn('configured', self.config_plugin._modified_scopes)
+
+    def test_complete_file_is_not_modified(self):
+        self.config_plugin._scopes.clear()
+        self.config_plugin.plugin_discovered(None, _ConfiguredPlugin())
+
+        self.assertFalse(self.config_plugin._scopes['configured'].was_modified_in_memory())
+
+    def test_stored_file_is_plain_yaml(self):
+        self.plugin.config['volume'] = {'left': 10, 'right': [20]}
+        self.config_plugin._scan_changes((), ('configured',))
+
+        self.assertFalse(self.scope.was_modified_in_memory())
+        self.assertNotIn('!!python', self.config_path.read_text(encoding='utf-8'))
+
+    def run_watch(self, action) -> float:
+        async def main():
+            task = asyncio.create_task(self.config_plugin.run())
+
+            try:
+                await asyncio.sleep(0.2)
+                started = time.perf_counter()
+                expected = action()
+
+                while not expected():
+                    await asyncio.sleep(0.01)
+
+                return time.perf_counter() - started
+            finally:
+                task.cancel()
+
+        return asyncio.run(asyncio.wait_for(main(), 5))
+
+    def test_memory_changes_are_stored_immediately(self):
+        def action():
+            self.plugin.config['greeting'] = 'добрый вечер'
+            return lambda: 'добрый вечер' in self.config_path.read_text(encoding='utf-8')
+
+        self.assertLess(self.run_watch(action), 1)
+
+    def test_file_changes_are_loaded_immediately(self):
+        if not self.config_plugin.config['useInotify'] or create_file_watcher() is None:
+            self.skipTest("inotify недоступен")
+
+        def action():
+            self.config_path.write_text('greeting: доброе утро\nvolume: 50\n', encoding='utf-8')
+            return lambda: self.plugin.config['greeting'] == 'доброе утро'
+
+        self.assertLess(self.run_watch(action), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import unittest
+
+from irene.plugin_loader import executors
+from irene.plugin_loader.executors import MonitoredThreadPoolExecutor, configure_executor, get_executor, \
+    run_in_executor, get_executors_stats, shutdown_executors
+
+
+class MonitoredThreadPoolExecutorTest(unittest.TestCase):
+    def setUp(self):
+        self.executor = MonitoredThreadPoolExecutor('test', 1)
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_stats(self):
+        started, release = threading.Event(), threading.Event()
+
+        def block():
+            started.set()
+            return release.wait()
+
+        blocking = self.executor.submit(block)
+        started.wait()
+        queued = [self.executor.submit(lambda x: x * 2, i) for i in range(3)]
+        cancelled = self.executor.submit(lambda: None)
+        cancelled.cancel()
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats.name, 'test')
+        self.assertEqual(stats.max_workers, 1)
+        self.assertEqual(stats.submitted, 5)
+        self.assertEqual(stats.queued, 3)
+        self.assertEqual(stats.active, 1)
+
+        release.set()
+
+        self.assertTrue(blocking.result())
+        self.assertEqual([f.result() for f in queued], [0, 2, 4])
+
+        stats = self.executor.get_stats()
+        self.assertEqual(stats.completed, 4)
+        self.assertEqual(stats.queued, 0)
+        self.assertEqual(stats.active, 0)
+        self.assertGreater(stats.wait_time_max, 0)
+        self.assertGreater(stats.utilization, 0)
+        self.assertLessEqual(stats.utilization, 1)
+
+    def test_exception(self):
+        def fail():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            self.executor.submit(fail).result()
+
+        self.assertEqual(self.executor.get_stats().completed, 1)
+
+
+class ExecutorsRegistryTest(unittest.TestCase):
+    def tearDown(self):
+        shutdown_executors()
+        executors._max_workers.clear()
+
+    def test_configured_size(self):
+        configure_executor('test_sized', 3)
+
+        self.assertEqual(get_executor('test_sized').get_stats().max_workers, 3)
+        self.assertIs(get_executor('test_sized'), get_executor('test_sized'))
+        self.assertIn('test_sized', [stats.name for stats in get_executors_stats()])
+
+    def test_isolation(self):
+        configure_executor('test_slow', 1)
+        release = threading.Event()
+
+        async def main():
+            slow = run_in_executor('test_slow', release.wait)
+
+            try:
+                # Пул другой подсистемы не занят медленной задачей
+                self.assertEqual(await asyncio.wait_for(run_in_executor('test_fast', lambda: 42), 1), 42)
+                self.assertEqual(get_executor('test_slow').get_stats().active, 1)
+            finally:
+                release.set()
+
+            await slow
+
+        asyncio.run(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
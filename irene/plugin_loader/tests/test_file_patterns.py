@@ -1,8 +1,16 @@
+import os
 import sys
+import tempfile
+import time
 import unittest
+from glob import glob
+from os.path import join
 from pathlib import Path
+from unittest import mock
 
-from irene.plugin_loader.file_patterns import substitute_pattern
+from irene.plugin_loader import file_patterns
+from irene.plugin_loader.file_patterns import substitute_pattern, glob_with_snapshot, is_snapshot_valid, match_files, \
+    invalidate_matches
 
 
 class FilePatternSubstitutionTest(unittest.TestCase):
@@ -44,6 +52,123 @@ class FilePatternSubstitutionTest(unittest.TestCase):
         self.assertIn('\'{foo}/bar\'', str(e.exception))
         self.assertIn('\'foo\'', str(e.exception))
 
+    def test_varying_variables_order(self):
+        res = list(substitute_pattern('/{v2}/{v1}/{v2}', override_vars=dict(v1=['a', 'b'], v2=['c', 'd'])))
+
+        self.assertEqual(res, ['/c/a/c', '/d/a/d', '/c/b/c', '/d/b/d'])
+
+    def test_format_features(self):
+        self.assertEqual(list(substitute_pattern('{{v}}/{v!r}', override_vars=dict(v='x'))), ["{v}/'x'"])
+        self.assertEqual(list(substitute_pattern('{{v}}/{v}', override_vars=dict(v='x'))), ['{v}/x'])
+
+
+class GlobWithSnapshotTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+        for path in ('a/plugin_a.py', 'a/b/plugin_b.py', 'c/plugin_c.txt', '.hidden/plugin_h.py', 'plugin_top.py'):
+            self.touch(path)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def touch(self, path: str):
+        os.makedirs(os.path.dirname(join(self.root, path)), exist_ok=True)
+        Path(self.root, path).touch()
+
+    def test_same_as_glob(self):
+        self.assert_same_as_glob(
+            '*/plugin_*.py', '**/plugin_*.py', '*', '**', 'a/b/plugin_b.py', 'a/none.py', 'none/*/x',
+        )
+
+    def test_missing_or_file_base_same_as_glob(self):
+        self.assert_same_as_glob('none/**', 'plugin_top.py/**', 'plugin_top.py/*', 'none/**/', 'plugin_top.py/**/')
+
+    def test_trailing_separator_same_as_glob(self):
+        self.assert_same_as_glob('*/', '**/', 'a/', 'plugin_top.py/', 'a/*/')
+
+    def assert_same_as_glob(self, *patterns: str):
+        for pattern in patterns:
+            files, _ = glob_with_snapshot(join(self.root, pattern))
+
+            self.assertEqual(
+                sorted(files),
+                sorted(os.path.abspath(it) for it in glob(join(self.root, pattern), recursive=True)),
+                pattern
+            )
+
+    def test_snapshot_invalidated_by_new_file(self):
+        _, snapshot = glob_with_snapshot(join(self.root, '*/plugin_*.py'))
+        self.assertTrue(is_snapshot_valid(snapshot))
+
+        self.touch('c/plugin_d.py')
+        self.assertFalse(is_snapshot_valid(snapshot))
+
+    def test_snapshot_invalidated_by_new_directory(self):
+        _, snapshot = glob_with_snapshot(join(self.root, 'new/*/plugin_*.py'))
+        self.assertTrue(is_snapshot_valid(snapshot))
+
+        os.makedirs(join(self.root, 'new'))
+        self.assertFalse(is_snapshot_valid(snapshot))
+
+
+class MatchFilesCacheTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.pattern = join(self.root, 'sounds', '*.wav')
+
+        self.touch('sounds/a.wav')
+        self.touch('sounds/b.txt')
+        self.make_old()
+        invalidate_matches()
+
+    def tearDown(self):
+        invalidate_matches()
+        self._tmp.cleanup()
+
+    def touch(self, path: str):
+        os.makedirs(os.path.dirname(join(self.root, path)), exist_ok=True)
+        Path(self.root, path).touch()
+
+    def make_old(self):
+        # Результаты поиска в только что изменённых папках не кешируются
+        old_time = time.time() - 60
+
+        for path in (self.root, join(self.root, 'sounds')):
+            os.utime(path, (old_time, old_time))
+
+    def test_results_are_cached(self):
+        self.assertEqual(match_files(self.pattern), {join(self.root, 'sounds', 'a.wav')})
+        self.assertIn(self.pattern, file_patterns._match_cache)
+
+        with mock.patch.object(file_patterns, 'glob_with_snapshot') as glob_mock:
+            self.assertEqual(match_files(self.pattern), {join(self.root, 'sounds', 'a.wav')})
+
+        glob_mock.assert_not_called()
+
+    def test_new_file_is_found(self):
+        match_files(self.pattern)
+        self.touch('sounds/c.wav')
+
+        self.assertEqual(
+            match_files(self.pattern),
+            {join(self.root, 'sounds', 'a.wav'), join(self.root, 'sounds', 'c.wav')},
+        )
+
+    def test_recently_changed_directory_is_not_cached(self):
+        self.touch('sounds/c.wav')
+        match_files(self.pattern)
+
+        self.assertNotIn(self.pattern, file_patterns._match_cache)
+
+    def test_invalidate(self):
+        match_files(self.pattern)
+        invalidate_matches(join(self.root, 'sounds', 'd.wav'))
+
+        self.assertNotIn(self.pattern, file_patterns._match_cache)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,135 @@
+import asyncio
+import unittest
+from types import ModuleType
+
+from irene.plugin_loader.errors import PluginLoadingException
+from irene.plugin_loader.lazy_plugin import LazyModulePlugin
+from irene.plugin_loader.magic_plugin import MagicModulePlugin, after
+from irene.plugin_loader.plugin_index import PluginManifest
+from irene.plugin_loader.run_operation import call_all, call_all_parallel_async
+
+
+def _make_module() -> ModuleType:
+    module = ModuleType('plugin_lazy_sample')
+
+    @after('config')
+    def init(*_args, **_kwargs):
+        return module.config['greeting']
+
+    async def run(*_args, **_kwargs):
+        return 'ran'
+
+    module.__dict__.update(
+        name='lazy sample',
+        version='0.1.0',
+        __doc__='Плагин для проверки отложенной загрузки',
+        config={'greeting': 'привет'},
+        config_comment='Настройки приветствия',
+        init=init,
+        run=run,
+        define_commands={'привет': 'привет'},
+    )
+
+    return module
+
+
+class LazyModulePluginTest(unittest.TestCase):
+    def setUp(self):
+        self.manifest = PluginManifest.of(MagicModulePlugin(_make_module()))
+        self.loads = 0
+        self.module = _make_module()
+        self.plugin = LazyModulePlugin(self.manifest, self._load)
+
+    def _load(self):
+        self.loads += 1
+        return MagicModulePlugin(self.module)
+
+    def test_metadata_without_loading(self):
+        self.assertEqual(self.plugin.name, 'lazy sample')
+        self.assertEqual(self.plugin.version, '0.1.0')
+        self.assertEqual(self.plugin.__doc__, 'Плагин для проверки отложенной загрузки')
+        self.assertEqual(self.plugin.config_comment, 'Настройки приветствия')
+        self.assertEqual(set(self.plugin.get_declared_operations() or ()), set(self.manifest.operations or ()))
+
+        init, = self.plugin.get_operation_steps('init')
+        self.assertEqual(init.name, 'lazy sample.init')
+        self.assertEqual(init.dependencies, ('config',))
+        self.assertIs(init.plugin, self.plugin)
+
+        self.assertEqual(self.loads, 0)
+        self.assertFalse(self.plugin.is_loaded())
+
+    def test_missing_config_comment(self):
+        plugin = LazyModulePlugin(self.manifest._replace(config_comment=None), self._load)
+
+        self.assertEqual(getattr(plugin, 'config_comment', 'по-умолчанию'), 'по-умолчанию')
+        self.assertEqual(self.loads, 0)
+
+    def test_config_is_shared_with_loaded_module(self):
+        config, = self.plugin.get_operation_steps('config')
+        config.step['greeting'] = 'здравствуйте'
+
+        self.assertEqual(self.loads, 0)
+
+        call_all(self.plugin.get_operation_steps('init'))
+
+        self.assertEqual(self.loads, 1)
+        self.assertIs(self.module.config, config.step)
+
+    def test_replaced_config_without_loading(self):
+        config = {'greeting': 'здравствуйте'}
+        self.plugin.config = config
+
+        self.assertIs(self.plugin.config, config)
+        self.assertIs(next(iter(self.plugin.get_operation_steps('config'))).step, config)
+        self.assertEqual(self.loads, 0)
+
+        self.plugin.load()
+
+        self.assertIs(self.module.config, config)
+
+    def test_loads_once_on_step_call(self):
+        init, = self.plugin.get_operation_steps('init')
+
+        self.assertEqual(init.step(), 'привет')
+        self.assertEqual(init.step(), 'привет')
+        self.assertEqual(self.loads, 1)
+        self.assertTrue(self.plugin.is_loaded())
+
+    def test_coroutine_step(self):
+        run, = self.plugin.get_operation_steps('run')
+
+        self.assertTrue(asyncio.iscoroutinefunction(run.step))
+        self.assertEqual(self.loads, 0)
+
+        async def run_all():
+            await asyncio.gather(*await call_all_parallel_async([run]))
+
+        asyncio.run(run_all())
+
+        self.assertEqual(self.loads, 1)
+
+    def test_value_step_forces_loading(self):
+        commands, = self.plugin.get_operation_steps('define_commands')
+
+        self.assertEqual(commands.step, {'привет': 'привет'})
+        self.assertIs(commands.plugin, self.plugin)
+        self.assertEqual(self.loads, 1)
+
+    def test_loading_error(self):
+        def fail():
+            raise ImportError('torch')
+
+        plugin = LazyModulePlugin(self.manifest, fail)
+        init, = plugin.get_operation_steps('init')
+
+        with self.assertRaises(PluginLoadingException):
+            init.step()
+
+    def test_not_lazy_loadable(self):
+        with self.assertRaises(ValueError):
+            LazyModulePlugin(self.manifest._replace(lazy_loadable=False), self._load)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+from os.path import join
+from pathlib import Path
+
+from irene.plugin_loader.abc import Plugin
+from irene.plugin_loader.core_plugins import PluginDiscoveryPlugin
+from irene.plugin_loader.magic_plugin import MagicPlugin
+from irene.plugin_loader.plugin_manager import PluginManagerImpl
+
+_PLUGIN_TEMPLATE = '''
+name = 'plugin_{index}'
+version = '0.0.1'
+
+
+def init(*_args, **_kwargs):
+    ...
+'''
+
+_MAIN_THREAD_ONLY_PLUGIN = '''
+import threading
+
+assert threading.current_thread() is threading.main_thread()
+
+name = 'main_thread_only'
+version = '0.0.1'
+'''
+
+
+class _DiscoveryObserver(MagicPlugin):
+    name = 'observer'
+    version = '0.0.1'
+
+    def __init__(self):
+        super().__init__()
+        self.discovered: list[str] = []
+
+    def plugin_discovered(self, _pm, plugin: Plugin, *_args, **_kwargs):
+        self.discovered.append(plugin.name)
+
+
+class PluginDiscoveryTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+
+        for i in range(12):
+            self.write(f'plugins/group{i % 3}/plugin_{i}.py', _PLUGIN_TEMPLATE.format(index=i))
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def write(self, path: str, content: str):
+        full_path = join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        Path(full_path).write_text(content)
+
+    def discover(self, import_threads: int) -> list[str]:
+        discovery = PluginDiscoveryPlugin()
+        discovery.config = {
+            'pluginPaths': [join(self.root, 'plugins', '*', 'plugin_*.py')],
+            'appendPythonPath': [],
+            'excludePlugins': [],
+            'pluginIndexPath': None,
+            'lazyPluginLoading': False,
+            'importThreads': import_threads,
+        }
+        discovery.receive_config(discovery.config)
+        observer = _DiscoveryObserver()
+
+        discovery.bootstrap(PluginManagerImpl([discovery, observer]))
+
+        return observer.discovered
+
+    def test_parallel_import_keeps_order(self):
+        sequential = self.discover(0)
+
+        self.assertEqual(len(sequential), 12)
+        self.assertEqual(self.discover(4), sequential)
+
+    def test_failed_parallel_import_is_retried(self):
+        self.write('plugins/group0/plugin_main_thread.py', _MAIN_THREAD_ONLY_PLUGIN)
+
+        self.assertIn('main_thread_only', self.discover(4))
+
+
+if __name__ == '__main__':
+    unittest.main()
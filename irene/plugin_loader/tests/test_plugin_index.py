@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import unittest
+from os.path import join
+from pathlib import Path
+from types import ModuleType
+
+from irene.plugin_loader.magic_plugin import MagicPlugin, after, MagicModulePlugin
+from irene.plugin_loader.plugin_index import PluginIndex, PluginManifest, StepManifest, STEP_FUNCTION
+
+
+class _IndexedPlugin(MagicPlugin):
+    name = 'indexed'
+    version = '1.2.3'
+
+    @after('config')
+    def init(self, *_args, **_kwargs):
+        ...
+
+
+class PluginIndexTest(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = self._tmp.name
+        self.index_path = join(self.root, 'cache', 'index.json')
+        self.pattern = join(self.root, 'plugins', '*', 'plugin_*.py')
+        self.plugin_path = self.touch('plugins/a/plugin_a.py')
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def touch(self, path: str, content: str = '') -> str:
+        full_path = join(self.root, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        Path(full_path).write_text(content)
+        return full_path
+
+    def test_match_files(self):
+        index = PluginIndex(self.index_path)
+        self.assertEqual(index.match_files([self.pattern]), {self.plugin_path})
+        index.save()
+
+        new_path = self.touch('plugins/b/plugin_b.py')
+
+        self.assertEqual(PluginIndex(self.index_path).match_files([self.pattern]), {self.plugin_path, new_path})
+
+    def test_plugins_manifest(self):
+        plugin = _IndexedPlugin()
+        index = PluginIndex(self.index_path)
+        index.match_files([self.pattern])
+        index.set_plugins(self.plugin_path, [plugin])
+        index.save()
+
+        manifests = PluginIndex(self.index_path).get_plugins(self.plugin_path)
+
+        self.assertEqual(manifests, [PluginManifest.of(plugin)])
+        assert manifests is not None
+        self.assertEqual(manifests[0].name, 'indexed')
+        self.assertEqual(manifests[0].version, '1.2.3')
+        assert manifests[0].operations is not None
+        self.assertEqual(manifests[0].operations['init'], (StepManifest('indexed.init', ('config',), (), STEP_FUNCTION),))
+        self.assertFalse(manifests[0].lazy_loadable)
+
+    def test_module_plugin_manifest(self):
+        module = ModuleType('plugin_module')
+        module.name = 'module'
+        module.version = '0.1.0'
+        module.config = {'answer': 42, 'names': ['a', 'b']}
+        module.config_comment = 'Настройки'
+        plugin = MagicModulePlugin(module)
+
+        manifest = PluginManifest.of(plugin)
+        module.config['answer'] = 0
+
+        self.assertTrue(manifest.lazy_loadable)
+        self.assertEqual(manifest.config, {'answer': 42, 'names': ['a', 'b']})
+        self.assertEqual(manifest.config_comment, 'Настройки')
+        self.assertEqual(PluginManifest.from_json(json.loads(json.dumps(manifest.to_json()))), manifest)
+
+    def test_unstorable_config(self):
+        module = ModuleType('plugin_module')
+        module.name = 'module'
+        module.version = '0.1.0'
+        module.config = {'limits': (1, 2)}
+
+        self.assertIsNone(PluginManifest.of(MagicModulePlugin(module)).config)
+
+    def test_changed_file_is_stale(self):
+        index = PluginIndex(self.index_path)
+        index.set_plugins(self.plugin_path, [_IndexedPlugin()])
+        index.save()
+
+        self.touch('plugins/a/plugin_a.py', 'name = "changed"')
+
+        self.assertIsNone(PluginIndex(self.index_path).get_plugins(self.plugin_path))
+
+    def test_rebuild(self):
+        index = PluginIndex(self.index_path)
+        index.set_plugins(self.plugin_path, [_IndexedPlugin()])
+        index.save()
+
+        self.assertIsNone(PluginIndex(self.index_path, rebuild=True).get_plugins(self.plugin_path))
+
+    def test_corrupted_index(self):
+        self.touch('cache/index.json', '{not json')
+
+        index = PluginIndex(self.index_path)
+
+        self.assertEqual(index.match_files([self.pattern]), {self.plugin_path})
+        self.assertIsNone(index.get_plugins(self.plugin_path))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -92,6 +92,50 @@ class PluginManagerTest(unittest.TestCase):
             ]
         )
 
+    def test_cache_sequence(self):
+        plugins = [_TestPlugin1(), _TestPlugin2()]
+        pm = PluginManagerImpl(plugins)
+
+        first = pm.get_operation_sequence('init')
+
+        self.assertIs(pm.get_operation_sequence('init'), first)
+        self.assertEqual(pm.cache_info(), (1, 1, 1, 0))
+
+    def test_invalidate_cache(self):
+        plugins = [_TestPlugin1()]
+        pm = PluginManagerImpl(plugins)
+
+        self.assertEqual(len(pm.get_operation_sequence('init')), 1)
+
+        plugins.append(_TestPlugin2())
+        self.assertEqual(len(pm.get_operation_sequence('init')), 1)
+
+        pm.invalidate_operation_cache()
+        self.assertEqual(
+            [step.name for step in pm.get_operation_sequence('init')],
+            ['_TestPlugin1.init', '_TestPlugin2.init']
+        )
+        self.assertEqual(pm.cache_info().invalidations, 1)
+
+    def test_loop_is_not_cached(self):
+        pm = PluginManagerImpl([_ChickenPlugin(), _EggPlugin()])
+
+        for _ in range(2):
+            with self.assertRaises(DependencyCycleException):
+                pm.get_operation_sequence('create')
+
+        self.assertEqual(pm.cache_info().currsize, 0)
+
+    def test_cache_wrapper_chain(self):
+        plugins = [_TestPlugin1()]
+        pm = PluginManagerImpl(plugins)
+        chain = pm.get_wrapper_chain('init')
+
+        self.assertIs(pm.get_wrapper_chain('init'), chain)
+
+        pm.invalidate_operation_cache()
+        self.assertIsNot(pm.get_wrapper_chain('init'), chain)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from irene.plugin_loader.abc import OperationStep
+from irene.plugin_loader.run_operation import call_all_as_wrappers, compile_wrappers
+
+
+def _appender(suffix: str):
+    def step(nxt, prev, *args, **kwargs):
+        return nxt(prev + suffix, *args, **kwargs) + suffix.upper()
+
+    return step
+
+
+def _steps(*suffixes: str) -> list[OperationStep]:
+    return [OperationStep(_appender(suffix), suffix, None) for suffix in suffixes]  # type: ignore
+
+
+class WrappersTest(unittest.TestCase):
+    def test_call_all_as_wrappers(self):
+        self.assertEqual(call_all_as_wrappers(_steps('a', 'b', 'c'), ''), 'abcCBA')
+        self.assertEqual(call_all_as_wrappers([], 'initial'), 'initial')
+
+    def test_compiled_chain_is_reusable(self):
+        chain = compile_wrappers(_steps('a', 'b'))
+
+        self.assertEqual(chain('x'), 'xabBA')
+        self.assertEqual(chain('y'), 'yabBA')
+
+    def test_arguments_forwarded(self):
+        received = []
+
+        def step(nxt, prev, *args, **kwargs):
+            received.append((args, kwargs))
+            return nxt(prev, *args, **kwargs)
+
+        chain = compile_wrappers([OperationStep(step, 's1', None), OperationStep(step, 's2', None)])  # type: ignore
+
+        self.assertEqual(chain(42, 'arg', kw='kwarg'), 42)
+        self.assertEqual(received, [(('arg',), {'kw': 'kwarg'})] * 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import asyncio
+import json
+import tempfile
+import unittest
+from os.path import join, exists
+
+from irene.plugin_loader.magic_plugin import MagicPlugin
+from irene.plugin_loader.plugin_manager import PluginManagerImpl
+from irene.plugin_loader.run_operation import call_all
+from irene.plugin_loader.startup_profiler import StartupProfiler, profile_span, set_active_profiler
+
+
+class _ProfiledPlugin(MagicPlugin):
+    name = 'profiled'
+    version = '0.0.1'
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def bootstrap(self, *_args, **_kwargs):
+        self.calls += 1
+        return 'bootstrapped'
+
+    async def init(self, *_args, **_kwargs):
+        await asyncio.sleep(0)
+        return 'initialized'
+
+    async def fail(self, *_args, **_kwargs):
+        await asyncio.sleep(0)
+        raise ValueError('fail')
+
+
+class StartupProfilerTest(unittest.TestCase):
+    def setUp(self):
+        self.plugin = _ProfiledPlugin()
+        self.pm = PluginManagerImpl([self.plugin])
+        self.profiler = StartupProfiler()
+        self.pm.set_step_instrumentation(self.profiler.instrument)
+
+    def _events(self, phase: str) -> list[dict]:
+        return [it for it in self.profiler.to_chrome_trace()['traceEvents'] if it['ph'] == phase]
+
+    def test_sync_step(self):
+        step, = self.pm.get_operation_sequence('bootstrap')
+
+        self.assertEqual(step.step(), 'bootstrapped')
+        self.assertEqual(self.plugin.calls, 1)
+
+        event, = self._events('X')
+        self.assertEqual(event['name'], 'profiled.bootstrap')
+        self.assertEqual(event['cat'], 'bootstrap')
+        self.assertEqual(event['args']['plugin'], 'profiled@0.0.1')
+        self.assertIn('profiled.bootstrap', self.profiler.format_summary())
+
+    def test_async_step(self):
+        step, = self.pm.get_operation_sequence('init')
+
+        self.assertTrue(asyncio.iscoroutinefunction(step.step))
+        self.assertEqual(asyncio.run(step.step()), 'initialized')
+
+        begin, = self._events('b')
+        end, = self._events('e')
+        self.assertEqual(begin['name'], 'profiled.init')
+        self.assertEqual(begin['id'], end['id'])
+        self.assertLessEqual(begin['ts'], end['ts'])
+
+    def test_async_step_error(self):
+        step, = self.pm.get_operation_sequence('fail')
+
+        with self.assertRaises(ValueError):
+            asyncio.run(step.step())
+
+        self.assertEqual(len(self._events('b')), 1)
+
+    def test_stop(self):
+        self.profiler.stop()
+        call_all(self.pm.get_operation_sequence('bootstrap'))
+
+        self.assertEqual(self.plugin.calls, 1)
+        self.assertEqual(self._events('X'), [])
+
+    def test_instrumentation_reset(self):
+        self.pm.set_step_instrumentation(None)
+
+        step, = self.pm.get_operation_sequence('bootstrap')
+
+        self.assertEqual(step.step, self.plugin.bootstrap)
+
+    def test_profile_span(self):
+        with profile_span('inactive', 'import'):
+            ...
+
+        set_active_profiler(self.profiler)
+
+        try:
+            with profile_span('plugin_module', 'import', path='/plugin_module.py'):
+                ...
+        finally:
+            set_active_profiler(None)
+
+        event, = self._events('X')
+        self.assertEqual(event['name'], 'plugin_module')
+        self.assertEqual(event['args']['path'], '/plugin_module.py')
+
+    def test_write(self):
+        call_all(self.pm.get_operation_sequence('bootstrap'))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.profiler.write(join(tmp, 'startup.json'))
+
+            with open(join(tmp, 'startup.json'), encoding='utf-8') as f:
+                self.assertIn('traceEvents', json.load(f))
+
+            self.assertTrue(exists(join(tmp, 'startup.txt')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Отслеживание изменений файлов в папках с помощью inotify.
+
+inotify доступен только в Linux. На других платформах (или если inotify недоступен по другим причинам, например, из-за
+ограничения количества наблюдателей) ``create_file_watcher`` возвращает ``None``, и изменения файлов нужно отслеживать
+периодической проверкой.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import struct
+import sys
+from logging import getLogger
+from typing import Optional
+
+__all__ = ['InotifyWatcher', 'create_file_watcher']
+
+_logger = getLogger('file_watcher')
+
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM = 0x00000040
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE = 0x00000200
+_IN_Q_OVERFLOW = 0x00004000
+
+_IN_NONBLOCK = os.O_NONBLOCK
+_IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE
+
+_EVENT_HEADER = struct.Struct('iIII')
+
+_READ_BUFFER_SIZE = 64 * 1024
+
+
+class InotifyWatcher:
+    """
+    Наблюдатель за изменениями файлов в папках.
+
+    Сообщает о созданных, удалённых, переименованных и записанных файлах.
+    Дескриптор наблюдателя (``fileno``) становится доступным для чтения когда появляются новые события, так что его
+    можно передать в ``loop.add_reader``.
+    """
+
+    __slots__ = ('_libc', '_fd', '_dirs')
+
+    def __init__(self):
+        """
+        Raises:
+            OSError - если inotify недоступен
+        """
+        libc_name = ctypes.util.find_library('c')
+
+        if libc_name is None:
+            raise OSError("Библиотека libc не найдена")
+
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        self._fd = self._libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+        self._dirs: dict[int, str] = {}
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add_directory(self, path: str):
+        """
+        Начинает отслеживать изменения файлов в заданной папке (без вложенных папок).
+
+        Raises:
+            OSError - если не удалось начать отслеживание
+        """
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), _WATCH_MASK)
+
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+
+        self._dirs[wd] = path
+
+    def read_changes(self) -> Optional[set[str]]:
+        """
+        Читает накопившиеся события, не блокируя поток.
+
+        Returns:
+            пути изменившихся файлов или ``None`` если часть событий была потеряна из-за переполнения очереди и
+            изменившимися нужно считать все файлы
+        """
+        changed: set[str] = set()
+        overflow = False
+
+        while True:
+            try:
+                data = os.read(self._fd, _READ_BUFFER_SIZE)
+            except BlockingIOError:
+                break
+
+            if not data:
+                break
+
+            offset = 0
+
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+                offset += length
+
+                if mask & _IN_Q_OVERFLOW:
+                    overflow = True
+                elif (directory := self._dirs.get(wd)) is not None and name:
+                    changed.add(os.path.join(directory, name))
+
+        return None if overflow else changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_file_watcher() -> Optional[InotifyWatcher]:
+    """
+    Создаёт наблюдатель за изменениями файлов, если это возможно на текущей платформе.
+    """
+    if not sys.platform.startswith('linux'):
+        return None
+
+    try:
+        return InotifyWatcher()
+    except (OSError, AttributeError):
+        _logger.debug("inotify недоступен", exc_info=True)
+        return None
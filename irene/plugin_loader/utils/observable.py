@@ -0,0 +1,165 @@
+"""
+Словари и списки, сообщающие об изменениях своего содержимого.
+
+Используются для отслеживания изменений конфигурации плагинов без периодического вычисления хешей всей конфигурации.
+"""
+
+from typing import Any, Callable, Iterable, SupportsIndex
+
+__all__ = ['ObservableDict', 'ObservableList', 'make_observable']
+
+OnChange = Callable[[], None]
+
+
+def _noop():
+    pass
+
+
+def make_observable(value: Any, on_change: OnChange) -> Any:
+    """
+    Возвращает наблюдаемую копию словаря или списка (вместе со всеми вложенными словарями и списками) или само значение,
+    если оно не является словарём или списком.
+
+    Args:
+        value:
+            значение
+        on_change:
+            функция, вызываемая при любом изменении содержимого копии или вложенных в неё словарей и списков
+    """
+    if isinstance(value, dict):
+        return ObservableDict(value, on_change)
+
+    if isinstance(value, list):
+        return ObservableList(value, on_change)
+
+    return value
+
+
+class ObservableDict(dict):
+    """
+    Словарь, вызывающий заданную функцию при изменении своего содержимого или содержимого вложенных словарей и списков.
+
+    Значения-словари и списки, добавляемые в такой словарь, заменяются наблюдаемыми копиями.
+    При копировании (``copy.deepcopy``, ``pickle``) получается обычный словарь.
+    """
+
+    __slots__ = ('_on_change',)
+
+    def __init__(self, items: Any = (), on_change: OnChange = _noop):
+        self._on_change = on_change
+        super().__init__()
+        dict.update(self, ((k, make_observable(v, on_change)) for k, v in dict(items).items()))
+
+    def __reduce_ex__(self, protocol: SupportsIndex):
+        return dict, (dict(self),)
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, make_observable(value, self._on_change))
+        self._on_change()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._on_change()
+
+    def __ior__(self, other):  # type: ignore[misc]
+        self.update(other)
+        return self
+
+    def update(self, *args, **kwargs):
+        super().update((k, make_observable(v, self._on_change)) for k, v in dict(*args, **kwargs).items())
+        self._on_change()
+
+    def setdefault(self, key, default=None):
+        if key in self:
+            return self[key]
+
+        self[key] = default
+        return self[key]
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._on_change()
+        return result
+
+    def popitem(self):
+        result = super().popitem()
+        self._on_change()
+        return result
+
+    def clear(self):
+        super().clear()
+        self._on_change()
+
+
+class ObservableList(list):
+    """
+    Список, вызывающий заданную функцию при изменении своего содержимого или содержимого вложенных словарей и списков.
+
+    См. ``ObservableDict``.
+    """
+
+    __slots__ = ('_on_change',)
+
+    def __init__(self, items: Iterable[Any] = (), on_change: OnChange = _noop):
+        self._on_change = on_change
+        super().__init__(make_observable(it, on_change) for it in items)
+
+    def __reduce_ex__(self, protocol: SupportsIndex):
+        return list, (list(self),)
+
+    def _wrap_all(self, items: Iterable[Any]) -> list[Any]:
+        return [make_observable(it, self._on_change) for it in items]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            super().__setitem__(index, self._wrap_all(value))
+        else:
+            super().__setitem__(index, make_observable(value, self._on_change))
+
+        self._on_change()
+
+    def __delitem__(self, index):
+        super().__delitem__(index)
+        self._on_change()
+
+    def __iadd__(self, other):  # type: ignore[misc]
+        self.extend(other)
+        return self
+
+    def __imul__(self, n):  # type: ignore[misc]
+        super().__imul__(n)
+        self._on_change()
+        return self
+
+    def append(self, value):
+        super().append(make_observable(value, self._on_change))
+        self._on_change()
+
+    def extend(self, values):
+        super().extend(self._wrap_all(values))
+        self._on_change()
+
+    def insert(self, index, value):
+        super().insert(index, make_observable(value, self._on_change))
+        self._on_change()
+
+    def pop(self, *args):
+        result = super().pop(*args)
+        self._on_change()
+        return result
+
+    def remove(self, value):
+        super().remove(value)
+        self._on_change()
+
+    def clear(self):
+        super().clear()
+        self._on_change()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._on_change()
+
+    def reverse(self):
+        super().reverse()
+        self._on_change()
@@ -0,0 +1,44 @@
+import os
+import select
+import tempfile
+import unittest
+
+from irene.plugin_loader.utils.file_watcher import create_file_watcher
+
+
+class FileWatcherTest(unittest.TestCase):
+    def setUp(self):
+        self.watcher = create_file_watcher()
+
+        if self.watcher is None:
+            self.skipTest("inotify недоступен")
+
+        self._tmp = tempfile.TemporaryDirectory()
+        self.watcher.add_directory(self._tmp.name)
+
+    def tearDown(self):
+        self.watcher.close()
+        self._tmp.cleanup()
+
+    def test_no_changes(self):
+        self.assertEqual(self.watcher.read_changes(), set())
+
+    def test_written_and_renamed_files(self):
+        path = os.path.join(self._tmp.name, 'a.yaml')
+
+        with open(path, 'w') as f:
+            f.write('a: 1\n')
+
+        os.rename(path, os.path.join(self._tmp.name, 'b.yaml'))
+
+        readable, _, _ = select.select([self.watcher], [], [], 1)
+
+        self.assertEqual(readable, [self.watcher])
+        self.assertEqual(
+            self.watcher.read_changes(),
+            {path, os.path.join(self._tmp.name, 'b.yaml')},
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import copy
+import pickle
+import unittest
+
+from irene.plugin_loader.utils.observable import ObservableDict, ObservableList
+
+
+class ObservableTest(unittest.TestCase):
+    def setUp(self):
+        self.changes = 0
+        self.value = ObservableDict({'a': 1, 'nested': {'items': [1, {'b': 2}]}}, self.on_change)
+
+    def on_change(self):
+        self.changes += 1
+
+    def test_nested_values_are_observable(self):
+        self.assertIsInstance(self.value['nested'], ObservableDict)
+        self.assertIsInstance(self.value['nested']['items'], ObservableList)
+        self.assertIsInstance(self.value['nested']['items'][1], ObservableDict)
+        self.assertEqual(self.changes, 0)
+
+    def test_dict_mutations(self):
+        self.value['a'] = 2
+        del self.value['a']
+        self.value.update(c=3)
+        self.value |= {'d': 4}
+        self.value.setdefault('e', 5)
+        self.value.setdefault('e', 6)
+        self.value.pop('c')
+        self.value.popitem()
+
+        self.assertEqual(self.changes, 7)
+
+    def test_list_mutations(self):
+        items = self.value['nested']['items']
+
+        items.append(2)
+        items[0] = 0
+        items[0:1] = [5, 6]
+        items += [7]
+        items.sort(key=str)
+        items.remove(7)
+        del items[0]
+
+        self.assertEqual(self.changes, 7)
+
+    def test_nested_mutations(self):
+        self.value['nested']['items'][1]['b'] = 3
+        self.value['new'] = {'x': []}
+        self.value['new']['x'].append(1)
+
+        self.assertEqual(self.changes, 3)
+
+    def test_copies_are_plain(self):
+        for cp in (copy.deepcopy(self.value), pickle.loads(pickle.dumps(self.value))):
+            self.assertEqual(type(cp), dict)
+            self.assertEqual(cp, self.value)
+
+
+if __name__ == '__main__':
+    unittest.main()
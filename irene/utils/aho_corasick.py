@@ -0,0 +1,127 @@
+from collections import deque
+from typing import Generic, Hashable, Iterable, Iterator, Optional, Sequence, TypeVar
+
+T = TypeVar('T')
+
+
+class AhoCorasickAutomaton(Generic[T]):
+    """
+    Автомат Ахо-Корасик для поиска вхождений нескольких образцов в последовательность за один проход.
+
+    Символами образцов и последовательностей могут быть любые хешируемые значения, например, слова - в этом случае
+    автомат ищет вхождения фраз в последовательность слов.
+    Время поиска линейно зависит от длины последовательности и количества найденных вхождений и не зависит от количества
+    образцов.
+    """
+
+    __slots__ = ('_goto', '_fail', '_outputs', '_max_length')
+
+    def __init__(self, patterns: Iterable[tuple[Sequence[Hashable], T]]):
+        """
+        Args:
+            patterns:
+                пары из образца (последовательности символов) и значения, возвращаемого при обнаружении образца.
+                Пустые образцы игнорируются.
+        """
+        self._goto: list[dict[Hashable, int]] = [{}]
+
+        # Для каждого состояния - вхождения, заканчивающиеся в нём, в виде (длина образца, порядковый номер, значение)
+        self._outputs: list[list[tuple[int, int, T]]] = [[]]
+        self._max_length = 0
+
+        for index, (pattern, value) in enumerate(patterns):
+            if len(pattern) == 0:
+                continue
+
+            state = 0
+
+            for symbol in pattern:
+                if (next_state := self._goto[state].get(symbol)) is None:
+                    next_state = self._goto[state][symbol] = len(self._goto)
+                    self._goto.append({})
+                    self._outputs.append([])
+
+                state = next_state
+
+            self._outputs[state].append((len(pattern), index, value))
+            self._max_length = max(self._max_length, len(pattern))
+
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+
+        while queue:
+            state = queue.popleft()
+
+            for symbol, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+
+                while fallback and symbol not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+
+                target = self._goto[fallback].get(symbol, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._outputs[next_state] = self._outputs[next_state] + self._outputs[self._fail[next_state]]
+                queue.append(next_state)
+
+    def iter_matches(self, symbols: Iterable[Hashable]) -> Iterator[tuple[int, int, T]]:
+        """
+        Перебирает вхождения образцов в последовательность в порядке возрастания позиции окончания вхождения.
+
+        Args:
+            symbols:
+                последовательность символов
+        Returns:
+            итератор по вхождениям в виде (начало вхождения, конец вхождения (не включительно), значение образца)
+        """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+
+        for position, symbol in enumerate(symbols, 1):
+            while state and symbol not in goto[state]:
+                state = fail[state]
+
+            state = goto[state].get(symbol, 0)
+
+            for length, _, value in outputs[state]:
+                yield position - length, position, value
+
+    def find_earliest(self, symbols: Sequence[Hashable]) -> Optional[tuple[int, int, T]]:
+        """
+        Находит вхождение с самым ранним началом.
+
+        Из нескольких вхождений, начинающихся в одной позиции, выбирается вхождение образца, переданного в конструктор
+        первым.
+        Поиск прекращается как только становится понятно, что более раннего вхождения нет.
+
+        Args:
+            symbols:
+                последовательность символов
+        Returns:
+            вхождение в виде (начало вхождения, конец вхождения (не включительно), значение образца) или ``None`` если
+            вхождений нет
+        """
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        best: Optional[tuple[int, int, int, T]] = None
+
+        for position, symbol in enumerate(symbols, 1):
+            # Вхождения, заканчивающиеся здесь и далее, начинаются не раньше чем position - max_length
+            if best is not None and position - self._max_length > best[0]:
+                break
+
+            while state and symbol not in goto[state]:
+                state = fail[state]
+
+            state = goto[state].get(symbol, 0)
+
+            for length, index, value in outputs[state]:
+                start = position - length
+
+                if best is None or (start, index) < (best[0], best[2]):
+                    best = (start, position, index, value)
+
+        if best is None:
+            return None
+
+        start, end, _, value = best
+        return start, end, value
@@ -0,0 +1,130 @@
+"""
+Ограниченный по размеру кеш двоичных данных в оперативной памяти.
+"""
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, NamedTuple, Hashable
+
+__all__ = ['BytesLRUCache', 'BytesCacheStats']
+
+
+class BytesCacheStats(NamedTuple):
+    """
+    Статистика кеша.
+    """
+
+    entries: int
+    """Количество хранимых записей"""
+
+    size: int
+    """Суммарный размер хранимых данных в байтах"""
+
+    max_size: int
+    """Максимальный суммарный размер данных в байтах"""
+
+    hits: int
+    """Количество успешных обращений к кешу"""
+
+    misses: int
+    """Количество обращений к кешу, при которых данные не были найдены"""
+
+    evictions: int
+    """Количество записей, удалённых из-за нехватки места"""
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Доля (от 0 до 1) успешных обращений к кешу.
+        """
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class BytesLRUCache:
+    """
+    Кеш двоичных данных, ограниченный суммарным размером данных.
+
+    При нехватке места удаляются записи, к которым дольше всего не было обращений.
+    Может использоваться одновременно из нескольких потоков.
+    """
+
+    __slots__ = ('_max_size', '_max_item_size', '_entries', '_size', '_hits', '_misses', '_evictions', '_lck')
+
+    def __init__(self, max_size: int, max_item_size: Optional[int] = None):
+        """
+        Args:
+            max_size:
+                максимальный суммарный размер данных в байтах
+            max_item_size:
+                максимальный размер одной записи в байтах.
+                Если ``None``, то записи ограничены только ``max_size``.
+        """
+        self._max_size = max_size
+        self._max_item_size = max_size if max_item_size is None else min(max_item_size, max_size)
+        self._entries: OrderedDict[Hashable, bytes] = OrderedDict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._lck = Lock()
+
+    def accepts(self, size: int) -> bool:
+        """
+        Проверяет, могут ли данные заданного размера быть сохранены в кеше.
+        """
+        return 0 < size <= self._max_item_size
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        Возвращает данные, сохранённые с заданным ключом или ``None`` если их нет в кеше.
+        """
+        with self._lck:
+            if (data := self._entries.get(key)) is None:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+            return data
+
+    def put(self, key: Hashable, data: bytes):
+        """
+        Сохраняет данные в кеше, вытесняя давно не использовавшиеся записи.
+
+        Данные, размер которых превышает допустимый (см. ``accepts``), не сохраняются.
+        """
+        if not self.accepts(len(data)):
+            return
+
+        with self._lck:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._size -= len(previous)
+
+            self._entries[key] = data
+            self._size += len(data)
+
+            while self._size > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+                self._evictions += 1
+
+    def discard(self, key: Hashable):
+        """
+        Удаляет запись с заданным ключом, если она есть в кеше.
+        """
+        with self._lck:
+            if (data := self._entries.pop(key, None)) is not None:
+                self._size -= len(data)
+
+    def get_stats(self) -> BytesCacheStats:
+        with self._lck:
+            return BytesCacheStats(
+                entries=len(self._entries),
+                size=self._size,
+                max_size=self._max_size,
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+            )
@@ -0,0 +1,130 @@
+from typing import Iterable, Optional
+
+
+def edit_distance(a: str, b: str, limit: Optional[int] = None) -> int:
+    """
+    Вычисляет расстояние Левенштейна между двумя строками.
+
+    Args:
+        a:
+        b:
+        limit:
+            если передан, то вычисляются только значения, которые могут оказаться не больше этого значения, и
+            вычисление прекращается как только становится понятно, что расстояние его превышает.
+            В этом случае возвращается ``limit + 1``.
+    Returns:
+        расстояние Левенштейна между строками или ``limit + 1`` если расстояние больше ``limit``
+    """
+    if len(a) < len(b):
+        a, b = b, a
+
+    if limit is None:
+        limit = len(a)
+    elif len(a) - len(b) > limit:
+        return limit + 1
+
+    over = limit + 1
+    previous = list(range(len(b) + 1))
+
+    for i, ca in enumerate(a, 1):
+        # Значения вне полосы шириной limit вокруг диагонали заведомо больше limit
+        current = [i if i <= limit else over] + [over] * len(b)
+        row_min = current[0]
+
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            value = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != b[j - 1]),
+            )
+            current[j] = value
+
+            if value < row_min:
+                row_min = value
+
+        if row_min > limit:
+            return over
+
+        previous = current
+
+    return min(previous[-1], over)
+
+
+class FuzzyWordIndex:
+    """
+    Индекс для поиска слов, отличающихся от заданного не более чем на заданное количество правок (вставок, удалений и
+    замен букв).
+
+    Для каждого слова индекс хранит все варианты, получаемые удалением до ``max_distance`` букв.
+    Если два слова отличаются не более чем на ``d`` правок, то у них есть общий вариант с не более чем ``d`` удалёнными
+    буквами, так что поиск проверяет только слова, имеющие общие варианты с искомым, и количество проверок почти не
+    зависит от количества слов в индексе.
+    """
+
+    __slots__ = ('_max_distance', '_variants')
+
+    def __init__(self, words: Iterable[str], max_distance: int):
+        """
+        Args:
+            words:
+                слова
+            max_distance:
+                максимальное количество правок, с которым будет выполняться поиск
+        """
+        self._max_distance = max_distance
+        self._variants: dict[str, set[str]] = {}
+
+        for word in words:
+            for variant in _deletion_variants(word, max_distance):
+                self._variants.setdefault(variant, set()).add(word)
+
+    @property
+    def max_distance(self) -> int:
+        return self._max_distance
+
+    def find(self, word: str, max_distance: Optional[int] = None) -> list[tuple[str, int]]:
+        """
+        Находит слова, расстояние Левенштейна от которых до заданного не превышает заданного значения.
+
+        Args:
+            word:
+                искомое слово
+            max_distance:
+                максимальное расстояние, не больше переданного при создании индекса.
+                По-умолчанию используется значение, переданное при создании индекса.
+        Returns:
+            список пар из найденного слова и расстояния до него
+        Raises:
+            ValueError - если запрошенное расстояние больше, чем расстояние, для которого построен индекс
+        """
+        if max_distance is None:
+            max_distance = self._max_distance
+        elif max_distance > self._max_distance:
+            raise ValueError(
+                f"Индекс построен для поиска на расстоянии не более {self._max_distance}, запрошено {max_distance}"
+            )
+
+        candidates: set[str] = set()
+
+        for variant in _deletion_variants(word, max_distance):
+            if (words := self._variants.get(variant)) is not None:
+                candidates.update(words)
+
+        found: list[tuple[str, int]] = []
+
+        for candidate in candidates:
+            if (distance := edit_distance(word, candidate, max_distance)) <= max_distance:
+                found.append((candidate, distance))
+
+        return found
+
+
+def _deletion_variants(word: str, max_deletions: int) -> set[str]:
+    variants = {word}
+    level = variants
+
+    for _ in range(max_deletions):
+        level = {variant[:i] + variant[i + 1:] for variant in level for i in range(len(variant))}
+        variants |= level
+
+    return variants
@@ -0,0 +1,61 @@
+import random
+import unittest
+
+from irene.utils.aho_corasick import AhoCorasickAutomaton
+
+
+def _naive_matches(patterns, symbols):
+    return sorted(
+        (start, start + len(pattern), value)
+        for start in range(len(symbols))
+        for pattern, value in patterns
+        if len(pattern) > 0 and tuple(symbols[start:start + len(pattern)]) == tuple(pattern)
+    )
+
+
+class AhoCorasickAutomatonTest(unittest.TestCase):
+    def test_phrases(self):
+        automaton = AhoCorasickAutomaton([
+            (("окей", "ирина"), 'okay'),
+            (("ирина",), 'name'),
+        ])
+
+        self.assertEqual(
+            list(automaton.iter_matches(["скажи", "окей", "ирина", "привет", "ирина"])),
+            [(1, 3, 'okay'), (2, 3, 'name'), (4, 5, 'name')]
+        )
+        self.assertEqual(list(automaton.iter_matches(["привет"])), [])
+
+    def test_find_earliest(self):
+        automaton = AhoCorasickAutomaton([
+            (("ирина",), 'short'),
+            (("ирина", "ивановна"), 'long'),
+            (("окей", "ирина"), 'okay'),
+        ])
+
+        self.assertEqual(automaton.find_earliest(["окей", "ирина", "ивановна"]), (0, 2, 'okay'))
+        # Из вхождений с одинаковым началом выбирается образец, переданный первым
+        self.assertEqual(automaton.find_earliest(["ирина", "ивановна"]), (0, 1, 'short'))
+        self.assertIsNone(automaton.find_earliest(["привет"]))
+        self.assertIsNone(automaton.find_earliest([]))
+
+    def test_same_as_naive_search(self):
+        rnd = random.Random(0)
+
+        for _ in range(300):
+            patterns = [
+                (tuple(rnd.choices('абв', k=rnd.randint(0, 4))), i)
+                for i in range(rnd.randint(1, 6))
+            ]
+            symbols = rnd.choices('абв', k=rnd.randint(0, 12))
+            automaton = AhoCorasickAutomaton(patterns)
+            expected = _naive_matches(patterns, symbols)
+
+            self.assertEqual(sorted(automaton.iter_matches(symbols)), expected)
+
+            earliest = min(expected, key=lambda m: (m[0], m[2]), default=None)
+            self.assertEqual(automaton.find_earliest(symbols), earliest)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from irene.utils.bytes_cache import BytesLRUCache
+
+
+class BytesLRUCacheTest(unittest.TestCase):
+    def test_get_put(self):
+        cache = BytesLRUCache(100)
+
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', b'data')
+        self.assertEqual(cache.get('a'), b'data')
+
+        stats = cache.get_stats()
+        self.assertEqual((stats.entries, stats.size, stats.hits, stats.misses), (1, 4, 1, 1))
+        self.assertEqual(stats.hit_rate, 0.5)
+
+    def test_evicts_least_recently_used(self):
+        cache = BytesLRUCache(10)
+
+        cache.put('a', b'aaaa')
+        cache.put('b', b'bbbb')
+        cache.get('a')
+        cache.put('c', b'cccc')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'aaaa')
+        self.assertEqual(cache.get('c'), b'cccc')
+        self.assertEqual(cache.get_stats().evictions, 1)
+        self.assertEqual(cache.get_stats().size, 8)
+
+    def test_replace(self):
+        cache = BytesLRUCache(10)
+
+        cache.put('a', b'aaaa')
+        cache.put('a', b'aa')
+
+        self.assertEqual(cache.get('a'), b'aa')
+        self.assertEqual(cache.get_stats().size, 2)
+
+    def test_item_size_limit(self):
+        cache = BytesLRUCache(100, 4)
+
+        self.assertFalse(cache.accepts(5))
+        cache.put('a', b'aaaaa')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_stats().size, 0)
+
+    def test_discard(self):
+        cache = BytesLRUCache(10)
+
+        cache.put('a', b'aaaa')
+        cache.discard('a')
+        cache.discard('b')
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get_stats().size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import random
+import unittest
+
+from irene.utils.edit_distance import edit_distance, FuzzyWordIndex
+
+
+class EditDistanceTest(unittest.TestCase):
+    def test_distance(self):
+        self.assertEqual(edit_distance("таймер", "таймер"), 0)
+        self.assertEqual(edit_distance("таймер", "тайгер"), 1)
+        self.assertEqual(edit_distance("таймер", "таймеры"), 1)
+        self.assertEqual(edit_distance("таймер", "тамер"), 1)
+        self.assertEqual(edit_distance("котёнок", "утёнок"), 2)
+        self.assertEqual(edit_distance("", "abc"), 3)
+
+    def test_limit(self):
+        self.assertEqual(edit_distance("привет", "пока", 1), 2)
+        self.assertEqual(edit_distance("таймер", "тайгер", 1), 1)
+        self.assertEqual(edit_distance("абвгд", "бвгда", 1), 2)
+        self.assertEqual(edit_distance("абвгд", "бвгда", 2), 2)
+
+    def test_limit_same_as_exact(self):
+        rnd = random.Random(0)
+
+        for _ in range(500):
+            a = ''.join(rnd.choices('абв', k=rnd.randint(0, 6)))
+            b = ''.join(rnd.choices('абв', k=rnd.randint(0, 6)))
+            exact = edit_distance(a, b)
+
+            for limit in range(4):
+                self.assertEqual(edit_distance(a, b, limit), min(exact, limit + 1), f'{a}, {b}, {limit}')
+
+
+class FuzzyWordIndexTest(unittest.TestCase):
+    def test_find(self):
+        index = FuzzyWordIndex(["таймер", "время", "дата", "погода", "привет", "тайм"], 2)
+
+        self.assertEqual(
+            sorted(index.find("тайгер", 1)),
+            [("таймер", 1)]
+        )
+        self.assertEqual(
+            sorted(index.find("таймер")),
+            [("тайм", 2), ("таймер", 0)]
+        )
+        self.assertEqual(index.find("абракадабра"), [])
+
+    def test_empty(self):
+        self.assertEqual(FuzzyWordIndex([], 2).find("таймер"), [])
+
+    def test_max_distance_exceeded(self):
+        with self.assertRaises(ValueError):
+            FuzzyWordIndex(["таймер"], 1).find("таймер", 2)
+
+    def test_same_as_linear_search(self):
+        rnd = random.Random(1)
+        words = {''.join(rnd.choices('абвгд', k=rnd.randint(1, 6))) for _ in range(300)}
+        index = FuzzyWordIndex(words, 2)
+
+        for _ in range(100):
+            query = ''.join(rnd.choices('абвгд', k=rnd.randint(1, 6)))
+
+            for max_distance in range(3):
+                self.assertEqual(
+                    sorted(index.find(query, max_distance)),
+                    sorted(
+                        (word, edit_distance(query, word))
+                        for word in words if edit_distance(query, word) <= max_distance
+                    )
+                )
+
+
+if __name__ == '__main__':
+    unittest.main()
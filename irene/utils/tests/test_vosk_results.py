@@ -0,0 +1,27 @@
+import unittest
+
+from irene.utils.vosk_results import parse_vosk_result
+
+
+class ParseVoskResultTest(unittest.TestCase):
+    def test_single_text(self):
+        self.assertEqual(parse_vosk_result({'text': "привет"}), [("привет", 1.0)])
+        self.assertEqual(parse_vosk_result({'text': ""}), [])
+
+    def test_alternatives(self):
+        result = parse_vosk_result({'alternatives': [
+            {'text': "включи свет", 'confidence': 120.0},
+            {'text': "включи свет два", 'confidence': 121.0},
+            {'text': "", 'confidence': 200.0},
+        ]})
+
+        self.assertEqual([text for text, _ in result], ["включи свет два", "включи свет"])
+        self.assertAlmostEqual(sum(confidence for _, confidence in result), 1.0)
+        self.assertGreater(result[0][1], result[1][1])
+
+    def test_no_alternatives(self):
+        self.assertEqual(parse_vosk_result({'alternatives': []}), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
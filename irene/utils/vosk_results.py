@@ -0,0 +1,40 @@
+"""
+Разбор результатов распознавания речи, возвращаемых распознавателем Vosk (``KaldiRecognizer``).
+"""
+
+import math
+from typing import Any, Mapping
+
+__all__ = ['parse_vosk_result']
+
+
+def parse_vosk_result(result: Mapping[str, Any]) -> list[tuple[str, float]]:
+    """
+    Извлекает варианты текста из результата распознавания.
+
+    Если распознавателю задано количество альтернатив (``SetMaxAlternatives``), то результат содержит список
+    ``alternatives`` с оценками правдоподобия вариантов в логарифмической шкале.
+    Оценки преобразуются в уверенность от 0 до 1 так, чтобы сумма уверенностей всех вариантов была равна 1.
+    Иначе результат содержит единственный вариант в поле ``text``.
+
+    Args:
+        result:
+            разобранный JSON, полученный от ``Result()`` или ``FinalResult()``
+    Returns:
+        список пар из непустого текста варианта и уверенности в нём, упорядоченный по убыванию уверенности.
+        Пустой список если ничего не распознано.
+    """
+    if (alternatives := result.get('alternatives')) is None:
+        text = result.get('text', '')
+        return [(text, 1.0)] if text else []
+
+    scored = [(it['text'], float(it.get('confidence', 0.0))) for it in alternatives if it.get('text')]
+
+    if len(scored) == 0:
+        return []
+
+    best = max(score for _, score in scored)
+    weights = [(text, math.exp(score - best)) for text, score in scored]
+    total = sum(weight for _, weight in weights)
+
+    return sorted(((text, weight / total) for text, weight in weights), key=lambda it: it[1], reverse=True)
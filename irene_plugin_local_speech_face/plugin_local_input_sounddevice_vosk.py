@@ -2,7 +2,7 @@ import contextlib
 import json
 from logging import getLogger
 from queue import Queue
-from typing import Any, Optional, Callable, Iterable, TypedDict
+from typing import Any, Optional, Callable, Iterable, TypedDict, Union, Sequence
 
 import sounddevice  # type: ignore
 
@@ -10,6 +10,7 @@ from irene.face.abc import LocalInput, Muteable, MuteGroup
 from irene.face.mute_group import NULL_MUTE_GROUP
 from irene.plugin_loader.abc import PluginManager
 from irene.plugin_loader.run_operation import call_all_as_wrappers
+from irene.utils.vosk_results import parse_vosk_result
 
 name = 'local_input_sounddevice_vosk'
 version = '0.1.0'
@@ -18,22 +19,27 @@ version = '0.1.0'
 class _Config(TypedDict):
     deviceId: Optional[int]
     sampleRate: Optional[int]
+    maxAlternatives: int
 
 
 config: _Config = {
     'deviceId': None,
     'sampleRate': None,
+    'maxAlternatives': 3,
 }
 
 config_comment = f"""
 Настройки локального голосового ввода через sounddevice с распознанием через vosk.
 
 Доступные параметры:
-- `deviceId`      - номер устройства ввода (микрофона) которое будет использовано для прослушивания голосовых команд.
-                    См. список устройств далее.
-                    Если `null`, то будет использоваться устройство по-умолчанию.
-- `sampleRate`    - частота дискретизации ввода.
-                    Если `null`, то будет использоваться частота по-умолчанию для выбранного устройства.
+- `deviceId`        - номер устройства ввода (микрофона) которое будет использовано для прослушивания голосовых команд.
+                      См. список устройств далее.
+                      Если `null`, то будет использоваться устройство по-умолчанию.
+- `sampleRate`      - частота дискретизации ввода.
+                      Если `null`, то будет использоваться частота по-умолчанию для выбранного устройства.
+- `maxAlternatives` - количество вариантов текста, запрашиваемых у распознавателя.
+                      Из вариантов выбирается тот, который лучше подходит к известным командам.
+                      Если `0`, то используется только наиболее вероятный вариант.
 
 Для применения любых изменений требуется перезапуск приложения.
 
@@ -80,6 +86,9 @@ class _VoskSoundDeviceInput(LocalInput, Muteable):
 
         recognizer = vosk.KaldiRecognizer(self._model, self._sample_rate)
 
+        if config['maxAlternatives'] > 0:
+            recognizer.SetMaxAlternatives(config['maxAlternatives'])
+
         self._stream = sounddevice.RawInputStream(
             self._sample_rate,
             blocksize=8000,
@@ -89,7 +98,7 @@ class _VoskSoundDeviceInput(LocalInput, Muteable):
             callback=_stream_callback,
         )
 
-        def _read_commands() -> Iterable[str]:
+        def _read_commands() -> Iterable[Union[str, Sequence[tuple[str, float]]]]:
             while True:
                 msg = queue.get()
 
@@ -98,13 +107,12 @@ class _VoskSoundDeviceInput(LocalInput, Muteable):
                 elif self._muted:
                     pass
                 elif recognizer.AcceptWaveform(msg):
-                    recognized = json.loads(recognizer.Result())
-                    text = recognized['text']
+                    hypotheses = parse_vosk_result(json.loads(recognizer.Result()))
 
-                    if len(text) > 0:
-                        _logger.debug("Распознано: %s", text)
+                    if len(hypotheses) > 0:
+                        _logger.debug("Распознано: %s", hypotheses[0][0])
 
-                        yield text
+                        yield hypotheses
 
         def _abort():
             nonlocal aborted
@@ -1,10 +1,10 @@
 from logging import getLogger
-from typing import Callable, Any, TypedDict, Optional
+from typing import Callable, Any, TypedDict, Optional, Hashable
 
 import sounddevice  # type: ignore
 import soundfile  # type: ignore
 
-from irene.brain.abc import OutputChannel, AudioOutputChannel
+from irene.brain.abc import OutputChannel, AudioOutputChannel, LOCAL_AUDIO_DEVICE
 from irene.plugin_loader.abc import PluginManager
 
 name = 'local_output_sounddevice'
@@ -52,6 +52,10 @@ _logger = getLogger(name)
 class _SoundDeviceAudioOutput(AudioOutputChannel):
     __slots__ = ()
 
+    @property
+    def output_device(self) -> Hashable:
+        return LOCAL_AUDIO_DEVICE
+
     def check(self):
         sounddevice.query_devices(config['deviceId'], 'output')
 
@@ -2,7 +2,7 @@ from logging import getLogger
 from typing import Optional, Callable, TypedDict
 
 from irene.brain.abc import OutputChannelPool, Brain
-from irene.brain.inbound_messages import PlainTextMessage
+from irene.brain.inbound_messages import PlainTextMessage, SpeechHypothesesMessage
 from irene.brain.output_pool import OutputPoolImpl
 from irene.face.abc import LocalInput, MuteGroup
 from irene.face.mute_group import NULL_MUTE_GROUP
@@ -153,7 +153,10 @@ class LocalSpeechFacePlugin(MagicPlugin):
                 self._stop = stop
 
                 for command in commands:
-                    send_message(PlainTextMessage(command, self._outputs))
+                    if isinstance(command, str):
+                        send_message(PlainTextMessage(command, self._outputs))
+                    else:
+                        send_message(SpeechHypothesesMessage(command, self._outputs))
 
     def terminate(self, *_args, **_kwargs):
         if self._stop:
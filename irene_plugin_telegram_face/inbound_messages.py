@@ -2,10 +2,19 @@ from telebot import TeleBot  # type: ignore
 from telebot.types import Message  # type: ignore
 
 from irene.brain.abc import OutputChannelPool
-from irene.brain.inbound_messages import PlainTextMessage
+from irene.brain.inbound_messages import PlainTextMessage, SpeechHypothesesMessage
+from irene.utils.metadata import MetadataMapping
 from irene_plugin_telegram_face.utils import is_direct_message
 
 
+def _message_meta(message: Message, bot: TeleBot) -> MetadataMapping:
+    return {
+        'is_direct': is_direct_message(message, bot),
+        # Каждый чат - отдельный сеанс диалога
+        'session': ('telegram', message.chat.id),
+    }
+
+
 class TelegramMessage(PlainTextMessage):
     __slots__ = ('message', 'bot')
 
@@ -19,7 +28,7 @@ class TelegramMessage(PlainTextMessage):
         super().__init__(
             text,
             outputs,
-            {'is_direct': is_direct_message(message, bot)}
+            _message_meta(message, bot),
         )
         self.message = message
         self.bot = bot
@@ -40,3 +49,25 @@ class TelegramTextMessage(TelegramMessage):
             bot,
             outputs
         )
+
+
+class TelegramVoiceMessage(SpeechHypothesesMessage):
+    """
+    Голосовое сообщение, распознанное с несколькими вариантами текста.
+    """
+    __slots__ = ('message', 'bot')
+
+    def __init__(
+            self,
+            hypotheses: list[tuple[str, float]],
+            message: Message,
+            bot: TeleBot,
+            outputs: OutputChannelPool
+    ):
+        super().__init__(
+            hypotheses,
+            outputs,
+            _message_meta(message, bot),
+        )
+        self.message = message
+        self.bot = bot
@@ -1,4 +1,5 @@
-from typing import Any, Optional, Iterable
+from hashlib import sha256
+from typing import Any, Optional, Iterable, Hashable
 
 from telebot import TeleBot  # type: ignore
 from telebot.types import Chat, Message  # type: ignore
@@ -6,6 +7,7 @@ from telebot.types import Chat, Message  # type: ignore
 from irene.brain.abc import TextOutputChannel, AudioOutputChannel
 from irene.constants.labels import pure_text_channel_labels
 from irene.utils.audio_converter import AudioConverter, ConversionError
+from irene.utils.bytes_cache import BytesLRUCache
 
 
 def _args_to_send_message(
@@ -46,6 +48,10 @@ class ChatTextChannel(TextOutputChannel):
             **_args_to_send_message(text, **kwargs),
         )
 
+    @property
+    def output_device(self) -> Hashable:
+        return 'telegram', self._chat.id
+
     @property
     def meta(self):
         return pure_text_channel_labels()
@@ -122,6 +128,10 @@ class AudioChannel(AudioOutputChannel):
         self._chat = chat
         self._converter = converter
 
+    @property
+    def output_device(self) -> Hashable:
+        return 'telegram', self._chat.id
+
     @staticmethod
     def _args_to_telebot(
             alt_text: Optional[str] = None,
@@ -136,8 +146,18 @@ class AudioChannel(AudioOutputChannel):
     def send_file(
             self,
             file_path: str,
+            *,
+            audio_data: Optional[bytes] = None,
             **kwargs
     ):
+        if audio_data is not None:
+            self._bot.send_audio(
+                self._chat.id,
+                audio_data,
+                **self._args_to_telebot(**kwargs),
+            )
+            return
+
         with open(file_path, 'rb') as file:
             self._bot.send_audio(
                 self._chat.id,
@@ -149,28 +169,57 @@ class AudioChannel(AudioOutputChannel):
 class VoiceChannel(AudioChannel):
     """
     Канал, отправляющий аудио-файл в виде голосового сообщения.
+
+    Если содержимое файла передано в опции ``audio_data`` (например, файл хранится в памяти кешем TTS), то
+    преобразованный файл может быть взят из ``converted_cache`` без обращения к файловой системе.
     """
 
-    __slots__ = ('_converter',)
+    __slots__ = ('_converter', '_converted_cache')
 
     def __init__(
             self,
             bot: TeleBot,
             chat: Chat,
             converter: AudioConverter,
+            converted_cache: Optional[BytesLRUCache] = None,
     ):
         super().__init__(bot, chat)
         self._converter: AudioConverter = converter
+        self._converted_cache = converted_cache
 
     def send_file(
             self,
             file_path: str,
+            *,
+            audio_data: Optional[bytes] = None,
             **kwargs
     ):
-        try:
-            converted = self._converter.convert(file_path, "ogg")
-        except ConversionError:
-            return super().send_file(file_path, **kwargs)
+        voice_data: Optional[bytes] = None
+        cache_key: Optional[bytes] = None
+
+        if audio_data is not None and self._converted_cache is not None:
+            cache_key = sha256(audio_data).digest()
+            voice_data = self._converted_cache.get(cache_key)
+
+        if voice_data is None:
+            try:
+                converted = self._converter.convert(file_path, "ogg")
+            except ConversionError:
+                return super().send_file(file_path, audio_data=audio_data, **kwargs)
+
+            if cache_key is not None and self._converted_cache is not None:
+                with open(converted, 'rb') as file:
+                    voice_data = file.read()
+
+                self._converted_cache.put(cache_key, voice_data)
+
+        if voice_data is not None:
+            self._bot.send_voice(
+                self._chat.id,
+                voice_data,
+                **self._args_to_telebot(**kwargs),
+            )
+            return
 
         with open(converted, 'rb') as file:
             self._bot.send_voice(
@@ -195,6 +244,10 @@ class AudioReplyChannel(AudioOutputChannel):
         self._channel = channel
         self._message = message
 
+    @property
+    def output_device(self) -> Hashable:
+        return self._channel.output_device
+
     def send_file(self, file_path: str, *, telebot_add_args: Optional[dict[str, Any]] = None, **kwargs):
         telebot_args = telebot_add_args.copy() if telebot_add_args is not None else {}
         telebot_args['reply_to_message_id'] = self._message.id
@@ -14,7 +14,8 @@ from irene.plugin_loader.abc import PluginManager
 from irene.plugin_loader.magic_plugin import MagicPlugin
 from irene.plugin_loader.run_operation import call_all_as_wrappers
 from irene.utils.audio_converter import AudioConverter
-from irene_plugin_telegram_face.inbound_messages import TelegramMessage
+from irene.utils.vosk_results import parse_vosk_result
+from irene_plugin_telegram_face.inbound_messages import TelegramVoiceMessage
 
 
 class TelegramAudioInputPlugin(MagicPlugin):
@@ -32,13 +33,18 @@ class TelegramAudioInputPlugin(MagicPlugin):
 
     Доступны следующие параметры:
     - `recognizeTextReply`  - слать сообщения с распознанным текстом из голосового сообщения
+    - `maxAlternatives`     - количество вариантов текста, запрашиваемых у распознавателя.
+                              Из вариантов выбирается тот, который лучше подходит к известным командам.
+                              Если `0`, то используется только наиболее вероятный вариант.
     """
 
     class _Config(TypedDict):
         recognizeTextReply: bool
+        maxAlternatives: int
 
     config: _Config = {
         'recognizeTextReply': False,
+        'maxAlternatives': 3,
     }
 
     _logger = getLogger(name)
@@ -64,14 +70,14 @@ class TelegramAudioInputPlugin(MagicPlugin):
             message: Message,
             pm: PluginManager,
             bot: TeleBot,
-    ) -> Optional[str]:
+    ) -> list[tuple[str, float]]:
         model = self._get_model(pm)
 
         if model is None:
             self._logger.warning(
                 "Голосовое сообщение проигнорировано т.к. не удалось загрузить vosk-модель для распознания голоса."
             )
-            return None
+            return []
 
         tele_file = bot.get_file(message.voice.file_id)
 
@@ -80,11 +86,12 @@ class TelegramAudioInputPlugin(MagicPlugin):
         ) as sf:
             recognizer = KaldiRecognizer(model, sf.samplerate)
 
-            recognizer.AcceptWaveform(sf.buffer_read(dtype='int16')[:])
+            if self.config['maxAlternatives'] > 0:
+                recognizer.SetMaxAlternatives(self.config['maxAlternatives'])
 
-        result = json.loads(recognizer.Result())
+            recognizer.AcceptWaveform(sf.buffer_read(dtype='int16')[:])
 
-        return result['text']
+        return parse_vosk_result(json.loads(recognizer.Result()))
 
     def telegram_add_bot_handlers(
             self,
@@ -96,11 +103,13 @@ class TelegramAudioInputPlugin(MagicPlugin):
     ):
         @bot.message_handler(content_types=['voice'])
         def handle_voice_message(message: Message):
-            text = self._recognize_voice(message, pm, bot)
+            hypotheses = self._recognize_voice(message, pm, bot)
 
-            if text is None:
+            if len(hypotheses) == 0:
                 return
 
+            text = hypotheses[0][0]
+
             self._logger.info("Распознано голосовое сообщение \"%s\"", text)
 
             if self.config['recognizeTextReply']:
@@ -120,5 +129,5 @@ class TelegramAudioInputPlugin(MagicPlugin):
             )
 
             send_message(
-                TelegramMessage(text, message, bot, OutputPoolImpl(outputs))
+                TelegramVoiceMessage(hypotheses, message, bot, OutputPoolImpl(outputs))
             )
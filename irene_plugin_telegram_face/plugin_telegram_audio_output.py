@@ -10,6 +10,7 @@ from irene.plugin_loader.abc import PluginManager
 from irene.plugin_loader.magic_plugin import MagicPlugin, step_name, before
 from irene.plugin_loader.run_operation import call_all_as_wrappers
 from irene.utils.audio_converter import AudioConverter
+from irene.utils.bytes_cache import BytesLRUCache
 from irene_plugin_telegram_face.outputs import AudioChannel, AudioReplyChannel, VoiceChannel
 
 
@@ -18,7 +19,7 @@ class TelegramAudioOutputPlugin(MagicPlugin):
     Обеспечивает отправку аудио-файлов и текста, озвученного через TTS в Telegram.
     """
     name = 'telegram_output_audio'
-    version = '0.2.0'
+    version = '0.3.0'
 
     _logger = getLogger(name)
 
@@ -32,6 +33,12 @@ class TelegramAudioOutputPlugin(MagicPlugin):
                                 Это может не получиться если не доступен конвертер аудио-файлов или файлы не удаётся
                                 преобразовывать в формат OGG.
                                 Когда звуки не отправляются как голосовые сообщения, они отправляются как аудио-записи.
+    - `voiceCacheSize`        - максимальный суммарный размер (в мибибайтах) преобразованных в OGG файлов, которые
+                                хранятся в памяти для повторной отправки.
+                                В памяти хранятся только преобразованные варианты файлов, содержимое которых хранит в
+                                памяти кеш TTS.
+                                0 отключает хранение файлов в памяти.
+                                Изменения применяются после перезапуска.
     - `voiceProfileSelector`  - селектор, определяющий, какие голоса будут использоваться при озвучении текстовых
                                 сообщений.
     """
@@ -40,15 +47,27 @@ class TelegramAudioOutputPlugin(MagicPlugin):
         replyInPrivate: bool
         replyInGroups: bool
         trySendVoice: bool
+        voiceCacheSize: float
         voiceProfileSelector: dict[str, Any]
 
     config: _Config = {
         'replyInPrivate': False,
         'replyInGroups': True,
         'trySendVoice': True,
+        'voiceCacheSize': 8,
         'voiceProfileSelector': {},
     }
 
+    def __init__(self) -> None:
+        super().__init__()
+        self._voice_cache: Optional[BytesLRUCache] = None
+
+    def _get_voice_cache(self) -> Optional[BytesLRUCache]:
+        if self._voice_cache is None and self.config['voiceCacheSize'] > 0:
+            self._voice_cache = BytesLRUCache(int(self.config['voiceCacheSize'] * 1024 * 1024))
+
+        return self._voice_cache
+
     @staticmethod
     def _get_audio_converter(pm: PluginManager) -> Optional[AudioConverter]:
         converter: Optional[AudioConverter] = call_all_as_wrappers(
@@ -78,7 +97,7 @@ class TelegramAudioOutputPlugin(MagicPlugin):
         if converter is None:
             audio_channel: AudioOutputChannel = AudioChannel(bot, message.chat)
         else:
-            audio_channel = VoiceChannel(bot, message.chat, converter)
+            audio_channel = VoiceChannel(bot, message.chat, converter, self._get_voice_cache())
 
         send_reply = self.config['replyInPrivate'] if message.chat.type == 'private' else self.config['replyInGroups']
 
@@ -1,13 +1,14 @@
+import mimetypes
 import uuid
 from datetime import datetime, timedelta
 from hashlib import md5
 from logging import getLogger
 from os.path import splitext, normpath
 from threading import Event
-from typing import Callable, Optional
+from typing import Callable, Optional, Hashable
 
 from fastapi import APIRouter, HTTPException
-from starlette.responses import FileResponse
+from starlette.responses import FileResponse, Response
 
 from irene.brain.abc import AudioOutputChannel
 from irene.face.abc import MuteGroup
@@ -79,24 +80,39 @@ class PlaybackEndSyncer:
 
 
 class FileBindings:
-    __slots__ = ('_path_prefix', '_file_bindings')
+    __slots__ = ('_path_prefix', '_file_bindings', '_file_data')
 
     def __init__(self, path_prefix: str):
         self._path_prefix = path_prefix
         self._file_bindings: dict[str, str] = {}
+        self._file_data: dict[str, bytes] = {}
 
-    def add(self, file_path: str) -> str:
+    def add(self, file_path: str, data: Optional[bytes] = None) -> str:
+        """
+        Args:
+            file_path:
+                путь к файлу
+            data:
+                содержимое файла, если оно уже загружено в память - тогда файл будет отдаваться клиенту без чтения с
+                диска
+        Returns:
+            имя, по которому файл доступен клиенту
+        """
         file_path = normpath(file_path)
         name, ext = splitext(file_path)
         bind_name = md5(name.encode()).hexdigest() + ext
         self._file_bindings[bind_name] = file_path
 
+        if data is not None:
+            self._file_data[bind_name] = data
+
         return bind_name
 
     def remove(self, bound_name: str):
         # FIXME: если несколько каналов вывода (с отдельными мозгами) попытаются почти одновременно воспроизводить один
         #   файл, то что-нибудь может пойти не так.
         del self._file_bindings[bound_name]
+        self._file_data.pop(bound_name, None)
 
     def get_full_path(self, bound_name: str) -> str:
         return self._path_prefix + '/' + bound_name
@@ -104,6 +120,9 @@ class FileBindings:
     def get_local_path(self, bound_name: str) -> str:
         return self._file_bindings[bound_name]
 
+    def get_data(self, bound_name: str) -> Optional[bytes]:
+        return self._file_data.get(bound_name)
+
 
 class WebAudioOutImpl(AudioOutputChannel, ProtocolHandler):
     _logger = getLogger('web-audio-output')
@@ -147,9 +166,16 @@ class WebAudioOutImpl(AudioOutputChannel, ProtocolHandler):
     def start(self):
         pass
 
-    def send_file(self, file_path: str, *, alt_text: Optional[str] = None, **kwargs):
+    def send_file(
+            self,
+            file_path: str,
+            *,
+            alt_text: Optional[str] = None,
+            audio_data: Optional[bytes] = None,
+            **kwargs
+    ):
         playback_id = str(uuid.uuid4())
-        binding_name = self._file_bindings.add(file_path)
+        binding_name = self._file_bindings.add(file_path, audio_data)
         syncer = PlaybackEndSyncer(2.0)
         try:
             self._syncers[playback_id] = syncer
@@ -169,6 +195,10 @@ class WebAudioOutImpl(AudioOutputChannel, ProtocolHandler):
             del self._syncers[playback_id]
             self._file_bindings.remove(binding_name)
 
+    @property
+    def output_device(self) -> Hashable:
+        return self._connection
+
     def terminate(self):
         pass
 
@@ -194,6 +224,9 @@ class WebAudioOutputPlugin(MagicPlugin):
             except KeyError:
                 raise HTTPException(404)
 
+            if (data := self._file_bindings.get_data(file_name)) is not None:
+                return Response(data, media_type=mimetypes.guess_type(local_path)[0])
+
             return FileResponse(
                 local_path,
             )
@@ -7,7 +7,7 @@ from argparse import ArgumentParser
 from asyncio import AbstractEventLoop
 from logging import getLogger
 from threading import Lock
-from typing import Callable, Optional, Any
+from typing import Callable, Optional, Any, TypedDict
 
 import vosk  # type: ignore
 from fastapi import APIRouter, Query, HTTPException
@@ -15,13 +15,15 @@ from starlette.websockets import WebSocket, WebSocketDisconnect
 
 from irene.brain.abc import InboundMessage, VAContext, VAApi
 from irene.brain.contexts import BaseContextWrapper
-from irene.brain.inbound_messages import PlainTextMessage
+from irene.brain.inbound_messages import SpeechHypothesesMessage
 from irene.face.abc import MuteGroup, Muteable
 from irene.face.mute_group import NULL_MUTE_GROUP
 from irene.plugin_loader.abc import PluginManager
+from irene.plugin_loader.executors import get_executor, EXECUTOR_STT, EXECUTOR_IO
 from irene.plugin_loader.file_patterns import first_substitution
 from irene.plugin_loader.magic_plugin import operation, after, before, step_name
 from irene.plugin_loader.run_operation import call_all_as_wrappers
+from irene.utils.vosk_results import parse_vosk_result
 from irene_plugin_web_face.abc import Connection, ProtocolHandler
 from irene_plugin_web_face.protocol import MT_IN_SERVER_SIDE_STT_RECOGNIZED, MT_IN_SERVER_SIDE_STT_PROCESSED, \
     MT_IN_SERVER_SIDE_STT_READY, PROTOCOL_IN_SERVER_SIDE_STT, IN_SERVER_SIDE_STT_DEFAULT_SAMPLE_RATE
@@ -29,14 +31,32 @@ from irene_plugin_web_face.protocol import MT_IN_SERVER_SIDE_STT_RECOGNIZED, MT_
 name = 'plugin_in_stt_serverside'
 version = '0.1.0'
 
+
+class _Config(TypedDict):
+    maxAlternatives: int
+
+
+config: _Config = {
+    'maxAlternatives': 3,
+}
+
+config_comment = """
+Настройки распознавания речи на сервере.
+
+Доступные параметры:
+- `maxAlternatives`   - количество вариантов текста, запрашиваемых у распознавателя.
+                        Из вариантов выбирается тот, который лучше подходит к известным командам.
+                        Если `0`, то используется только наиболее вероятный вариант.
+"""
+
 _logger = getLogger(name)
 
 
-class _ServerSttMessage(PlainTextMessage):
+class _ServerSttMessage(SpeechHypothesesMessage):
     __slots__ = ('_connection', '_processed')
 
-    def __init__(self, connection: Connection, text: str):
-        super().__init__(text, connection.get_associated_outputs())
+    def __init__(self, connection: Connection, hypotheses: list[tuple[str, float]]):
+        super().__init__(hypotheses, connection.get_associated_outputs())
 
         self._connection = connection
         self._processed = False
@@ -139,6 +159,9 @@ class _RecognizerWorker(Muteable):
         self._recognizer = vosk.KaldiRecognizer(model, sample_rate)
         self._need_stop = False
 
+        if config['maxAlternatives'] > 0:
+            self._recognizer.SetMaxAlternatives(config['maxAlternatives'])
+
         self._mute_group = mute_group
         self._muted = False
 
@@ -152,7 +175,7 @@ class _RecognizerWorker(Muteable):
         self._muted = True
         self._event_loop.call_soon_threadsafe(
             self._event_loop.run_in_executor,
-            None, self._cmd_reset_recognizer
+            get_executor(EXECUTOR_STT), self._cmd_reset_recognizer
         )
 
     def unmute(self):
@@ -177,17 +200,17 @@ class _RecognizerWorker(Muteable):
             if not self._recognizer.AcceptWaveform(chunk):
                 return
 
-            recognized = json.loads(self._recognizer.Result())
-            text = recognized['text']
+            hypotheses = parse_vosk_result(json.loads(self._recognizer.Result()))
 
-        if len(text) > 0 and not self._muted:
+        if len(hypotheses) > 0 and not self._muted:
+            text = hypotheses[0][0]
             _logger.debug("Распознано: %s", text)
 
             self._connection.send_message(
                 MT_IN_SERVER_SIDE_STT_RECOGNIZED, dict(text=text))
 
             self._connection.receive_inbound_message(
-                _ServerSttMessage(self._connection, text)
+                _ServerSttMessage(self._connection, hypotheses)
             )
 
     def _cmd_stop(self) -> None:
@@ -221,7 +244,7 @@ class _RecognizerWorker(Muteable):
         remove_from_mute_group = self._mute_group.add_item(self)
 
         await self._event_loop.run_in_executor(
-            None,
+            get_executor(EXECUTOR_IO),
             self._open_dump_file
         )
 
@@ -230,7 +253,7 @@ class _RecognizerWorker(Muteable):
                 chunk = await ws.receive_bytes()
 
                 await self._event_loop.run_in_executor(
-                    None,
+                    get_executor(EXECUTOR_STT),
                     self._cmd_process_data_chunk,
                     chunk
                 )
@@ -243,7 +266,7 @@ class _RecognizerWorker(Muteable):
                 remove_from_mute_group()
 
             await self._event_loop.run_in_executor(
-                None,
+                get_executor(EXECUTOR_IO),
                 self._close_dump_file
             )
 
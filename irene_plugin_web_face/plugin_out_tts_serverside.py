@@ -10,19 +10,30 @@ from irene_plugin_web_face.abc import Connection, ProtocolHandler
 from irene_plugin_web_face.protocol import PROTOCOL_OUT_SERVER_SIDE_TTS
 
 name = 'plugin_out_tts_serverside'
-version = '0.3.0'
+version = '0.4.0'
 
 _logger = getLogger(name)
 
 
 class _Config(TypedDict):
     profile_selector: dict[str, Any]
+    streaming: bool
 
 
 config: _Config = {
     'profile_selector': {},
+    'streaming': True,
 }
 
+config_comment = """
+Настройки озвучения ответов на сервере для веб-клиентов.
+
+Параметры:
+- `profile_selector`  - селектор, определяющий, какие голосовые профили будут использоваться.
+- `streaming`         - если `true`, то длинный текст синтезируется по предложениям, и клиент начинает воспроизводить
+                        речь сразу после синтеза первого предложения.
+"""
+
 
 class _NonFatalError(Exception):
     pass
@@ -64,6 +75,7 @@ class _ServersideTTSOutput(ProtocolHandler):
                     FilePlaybackTTS(
                         tts,
                         audio_output,
+                        streaming=config['streaming'],
                     )
                 )
             )
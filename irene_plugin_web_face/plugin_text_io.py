@@ -1,5 +1,5 @@
 from functools import partial
-from typing import Callable, Optional, TypedDict, Any
+from typing import Callable, Optional, TypedDict, Any, Hashable
 
 from irene.brain.abc import TextOutputChannel
 from irene.brain.inbound_messages import PlainTextMessage
@@ -40,6 +40,10 @@ class _TextOutputImpl(TextOutputChannel, ProtocolHandler):
     def terminate(self):
         pass
 
+    @property
+    def output_device(self) -> Hashable:
+        return self._connection
+
     @property
     def meta(self) -> MetadataMapping:
         return config['output_metadata']
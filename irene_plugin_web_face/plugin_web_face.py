@@ -10,6 +10,7 @@ from irene.brain.output_pool import OutputPoolImpl
 from irene.face.abc import MuteGroup
 from irene.face.mute_group import NULL_MUTE_GROUP
 from irene.plugin_loader.abc import PluginManager
+from irene.plugin_loader.executors import get_executor, EXECUTOR_BRAIN, EXECUTOR_IO
 from irene.plugin_loader.magic_plugin import MagicPlugin
 from irene.plugin_loader.run_operation import call_all_as_wrappers
 from irene_plugin_web_face.abc import Connection, ProtocolHandler
@@ -45,7 +46,7 @@ class _ConnectionImpl(Connection):
         mp(im)
 
     def receive_inbound_message(self, im: InboundMessage):
-        self._event_loop.run_in_executor(None, self._process_inbound_message, im)
+        self._event_loop.run_in_executor(get_executor(EXECUTOR_BRAIN), self._process_inbound_message, im)
 
     def register_message_type(self, mt: str, handler: Callable[[dict], None]):
         if mt in self._message_handlers:
@@ -74,7 +75,7 @@ class _ConnectionImpl(Connection):
                 f"Получено сообщение неизвестного типа: '{mt}'")
             return
 
-        self._event_loop.run_in_executor(None, handler, msg)
+        self._event_loop.run_in_executor(get_executor(EXECUTOR_IO), handler, msg)
 
     def negotiate_protocols(self, pm: PluginManager, msg: Any):
         if msg.get('type', None) != MT_NEGOTIATE_REQUEST:
@@ -104,8 +105,7 @@ class _ConnectionImpl(Connection):
                     negotiated.append(variant)
                     return
 
-                proto = call_all_as_wrappers(
-                    pm.get_operation_sequence('init_client_protocol'),
+                proto = pm.get_wrapper_chain('init_client_protocol')(
                     None,
                     variant,
                     self,
@@ -180,7 +180,7 @@ class WebFacePlugin(MagicPlugin):
 
             try:
                 await event_loop.run_in_executor(
-                    None,
+                    get_executor(EXECUTOR_IO),
                     connection.negotiate_protocols,
                     pm, await ws.receive_json(),
                 )
@@ -190,10 +190,11 @@ class WebFacePlugin(MagicPlugin):
                     connection.client_address,
                 )
                 await ws.close(reason=str(e))
-                await event_loop.run_in_executor(None, connection.terminate)
+                await event_loop.run_in_executor(get_executor(EXECUTOR_IO), connection.terminate)
                 return
 
-            with brain.send_messages(connection.get_associated_outputs()) as send_message:
+            # Каждое соединение - отдельный сеанс диалога
+            with brain.send_messages(connection.get_associated_outputs(), session=connection) as send_message:
                 try:
                     connection.set_message_processor(send_message)
 
@@ -208,4 +209,5 @@ class WebFacePlugin(MagicPlugin):
                         f"Ошибка при обработке сообщений от удалённого клиента")
                     await ws.close(4500, reason=str(e))
                 finally:
-                    await event_loop.run_in_executor(None, connection.terminate)
+                    await event_loop.run_in_executor(get_executor(EXECUTOR_IO), connection.terminate)
+                    brain.close_session(connection)
@@ -0,0 +1,159 @@
+"""
+Сравнение производительности поиска команд в дереве команд (``VACommandTree``).
+
+Сравнивает эталонный перебор (``_CommandTreeNode.get_matches``) с поиском, используемым ``VACommandTree.get_command``,
+а также поиск похожих слов среди дочерних узлов корня через индекс и линейным перебором.
+
+Запуск из корня репозитория:
+
+    python -m scripts.benchmarks.command_tree
+"""
+
+import random
+from timeit import timeit
+
+from irene.brain.command_tree import VACommandTree, FuzzyMatchingOptions, _find_best_matches
+from irene.utils.edit_distance import edit_distance
+
+_LETTERS = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+# Случайные "слова" вместо слов вида "слово123", которые почти все отличаются друг от друга на одну-две буквы
+_VOCABULARY = sorted({
+    ''.join(random.Random(i).choices(_LETTERS, k=random.Random(-i).randint(3, 9)))
+    for i in range(400)
+})
+
+
+def build_tree(rnd: random.Random, groups: int = 300) -> tuple[VACommandTree[str], list[list[str]]]:
+    """
+    Строит дерево из нескольких тысяч вариантов команд.
+
+    Returns:
+        дерево и список фраз, соответствующих командам из дерева
+    """
+    tree: VACommandTree[str] = VACommandTree()
+    phrases: list[list[str]] = []
+
+    for group in range(groups):
+        verbs = '|'.join(rnd.sample(_VOCABULARY, 3))
+        objects = '|'.join(rnd.sample(_VOCABULARY, 2))
+        first, second, third, fourth = rnd.sample(_VOCABULARY, 4)
+        tree.add_commands(
+            {
+                verbs: {
+                    f'команда{group} {objects}': {
+                        f'{first}|{second}': f'cmd{group}.0',
+                        f'{third}|{fourth}': f'cmd{group}.1',
+                    },
+                },
+            },
+            lambda it: it,
+        )
+        phrases.append([verbs.split('|')[0], f'команда{group}', objects.split('|')[0], first])
+
+    return tree, phrases
+
+
+def make_query(rnd: random.Random, phrases: list[list[str]], length: int) -> list[str]:
+    """
+    Создаёт запрос, похожий на длинную расшифровку речи: слова нескольких команд, перемешанные с посторонними словами.
+    """
+    query: list[str] = []
+
+    while len(query) < length:
+        if rnd.random() < 0.5:
+            query.extend(rnd.choice(phrases)[:rnd.randint(1, 4)])
+        else:
+            query.append(rnd.choice(_VOCABULARY))
+
+    return query[:length]
+
+
+def misspell(rnd: random.Random, word: str) -> str:
+    """
+    Заменяет одну случайную букву слова.
+    """
+    position = rnd.randrange(len(word))
+    return word[:position] + rnd.choice(_LETTERS) + word[position + 1:]
+
+
+def _reference_get_matches(tree: VACommandTree, words: list[str], fuzzy=None):
+    return sorted(tree._root.get_matches(words, fuzzy), key=lambda m: m.weight, reverse=True)
+
+
+def main():
+    rnd = random.Random(0)
+    tree, phrases = build_tree(rnd)
+
+    for length in (3, 6, 10, 15, 20):
+        queries = [make_query(rnd, phrases, length) for _ in range(20)]
+        number = 5
+
+        reference_time = timeit(lambda: [_reference_get_matches(tree, q) for q in queries], number=number)
+        dp_time = timeit(lambda: [_find_best_matches(tree._root, q) for q in queries], number=number)
+
+        per_query = number * len(queries)
+        print(
+            f'{length:>3} слов: перебор {reference_time / per_query * 1e6:10.1f} мкс, '
+            f'ДП {dp_time / per_query * 1e6:10.1f} мкс, '
+            f'ускорение x{reference_time / dp_time:.1f}'
+        )
+
+    # Худший случай для перебора: повторяющиеся слова, совпадающие с длинными командами множеством способов
+    repeating: VACommandTree[str] = VACommandTree()
+    repeating.add_commands({' '.join(['да'] * depth): f'да{depth}' for depth in range(1, 13)}, lambda it: it)
+
+    for length in (6, 12, 24):
+        query = ['да'] * length
+        number = 10
+
+        reference_time = timeit(lambda: _reference_get_matches(repeating, query), number=number)
+        dp_time = timeit(lambda: _find_best_matches(repeating._root, query), number=number)
+
+        print(
+            f'{length:>3} повторов: перебор {reference_time / number * 1e6:10.1f} мкс, '
+            f'ДП {dp_time / number * 1e6:10.1f} мкс, '
+            f'ускорение x{reference_time / dp_time:.1f}'
+        )
+
+    # Нечёткий поиск: каждое слово запроса может содержать ошибку
+    fuzzy = FuzzyMatchingOptions()
+
+    for length in (3, 6, 10):
+        queries = [
+            [misspell(rnd, word) if rnd.random() < 0.3 else word for word in make_query(rnd, phrases, length)]
+            for _ in range(20)
+        ]
+        number = 5
+
+        exact_time = timeit(lambda: [_find_best_matches(tree._root, q) for q in queries], number=number)
+        reference_time = timeit(lambda: [_reference_get_matches(tree, q, fuzzy) for q in queries], number=number)
+        dp_time = timeit(lambda: [_find_best_matches(tree._root, q, fuzzy=fuzzy) for q in queries], number=number)
+
+        per_query = number * len(queries)
+        print(
+            f'{length:>3} слов с ошибками: точный поиск {exact_time / per_query * 1e6:10.1f} мкс, '
+            f'нечёткий перебор {reference_time / per_query * 1e6:10.1f} мкс, '
+            f'нечёткий ДП {dp_time / per_query * 1e6:10.1f} мкс'
+        )
+
+    # Поиск похожих слов среди дочерних узлов корня
+    root = tree._root
+    words = [misspell(rnd, word) for word in rnd.choices(list(root._children.keys()), k=200)]
+    root.find_similar_children(words[0], 1)  # построение индекса
+    number = 5
+
+    index_time = timeit(lambda: [root.find_similar_children(word, 1) for word in words], number=number)
+    linear_time = timeit(
+        lambda: [[w for w in root._children if 0 < edit_distance(word, w, 1) <= 1] for word in words],
+        number=number
+    )
+
+    print(
+        f'поиск похожих среди {len(root._children)} дочерних узлов: индекс {index_time / number / len(words) * 1e6:.1f} '
+        f'мкс, перебор {linear_time / number / len(words) * 1e6:.1f} мкс'
+    )
+
+
+if __name__ == '__main__':
+    main()
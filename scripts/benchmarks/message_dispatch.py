@@ -0,0 +1,112 @@
+"""
+Измерение времени и количества выделений памяти при обработке одного входящего сообщения корневым контекстом.
+
+Сообщение проходит тот же путь, что и в приложении: ``CommandErrorInterceptionContext`` -> ``TriggerPhraseContext`` ->
+``CommandTreeContext`` -> ``FunctionContext``, обработчик команды ничего не выводит.
+
+Отдельно измеряется вызов ``FunctionContext`` без явно переданного ``ApiExtProvider`` (так создаются контексты для
+обработчиков команд плагинов).
+
+Запуск из корня репозитория:
+
+    python -m scripts.benchmarks.message_dispatch
+"""
+
+import tracemalloc
+from timeit import timeit
+
+from irene.brain.abc import VAApi, OutputChannelPool, VAApiExt
+from irene.brain.contexts import construct_context, TriggerPhraseContext, CommandErrorInterceptionContext, \
+    FunctionContext
+from irene.brain.inbound_messages import PlainTextMessage
+from irene.brain.output_pool import EMPTY_OUTPUT_POOL
+
+
+class _StubApi(VAApi):
+    def get_outputs(self) -> OutputChannelPool:
+        return EMPTY_OUTPUT_POOL
+
+    def submit_active_interaction(self, *args, **kwargs):
+        ...
+
+
+def _handler(va: VAApiExt, text: str):
+    ...
+
+
+def build_root_context():
+    commands = {
+        f"команда{i}": {
+            "включи|выключи": _handler,
+            "который час": _handler,
+        }
+        for i in range(100)
+    }
+    commands["который час"] = _handler
+
+    return CommandErrorInterceptionContext(
+        TriggerPhraseContext(
+            [["ирина"], ["ирины"], ["ирину"]],
+            construct_context(commands),
+        ),
+        ["ошибка"],
+    )
+
+
+def measure_peak_memory(fn, number: int = 1000) -> float:
+    """
+    Возвращает средний объём памяти (в байтах), временно выделяемой при вызове функции сверх уже выделенной.
+
+    Python не предоставляет счётчика всех выделений памяти, но объекты, создаваемые при обработке сообщения, живут до
+    конца обработки, так что пиковый объём памяти во время вызова отражает количество и размер созданных объектов.
+    """
+    fn()
+    tracemalloc.start()
+
+    try:
+        total = 0
+
+        for _ in range(number):
+            current, _peak = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            _current, peak = tracemalloc.get_traced_memory()
+            total += peak - current
+    finally:
+        tracemalloc.stop()
+
+    return total / number
+
+
+def main():
+    va = _StubApi()
+    root = build_root_context()
+    messages = [
+        PlainTextMessage("Ирина, который час?", EMPTY_OUTPUT_POOL),
+        PlainTextMessage("скажи-ка ирина команда42 включи", EMPTY_OUTPUT_POOL),
+        PlainTextMessage("ирина команда7 который час пожалуйста", EMPTY_OUTPUT_POOL),
+    ]
+
+    def dispatch_all():
+        for message in messages:
+            root.handle_command(va, message)
+
+    number = 20000
+    elapsed = timeit(dispatch_all, number=number)
+    print(f'время обработки сообщения: {elapsed / number / len(messages) * 1e6:.2f} мкс')
+
+    peak = sum(measure_peak_memory(lambda: root.handle_command(va, message)) for message in messages)
+    print(f'временно выделяемая память: {peak / len(messages):.0f} байт на сообщение')
+
+    fn_ctx = FunctionContext(_handler, ext_api_provider=None, context_constructor=construct_context)
+    fn_message = messages[0]
+
+    elapsed = timeit(lambda: fn_ctx.handle_command(va, fn_message), number=number)
+    print(f'время вызова обработчика: {elapsed / number * 1e6:.2f} мкс')
+
+    peak = measure_peak_memory(lambda: fn_ctx.handle_command(va, fn_message))
+    print(f'временно выделяемая память при вызове обработчика: {peak:.0f} байт')
+
+
+if __name__ == '__main__':
+    main()
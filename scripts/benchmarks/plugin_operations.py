@@ -0,0 +1,96 @@
+"""
+Измерение накладных расходов на получение последовательностей шагов операций и выполнение шагов как обёрток,
+выполняемое при обработке каждого входящего сообщения (``construct_context``, ``telegram_add_message_reply_channels`` и
+т.п.), при большом количестве загруженных плагинов.
+
+Запуск из корня репозитория:
+
+    python -m scripts.benchmarks.plugin_operations
+"""
+
+from timeit import timeit
+from typing import Iterable
+
+from irene.plugin_loader.abc import Plugin, OperationStep
+from irene.plugin_loader.plugin_manager import PluginManagerImpl
+from irene.plugin_loader.run_operation import call_all_as_wrappers
+
+_PLUGINS_COUNT = 60
+
+# Операции, выполняемые при обработке одного сообщения
+_MESSAGE_OPERATIONS = (
+    'construct_context',
+    'telegram_add_message_reply_channels',
+    'get_file_writing_tts_engines',
+    'get_vosk_model',
+)
+
+# Прочие операции, шаги которых есть у плагинов
+_OTHER_OPERATIONS = tuple(f'operation{i}' for i in range(30))
+
+
+def _wrapper(nxt, prev, *args, **kwargs):
+    return nxt(prev, *args, **kwargs)
+
+
+class _SyntheticPlugin(Plugin):
+    def __init__(self, index: int):
+        self.name = f'plugin{index}'
+        self.version = '0.0.0'
+        self._steps = {
+            op_name: (
+                OperationStep(
+                    _wrapper,
+                    f'{self.name}.{op_name}',
+                    self,
+                    (f'plugin{index - 1}.{op_name}',) if index > 0 and index % 3 == 0 else (),
+                ),
+            )
+            for op_index, op_name in enumerate((*_MESSAGE_OPERATIONS, *_OTHER_OPERATIONS))
+            if (index + op_index) % 4 != 0
+        }
+
+    def get_operation_steps(self, op_name: str) -> Iterable[OperationStep]:
+        return self._steps.get(op_name, ())
+
+
+def main():
+    pm = PluginManagerImpl([_SyntheticPlugin(i) for i in range(_PLUGINS_COUNT)])
+
+    def handle_message():
+        for op_name in _MESSAGE_OPERATIONS:
+            call_all_as_wrappers(pm.get_operation_sequence(op_name), None)
+
+    def handle_message_uncached():
+        pm.invalidate_operation_cache()
+        handle_message()
+
+    def handle_message_compiled():
+        for op_name in _MESSAGE_OPERATIONS:
+            pm.get_wrapper_chain(op_name)(None)
+
+    number = 2000
+
+    for title, fn in (
+            ("без кеша", handle_message_uncached),
+            ("с кешем", handle_message),
+            ("с кешем и готовыми цепочками обёрток", handle_message_compiled),
+    ):
+        elapsed = timeit(fn, number=number)
+        print(f'{title}: {elapsed / number * 1e6:.1f} мкс на сообщение')
+
+    print(pm.cache_info())
+
+    steps = pm.get_operation_sequence('construct_context')
+    chain = pm.get_wrapper_chain('construct_context')
+
+    for title, fn in (
+            ("call_all_as_wrappers", lambda: call_all_as_wrappers(steps, None)),
+            ("готовая цепочка", lambda: chain(None)),
+    ):
+        elapsed = timeit(fn, number=number * 10)
+        print(f'{title}, {len(steps)} шагов: {elapsed / number / 10 * 1e6:.2f} мкс на вызов')
+
+
+if __name__ == '__main__':
+    main()